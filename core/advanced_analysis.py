@@ -8,20 +8,49 @@ Advanced Analysis Module - Competitive analysis and market insights
 - 评论关键词云 / Review keyword cloud
 - 品牌集中度分析 / Brand concentration analysis
 - 市场趋势分析 / Market trend analysis
+- 历史数据分析（数据湖，分块聚合） / Historical analysis over the data lake (chunked aggregates)
+- 基于每日预聚合的趋势分析 / Trend analysis over materialized daily aggregates
+- 跨平台比价（稀疏价格立方体） / Cross-platform price comparison on a sparse price cube
+- 并行综合报告，图表在后台渲染并按内容缓存 / Parallel comprehensive reports with
+  charts rendered in the background and cached by content
+
+所有方法都接受商品列表或 ProductFrame；传入同一个 ProductFrame 时，
+数值解析和中间结果只计算一次。
+Every method accepts a product list or a ProductFrame; passing the same
+ProductFrame parses values and computes intermediate results once.
 """
 
 import pandas as pd
 import numpy as np
+import matplotlib
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+import hashlib
+import importlib.util
 import json
+import multiprocessing
 import os
-from typing import List, Dict, Any, Optional, Tuple
+import threading
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Dict, Any, Optional, Sequence, Tuple, Union
 from datetime import datetime
 from pathlib import Path
 import logging
 
+from core.processing.normalization import parse_price, parse_rating, parse_count
+from core.processing.product_frame import ProductFrame
+from core.processing.data_lake import DataLake, get_data_lake
+from core.processing.keywords import POOL_START_METHOD, KeywordCorpus, KeywordEngine
+from core.processing.price_cube import PriceCube
+from core.processing.anomaly_detector import BATCH_METHODS, detect_anomalies_batch
+from core.processing.trend_aggregates import TrendAggregates, get_trend_aggregates
+
 logger = logging.getLogger(__name__)
 
+Products = Union[List[Dict[str, Any]], ProductFrame]
+
 # 设置中文字体支持
 try:
     plt.rcParams['font.sans-serif'] = ['SimHei', 'DejaVu Sans', 'Arial Unicode MS']
@@ -29,6 +58,145 @@ try:
 except:
     logger.warning("Chinese font not available, using default font")
 
+HAS_WORDCLOUD = importlib.util.find_spec('wordcloud') is not None
+
+# 综合报告中的独立分析 / Independent analyses in the comprehensive report
+REPORT_ANALYSES = ('competitor_matrix', 'price_distribution', 'top_keywords',
+                   'brand_concentration', 'market_trends')
+# 每个分析需要的列（只把这些列发送到工作进程） / Columns each analysis needs in a worker
+REPORT_COLUMNS = {
+    'competitor_matrix': ('brand', 'price_numeric', 'rating_numeric', 'review_count_numeric'),
+    'price_distribution': ('price_numeric',),
+    'top_keywords': ('title',),
+    'brand_concentration': ('brand',),
+    'market_trends': ('price_numeric', 'rating_numeric', 'review_count_numeric'),
+}
+# 少于该商品数时串行执行（进程间传输的开销大于收益）
+# Below this many products analyses run serially; shipping data to workers costs more than it saves
+PARALLEL_MIN_PRODUCTS = 5000
+REPORT_WORKERS = min(len(REPORT_ANALYSES), os.cpu_count() or 1)
+
+_report_pool: Optional[ProcessPoolExecutor] = None
+_report_pool_lock = threading.Lock()
+
+
+def _get_report_pool() -> ProcessPoolExecutor:
+    """获取共享的报告进程池 / Get the shared report process pool"""
+    global _report_pool
+    with _report_pool_lock:
+        if _report_pool is None:
+            _report_pool = ProcessPoolExecutor(max_workers=REPORT_WORKERS,
+                                               mp_context=multiprocessing.get_context(POOL_START_METHOD))
+        return _report_pool
+
+
+def _reset_report_pool():
+    """丢弃损坏的进程池 / Drop a broken process pool"""
+    global _report_pool
+    with _report_pool_lock:
+        if _report_pool is not None:
+            _report_pool.shutdown(wait=False, cancel_futures=True)
+        _report_pool = None
+
+
+def _run_report_analysis(output_dir: str, name: str, frame: ProductFrame) -> Any:
+    """在工作进程中执行一个报告分析 / Run one report analysis in a worker process"""
+    return AdvancedAnalyzer(output_dir).run_report_analysis(name, frame)
+
+
+def _content_key(*parts: Any) -> str:
+    """图表内容摘要，用于缓存文件名 / Digest of chart inputs, used as the cache file name"""
+    digest = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class ChartRenderer:
+    """
+    后台图表渲染（按内容缓存，相同数据不重复渲染）
+    Background chart rendering, cached by content so identical data is not redrawn
+
+    图表使用面向对象的 Figure 接口渲染，不依赖 pyplot 全局状态，可以在后台线程中运行。
+    Charts use the object-oriented Figure API rather than pyplot's global state,
+    so they can render on a background thread.
+    """
+    
+    def __init__(self, output_dir: Union[str, Path], max_workers: int = 1):
+        """
+        初始化渲染器
+        
+        Args:
+            output_dir: 图表目录 / Chart directory
+            max_workers: 渲染线程数 / Rendering threads
+        """
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ChartRenderer")
+        self.lock = threading.Lock()
+        self.pending: Dict[str, Future] = {}
+        self.rendered = 0
+        self.cache_hits = 0
+    
+    def submit(self, kind: str, key: str, render: Callable[[Path], Any]) -> str:
+        """
+        提交图表渲染，已存在则直接复用
+        Submit a chart for rendering, reusing an existing file
+        
+        Args:
+            kind: 图表类型（文件名前缀） / Chart kind (file name prefix)
+            key: 内容摘要 / Content digest
+            render: 接收目标路径的渲染函数 / Render function taking the target path
+            
+        Returns:
+            图表路径（渲染可能仍在进行） / Chart path (rendering may still be in progress)
+        """
+        filepath = self.output_dir / f"{kind}_{key}.png"
+        with self.lock:
+            if filepath.exists() or str(filepath) in self.pending:
+                self.cache_hits += 1
+                return str(filepath)
+            self.pending[str(filepath)] = self.executor.submit(self._render, filepath, render)
+        return str(filepath)
+    
+    def _render(self, filepath: Path, render: Callable[[Path], Any]):
+        try:
+            # 先写临时文件，避免读到一半的图表被当作缓存
+            tmp_path = filepath.with_name(filepath.stem + '.tmp.png')
+            render(tmp_path)
+            if tmp_path.exists():
+                os.replace(tmp_path, filepath)
+                with self.lock:
+                    self.rendered += 1
+        except Exception as e:
+            logger.error(f"Error rendering chart {filepath}: {e}")
+        finally:
+            with self.lock:
+                self.pending.pop(str(filepath), None)
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待已提交的图表渲染完成
+        Wait for submitted charts to finish
+        
+        Args:
+            timeout: 超时秒数 / Timeout in seconds
+            
+        Returns:
+            是否全部完成 / Whether all finished
+        """
+        with self.lock:
+            futures = list(self.pending.values())
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                pass
+            return True
+        except TimeoutError:
+            return False
+
 
 class AdvancedAnalyzer:
     """高级分析器 / Advanced Analyzer"""
@@ -42,17 +210,26 @@ class AdvancedAnalyzer:
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._chart_renderer: Optional[ChartRenderer] = None
+        self._keyword_engine: Optional[KeywordEngine] = None
         logger.info("Advanced analyzer initialized")
     
+    @property
+    def chart_renderer(self) -> ChartRenderer:
+        """后台图表渲染器（首次使用时创建） / Background chart renderer, created on first use"""
+        if self._chart_renderer is None:
+            self._chart_renderer = ChartRenderer(self.output_dir)
+        return self._chart_renderer
+    
     def analyze_competitor_matrix(self, 
-                                  products: List[Dict[str, Any]],
+                                  products: Products,
                                   group_by: str = 'brand') -> pd.DataFrame:
         """
         竞品矩阵分析（不同卖家的价格/评分对比）
         Competitor matrix analysis (price/rating comparison across sellers)
         
         Args:
-            products: 商品数据列表 / Product data list
+            products: 商品数据列表或 ProductFrame / Product list or ProductFrame
             group_by: 分组依据（brand/seller） / Group by field
             
         Returns:
@@ -60,24 +237,27 @@ class AdvancedAnalyzer:
         """
         logger.info("Analyzing competitor matrix...")
         
-        if not products:
+        frame = ProductFrame.coerce(products)
+        if frame.empty:
             logger.warning("No products to analyze")
             return pd.DataFrame()
         
-        # 转换为DataFrame
-        df = pd.DataFrame(products)
+        matrix = frame.memo(('competitor_matrix', group_by),
+                            lambda: self._build_competitor_matrix(frame, group_by))
         
-        # 提取价格和评分数据
-        df['price_numeric'] = df.get('price', df.get('current_price', '')).apply(self._extract_price)
-        df['rating_numeric'] = df.get('rating', df.get('average_rating', '')).apply(self._extract_rating)
-        df['review_count_numeric'] = df.get('review_count', '').apply(self._extract_number)
-        
-        # 确保分组字段存在
-        if group_by not in df.columns:
-            df[group_by] = 'Unknown'
+        logger.info(f"Competitor matrix created with {len(matrix)} competitors")
+        return matrix.copy()
+    
+    def _build_competitor_matrix(self, frame: ProductFrame, group_by: str) -> pd.DataFrame:
+        """按品牌/卖家分组统计 / Group statistics by brand or seller"""
+        # 数值列（无法解析的记为0），分组字段缺失时全部记为 Unknown
+        df = frame.filled_numeric()
+        if group_by in frame.df.columns:
+            keys = frame.df[group_by]
+        else:
+            keys = frame.group_key(group_by)
         
-        # 按品牌/卖家分组统计
-        matrix = df.groupby(group_by).agg({
+        matrix = df.groupby(keys, observed=True).agg({
             'price_numeric': ['mean', 'min', 'max', 'std', 'count'],
             'rating_numeric': ['mean', 'min', 'max'],
             'review_count_numeric': ['mean', 'sum']
@@ -85,27 +265,26 @@ class AdvancedAnalyzer:
         
         # 扁平化列名
         matrix.columns = ['_'.join(col).strip() for col in matrix.columns.values]
+        matrix.index = matrix.index.astype(object)
+        matrix.index.name = group_by
         matrix = matrix.reset_index()
         
         # 计算市场份额
-        total_products = len(df)
+        total_products = len(frame)
         matrix['market_share_percent'] = (matrix['price_numeric_count'] / total_products * 100).round(2)
         
         # 按市场份额排序
-        matrix = matrix.sort_values('market_share_percent', ascending=False)
-        
-        logger.info(f"Competitor matrix created with {len(matrix)} competitors")
-        return matrix
+        return matrix.sort_values('market_share_percent', ascending=False)
     
     def analyze_price_distribution(self, 
-                                   products: List[Dict[str, Any]],
+                                   products: Products,
                                    save_plot: bool = True) -> Dict[str, Any]:
         """
         价格分布分析（箱线图或区间分布）
         Price distribution analysis (box plot or interval distribution)
         
         Args:
-            products: 商品数据列表 / Product data list
+            products: 商品数据列表或 ProductFrame / Product list or ProductFrame
             save_plot: 是否保存图表 / Whether to save plot
             
         Returns:
@@ -113,25 +292,29 @@ class AdvancedAnalyzer:
         """
         logger.info("Analyzing price distribution...")
         
-        if not products:
+        frame = ProductFrame.coerce(products)
+        if frame.empty:
             logger.warning("No products to analyze")
             return {}
         
         # 提取价格数据
-        prices = []
-        for product in products:
-            price_str = product.get('price', product.get('current_price', ''))
-            price = self._extract_price(price_str)
-            if price > 0:
-                prices.append(price)
-        
-        if not prices:
+        prices_array = frame.numeric('price')
+        
+        if prices_array.size == 0:
             logger.warning("No valid prices found")
             return {}
         
-        prices_array = np.array(prices)
+        stats = self._price_stats(prices_array)
+        
+        # 生成图表
+        if save_plot:
+            self._plot_price_distribution(prices_array, stats)
         
-        # 计算统计数据
+        logger.info(f"Price distribution analyzed: mean=${stats['mean']:.2f}, median=${stats['median']:.2f}")
+        return stats
+    
+    def _price_stats(self, prices_array: np.ndarray) -> Dict[str, Any]:
+        """价格统计与区间分布 / Price statistics and range distribution"""
         stats = {
             'mean': float(np.mean(prices_array)),
             'median': float(np.median(prices_array)),
@@ -140,7 +323,7 @@ class AdvancedAnalyzer:
             'max': float(np.max(prices_array)),
             'q25': float(np.percentile(prices_array, 25)),
             'q75': float(np.percentile(prices_array, 75)),
-            'count': len(prices)
+            'count': int(prices_array.size)
         }
         
         # 价格区间分布
@@ -149,17 +332,13 @@ class AdvancedAnalyzer:
         price_ranges = pd.cut(prices_array, bins=bins, labels=labels)
         range_counts = price_ranges.value_counts().to_dict()
         stats['price_ranges'] = {str(k): int(v) for k, v in range_counts.items()}
-        
-        # 生成图表
-        if save_plot:
-            self._plot_price_distribution(prices_array, stats)
-        
-        logger.info(f"Price distribution analyzed: mean=${stats['mean']:.2f}, median=${stats['median']:.2f}")
         return stats
     
-    def _plot_price_distribution(self, prices: np.ndarray, stats: Dict[str, Any]):
+    def _plot_price_distribution(self, prices: np.ndarray, stats: Dict[str, Any],
+                                 filepath: Optional[Path] = None):
         """绘制价格分布图 / Plot price distribution"""
-        fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+        fig = Figure(figsize=(14, 5))
+        axes = fig.subplots(1, 2)
         
         # 箱线图
         axes[0].boxplot(prices, orientation='vertical')
@@ -182,85 +361,67 @@ class AdvancedAnalyzer:
         axes[1].legend()
         axes[1].grid(True, alpha=0.3)
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         # 保存图表
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filepath = self.output_dir / f"price_distribution_{timestamp}.png"
-        plt.savefig(filepath, dpi=150, bbox_inches='tight')
-        plt.close()
+        if filepath is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filepath = self.output_dir / f"price_distribution_{timestamp}.png"
+        fig.savefig(filepath, dpi=150, bbox_inches='tight')
         
         logger.info(f"Price distribution plot saved: {filepath}")
     
     def analyze_keywords(self, 
-                        products: List[Dict[str, Any]],
+                        products: Products,
                         text_field: str = 'title',
                         top_n: int = 50,
-                        save_wordcloud: bool = True) -> Dict[str, int]:
+                        save_wordcloud: bool = True,
+                        ngram_range: Tuple[int, int] = (1, 1),
+                        weighting: str = 'count') -> Dict[str, Any]:
         """
         评论关键词分析（使用jieba分词）
         Keyword analysis (using jieba for Chinese text)
         
+        分词结果按标题缓存，大批量新标题在进程池中分块并行分词。
+        Tokens are cached per title and large batches of new titles are
+        tokenized in parallel chunks.
+        
         Args:
-            products: 商品数据列表 / Product data list
+            products: 商品数据列表或 ProductFrame / Product list or ProductFrame
             text_field: 文本字段名 / Text field name
             top_n: 返回前N个关键词 / Return top N keywords
             save_wordcloud: 是否保存词云 / Whether to save word cloud
+            ngram_range: 词组长度范围，如 (1, 2) 包含单词和二元词组 / N-gram sizes, e.g. (1, 2)
+            weighting: 'count' 词频 或 'tfidf'（仅单词） / 'count' or 'tfidf' (single words)
             
         Returns:
-            关键词频率字典 / Keyword frequency dictionary
+            关键词频率（或 TF-IDF 得分）字典 / Keyword frequency (or TF-IDF score) dictionary
         """
         logger.info("Analyzing keywords...")
         
-        if not products:
+        if weighting not in ('count', 'tfidf'):
+            raise ValueError(f"Unknown keyword weighting: {weighting}")
+        min_n, max_n = ngram_range
+        if not 1 <= min_n <= max_n:
+            raise ValueError(f"Invalid ngram_range: {ngram_range}")
+        
+        frame = ProductFrame.coerce(products)
+        if frame.empty:
             logger.warning("No products to analyze")
             return {}
         
-        # 导入jieba（如果可用）
-        try:
-            import jieba
-            use_jieba = True
-        except ImportError:
-            logger.warning("jieba not installed, using basic word splitting")
-            use_jieba = False
-        
-        # 收集所有文本
-        all_text = []
-        for product in products:
-            text = product.get(text_field, '')
-            if text:
-                all_text.append(str(text))
-        
-        combined_text = ' '.join(all_text)
-        
-        # 分词和统计
-        word_freq = {}
-        
-        if use_jieba:
-            # 使用jieba分词（中文）
-            words = jieba.cut(combined_text)
-            for word in words:
-                word = word.strip().lower()
-                if len(word) > 1 and not word.isdigit():  # 过滤单字符和纯数字
-                    word_freq[word] = word_freq.get(word, 0) + 1
+        corpus = frame.memo(('keyword_corpus', text_field),
+                            lambda: self._build_keyword_corpus(frame.texts(text_field)))
+        
+        if weighting == 'tfidf':
+            top_keywords = corpus.tfidf(top_n)
+        elif min_n == max_n:
+            top_keywords = dict(corpus.ngram_counts(min_n).most_common(top_n))
         else:
-            # 基础英文分词
-            words = combined_text.lower().split()
-            for word in words:
-                # 移除标点符号
-                word = ''.join(c for c in word if c.isalnum())
-                if len(word) > 2:  # 过滤短词
-                    word_freq[word] = word_freq.get(word, 0) + 1
-        
-        # 停用词过滤
-        stopwords = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
-                    'of', 'with', 'by', 'from', 'up', 'about', 'into', 'through', 'during',
-                    '的', '了', '和', '是', '在', '有', '个', '为', '与', '等', '及'}
-        word_freq = {k: v for k, v in word_freq.items() if k not in stopwords}
-        
-        # 排序并获取前N个
-        sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:top_n]
-        top_keywords = dict(sorted_words)
+            counts = Counter()
+            for n in range(min_n, max_n + 1):
+                counts.update(corpus.ngram_counts(n))
+            top_keywords = dict(counts.most_common(top_n))
         
         # 生成词云
         if save_wordcloud and top_keywords:
@@ -269,7 +430,20 @@ class AdvancedAnalyzer:
         logger.info(f"Keyword analysis completed: {len(top_keywords)} keywords extracted")
         return top_keywords
     
-    def _generate_wordcloud(self, word_freq: Dict[str, int]):
+    @property
+    def keyword_engine(self) -> KeywordEngine:
+        """关键词引擎（分词缓存保存在输出目录） / Keyword engine, token cache kept in the output directory"""
+        if self._keyword_engine is None:
+            self._keyword_engine = KeywordEngine(cache_path=str(self.output_dir / 'cache' / 'keyword_tokens.json'))
+        return self._keyword_engine
+    
+    def _build_keyword_corpus(self, texts: List[str]) -> KeywordCorpus:
+        """分词、统计并保存分词缓存 / Tokenize, count and persist the token cache"""
+        corpus = self.keyword_engine.build(texts)
+        self.keyword_engine.save_cache()
+        return corpus
+    
+    def _generate_wordcloud(self, word_freq: Dict[str, int], filepath: Optional[Path] = None):
         """生成词云图 / Generate word cloud"""
         try:
             from wordcloud import WordCloud
@@ -286,16 +460,17 @@ class AdvancedAnalyzer:
             ).generate_from_frequencies(word_freq)
             
             # 绘制词云
-            plt.figure(figsize=(12, 6))
-            plt.imshow(wordcloud, interpolation='bilinear')
-            plt.axis('off')
-            plt.title('Keyword Cloud', fontsize=16, pad=20)
+            fig = Figure(figsize=(12, 6))
+            ax = fig.subplots()
+            ax.imshow(wordcloud, interpolation='bilinear')
+            ax.axis('off')
+            ax.set_title('Keyword Cloud', fontsize=16, pad=20)
             
             # 保存图表
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filepath = self.output_dir / f"keyword_cloud_{timestamp}.png"
-            plt.savefig(filepath, dpi=150, bbox_inches='tight')
-            plt.close()
+            if filepath is None:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                filepath = self.output_dir / f"keyword_cloud_{timestamp}.png"
+            fig.savefig(filepath, dpi=150, bbox_inches='tight')
             
             logger.info(f"Word cloud saved: {filepath}")
             
@@ -305,32 +480,30 @@ class AdvancedAnalyzer:
             logger.error(f"Error generating word cloud: {e}")
     
     def analyze_brand_concentration(self, 
-                                   products: List[Dict[str, Any]]) -> Dict[str, Any]:
+                                   products: Products,
+                                   save_plot: bool = True) -> Dict[str, Any]:
         """
         品牌集中度分析（品牌数量、市场占比）
         Brand concentration analysis (brand count, market share)
         
         Args:
-            products: 商品数据列表 / Product data list
+            products: 商品数据列表或 ProductFrame / Product list or ProductFrame
+            save_plot: 是否保存品牌份额饼图 / Whether to save the brand share chart
             
         Returns:
             品牌集中度分析结果 / Brand concentration analysis results
         """
         logger.info("Analyzing brand concentration...")
         
-        if not products:
+        frame = ProductFrame.coerce(products)
+        if frame.empty:
             logger.warning("No products to analyze")
             return {}
         
-        # 统计品牌
-        brand_counts = {}
-        for product in products:
-            brand = product.get('brand', 'Unknown')
-            if not brand or brand == '':
-                brand = 'Unknown'
-            brand_counts[brand] = brand_counts.get(brand, 0) + 1
+        # 统计品牌（分类列上计数）
+        brand_counts = frame.value_counts('brand')
         
-        total_products = len(products)
+        total_products = len(frame)
         
         # 计算市场份额
         brand_shares = []
@@ -338,7 +511,7 @@ class AdvancedAnalyzer:
             share = (count / total_products) * 100
             brand_shares.append({
                 'brand': brand,
-                'count': count,
+                'count': int(count),
                 'market_share_percent': round(share, 2)
             })
         
@@ -374,92 +547,230 @@ class AdvancedAnalyzer:
         }
         
         # 生成品牌份额饼图
-        self._plot_brand_share(brand_shares[:10])
+        if save_plot:
+            self._plot_brand_share(brand_shares[:10])
         
         logger.info(f"Brand concentration analyzed: {result['total_brands']} brands, HHI={result['hhi_index']}")
         return result
     
-    def _plot_brand_share(self, brand_shares: List[Dict[str, Any]]):
+    def _plot_brand_share(self, brand_shares: List[Dict[str, Any]], filepath: Optional[Path] = None):
         """绘制品牌市场份额饼图 / Plot brand market share pie chart"""
         if not brand_shares:
             return
         
-        brands = [item['brand'][:20] for item in brand_shares]  # 限制品牌名长度
+        brands = [str(item['brand'])[:20] for item in brand_shares]  # 限制品牌名长度
         shares = [item['market_share_percent'] for item in brand_shares]
         
-        plt.figure(figsize=(10, 8))
-        colors = plt.cm.Set3(range(len(brands)))
+        fig = Figure(figsize=(10, 8))
+        ax = fig.subplots()
+        colors = matplotlib.colormaps['Set3'](range(len(brands)))
         
-        plt.pie(shares, labels=brands, autopct='%1.1f%%', startangle=90, colors=colors)
-        plt.title('Top Brands Market Share', fontsize=14, pad=20)
-        plt.axis('equal')
+        ax.pie(shares, labels=brands, autopct='%1.1f%%', startangle=90, colors=colors)
+        ax.set_title('Top Brands Market Share', fontsize=14, pad=20)
+        ax.axis('equal')
         
         # 保存图表
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filepath = self.output_dir / f"brand_share_{timestamp}.png"
-        plt.savefig(filepath, dpi=150, bbox_inches='tight')
-        plt.close()
+        if filepath is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filepath = self.output_dir / f"brand_share_{timestamp}.png"
+        fig.savefig(filepath, dpi=150, bbox_inches='tight')
         
         logger.info(f"Brand share plot saved: {filepath}")
     
     def analyze_market_trends(self, 
-                             products: List[Dict[str, Any]]) -> Dict[str, Any]:
+                             products: Optional[Products] = None,
+                             aggregates: Optional[TrendAggregates] = None,
+                             **filters) -> Dict[str, Any]:
         """
         市场趋势分析（价格、销量、评分、评论数）
         Market trend analysis (price, sales, rating, review count)
         
         Args:
-            products: 商品数据列表 / Product data list
+            products: 商品数据列表或 ProductFrame，为空时读取每日预聚合 / Products; reads the daily aggregates when None
+            aggregates: 预聚合，默认全局实例 / Aggregates, defaults to the shared instance
+            **filters: 预聚合过滤（platform/category/since/until） / Aggregate filters
             
         Returns:
             市场趋势分析结果 / Market trend analysis results
         """
+        if products is None:
+            return self.analyze_trend_aggregates(aggregates, **filters)
+        
         logger.info("Analyzing market trends...")
         
-        if not products:
+        frame = ProductFrame.coerce(products)
+        if frame.empty:
             logger.warning("No products to analyze")
             return {}
         
-        # 提取数据
-        prices = []
-        ratings = []
-        review_counts = []
-        
-        for product in products:
-            price = self._extract_price(product.get('price', product.get('current_price', '')))
-            if price > 0:
-                prices.append(price)
-            
-            rating = self._extract_rating(product.get('rating', product.get('average_rating', '')))
-            if rating > 0:
-                ratings.append(rating)
-            
-            review_count = self._extract_number(product.get('review_count', ''))
-            if review_count > 0:
-                review_counts.append(review_count)
+        # 提取数据（每个 ProductFrame 只解析一次）
+        prices = frame.numeric('price')
+        ratings = frame.numeric('rating')
+        review_counts = frame.numeric('review_count')
         
         # 计算趋势指标
         trends = {
             'price_trends': {
-                'average': round(np.mean(prices), 2) if prices else 0,
-                'median': round(np.median(prices), 2) if prices else 0,
-                'range': [round(np.min(prices), 2), round(np.max(prices), 2)] if prices else [0, 0]
+                'average': round(float(np.mean(prices)), 2) if prices.size else 0,
+                'median': round(float(np.median(prices)), 2) if prices.size else 0,
+                'range': [round(float(np.min(prices)), 2), round(float(np.max(prices)), 2)] if prices.size else [0, 0]
             },
             'rating_trends': {
-                'average': round(np.mean(ratings), 2) if ratings else 0,
-                'distribution': self._rating_distribution(ratings) if ratings else {}
+                'average': round(float(np.mean(ratings)), 2) if ratings.size else 0,
+                'distribution': self._rating_distribution(ratings.tolist()) if ratings.size else {}
             },
             'review_trends': {
-                'average': round(np.mean(review_counts), 2) if review_counts else 0,
-                'total': sum(review_counts) if review_counts else 0,
-                'high_engagement_products': len([r for r in review_counts if r > 100]) if review_counts else 0
+                'average': round(float(np.mean(review_counts)), 2) if review_counts.size else 0,
+                'total': int(review_counts.sum()) if review_counts.size else 0,
+                'high_engagement_products': int((review_counts > 100).sum())
             },
-            'hot_selling_points': self._identify_hot_points(products)
+            'hot_selling_points': self._identify_hot_points(frame)
         }
         
         logger.info("Market trends analysis completed")
         return trends
     
+    def analyze_cross_platform_prices(self,
+                                      products: Optional[Products] = None,
+                                      lake: Optional[DataLake] = None,
+                                      platform: Optional[str] = None,
+                                      day: Any = None,
+                                      max_age_days: Optional[int] = None,
+                                      undercut_threshold: float = 0.05,
+                                      **query) -> Dict[str, Any]:
+        """
+        跨平台比价：各商品最便宜的平台、价差和被低价竞争的商品
+        Cross-platform price comparison: cheapest platform, spread and undercuts per product
+        
+        Args:
+            products: 商品数据列表或 ProductFrame，为空时读取数据湖 / Products; reads the data lake when None
+            lake: 数据湖，默认 data/ 目录 / Data lake, defaults to data/
+            platform: 检测该平台被低价竞争的商品 / Platform to check for undercuts
+            day: 比价日期，默认最近一天 / As-of day, defaults to the latest
+            max_age_days: 忽略早于该天数的报价 / Ignore prices older than this many days
+            undercut_threshold: 最低价差比例 / Minimum undercut fraction
+            **query: 数据湖查询参数（platforms/since/until） / Data lake query
+            
+        Returns:
+            汇总、最便宜平台、价差和低价竞争结果 / Summary, cheapest platform, spread and undercuts
+        """
+        logger.info("Analyzing cross-platform prices...")
+        if products is not None:
+            frame = ProductFrame.coerce(products)
+            cube = frame.memo('price_cube', lambda: PriceCube.from_frame(frame.df))
+        else:
+            cube = PriceCube.from_lake(lake or get_data_lake(), **query)
+        if not len(cube):
+            logger.warning("No priced products to compare")
+            return {}
+        
+        snapshot = {'day': day, 'max_age_days': max_age_days}
+        cheapest = cube.cheapest_platform(min_platforms=2, **snapshot)
+        result = {
+            'summary': {
+                'products': cube.shape[0],
+                'platforms': cube.shape[1],
+                'price_points': len(cube),
+                'cross_platform_products': len(cheapest),
+                'day_range': cube.day_range
+            },
+            'cheapest_platform': cheapest,
+            'platform_wins': cheapest['platform'].value_counts().to_dict(),
+            'price_spread': cube.price_spread(**snapshot)
+        }
+        if platform:
+            result['undercuts'] = cube.undercuts(platform, undercut_threshold, **snapshot)
+        
+        logger.info(f"Cross-platform comparison: {len(cheapest)} products on 2+ platforms")
+        return result
+    
+    def detect_price_anomalies(self,
+                               lake: Optional[DataLake] = None,
+                               platforms: Optional[List[str]] = None,
+                               since: Any = None,
+                               until: Any = None,
+                               methods: Sequence[str] = BATCH_METHODS,
+                               **params) -> pd.DataFrame:
+        """
+        检测所有商品历史价格序列中的异常（批量向量化）
+        Detect anomalies in every product's price history at once
+        
+        Args:
+            lake: 数据湖，默认 data/ 目录 / Data lake, defaults to data/
+            platforms: 平台过滤 / Platform filter
+            since: 起始时间 / Earliest scrape time
+            until: 结束时间 / Latest scrape time
+            methods: 检测方法 / Detection methods
+            **params: detect_anomalies_batch 参数 / Extra detect_anomalies_batch parameters
+            
+        Returns:
+            稀疏异常表（series 为 platform:product_key） / Sparse anomaly table (series is platform:product_key)
+        """
+        lake = lake or get_data_lake()
+        chunks = []
+        for chunk in lake.scan(columns=['platform', 'product_key', 'scraped_at', 'price_numeric'],
+                               platforms=platforms, since=since, until=until):
+            chunk = chunk[chunk['product_key'].notna() & (chunk['price_numeric'] > 0)]
+            if len(chunk):
+                chunks.append(pd.DataFrame({
+                    'sku': chunk['platform'].astype(str) + ':' + chunk['product_key'].astype(str),
+                    't': chunk['scraped_at'],
+                    'value': chunk['price_numeric']
+                }))
+        history = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=['sku', 't', 'value'])
+        logger.info(f"Checking {history['sku'].nunique()} price series for anomalies...")
+        return detect_anomalies_batch(history, methods=methods, **params)
+    
+    def analyze_trend_aggregates(self,
+                                 aggregates: Optional[TrendAggregates] = None,
+                                 platform: Any = None,
+                                 category: Optional[str] = None,
+                                 since: Any = None,
+                                 until: Any = None) -> Dict[str, Any]:
+        """
+        基于每日预聚合的市场趋势（不扫描商品列表）
+        Market trends read from the materialized daily aggregates (no product scan)
+        
+        Args:
+            aggregates: 预聚合，默认全局实例 / Aggregates, defaults to the shared instance
+            platform: 平台或平台列表过滤 / Platform (or list of platforms) filter
+            category: 类别过滤 / Category filter
+            since: 起始日期 / First day
+            until: 结束日期 / Last day
+            
+        Returns:
+            价格/评分/评论趋势与每日明细 / Price, rating and review trends with daily rows
+        """
+        aggregates = aggregates or get_trend_aggregates()
+        filters = {'platform': platform, 'category': category, 'since': since, 'until': until}
+        summary = aggregates.summary(**filters)
+        if not summary:
+            logger.warning("No aggregated trend data")
+            return {}
+        
+        def rounded(value):
+            return round(float(value), 2) if value is not None else 0
+        
+        stars = {'5_stars': 'rating_5', '4_stars': 'rating_4', '3_stars': 'rating_3',
+                 '2_stars': 'rating_2', '1_star': 'rating_1'}
+        return {
+            'price_trends': {
+                'average': rounded(summary['price_mean']),
+                'std': rounded(summary['price_std']),
+                'range': [rounded(summary['price_min']), rounded(summary['price_max'])]
+            },
+            'rating_trends': {
+                'average': rounded(summary['rating_mean']),
+                'distribution': {label: int(summary[field]) for label, field in stars.items()}
+            },
+            'review_trends': {
+                'average': rounded(summary['review_mean']),
+                'review_growth': int(summary['review_delta']),
+                'new_products': int(summary['new_products'])
+            },
+            'daily': aggregates.query('day', **filters)
+        }
+    
     def _rating_distribution(self, ratings: List[float]) -> Dict[str, int]:
         """评分分布统计 / Rating distribution statistics"""
         distribution = {
@@ -484,68 +795,124 @@ class AdvancedAnalyzer:
         
         return distribution
     
-    def _identify_hot_points(self, products: List[Dict[str, Any]]) -> List[str]:
+    def _identify_hot_points(self, frame: ProductFrame) -> List[str]:
         """识别热销点 / Identify hot selling points"""
         hot_points = []
         
         # 高评分产品比例
-        high_rating_count = sum(1 for p in products 
-                               if self._extract_rating(p.get('rating', p.get('average_rating', ''))) >= 4.5)
-        if high_rating_count / len(products) > 0.5:
+        high_rating_count = int((frame.numeric('rating') >= 4.5).sum())
+        if high_rating_count / len(frame) > 0.5:
             hot_points.append("High quality products dominate (>50% rated 4.5+)")
         
         # 评论活跃度
-        review_counts = [self._extract_number(p.get('review_count', '')) for p in products]
-        avg_reviews = np.mean([r for r in review_counts if r > 0]) if any(review_counts) else 0
+        review_counts = frame.numeric('review_count')
+        avg_reviews = np.mean(review_counts) if review_counts.size else 0
         if avg_reviews > 500:
             hot_points.append(f"High customer engagement (avg {int(avg_reviews)} reviews)")
         
         # 价格竞争
-        prices = [self._extract_price(p.get('price', p.get('current_price', ''))) for p in products]
-        price_std = np.std([p for p in prices if p > 0]) if any(prices) else 0
-        price_mean = np.mean([p for p in prices if p > 0]) if any(prices) else 0
+        prices = frame.numeric('price')
+        price_std = np.std(prices) if prices.size else 0
+        price_mean = np.mean(prices) if prices.size else 0
         if price_std / price_mean < 0.3 if price_mean > 0 else False:
             hot_points.append("Price competition is intense (low price variance)")
         
         return hot_points if hot_points else ["Market data insufficient for trend analysis"]
     
+    def analyze_history(self,
+                        lake: Optional[DataLake] = None,
+                        group_by: str = 'brand',
+                        platforms: Optional[List[str]] = None,
+                        since: Any = None,
+                        until: Any = None) -> Dict[str, Any]:
+        """
+        历史数据分析（所有采集结果，分块聚合，不需要全部载入内存）
+        Historical analysis over all scrape outputs, aggregated chunk by chunk
+        
+        Args:
+            lake: 数据湖，默认 data/ 目录 / Data lake, defaults to data/
+            group_by: 竞品分组字段 / Competitor grouping field
+            platforms: 平台过滤 / Platform filter
+            since: 起始时间 / Earliest scrape time
+            until: 结束时间 / Latest scrape time
+            
+        Returns:
+            竞品矩阵、每日趋势和价格分布 / Competitor matrix, daily trends and price distribution
+        """
+        logger.info("Analyzing historical data...")
+        lake = lake or get_data_lake()
+        query = {'platforms': platforms, 'since': since, 'until': until}
+        
+        # 一次扫描得到总体、竞品和每日聚合，以及价格列（用于中位数和分位数）
+        summary = lake.summarize({'competitors': group_by, 'daily': 'day'}, values=['price'], **query)
+        overall = summary['overall']
+        if overall.empty:
+            logger.warning("No historical data to analyze")
+            return {}
+        
+        prices = summary['price']
+        
+        result = {
+            'total_products': int(overall['products'].iloc[0]),
+            'competitor_matrix': summary['competitors'],
+            'daily_trends': summary['daily'],
+            'price_distribution': self._price_stats(prices) if prices.size else {}
+        }
+        
+        logger.info(f"Historical analysis completed: {result['total_products']} products")
+        return result
+    
     def generate_comprehensive_report(self, 
-                                     products: List[Dict[str, Any]],
-                                     report_name: str = None) -> str:
+                                     products: Products,
+                                     report_name: str = None,
+                                     render_charts: bool = True,
+                                     parallel: Optional[bool] = None) -> str:
         """
         生成综合分析报告
         Generate comprehensive analysis report
         
+        各项分析相互独立，大数据量时在进程池中并行执行，结果按完成顺序汇总；
+        图表在后台线程渲染，不阻塞报告返回，可用 wait_for_charts() 等待。
+        The analyses are independent: on large inputs they run concurrently on a
+        process pool and are assembled as they finish. Charts render on a
+        background thread and do not delay the report; use wait_for_charts().
+        
         Args:
-            products: 商品数据列表 / Product data list
+            products: 商品数据列表或 ProductFrame / Product list or ProductFrame
             report_name: 报告名称 / Report name
+            render_charts: 是否渲染图表 / Whether to render charts
+            parallel: 是否使用进程池，None 表示按数据量决定 / Use the process pool, None to decide by size
             
         Returns:
             报告文件路径 / Report file path
         """
         logger.info("Generating comprehensive report...")
         
-        if not products:
+        # 只构建一次列式数据，所有分析共享解析结果
+        frame = ProductFrame.coerce(products)
+        if frame.empty:
             logger.warning("No products to analyze")
             return ""
         
-        # 执行所有分析
-        competitor_matrix = self.analyze_competitor_matrix(products)
-        price_dist = self.analyze_price_distribution(products, save_plot=True)
-        keywords = self.analyze_keywords(products, save_wordcloud=True)
-        brand_concentration = self.analyze_brand_concentration(products)
-        market_trends = self.analyze_market_trends(products)
+        if parallel is None:
+            parallel = len(frame) >= PARALLEL_MIN_PRODUCTS and REPORT_WORKERS > 1
         
         # 创建报告
         report = {
             'generated_at': datetime.now().isoformat(),
-            'total_products': len(products),
-            'competitor_matrix': competitor_matrix.to_dict('records') if not competitor_matrix.empty else [],
-            'price_distribution': price_dist,
-            'top_keywords': keywords,
-            'brand_concentration': brand_concentration,
-            'market_trends': market_trends
+            'total_products': len(frame),
         }
+        charts = {}
+        
+        for name, result in self._run_report_analyses(frame, parallel):
+            report[name] = result
+            if render_charts:
+                self._submit_report_chart(name, result, frame, charts)
+        
+        # 固定键顺序 / Keep a stable key order
+        report = {key: report[key] for key in ('generated_at', 'total_products') + REPORT_ANALYSES}
+        if charts:
+            report['charts'] = charts
         
         # 保存报告
         if not report_name:
@@ -559,53 +926,108 @@ class AdvancedAnalyzer:
         logger.info(f"Comprehensive report saved: {filepath}")
         return str(filepath)
     
+    def run_report_analysis(self, name: str, frame: ProductFrame) -> Any:
+        """
+        执行一项报告分析（不渲染图表，返回可序列化结果）
+        Run one report analysis without charts, returning a JSON-ready result
+        
+        Args:
+            name: REPORT_ANALYSES 中的分析名 / Analysis name from REPORT_ANALYSES
+            frame: 商品数据 / Products
+            
+        Returns:
+            分析结果 / Analysis result
+        """
+        if name == 'competitor_matrix':
+            matrix = self.analyze_competitor_matrix(frame)
+            return matrix.to_dict('records') if not matrix.empty else []
+        if name == 'price_distribution':
+            return self.analyze_price_distribution(frame, save_plot=False)
+        if name == 'top_keywords':
+            return self.analyze_keywords(frame, save_wordcloud=False)
+        if name == 'brand_concentration':
+            return self.analyze_brand_concentration(frame, save_plot=False)
+        if name == 'market_trends':
+            return self.analyze_market_trends(frame)
+        raise ValueError(f"Unknown report analysis: {name}")
+    
+    def _run_report_analyses(self, frame: ProductFrame, parallel: bool):
+        """按完成顺序产出 (分析名, 结果) / Yield (name, result) as analyses finish"""
+        done = set()
+        if parallel:
+            try:
+                pool = _get_report_pool()
+                futures = {
+                    pool.submit(_run_report_analysis, str(self.output_dir), name,
+                                self._report_subframe(frame, name)): name
+                    for name in REPORT_ANALYSES
+                }
+                for future in as_completed(futures):
+                    name = futures[future]
+                    result = future.result()
+                    done.add(name)
+                    logger.info(f"Report analysis finished: {name}")
+                    yield name, result
+            except BrokenProcessPool as e:
+                logger.warning(f"Report process pool failed, running serially: {e}")
+                _reset_report_pool()
+            except Exception as e:
+                # 例如结果无法在进程间传递 / e.g. a result that cannot be pickled
+                logger.warning(f"Parallel report failed, running serially: {e}")
+        
+        for name in REPORT_ANALYSES:
+            if name not in done:
+                yield name, self.run_report_analysis(name, frame)
+    
+    @staticmethod
+    def _report_subframe(frame: ProductFrame, name: str) -> ProductFrame:
+        """只含某项分析所需列的数据，减少发送到工作进程的数据量 / Only the columns one analysis needs"""
+        columns = [column for column in REPORT_COLUMNS[name] if column in frame.df.columns]
+        return ProductFrame(frame.df[columns], normalized=True)
+    
+    def _submit_report_chart(self, name: str, result: Any, frame: ProductFrame, charts: Dict[str, str]):
+        """为完成的分析提交后台图表渲染 / Submit background chart rendering for a finished analysis"""
+        renderer = self.chart_renderer
+        if name == 'price_distribution' and result:
+            prices = frame.numeric('price')
+            charts['price_distribution'] = renderer.submit(
+                'price_distribution', _content_key(prices),
+                lambda path: self._plot_price_distribution(prices, result, path))
+        elif name == 'top_keywords' and result and HAS_WORDCLOUD:
+            charts['keyword_cloud'] = renderer.submit(
+                'keyword_cloud', _content_key(result),
+                lambda path: self._generate_wordcloud(result, path))
+        elif name == 'brand_concentration' and result.get('top_brands'):
+            top_brands = result['top_brands']
+            charts['brand_share'] = renderer.submit(
+                'brand_share', _content_key(top_brands),
+                lambda path: self._plot_brand_share(top_brands, path))
+    
+    def wait_for_charts(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待后台图表渲染完成
+        Wait for background chart rendering
+        
+        Args:
+            timeout: 超时秒数 / Timeout in seconds
+            
+        Returns:
+            是否全部完成 / Whether all finished
+        """
+        if self._chart_renderer is None:
+            return True
+        return self._chart_renderer.wait(timeout)
+    
     # 辅助方法 / Helper methods
     
     def _extract_price(self, price_str: Any) -> float:
         """提取价格数值 / Extract price value"""
-        if not price_str:
-            return 0.0
-        try:
-            # 移除货币符号和逗号
-            price_str = str(price_str).replace('$', '').replace('¥', '').replace(',', '').strip()
-            # 提取第一个数字
-            import re
-            match = re.search(r'\d+\.?\d*', price_str)
-            if match:
-                return float(match.group())
-        except:
-            pass
-        return 0.0
+        return parse_price(price_str)
     
     def _extract_rating(self, rating_str: Any) -> float:
         """提取评分数值 / Extract rating value"""
-        if not rating_str:
-            return 0.0
-        try:
-            rating_str = str(rating_str)
-            # 提取第一个数字（通常是评分）
-            import re
-            match = re.search(r'\d+\.?\d*', rating_str)
-            if match:
-                rating = float(match.group())
-                # 确保评分在0-5之间
-                if 0 <= rating <= 5:
-                    return rating
-        except:
-            pass
-        return 0.0
+        return parse_rating(rating_str)
     
     def _extract_number(self, num_str: Any) -> int:
         """提取数字 / Extract number"""
-        if not num_str:
-            return 0
-        try:
-            # 移除逗号和其他非数字字符
-            import re
-            num_str = str(num_str).replace(',', '')
-            match = re.search(r'\d+', num_str)
-            if match:
-                return int(match.group())
-        except:
-            pass
-        return 0
+        return parse_count(num_str)
@@ -4,11 +4,28 @@ AI Model Integration Manager - Unified management of multiple AI model integrati
 """
 
 import json
+import math
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 import requests
 
+# 可以实际发起探测请求的提供商（其他提供商的测试不访问网络，不参与测速和路由）
+PROBE_PROVIDERS = ('openai', 'azure_openai', 'anthropic')
+# 每个模型保留的最近延迟样本数 / 健康判断使用的最近结果数
+MAX_LATENCY_SAMPLES = 100
+HEALTH_WINDOW = 20
+MIN_SUCCESS_RATE = 0.5
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """最近秩百分位（sorted_values 已排序且非空）"""
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
 
 class AIModelManager:
     """AI模型管理器 - 统一管理各种AI模型的接入"""
@@ -110,6 +127,11 @@ class AIModelManager:
         """
         self.config_file = config_file
         self.models = self._load_config()
+        
+        # 测速结果：model_id -> 延迟样本、最近成功/失败、tokens/s
+        self.benchmark_file = os.path.join(os.path.dirname(config_file) or '.', 'ai_models_benchmark.json')
+        self.benchmark_lock = threading.Lock()
+        self.benchmarks = self._load_benchmarks()
     
     def _load_config(self) -> Dict[str, Any]:
         """加载AI模型配置"""
@@ -260,13 +282,16 @@ class AIModelManager:
         """
         return self.models.get(model_id)
     
-    def test_model(self, model_id: str, test_prompt: str = "Hello") -> Dict[str, Any]:
+    def test_model(self, model_id: str, test_prompt: str = "Hello", timeout: float = 30,
+                   max_tokens: int = 10) -> Dict[str, Any]:
         """
         测试AI模型连接
         
         Args:
             model_id: 模型ID
             test_prompt: 测试提示词
+            timeout: 请求超时（秒）
+            max_tokens: 最大生成token数
             
         Returns:
             测试结果
@@ -283,9 +308,9 @@ class AIModelManager:
         try:
             # 根据不同提供商执行测试
             if provider == 'openai' or provider == 'azure_openai':
-                return self._test_openai_compatible(model, test_prompt)
+                return self._test_openai_compatible(model, test_prompt, timeout, max_tokens)
             elif provider == 'anthropic':
-                return self._test_anthropic(model, test_prompt)
+                return self._test_anthropic(model, test_prompt, timeout, max_tokens)
             elif provider == 'google':
                 return self._test_google(model, test_prompt)
             else:
@@ -299,7 +324,8 @@ class AIModelManager:
                 'error': str(e)
             }
     
-    def _test_openai_compatible(self, model: Dict, test_prompt: str) -> Dict[str, Any]:
+    def _test_openai_compatible(self, model: Dict, test_prompt: str, timeout: float = 30,
+                                max_tokens: int = 10) -> Dict[str, Any]:
         """测试OpenAI兼容的API"""
         api_base = model['api_base']
         api_key = model['api_key']
@@ -314,10 +340,10 @@ class AIModelManager:
         data = {
             'model': model_name,
             'messages': [{'role': 'user', 'content': test_prompt}],
-            'max_tokens': 10
+            'max_tokens': max_tokens
         }
         
-        response = requests.post(url, headers=headers, json=data, timeout=30)
+        response = requests.post(url, headers=headers, json=data, timeout=timeout)
         
         if response.status_code == 200:
             return {
@@ -332,7 +358,8 @@ class AIModelManager:
                 'error': response.text
             }
     
-    def _test_anthropic(self, model: Dict, test_prompt: str) -> Dict[str, Any]:
+    def _test_anthropic(self, model: Dict, test_prompt: str, timeout: float = 30,
+                        max_tokens: int = 10) -> Dict[str, Any]:
         """测试Anthropic API"""
         api_base = model['api_base']
         api_key = model['api_key']
@@ -348,10 +375,10 @@ class AIModelManager:
         data = {
             'model': model_name,
             'messages': [{'role': 'user', 'content': test_prompt}],
-            'max_tokens': 10
+            'max_tokens': max_tokens
         }
         
-        response = requests.post(url, headers=headers, json=data, timeout=30)
+        response = requests.post(url, headers=headers, json=data, timeout=timeout)
         
         if response.status_code == 200:
             return {
@@ -381,6 +408,224 @@ class AIModelManager:
             'message': '配置已保存（需要根据具体API文档进行测试）'
         }
     
+    # 并发测速与路由
+    
+    def _load_benchmarks(self) -> Dict[str, Any]:
+        """加载测速结果"""
+        if os.path.exists(self.benchmark_file):
+            try:
+                with open(self.benchmark_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception:
+                return {}
+        return {}
+    
+    def _save_benchmarks(self):
+        """保存测速结果"""
+        with self.benchmark_lock:
+            data = json.loads(json.dumps(self.benchmarks))
+        os.makedirs(os.path.dirname(self.benchmark_file) or '.', exist_ok=True)
+        tmp_file = self.benchmark_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.benchmark_file)
+    
+    def _record_probe(self, model_id: str, probe: Dict[str, Any]):
+        """记录一次请求结果（测速和实际调用都会记录）"""
+        with self.benchmark_lock:
+            record = self.benchmarks.setdefault(model_id, {
+                'latencies': [], 'outcomes': [], 'tokens_per_second': None, 'last_error': None
+            })
+            record['outcomes'] = (record['outcomes'] + [1 if probe['success'] else 0])[-HEALTH_WINDOW:]
+            if probe['success']:
+                record['latencies'] = (record['latencies'] + [probe['latency']])[-MAX_LATENCY_SAMPLES:]
+                if probe.get('tokens_per_second') is not None:
+                    record['tokens_per_second'] = probe['tokens_per_second']
+            else:
+                record['last_error'] = probe.get('error')
+            record['updated_at'] = datetime.now().isoformat()
+    
+    def _probe(self, model: Dict, prompt: str, timeout: float, max_tokens: int) -> Dict[str, Any]:
+        """发送一次探测请求并计时"""
+        start = time.perf_counter()
+        result = self.test_model(model['id'], prompt, timeout=timeout, max_tokens=max_tokens)
+        latency = time.perf_counter() - start
+        probe = {'success': result['success'], 'latency': latency}
+        if result['success']:
+            usage = (result.get('response') or {}).get('usage') or {}
+            tokens = usage.get('completion_tokens', usage.get('output_tokens'))
+            probe['tokens_per_second'] = tokens / latency if tokens and latency > 0 else None
+        else:
+            probe['error'] = result.get('error') or result.get('message')
+        return probe
+    
+    def _benchmark_one(self, model: Dict, prompt: str, rounds: int, timeout: float,
+                       max_tokens: int) -> None:
+        """对单个模型连续测速 rounds 次"""
+        for _ in range(rounds):
+            probe = self._probe(model, prompt, timeout, max_tokens)
+            self._record_probe(model['id'], probe)
+    
+    def benchmark_models(self, model_ids: List[str] = None, test_prompt: str = "Hello",
+                         rounds: int = 3, timeout: float = 10, max_tokens: int = 16,
+                         max_workers: int = 8, save: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        并发测速所有已启用的模型
+        
+        每个模型依次请求 rounds 次，不同模型并行探测，总耗时约为最慢模型的耗时而不是所有模型之和。
+        
+        Args:
+            model_ids: 要测速的模型ID，默认所有已启用且可探测的模型
+            test_prompt: 测试提示词
+            rounds: 每个模型的请求次数
+            timeout: 单次请求超时（秒）
+            max_tokens: 最大生成token数
+            max_workers: 并发线程数
+            save: 是否保存测速结果
+            
+        Returns:
+            模型ID -> 延迟分布、tokens/s 与健康状态
+        """
+        if model_ids is None:
+            models = [m for m in self.list_models(enabled_only=True) if m.get('provider') in PROBE_PROVIDERS]
+        else:
+            models = [self.models[model_id] for model_id in model_ids if model_id in self.models]
+        if not models:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(models)))) as executor:
+            futures = [executor.submit(self._benchmark_one, model, test_prompt, rounds, timeout, max_tokens)
+                       for model in models]
+            for future in futures:
+                future.result()
+        
+        if save:
+            self._save_benchmarks()
+        return {model['id']: self.get_model_stats(model['id']) for model in models}
+    
+    def get_model_stats(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取模型的测速统计
+        
+        Args:
+            model_id: 模型ID
+            
+        Returns:
+            延迟分布（秒）、成功率、tokens/s、是否健康；未测速时返回 None
+        """
+        with self.benchmark_lock:
+            record = self.benchmarks.get(model_id)
+            if record is None:
+                return None
+            latencies = sorted(record['latencies'])
+            outcomes = list(record['outcomes'])
+            stats = {
+                'model_id': model_id,
+                'samples': len(latencies),
+                'success_rate': sum(outcomes) / len(outcomes) if outcomes else 0.0,
+                'tokens_per_second': record.get('tokens_per_second'),
+                'last_error': record.get('last_error'),
+                'updated_at': record.get('updated_at'),
+            }
+        if latencies:
+            stats.update({
+                'latency_min': latencies[0],
+                'latency_p50': _percentile(latencies, 50),
+                'latency_p95': _percentile(latencies, 95),
+                'latency_max': latencies[-1],
+                'latency_mean': sum(latencies) / len(latencies),
+            })
+        stats['healthy'] = bool(latencies) and stats['success_rate'] >= MIN_SUCCESS_RATE
+        return stats
+    
+    def rank_models(self, provider: str = None) -> List[str]:
+        """
+        按实测延迟排序可路由的模型
+        
+        顺序：健康模型按 p50 延迟升序，然后是未测速的模型（配置顺序），最后是不健康的模型。
+        
+        Args:
+            provider: 过滤提供商
+            
+        Returns:
+            模型ID列表
+        """
+        healthy, untested, unhealthy = [], [], []
+        for model in self.list_models(provider=provider, enabled_only=True):
+            if model.get('provider') not in PROBE_PROVIDERS:
+                continue
+            stats = self.get_model_stats(model['id'])
+            if stats is None:
+                untested.append(model['id'])
+            elif stats['healthy']:
+                healthy.append((stats['latency_p50'], model['id']))
+            else:
+                unhealthy.append(model['id'])
+        return [model_id for _, model_id in sorted(healthy, key=lambda item: item[0])] + untested + unhealthy
+    
+    def get_fastest_model(self, provider: str = None) -> Optional[Dict[str, Any]]:
+        """
+        获取实测最快的健康模型
+        
+        Args:
+            provider: 过滤提供商
+            
+        Returns:
+            模型配置，没有健康的已测速模型时返回 None
+        """
+        ranking = self.rank_models(provider)
+        stats = self.get_model_stats(ranking[0]) if ranking else None
+        return self.models[ranking[0]] if stats and stats['healthy'] else None
+    
+    def complete_with_fallback(self, prompt: str, max_tokens: int = 256, timeout: float = 30,
+                               provider: str = None, max_attempts: int = 3) -> Dict[str, Any]:
+        """
+        使用最快的健康模型生成回复，失败时依次回退到下一个模型
+        
+        每次调用的延迟和结果都会计入测速统计，路由随实际表现调整。
+        
+        Args:
+            prompt: 提示词
+            max_tokens: 最大生成token数
+            timeout: 单次请求超时（秒）
+            provider: 过滤提供商
+            max_attempts: 最多尝试的模型数
+            
+        Returns:
+            结果（success、model_id、text、latency、attempts）
+        """
+        attempts = []
+        for model_id in self.rank_models(provider)[:max_attempts]:
+            start = time.perf_counter()
+            result = self.test_model(model_id, prompt, timeout=timeout, max_tokens=max_tokens)
+            latency = time.perf_counter() - start
+            self._record_probe(model_id, {'success': result['success'], 'latency': latency,
+                                          'error': result.get('error') or result.get('message')})
+            attempts.append({'model_id': model_id, 'success': result['success'], 'latency': latency})
+            if result['success']:
+                return {
+                    'success': True,
+                    'model_id': model_id,
+                    'text': self._response_text(self.models[model_id], result.get('response') or {}),
+                    'latency': latency,
+                    'attempts': attempts
+                }
+        return {
+            'success': False,
+            'message': '没有可用的AI模型' if not attempts else '所有模型调用均失败',
+            'attempts': attempts
+        }
+    
+    @staticmethod
+    def _response_text(model: Dict, response: Dict[str, Any]) -> str:
+        """从响应中提取文本"""
+        try:
+            if model.get('provider') == 'anthropic':
+                return ''.join(block.get('text', '') for block in response.get('content', []))
+            return response['choices'][0]['message']['content']
+        except (KeyError, IndexError, TypeError):
+            return ''
+    
     def get_provider_info(self, provider: str) -> Optional[Dict[str, Any]]:
         """
         获取提供商信息
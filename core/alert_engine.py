@@ -0,0 +1,591 @@
+"""
+Alert Engine Module
+警报引擎模块
+
+Evaluates declarative windowed rules against the monitoring rollups on a timer
+按定时器对监控汇总数据评估声明式的窗口规则
+
+Rule kinds / 规则类型:
+    rate:       sum(field) / window_seconds, e.g. failures per second / 每秒速率
+    ratio:      sum(numerator) / sum(denominator), e.g. error rate / 比例
+    percentile: latency percentile over the window / 窗口内的延迟百分位
+    absence:    no events of a field within the window / 窗口内没有事件
+
+Firing alerts are deduplicated until they resolve, re-fires within the cooldown
+are suppressed, and notifications are sent from a background thread so neither
+recording a request nor evaluating rules waits on SMTP.
+触发中的警报在恢复前不会重复发出，冷却期内的再次触发会被抑制，通知在后台线程发送，
+记录请求和评估规则都不会等待 SMTP。
+
+A "rules" list in config/alert_rules.json replaces DEFAULT_RULES.
+config/alert_rules.json 中的 "rules" 列表会替换 DEFAULT_RULES。
+"""
+
+import json
+import operator
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from scrapers.logger import log_info, log_error, log_warning
+
+
+CONFIG_PATH = os.path.join("config", "alert_rules.json")
+
+SEVERITY_LEVELS = {"info": 0, "warning": 1, "error": 2}
+
+COMPARATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+# Thresholds are looked up by threshold_key so MonitoringDashboard.set_alert_threshold keeps working
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {
+        "name": "high_error_rate",
+        "kind": "ratio",
+        "numerator": "failed",
+        "denominator": "requests",
+        "window_seconds": 300,
+        "min_count": 10,
+        "threshold_key": "error_rate",
+        "threshold": 0.1,
+        "severity": "warning",
+        "message": "错误率过高: {value:.1%}",
+    },
+    {
+        "name": "high_captcha_rate",
+        "kind": "ratio",
+        "numerator": "captcha",
+        "denominator": "requests",
+        "window_seconds": 300,
+        "min_count": 10,
+        "threshold_key": "captcha_rate",
+        "threshold": 0.05,
+        "severity": "warning",
+        "message": "验证码触发率过高: {value:.1%}",
+    },
+    {
+        "name": "slow_response",
+        "kind": "ratio",
+        "numerator": "latency_sum",
+        "denominator": "requests",
+        "window_seconds": 300,
+        "min_count": 10,
+        "threshold_key": "avg_response_time",
+        "threshold": 10.0,
+        "severity": "info",
+        "message": "平均响应时间过长: {value:.2f}秒",
+    },
+    {
+        "name": "high_p95_latency",
+        "kind": "percentile",
+        "percentile": "p95",
+        "window_seconds": 300,
+        "min_count": 20,
+        "threshold_key": "p95_response_time",
+        "threshold": 30.0,
+        "severity": "info",
+        "message": "P95 响应时间过长: {value:.2f}秒",
+    },
+    {
+        "name": "no_traffic",
+        "kind": "absence",
+        "field": "requests",
+        "window_seconds": 900,
+        "severity": "warning",
+        "message": "{window:.0f} 秒内没有抓取请求 / No requests in {window:.0f}s",
+    },
+]
+
+DEFAULT_CONFIG = {
+    "evaluation_interval_seconds": 15,
+    "cooldown_seconds": 300,
+    "rules": DEFAULT_RULES,
+    "notify": {
+        "email": False,
+        "min_severity": "warning",
+        "mail_config": os.path.join("config", "config.json"),
+    },
+}
+
+
+def load_alert_config(path: str = CONFIG_PATH) -> Dict[str, Any]:
+    """
+    Load alert config merged over defaults
+    加载警报配置（覆盖默认值）
+
+    Args:
+        path: Config file path / 配置文件路径
+
+    Returns:
+        Config / 配置
+    """
+    config = dict(DEFAULT_CONFIG)
+    config["notify"] = dict(DEFAULT_CONFIG["notify"])
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+            config["notify"].update(loaded.pop("notify", {}))
+            config.update(loaded)
+        except Exception as e:
+            log_error(f"加载警报配置失败 / Failed to load alert config: {e}")
+    return config
+
+
+class AlertRule:
+    """One declarative alert rule / 一条声明式警报规则"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        """
+        Initialize rule from a spec dict
+        从规则字典初始化
+
+        Args:
+            spec: Rule spec (name, kind, window_seconds, threshold, ...) / 规则定义
+        """
+        self.name = spec["name"]
+        self.kind = spec["kind"]
+        if self.kind not in ("rate", "ratio", "percentile", "absence"):
+            raise ValueError(f"Unknown alert rule kind: {self.kind}")
+        self.window_seconds = float(spec.get("window_seconds", 300))
+        self.field = spec.get("field", "requests")
+        self.numerator = spec.get("numerator", "failed")
+        self.denominator = spec.get("denominator", "requests")
+        self.percentile = spec.get("percentile", "p95")
+        self.platform = spec.get("platform")
+        self.endpoint_type = spec.get("endpoint_type")
+        self.min_count = spec.get("min_count", 0)
+        self.threshold_key = spec.get("threshold_key")
+        self.threshold = float(spec.get("threshold", 0.0))
+        self.op = spec.get("op", ">")
+        if self.op not in COMPARATORS:
+            raise ValueError(f"Unknown comparator: {self.op}")
+        self.severity = spec.get("severity", "warning")
+        self.message = spec.get("message", self.name + ": {value}")
+        self.cooldown_seconds = spec.get("cooldown_seconds")
+        self.enabled = spec.get("enabled", True)
+
+    def resolve_threshold(self, thresholds: Dict[str, float]) -> float:
+        """Threshold, preferring the shared thresholds dict / 阈值（优先取共享阈值表）"""
+        if self.threshold_key and self.threshold_key in thresholds:
+            return thresholds[self.threshold_key]
+        return self.threshold
+
+    def measure(self, collector, now: float) -> Optional[float]:
+        """
+        Compute the rule's value over its window
+        计算规则在窗口内的取值
+
+        Args:
+            collector: MetricsCollector / 指标收集器
+            now: Epoch seconds / 时间戳（秒）
+
+        Returns:
+            Value, or None when there is not enough data / 取值，数据不足时为 None
+        """
+        if self.kind == "percentile":
+            stats = collector.get_latency_percentiles(self.platform, self.endpoint_type,
+                                                      self.window_seconds)
+            if stats["count"] < max(1, self.min_count):
+                return None
+            return stats[self.percentile]
+
+        totals = collector.get_window_totals(self.window_seconds, now)
+        if self.kind == "ratio":
+            denominator = totals[self.denominator]
+            if denominator <= 0 or totals["requests"] < self.min_count:
+                return None
+            return totals[self.numerator] / denominator
+        if self.kind == "rate":
+            if totals["requests"] < self.min_count:
+                return None
+            return totals[self.field] / self.window_seconds
+        # absence: only meaningful once the collector has seen traffic and been up a full window
+        if collector.total_requests == 0 or now - collector.start_time.timestamp() < self.window_seconds:
+            return None
+        return totals[self.field]
+
+    def breached(self, value: float, thresholds: Dict[str, float]) -> bool:
+        """Whether the value breaches the rule / 取值是否触发规则"""
+        if self.kind == "absence":
+            return value == 0
+        return COMPARATORS[self.op](value, self.resolve_threshold(thresholds))
+
+
+class AlertNotifier:
+    """Background notification dispatcher / 后台通知分发器"""
+
+    def __init__(self, handlers: Optional[List[Callable[[Dict[str, Any]], None]]] = None,
+                 min_severity: str = "warning", max_pending: int = 100):
+        """
+        Initialize notifier
+        初始化通知器
+
+        Args:
+            handlers: Callables receiving an alert dict / 接收警报字典的回调
+            min_severity: Lowest severity sent / 发送的最低严重程度
+            max_pending: Queue bound, extra alerts are dropped / 队列上限，超出时丢弃
+        """
+        self.handlers = list(handlers or [])
+        self.min_level = SEVERITY_LEVELS.get(min_severity, 1)
+        self.queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, alert: Dict[str, Any]) -> bool:
+        """
+        Queue an alert for delivery without blocking
+        非阻塞地将警报加入发送队列
+
+        Args:
+            alert: Alert dict / 警报字典
+
+        Returns:
+            Whether the alert was queued / 是否已入队
+        """
+        if not self.handlers or SEVERITY_LEVELS.get(alert["severity"], 0) < self.min_level:
+            return False
+        self._ensure_thread()
+        try:
+            self.queue.put_nowait(alert)
+            return True
+        except queue.Full:
+            log_warning(f"通知队列已满，丢弃警报 / Notification queue full, dropped: {alert['type']}")
+            return False
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="AlertNotifier", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            alert = self.queue.get()
+            try:
+                if alert is None:
+                    return
+                for handler in self.handlers:
+                    try:
+                        handler(alert)
+                    except Exception as e:
+                        log_error(f"发送警报通知失败 / Failed to send alert notification: {e}")
+            finally:
+                self.queue.task_done()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until queued alerts are delivered
+        等待已入队的警报发送完成
+
+        Args:
+            timeout: Max seconds to wait / 最长等待秒数
+
+        Returns:
+            Whether the queue drained / 队列是否已清空
+        """
+        deadline = time.time() + timeout
+        while self.queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.01)
+        return not self.queue.unfinished_tasks
+
+    def stop(self, timeout: float = 5.0):
+        """Deliver pending alerts and stop the thread / 发送剩余警报并停止线程"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self.queue.put(None)
+            thread.join(timeout=timeout)
+
+
+def email_handler(cfg_path: str = os.path.join("config", "config.json")) -> Callable[[Dict[str, Any]], None]:
+    """
+    Build a notification handler that mails alerts via publishers.mail_sender
+    构建通过 publishers.mail_sender 发送邮件的通知回调
+
+    Args:
+        cfg_path: Mail config path / 邮件配置路径
+
+    Returns:
+        Handler / 回调
+    """
+    def send(alert: Dict[str, Any]):
+        from publishers.mail_sender import send_email
+
+        subject = f"[ALERT][{alert['severity']}] {alert['type']}"
+        body = f"<h3>{alert.get('message', alert['type'])}</h3><p>时间 / Time: {alert.get('timestamp', '')}</p>"
+        # 规则警报带阈值，外部警报（如价格异常）只有取值和分数 / Rule alerts carry a threshold, external ones may not
+        if alert.get("value") is not None:
+            value = f"取值 / Value: {alert['value']:.4g}"
+            if alert.get("threshold") is not None:
+                value += f" (阈值 / Threshold: {alert['threshold']:.4g})"
+            body += f"<p>{value}</p>"
+        if alert.get("score") is not None:
+            body += f"<p>异常分数 / Score: {alert['score']:.4g}</p>"
+        send_email(subject, body, cfg_path=cfg_path)
+
+    return send
+
+
+class AlertEngine:
+    """Timer-driven evaluator of windowed alert rules / 定时评估窗口警报规则的引擎"""
+
+    def __init__(self, collector, rules: Optional[List[Dict[str, Any]]] = None,
+                 thresholds: Optional[Dict[str, float]] = None,
+                 on_alert: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 notifier: Optional[AlertNotifier] = None,
+                 interval: float = 15.0, cooldown_seconds: float = 300.0):
+        """
+        Initialize alert engine
+        初始化警报引擎
+
+        Args:
+            collector: MetricsCollector to evaluate against / 要评估的指标收集器
+            rules: Rule specs, defaults to DEFAULT_RULES / 规则定义
+            thresholds: Shared thresholds dict looked up by threshold_key / 按 threshold_key 查找的共享阈值表
+            on_alert: Called with every fired alert / 每次触发警报时调用
+            notifier: Background notifier / 后台通知器
+            interval: Seconds between evaluations / 评估间隔（秒）
+            cooldown_seconds: Suppress re-fires of a rule within this period / 冷却期内抑制再次触发
+        """
+        self.collector = collector
+        self.rules = [AlertRule(spec) for spec in (rules if rules is not None else DEFAULT_RULES)]
+        self.thresholds = thresholds if thresholds is not None else {}
+        self.on_alert = on_alert
+        self.notifier = notifier
+        self.interval = interval
+        self.cooldown_seconds = cooldown_seconds
+        self.lock = threading.Lock()
+        # Per-rule state: {"firing", "since", "last_fired", "value"}
+        self.state: Dict[str, Dict[str, Any]] = {}
+        self.silenced_until: Dict[str, float] = {}
+        self.suppressed_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the timer is active / 定时器是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def evaluate_once(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Evaluate every rule once
+        对所有规则评估一次
+
+        Args:
+            now: Epoch seconds, defaults to current time / 时间戳，默认当前时间
+
+        Returns:
+            Newly fired alerts / 新触发的警报
+        """
+        now = time.time() if now is None else now
+        fired = []
+        with self.lock:
+            for rule in self.rules:
+                if not rule.enabled:
+                    continue
+                try:
+                    value = rule.measure(self.collector, now)
+                except Exception as e:
+                    log_error(f"评估警报规则失败 / Failed to evaluate rule {rule.name}: {e}")
+                    continue
+                alert = self._transition(rule, value, now)
+                if alert is not None:
+                    fired.append(alert)
+
+        self._dispatch(fired)
+        return fired
+
+    def submit_external(self, alerts: List[Dict[str, Any]], source: str,
+                        now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Route alerts computed outside the rules (e.g. nightly anomaly tables)
+        through the same dedup, cooldown, silencing and notifier
+        将规则之外计算出的警报（例如每晚的异常表）经同样的去重、冷却、屏蔽和通知器发出
+
+        Each alert is keyed by "<type>:<series>". A key stays firing while it
+        appears in successive batches from the same source and resolves when
+        a batch no longer contains it.
+        每条警报以 "<type>:<series>" 为键；同一来源的后续批次仍包含该键时保持触发，不再包含时恢复。
+
+        Args:
+            alerts: Alert dicts with type, message, severity and optional series / 警报字典
+            source: Producer name; a batch only resolves its own keys / 来源名，批次只恢复自己的键
+            now: Epoch seconds, defaults to current time / 时间戳，默认当前时间
+
+        Returns:
+            Alerts that were not deduplicated or suppressed / 未被去重或抑制的警报
+        """
+        now = time.time() if now is None else now
+        fired = []
+        with self.lock:
+            seen = set()
+            for alert in alerts:
+                key = f"{alert['type']}:{alert['series']}" if alert.get("series") is not None else alert["type"]
+                seen.add(key)
+                state = self.state.setdefault(key, {"firing": False, "since": None, "last_fired": None,
+                                                    "value": None, "source": source})
+                state["value"] = alert.get("value")
+                if state["firing"]:
+                    continue
+                state["firing"] = True
+                state["since"] = now
+                silenced = max(self.silenced_until.get(key, 0), self.silenced_until.get(alert["type"], 0)) > now
+                cooling = state["last_fired"] is not None and now - state["last_fired"] < self.cooldown_seconds
+                if silenced or cooling:
+                    self.suppressed_count += 1
+                    continue
+                state["last_fired"] = now
+                fired.append({"timestamp": datetime.fromtimestamp(now, timezone.utc).isoformat(), **alert})
+            for key, state in self.state.items():
+                if state.get("source") == source and state["firing"] and key not in seen:
+                    state["firing"] = False
+                    state["since"] = None
+                    log_info(f"[ALERT] {key} 已恢复 / resolved")
+
+        self._dispatch(fired)
+        return fired
+
+    def _dispatch(self, fired: List[Dict[str, Any]]):
+        for alert in fired:
+            if self.on_alert is not None:
+                self.on_alert(alert)
+            if self.notifier is not None:
+                self.notifier.submit(alert)
+
+    def _transition(self, rule: AlertRule, value: Optional[float], now: float) -> Optional[Dict[str, Any]]:
+        state = self.state.setdefault(rule.name, {"firing": False, "since": None,
+                                                  "last_fired": None, "value": None})
+        state["value"] = value
+        if value is None or not rule.breached(value, self.thresholds):
+            if state["firing"]:
+                state["firing"] = False
+                state["since"] = None
+                log_info(f"[ALERT] {rule.name} 已恢复 / resolved")
+            return None
+
+        # Dedup: one alert per firing episode
+        if state["firing"]:
+            return None
+        state["firing"] = True
+        state["since"] = now
+
+        # Suppression: silenced rules and flapping rules inside their cooldown
+        cooldown = rule.cooldown_seconds if rule.cooldown_seconds is not None else self.cooldown_seconds
+        silenced = self.silenced_until.get(rule.name, 0) > now
+        cooling = state["last_fired"] is not None and now - state["last_fired"] < cooldown
+        if silenced or cooling:
+            self.suppressed_count += 1
+            return None
+        state["last_fired"] = now
+
+        threshold = rule.resolve_threshold(self.thresholds)
+        return {
+            "timestamp": datetime.fromtimestamp(now, timezone.utc).isoformat(),
+            "type": rule.name,
+            "message": rule.message.format(value=value, threshold=threshold, window=rule.window_seconds),
+            "severity": rule.severity,
+            "value": value,
+            "threshold": threshold,
+        }
+
+    def silence(self, rule_name: str, seconds: float, now: Optional[float] = None):
+        """
+        Suppress a rule for a period
+        在一段时间内屏蔽某条规则
+
+        Args:
+            rule_name: Rule name / 规则名称
+            seconds: Silence duration / 屏蔽时长（秒）
+            now: Epoch seconds / 时间戳（秒）
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            self.silenced_until[rule_name] = now + seconds
+        log_info(f"警报规则已屏蔽 / Alert rule silenced: {rule_name} ({seconds:.0f}s)")
+
+    def get_active_alerts(self) -> List[Dict[str, Any]]:
+        """
+        Currently firing rules
+        当前处于触发状态的规则
+
+        Returns:
+            [{"type", "since", "value"}] / 触发中的规则
+        """
+        with self.lock:
+            return [
+                {"type": name, "since": state["since"], "value": state["value"]}
+                for name, state in self.state.items() if state["firing"]
+            ]
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.evaluate_once()
+            except Exception as e:
+                log_error(f"警报评估失败 / Alert evaluation failed: {e}")
+
+    def start(self):
+        """Start evaluating on a daemon timer thread / 在守护线程中定时评估"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="AlertEngine", daemon=True)
+        self._thread.start()
+        log_info(f"警报引擎已启动 / Alert engine started (interval={self.interval}s)")
+
+    def stop(self):
+        """Stop the timer thread and flush notifications / 停止定时线程并发送剩余通知"""
+        if self.running:
+            self._stop.set()
+            self._thread.join(timeout=max(1.0, self.interval))
+            self._thread = None
+        if self.notifier is not None:
+            self.notifier.stop()
+
+    def reset(self):
+        """Clear rule state and silences / 清除规则状态和屏蔽"""
+        with self.lock:
+            self.state.clear()
+            self.silenced_until.clear()
+            self.suppressed_count = 0
+
+
+def build_alert_engine(collector, thresholds: Optional[Dict[str, float]] = None,
+                       on_alert: Optional[Callable[[Dict[str, Any]], None]] = None,
+                       config: Optional[Dict[str, Any]] = None) -> AlertEngine:
+    """
+    Build an alert engine from config/alert_rules.json
+    按 config/alert_rules.json 构建警报引擎
+
+    Args:
+        collector: MetricsCollector / 指标收集器
+        thresholds: Shared thresholds dict / 共享阈值表
+        on_alert: Called with every fired alert / 每次触发警报时调用
+        config: Config, loaded from file when None / 配置，None 时从文件加载
+
+    Returns:
+        Alert engine / 警报引擎
+    """
+    config = config or load_alert_config()
+    notify = config["notify"]
+    handlers = [email_handler(notify["mail_config"])] if notify.get("email") else []
+    notifier = AlertNotifier(handlers, min_severity=notify.get("min_severity", "warning"))
+    return AlertEngine(
+        collector,
+        rules=config["rules"],
+        thresholds=thresholds,
+        on_alert=on_alert,
+        notifier=notifier,
+        interval=config["evaluation_interval_seconds"],
+        cooldown_seconds=config["cooldown_seconds"],
+    )
@@ -1,8 +1,15 @@
 import os
 import json
-import re
+from collections import deque
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any
+
+from scrapers.event_log import EVENT_LOG_PATH, EventLogReader
+
+# 与旧版一致：产出指标只看最近 30 次保存 / As before, yield metrics cover the 30 latest saves
+RECENT_SAVES = 30
+RECENT_ERRORS = 10
+
 
 class MetricsCollector:
     """
@@ -12,73 +19,97 @@ class MetricsCollector:
     - errors_total
     - captcha_hits
     - avg_list_time
+
+    从结构化事件日志增量累计，collect() 的开销只与新事件数量相关；
+    读取偏移和累计值保存在 state_file 中，新实例可以接着上次继续。
+    Aggregates are built incrementally from the structured event log, so
+    collect() costs O(new events); offset and running totals persist in
+    state_file so fresh instances resume where the last one stopped.
     """
 
-    def __init__(self, data_dir: str = "data/amazon", log_file: str = "scraper.log"):
-        self.data_dir = data_dir
-        self.log_file = log_file
+    def __init__(self, event_log: str = EVENT_LOG_PATH, state_file: str = None):
+        self.event_log = event_log
+        self.state_file = state_file or f"{event_log}.state.json"
+        self.reader = EventLogReader(event_log)
+        self.errors_total = 0
+        self.captcha_hits = 0
+        self.list_time_sum = 0.0
+        self.list_time_count = 0
+        self.recent_saves = deque(maxlen=RECENT_SAVES)
+        self.recent_errors = deque(maxlen=RECENT_ERRORS)
+        self._load_state()
 
-    def collect(self) -> Dict[str, Any]:
-        metrics = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "items_total": 0,
-            "pages_zero": 0,
-            "errors_total": 0,
-            "captcha_hits": 0,
-            "avg_list_time": None,
-            "files_scanned": 0,
-            "avg_items_per_file": 0.0,
-            "recent_errors": [],
+    def _load_state(self):
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as fp:
+                state = json.load(fp)
+        except Exception:
+            return
+        self.reader.set_state(state.get("reader", {}))
+        self.errors_total = state.get("errors_total", 0)
+        self.captcha_hits = state.get("captcha_hits", 0)
+        self.list_time_sum = state.get("list_time_sum", 0.0)
+        self.list_time_count = state.get("list_time_count", 0)
+        self.recent_saves.extend(state.get("recent_saves", []))
+        self.recent_errors.extend(state.get("recent_errors", []))
+
+    def _save_state(self):
+        state = {
+            "reader": self.reader.get_state(),
+            "errors_total": self.errors_total,
+            "captcha_hits": self.captcha_hits,
+            "list_time_sum": self.list_time_sum,
+            "list_time_count": self.list_time_count,
+            "recent_saves": list(self.recent_saves),
+            "recent_errors": list(self.recent_errors),
         }
-        counts: List[int] = []
+        try:
+            directory = os.path.dirname(self.state_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.state_file}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as fp:
+                json.dump(state, fp, ensure_ascii=False)
+            os.replace(tmp_path, self.state_file)
+        except Exception:
+            pass
+
+    def _apply(self, event: Dict[str, Any]):
+        etype = event.get("type")
+        if etype == "fetch":
+            secs = event.get("secs")
+            if secs is not None:
+                self.list_time_sum += float(secs)
+                self.list_time_count += 1
+        elif etype == "captcha":
+            self.captcha_hits += 1
+        elif etype == "error":
+            self.errors_total += 1
+            self.recent_errors.append(
+                f"[{event.get('platform') or '-'}] {event.get('kind', 'error')}: {event.get('message', '')}"
+            )
+        elif etype == "save":
+            self.recent_saves.append(int(event.get("items", 0)))
 
-        if os.path.isdir(self.data_dir):
-            files = [
-                f for f in os.listdir(self.data_dir)
-                if f.endswith(".json")
-            ]
-            files = sorted(files, key=lambda x: os.path.getmtime(os.path.join(self.data_dir, x)), reverse=True)[:30]
-            for f in files:
-                path = os.path.join(self.data_dir, f)
-                try:
-                    with open(path, "r", encoding="utf-8") as fp:
-                        data = json.load(fp)
-                    # 支持结构：list 或 {"items": [...]}
-                    if isinstance(data, list):
-                        cnt = len(data)
-                    elif isinstance(data, dict) and "items" in data and isinstance(data["items"], list):
-                        cnt = len(data["items"])
-                    else:
-                        continue
-                    counts.append(cnt)
-                    if cnt == 0:
-                        metrics["pages_zero"] += 1
-                except Exception:
-                    continue
-            metrics["files_scanned"] = len(counts)
-            metrics["items_total"] = sum(counts)
-            if counts:
-                metrics["avg_items_per_file"] = metrics["items_total"] / len(counts)
+    def collect(self) -> Dict[str, Any]:
+        new_events = self.reader.read_new()
+        for event in new_events:
+            self._apply(event)
+        if new_events:
+            self._save_state()
 
-        if os.path.exists(self.log_file):
-            list_times: List[float] = []
-            err_capture: List[str] = []
-            with open(self.log_file, "r", encoding="utf-8") as rf:
-                for line in rf:
-                    low = line.lower()
-                    if "captcha" in low:
-                        metrics["captcha_hits"] += 1
-                    if re.search(r"\[(EXCEPTION|ERROR)\]", line.upper()):
-                        metrics["errors_total"] += 1
-                        if len(err_capture) < 10:
-                            err_capture.append(line.strip())
-                    mt = re.search(r"\[LIST_TIME\]\s+secs=([0-9]+(?:\.[0-9]+)?)", line)
-                    if mt:
-                        try:
-                            list_times.append(float(mt.group(1)))
-                        except Exception:
-                            pass
-            if list_times:
-                metrics["avg_list_time"] = round(sum(list_times)/len(list_times), 3)
-            metrics["recent_errors"] = err_capture
-        return metrics
\ No newline at end of file
+        counts = list(self.recent_saves)
+        items_total = sum(counts)
+        return {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "items_total": items_total,
+            "pages_zero": sum(1 for c in counts if c == 0),
+            "errors_total": self.errors_total,
+            "captcha_hits": self.captcha_hits,
+            "avg_list_time": round(self.list_time_sum / self.list_time_count, 3) if self.list_time_count else None,
+            "files_scanned": len(counts),
+            "avg_items_per_file": items_total / len(counts) if counts else 0.0,
+            "recent_errors": list(self.recent_errors),
+        }
@@ -0,0 +1,159 @@
+"""
+列表页指纹存储 - 增量采集
+List-page Fingerprint Store - Incremental crawling
+
+记录每个商品列表卡片（标题、价格、评分、评论数）的指纹，
+只有新商品或指纹变化的商品才需要重新采集详情页。
+Stores a fingerprint of each list-page card (title, price, rating,
+review_count) so only new or changed products get their detail page fetched.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 标准 logging：scrapers.logger 会导入 scrapers 包，而该包又导入本模块
+# Standard logging: scrapers.logger would import the scrapers package, which imports this module
+logger = logging.getLogger(__name__)
+
+# 参与指纹计算的列表卡片字段 / List card fields covered by the fingerprint
+FINGERPRINT_FIELDS = ("title", "price", "rating", "review_count")
+
+
+def card_fingerprint(product: Dict[str, Any], fields: Tuple[str, ...] = FINGERPRINT_FIELDS) -> str:
+    """
+    计算列表卡片指纹
+    Calculate list card fingerprint
+
+    Args:
+        product: 列表页商品 / List page product
+        fields: 参与计算的字段 / Fields to include
+
+    Returns:
+        指纹字符串 / Fingerprint string
+    """
+    parts = [" ".join(str(product.get(field) or "").split()) for field in fields]
+    return hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=12).hexdigest()
+
+
+class FingerprintStore:
+    """列表卡片指纹存储 / List card fingerprint store"""
+
+    def __init__(self, path: str, store_details: bool = True):
+        """
+        初始化指纹存储
+        Initialize fingerprint store
+
+        Args:
+            path: JSON 存储路径 / JSON storage path
+            store_details: 是否缓存详情以便合并到未变化的商品 / Cache details for unchanged products
+        """
+        self.path = path
+        self.store_details = store_details
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """加载指纹 / Load fingerprints"""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"加载指纹存储失败 / Failed to load fingerprint store: {e}")
+            return {}
+
+    def is_changed(self, key: str, fingerprint: str) -> bool:
+        """
+        判断商品是否为新商品或已变化
+        Check whether product is new or changed
+
+        Args:
+            key: 商品键 / Product key
+            fingerprint: 当前指纹 / Current fingerprint
+
+        Returns:
+            是否需要重新采集 / Whether re-fetch is needed
+        """
+        entry = self.entries.get(key)
+        return entry is None or entry.get("fingerprint") != fingerprint
+
+    def get_detail(self, key: str) -> Dict[str, Any]:
+        """获取缓存的详情 / Get cached detail"""
+        entry = self.entries.get(key) or {}
+        return entry.get("detail") or {}
+
+    def update(self, key: str, fingerprint: str, detail: Dict[str, Any] = None):
+        """
+        更新商品指纹（详情采集成功后调用）
+        Update product fingerprint (call after detail fetched)
+
+        Args:
+            key: 商品键 / Product key
+            fingerprint: 列表卡片指纹 / List card fingerprint
+            detail: 详情数据 / Detail data
+        """
+        entry = {
+            "fingerprint": fingerprint,
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        }
+        if self.store_details and detail:
+            entry["detail"] = detail
+        self.entries[key] = entry
+        self._dirty = True
+
+    def split(self, products: List[Dict[str, Any]],
+              key_func: Callable[[Dict[str, Any]], Optional[str]]
+              ) -> Tuple[List[Tuple[Dict[str, Any], str, str]], List[Dict[str, Any]]]:
+        """
+        将商品划分为需要采集详情和未变化两组
+        Split products into those needing detail and unchanged ones
+
+        未变化商品会合并缓存的详情（不覆盖列表页字段）。
+        Unchanged products get their cached detail merged in (list fields win).
+
+        Args:
+            products: 列表页商品 / List page products
+            key_func: 商品键函数 / Product key function
+
+        Returns:
+            ([(商品, 键, 指纹)], [未变化商品]) / ([(product, key, fingerprint)], [unchanged])
+        """
+        changed = []
+        unchanged = []
+        for product in products:
+            key = key_func(product)
+            if not key:
+                continue
+            fingerprint = card_fingerprint(product)
+            if self.is_changed(key, fingerprint):
+                changed.append((product, key, fingerprint))
+            else:
+                cached = self.get_detail(key)
+                for field, value in cached.items():
+                    product.setdefault(field, value)
+                unchanged.append(product)
+
+        logger.info(f"增量采集: 变化/新增={len(changed)}, 未变化={len(unchanged)} / "
+                 f"Incremental: changed/new={len(changed)}, unchanged={len(unchanged)}")
+        return changed, unchanged
+
+    def save(self):
+        """保存指纹（仅在有变化时） / Save fingerprints if changed"""
+        if not self._dirty:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except Exception as e:
+            logger.error(f"保存指纹存储失败 / Failed to save fingerprint store: {e}")
@@ -10,14 +10,17 @@ from datetime import datetime
 from typing import Dict, List, Any
 import logging
 
+from core.llm_gateway import LLMGateway, OpenAIChatModel, get_llm_gateway
+
 logger = logging.getLogger(__name__)
 
 
 class CrawlerEvolutionEngine:
     """爬虫进化引擎 - 使用GPT-4分析日志并优化爬虫策略"""
     
-    def __init__(self):
+    def __init__(self, llm: LLMGateway = None):
         self.api_key = os.getenv("OPENAI_API_KEY")
+        self.llm = llm
         self.evolution_log_path = "logs/evolution_history.jsonl"
         self.scraper_log_path = "scraper.log"
         os.makedirs("logs", exist_ok=True)
@@ -122,7 +125,7 @@ class CrawlerEvolutionEngine:
         使用GPT-4生成爬虫优化建议
         Use GPT-4 to generate crawler optimization suggestions
         """
-        connection_status = self.check_openai_connection()
+        connection_status = self._llm_status()
         
         if connection_status['status'] != 'success':
             return connection_status
@@ -150,15 +153,15 @@ class CrawlerEvolutionEngine:
 
 请用中文输出，简洁明了。"""
 
-            client = openai.OpenAI(api_key=self.api_key)
-            response = client.chat.completions.create(
+            # 同一份日志的重复分析直接命中响应缓存
+            response = self._get_llm().complete(
+                [{"role": "user", "content": prompt}],
                 model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
                 max_tokens=1000,
                 temperature=0.7
             )
             
-            suggestions = response.choices[0].message.content
+            suggestions = response["text"]
             
             # 保存进化记录
             evolution_record = {
@@ -186,6 +189,30 @@ class CrawlerEvolutionEngine:
                 "suggestion": "请检查API配置和网络连接"
             }
     
+    def _get_llm(self) -> LLMGateway:
+        """获取大模型网关（共享响应缓存） / Get the LLM gateway (shared response cache)"""
+        if self.llm is None:
+            gateway = get_llm_gateway()
+            if gateway.available or not self.api_key:
+                self.llm = gateway
+            else:
+                self.llm = LLMGateway(OpenAIChatModel(self.api_key), gateway.cache)
+        return self.llm
+    
+    def _llm_status(self) -> Dict[str, Any]:
+        """
+        不发请求地检查网关是否可用（check_openai_connection 会发起一次真实补全）
+        Check gateway availability without a request (check_openai_connection sends a live completion)
+        """
+        if self._get_llm().available:
+            return {"status": "success", "message": "大模型可用", "available": True}
+        return {
+            "status": "error",
+            "message": "未配置OPENAI_API_KEY",
+            "suggestion": "请在.env文件中设置 OPENAI_API_KEY",
+            "help_link": "https://platform.openai.com/api-keys"
+        }
+    
     def get_evolution_history(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
         获取进化历史记录
@@ -217,8 +244,8 @@ class CrawlerEvolutionEngine:
         自动进化流程：分析日志 -> 生成建议 -> 保存记录
         Auto evolution process: Analyze logs -> Generate suggestions -> Save records
         """
-        # Step 1: 检查OpenAI连接
-        connection = self.check_openai_connection()
+        # Step 1: 检查大模型是否可用（不发起请求）
+        connection = self._llm_status()
         if connection['status'] != 'success':
             return connection
         
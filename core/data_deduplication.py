@@ -10,6 +10,9 @@ from typing import List, Dict, Any, Set
 from datetime import datetime
 import logging
 
+from core.processing.product_identity import canonicalize_url
+from core.tracing import span
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,8 +45,9 @@ class DataDeduplicator:
             logger.error(f"Error saving seen hashes: {e}")
     
     def get_url_hash(self, url: str) -> str:
-        """基于URL生成哈希"""
-        return hashlib.md5(url.encode('utf-8')).hexdigest()
+        """基于规范化URL生成哈希（去除跟踪参数等）"""
+        canonical = canonicalize_url(url) or url
+        return hashlib.md5(canonical.encode('utf-8')).hexdigest()
     
     def get_content_hash(self, content: str) -> str:
         """基于内容生成哈希"""
@@ -124,38 +128,39 @@ class DataDeduplicator:
         """
         unique_data = []
         
-        for item in data_list:
-            is_duplicate = False
-            
-            if method == 'url' and url_key in item:
-                is_duplicate = self.is_duplicate_by_url(item[url_key])
-                identifier = item[url_key]
-            
-            elif method == 'content' and content_key in item:
-                is_duplicate = self.is_duplicate_by_content(item[content_key])
-                identifier = item[content_key]
-            
-            elif method == 'title_time' and title_key in item and time_key in item:
-                is_duplicate = self.is_duplicate_by_title_time(
-                    item[title_key], 
-                    item[time_key]
-                )
-                identifier = f"{item[title_key]}|{item[time_key]}"
-            
-            else:
-                # No valid method or missing keys, keep the item
-                unique_data.append(item)
-                continue
-            
-            if not is_duplicate:
-                unique_data.append(item)
-                # Mark as seen
-                self.mark_as_seen(method, identifier, {
-                    title_key: item.get(title_key, ''),
-                    'source': item.get('source', '')
-                })
-            else:
-                logger.info(f"Duplicate detected and skipped: {identifier[:50]}...")
+        with span("dedup", records=len(data_list), method=method):
+            for item in data_list:
+                is_duplicate = False
+                
+                if method == 'url' and url_key in item:
+                    is_duplicate = self.is_duplicate_by_url(item[url_key])
+                    identifier = item[url_key]
+                
+                elif method == 'content' and content_key in item:
+                    is_duplicate = self.is_duplicate_by_content(item[content_key])
+                    identifier = item[content_key]
+                
+                elif method == 'title_time' and title_key in item and time_key in item:
+                    is_duplicate = self.is_duplicate_by_title_time(
+                        item[title_key], 
+                        item[time_key]
+                    )
+                    identifier = f"{item[title_key]}|{item[time_key]}"
+                
+                else:
+                    # No valid method or missing keys, keep the item
+                    unique_data.append(item)
+                    continue
+                
+                if not is_duplicate:
+                    unique_data.append(item)
+                    # Mark as seen
+                    self.mark_as_seen(method, identifier, {
+                        title_key: item.get(title_key, ''),
+                        'source': item.get('source', '')
+                    })
+                else:
+                    logger.info(f"Duplicate detected and skipped: {identifier[:50]}...")
         
         logger.info(f"Deduplication: {len(data_list)} items -> {len(unique_data)} unique items")
         return unique_data
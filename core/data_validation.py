@@ -12,6 +12,7 @@ import re
 from typing import List, Dict, Any, Optional, Set, Callable
 from datetime import datetime, timezone
 from scrapers.logger import log_info, log_error, log_warning
+from core.tracing import span
 
 
 class ValidationRule:
@@ -24,7 +25,7 @@ class ValidationRule:
         
         Args:
             field: Field name to validate / 要验证的字段名
-            rule_type: Rule type (required, type, regex, range, etc.) / 规则类型
+            rule_type: Rule type (required, type, regex, length, range, enum, custom) / 规则类型
             params: Rule parameters / 规则参数
             required: Whether field is required / 字段是否必需
         """
@@ -32,6 +33,14 @@ class ValidationRule:
         self.rule_type = rule_type
         self.params = params or {}
         self.required = required
+        
+        # Precompile regex patterns once instead of on every record
+        pattern = self.params.get("pattern")
+        self._compiled_pattern = re.compile(pattern) if rule_type == "regex" and pattern else None
+        # params["search"]: match anywhere in the value (JSON Schema semantics) instead of at the start
+        self._pattern_test = None
+        if self._compiled_pattern is not None:
+            self._pattern_test = self._compiled_pattern.search if self.params.get("search") else self._compiled_pattern.match
     
     def validate(self, data: Dict[str, Any]) -> tuple[bool, Optional[str]]:
         """
@@ -59,6 +68,8 @@ class ValidationRule:
                 return False, f"字段 '{self.field}' 应为字符串类型"
             elif expected_type == "number" and not isinstance(value, (int, float)):
                 return False, f"字段 '{self.field}' 应为数字类型"
+            elif expected_type == "integer" and (not isinstance(value, int) or isinstance(value, bool)):
+                return False, f"字段 '{self.field}' 应为整数类型"
             elif expected_type == "boolean" and not isinstance(value, bool):
                 return False, f"字段 '{self.field}' 应为布尔类型"
             elif expected_type == "list" and not isinstance(value, list):
@@ -68,10 +79,15 @@ class ValidationRule:
         
         # Regex pattern check
         elif self.rule_type == "regex":
-            pattern = self.params.get("pattern")
-            if pattern and isinstance(value, str):
-                if not re.match(pattern, value):
-                    return False, f"字段 '{self.field}' 不符合正则表达式: {pattern}"
+            if self._pattern_test is not None and isinstance(value, str):
+                if not self._pattern_test(value):
+                    return False, f"字段 '{self.field}' 不符合正则表达式: {self._compiled_pattern.pattern}"
+        
+        # Enumerated values check
+        elif self.rule_type == "enum":
+            allowed = self.params.get("values") or []
+            if value not in allowed:
+                return False, f"字段 '{self.field}' 取值必须为: {allowed}"
         
         # Length check
         elif self.rule_type == "length":
@@ -172,16 +188,17 @@ class DataValidator:
         valid_data = []
         invalid_data = []
         
-        for i, data in enumerate(data_list):
-            is_valid, errors = self.validate(data)
-            if is_valid:
-                valid_data.append(data)
-            else:
-                invalid_data.append({
-                    "index": i,
-                    "data": data,
-                    "errors": errors
-                })
+        with span("validate", records=len(data_list)):
+            for i, data in enumerate(data_list):
+                is_valid, errors = self.validate(data)
+                if is_valid:
+                    valid_data.append(data)
+                else:
+                    invalid_data.append({
+                        "index": i,
+                        "data": data,
+                        "errors": errors
+                    })
         
         log_info(f"验证完成: 有效={len(valid_data)}, 无效={len(invalid_data)}")
         return valid_data, invalid_data
@@ -270,11 +287,12 @@ class DataDeduplicator:
         unique_data = []
         duplicate_count = 0
         
-        for data in data_list:
-            if self.add(data):
-                unique_data.append(data)
-            else:
-                duplicate_count += 1
+        with span("dedup", records=len(data_list)):
+            for data in data_list:
+                if self.add(data):
+                    unique_data.append(data)
+                else:
+                    duplicate_count += 1
         
         log_info(f"去重完成: 唯一={len(unique_data)}, 重复={duplicate_count}")
         return unique_data, duplicate_count
@@ -346,6 +364,198 @@ class DataQualityChecker:
         return report
 
 
+class StreamingQualityChecker:
+    """Incremental data quality checker / 增量数据质量检查器"""
+    
+    def __init__(self, validator: DataValidator = None, deduplicator: DataDeduplicator = None,
+                 tracked_fields: List[str] = None, source: str = "default",
+                 dashboard=None, publish_every: int = 100):
+        """
+        Initialize streaming quality checker
+        初始化流式质量检查器
+        
+        Counters are fixed-size (per tracked field and per rule); only the
+        deduplicator keeps one hash per unique record.
+        
+        Args:
+            validator: Data validator / 数据验证器
+            deduplicator: Data deduplicator / 数据去重器
+            tracked_fields: Fields for completeness stats, defaults to rule fields / 统计完整度的字段
+            source: Source name used when publishing metrics / 发布指标时使用的来源名称
+            dashboard: MonitoringDashboard to publish to / 用于发布指标的监控仪表板
+            publish_every: Publish after this many records / 每处理多少条记录发布一次
+        """
+        self.validator = validator or DataValidator()
+        self.deduplicator = deduplicator or DataDeduplicator()
+        if tracked_fields is None:
+            tracked_fields = list(dict.fromkeys(rule.field for rule in self.validator.rules))
+        self.tracked_fields = tracked_fields
+        self.source = source
+        self.dashboard = dashboard
+        self.publish_every = max(1, publish_every)
+        self.reset()
+    
+    def reset(self):
+        """Reset all counters / 重置所有计数器"""
+        self.input_count = 0
+        self.valid_count = 0
+        self.invalid_count = 0
+        self.unique_count = 0
+        self.duplicate_count = 0
+        self.field_present: Dict[str, int] = {field: 0 for field in self.tracked_fields}
+        self.rule_failures: Dict[str, int] = {}
+        self.start_time = datetime.now(timezone.utc)
+        self._since_publish = 0
+    
+    def add(self, data: Dict[str, Any]) -> bool:
+        """
+        Feed a single record
+        输入单条记录
+        
+        Args:
+            data: Record to check / 要检查的记录
+            
+        Returns:
+            True if record is valid and not a duplicate / 记录有效且不重复时返回 True
+        """
+        self.input_count += 1
+        
+        for field in self.tracked_fields:
+            value = data.get(field)
+            if value is not None and value != "":
+                self.field_present[field] += 1
+        
+        is_valid = True
+        for rule in self.validator.rules:
+            rule_ok, _ = rule.validate(data)
+            if not rule_ok:
+                is_valid = False
+                key = f"{rule.field}:{rule.rule_type}"
+                self.rule_failures[key] = self.rule_failures.get(key, 0) + 1
+        
+        accepted = False
+        if not is_valid:
+            self.invalid_count += 1
+        else:
+            self.valid_count += 1
+            if self.deduplicator.add(data):
+                self.unique_count += 1
+                accepted = True
+            else:
+                self.duplicate_count += 1
+        
+        self._since_publish += 1
+        if self._since_publish >= self.publish_every:
+            self.publish()
+        
+        return accepted
+    
+    def add_batch(self, data_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Feed a batch of records
+        输入一批记录
+        
+        Args:
+            data_list: Records to check / 要检查的记录列表
+            
+        Returns:
+            Valid, unique records from the batch / 批次中有效且唯一的记录
+        """
+        return [data for data in data_list if self.add(data)]
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get current quality metrics
+        获取当前质量指标
+        
+        Returns:
+            Quality metrics snapshot / 质量指标快照
+        """
+        total = self.input_count
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "duration_seconds": (datetime.now(timezone.utc) - self.start_time).total_seconds(),
+            "input_count": total,
+            "valid_count": self.valid_count,
+            "invalid_count": self.invalid_count,
+            "unique_count": self.unique_count,
+            "duplicate_count": self.duplicate_count,
+            "invalid_rate": self.invalid_count / total if total else 0,
+            "duplicate_rate": self.duplicate_count / self.valid_count if self.valid_count else 0,
+            "quality_score": self.unique_count / total if total else 0,
+            "field_completeness": {
+                field: count / total if total else 0
+                for field, count in self.field_present.items()
+            },
+            "rule_failure_rates": {
+                key: count / total if total else 0
+                for key, count in self.rule_failures.items()
+            }
+        }
+    
+    def publish(self):
+        """Publish current metrics to dashboard / 向仪表板发布当前指标"""
+        self._since_publish = 0
+        if self.dashboard is not None:
+            self.dashboard.record_quality_metrics(self.source, self.get_metrics())
+    
+    def finish(self) -> Dict[str, Any]:
+        """
+        Publish and return final metrics
+        发布并返回最终指标
+        
+        Returns:
+            Final quality metrics / 最终质量指标
+        """
+        self.publish()
+        metrics = self.get_metrics()
+        log_info(f"流式质量检查完成[{self.source}]: 输入={metrics['input_count']}, "
+                f"无效={metrics['invalid_count']}, "
+                f"重复={metrics['duplicate_count']}, "
+                f"质量分数={metrics['quality_score']:.2%}")
+        return metrics
+
+
+# Fields whose fill rate is tracked for scraped products / 统计完整度的商品字段
+PRODUCT_QUALITY_FIELDS = ["title", "price", "rating", "review_count", "url"]
+
+
+def create_scrape_quality_checker(platform: str, dashboard=None,
+                                  publish_every: int = 100) -> StreamingQualityChecker:
+    """
+    Create the running quality checker for a platform's crawl
+    为平台采集创建流式质量检查器
+    
+    Feed it each page as it is extracted; it publishes running counters to the
+    dashboard every publish_every records. Uses the platform's JSON Schema when
+    one exists (otherwise only requires a title) and deduplicates on
+    product_key, so records must be annotated first.
+    每页提取后输入；每 publish_every 条记录向仪表板发布累计指标。有平台 JSON Schema 时按其校验
+    （否则只要求标题），按 product_key 去重，需先生成商品标识。
+    
+    Args:
+        platform: Platform, used as the dashboard source / 平台（仪表板来源名）
+        dashboard: MonitoringDashboard, defaults to the global one / 监控仪表板，默认全局实例
+        publish_every: Publish after this many records / 每处理多少条记录发布一次
+        
+    Returns:
+        Quality checker / 质量检查器
+    """
+    from core.schema_validation import find_schema_file, get_platform_validator
+    if dashboard is None:
+        from core.monitoring import get_monitoring_dashboard
+        dashboard = get_monitoring_dashboard()
+    
+    if find_schema_file(f"{platform.lower()}_product_schema") is not None:
+        validator = get_platform_validator(platform)
+    else:
+        validator = DataValidator()
+        validator.add_rule(ValidationRule("title", "length", {"min": 1}))
+    return StreamingQualityChecker(validator, create_product_deduplicator(),
+                                   tracked_fields=PRODUCT_QUALITY_FIELDS, source=platform,
+                                   dashboard=dashboard, publish_every=publish_every)
+
+
 # Predefined validators for common use cases / 常见用例的预定义验证器
 
 def create_amazon_validator() -> DataValidator:
@@ -353,24 +563,14 @@ def create_amazon_validator() -> DataValidator:
     Create validator for Amazon product data
     创建 Amazon 商品数据验证器
     
+    Compiled from the Amazon product JSON Schema / 由 Amazon 商品 JSON Schema 编译生成
+    
     Returns:
         Configured validator / 配置好的验证器
     """
-    validator = DataValidator()
-    
-    # Required fields
-    validator.add_rule(ValidationRule("asin", "type", {"type": "string"}, required=True))
-    validator.add_rule(ValidationRule("title", "type", {"type": "string"}, required=True))
-    validator.add_rule(ValidationRule("title", "length", {"min": 1}, required=True))
-    
-    # Optional fields with type checks
-    validator.add_rule(ValidationRule("price", "type", {"type": "string"}, required=False))
-    validator.add_rule(ValidationRule("rating", "type", {"type": "string"}, required=False))
-    validator.add_rule(ValidationRule("review_count", "type", {"type": "string"}, required=False))
-    validator.add_rule(ValidationRule("url", "type", {"type": "string"}, required=False))
-    
-    # ASIN format validation
-    validator.add_rule(ValidationRule("asin", "regex", {"pattern": r"^[A-Z0-9]{10}$"}, required=True))
+    # Rules live in data/schema/amazon_product_schema.json
+    from core.schema_validation import get_platform_validator
+    validator = get_platform_validator("amazon")
     
     log_info("Amazon 产品验证器已创建")
     return validator
@@ -386,3 +586,18 @@ def create_amazon_deduplicator() -> DataDeduplicator:
     """
     # Deduplicate based on ASIN (unique product identifier)
     return DataDeduplicator(hash_fields=["asin"])
+
+
+def create_product_deduplicator() -> DataDeduplicator:
+    """
+    Create cross-platform product deduplicator
+    创建跨平台商品去重器
+    
+    Requires records annotated by core.processing.product_identity.annotate_products
+    需要先用 annotate_products 为记录生成 product_key
+    
+    Returns:
+        Configured deduplicator / 配置好的去重器
+    """
+    # Deduplicate based on canonical product key (platform + native ID)
+    return DataDeduplicator(hash_fields=["product_key"])
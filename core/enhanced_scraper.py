@@ -24,6 +24,8 @@ from typing import List, Dict, Any, Optional
 from pathlib import Path
 import logging
 
+from core.metrics_exporter import get_metrics_registry, maybe_start_metrics_server
+
 logger = logging.getLogger(__name__)
 
 
@@ -77,6 +79,15 @@ class EnhancedScraper:
         self.max_retries = max_retries
         self.cache_ttl = timedelta(hours=cache_ttl_hours)
         
+        # 缓存命中统计 / Cache hit statistics
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+        # 导出缓存命中率（设置 SCRAPER_METRICS_PORT 时提供 HTTP 端点）
+        # Export the cache hit ratio (served over HTTP when SCRAPER_METRICS_PORT is set)
+        get_metrics_registry().register_cache(f"enhanced_scraper:{self.cache_dir}", self.get_cache_stats)
+        maybe_start_metrics_server()
+        
         # 创建必要的目录
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.data_dir.mkdir(parents=True, exist_ok=True)
@@ -146,12 +157,18 @@ class EnhancedScraper:
                 with open(cache_path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
                     logger.info(f"Cache hit: {url}")
+                    self.cache_hits += 1
                     return data
             except Exception as e:
                 logger.error(f"Error reading cache: {e}")
         
+        self.cache_misses += 1
         return None
     
+    def get_cache_stats(self) -> Dict[str, int]:
+        """获取缓存命中统计 / Get cache hit statistics"""
+        return {"hits": self.cache_hits, "misses": self.cache_misses}
+    
     def _save_to_cache(self, url: str, data: Dict[str, Any]):
         """保存数据到缓存 / Save data to cache"""
         cache_key = self._get_cache_key(url)
@@ -0,0 +1,87 @@
+"""
+File Lock Module
+文件锁模块
+
+Inter-process locks and atomic replacement for JSON state files that several
+scraper processes read, merge and rewrite
+多个采集进程读取、合并并重写的 JSON 状态文件的进程间锁与原子替换
+"""
+
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(path: str, timeout: float = 30.0) -> Iterator[None]:
+    """
+    在 <path>.lock 上持有独占锁
+    Hold an exclusive lock on <path>.lock
+
+    Args:
+        path: 被保护的文件 / Protected file
+        timeout: 最长等待秒数 / Maximum wait in seconds
+
+    Raises:
+        TimeoutError: 超时未获得锁 / Lock not acquired in time
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    deadline = time.monotonic() + timeout
+    with open(f"{path}.lock", "a+b") as handle:
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for lock on {path}")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def write_json_atomic(path: str, data: Any, **dump_kwargs):
+    """
+    经唯一临时文件原子写入 JSON
+    Write JSON atomically through a unique temp file
+
+    Args:
+        path: 目标文件 / Target file
+        data: 可序列化数据 / JSON-serializable data
+        **dump_kwargs: json.dump 参数 / json.dump arguments
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "x", encoding="utf-8") as f:
+            json.dump(data, f, **dump_kwargs)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,253 @@
+"""
+Streaming Latency Histogram Module
+流式延迟直方图模块
+
+Mergeable log-bucketed histograms with sliding windows for tail latency percentiles
+可合并的对数分桶直方图，支持滑动窗口的尾延迟百分位统计
+"""
+
+import math
+import time
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+DEFAULT_PERCENTILES = (50.0, 90.0, 95.0, 99.0, 99.9)
+
+
+def percentile_label(p: float) -> str:
+    """Format a percentile as p50 / p99 / p999 / 格式化百分位名称"""
+    return "p" + f"{p:g}".replace(".", "")
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram / 对数分桶延迟直方图"""
+
+    def __init__(self, relative_error: float = 0.01, min_value: float = 1e-6):
+        """
+        Initialize histogram
+        初始化直方图
+
+        Bucket boundaries grow geometrically, so every recorded value is
+        reported within ``relative_error`` regardless of magnitude, and two
+        histograms with the same settings merge by adding counts.
+
+        Args:
+            relative_error: Max relative error of reported values / 最大相对误差
+            min_value: Values below this share the lowest bucket (seconds) / 最小可区分值（秒）
+        """
+        self.relative_error = relative_error
+        self.min_value = min_value
+        self._gamma = (1 + relative_error) / (1 - relative_error)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def _index(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        return int(math.ceil(math.log(value / self.min_value) / self._log_gamma))
+
+    def _bucket_value(self, index: int) -> float:
+        if index == 0:
+            return self.min_value
+        # Midpoint that keeps the relative error symmetric inside the bucket
+        return self.min_value * 2 * self._gamma ** index / (self._gamma + 1)
+
+    def _value_at(self, index: int, rank: int) -> float:
+        # Extreme ranks are exact, everything else clamps to the observed range
+        if rank >= self.count:
+            return self.max
+        if rank <= 1:
+            return self.min
+        return min(max(self._bucket_value(index), self.min), self.max)
+
+    def record(self, value: float, count: int = 1):
+        """
+        Record a value
+        记录一个值
+
+        Args:
+            value: Latency in seconds / 延迟（秒）
+            count: Number of occurrences / 出现次数
+        """
+        index = self._index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram"):
+        """
+        Merge another histogram into this one
+        合并另一个直方图
+
+        Args:
+            other: Histogram with the same relative error / 相同精度的直方图
+        """
+        if other.relative_error != self.relative_error or other.min_value != self.min_value:
+            raise ValueError("Histograms with different bucket layouts cannot be merged")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> float:
+        """
+        Get the value at a percentile
+        获取百分位值
+
+        Args:
+            p: Percentile in [0, 100] / 百分位
+
+        Returns:
+            Latency in seconds, 0 if empty / 延迟（秒），无数据时为 0
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(p / 100.0 * self.count))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return self._value_at(index, rank)
+        return self.max
+
+    def percentiles(self, ps: Iterable[float] = DEFAULT_PERCENTILES) -> Dict[str, float]:
+        """
+        Get several percentiles in one pass
+        一次获取多个百分位
+
+        Args:
+            ps: Percentiles / 百分位列表
+
+        Returns:
+            {"p50": ..., "p99": ..., "p999": ...}
+        """
+        ps = sorted(ps)
+        result = {percentile_label(p): 0.0 for p in ps}
+        if self.count == 0:
+            return result
+
+        ranks = [(max(1, math.ceil(p / 100.0 * self.count)), p) for p in ps]
+        seen = 0
+        i = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            while i < len(ranks) and seen >= ranks[i][0]:
+                result[percentile_label(ranks[i][1])] = self._value_at(index, ranks[i][0])
+                i += 1
+            if i == len(ranks):
+                break
+        return result
+
+    def cumulative_counts(self, bounds: Iterable[float]) -> List[int]:
+        """
+        Count values at or below each bound (Prometheus-style buckets)
+        统计不超过各上界的值数量（Prometheus 风格的桶）
+
+        Args:
+            bounds: Ascending upper bounds in seconds / 升序上界（秒）
+
+        Returns:
+            Cumulative counts per bound / 各上界的累计数量
+        """
+        ordered = sorted(self.buckets.items())
+        result = []
+        seen = 0
+        i = 0
+        for bound in bounds:
+            limit = self._index(bound)
+            while i < len(ordered) and ordered[i][0] <= limit:
+                seen += ordered[i][1]
+                i += 1
+            result.append(seen)
+        return result
+
+    def mean(self) -> float:
+        """Mean latency / 平均延迟"""
+        return self.total / self.count if self.count else 0.0
+
+    def copy(self) -> "LatencyHistogram":
+        """Copy histogram / 复制直方图"""
+        clone = LatencyHistogram(self.relative_error, self.min_value)
+        clone.merge(self)
+        return clone
+
+
+class SlidingWindowHistogram:
+    """Ring of per-interval histograms for windowed percentiles / 滑动窗口直方图"""
+
+    def __init__(self, slot_seconds: float = 10.0, num_slots: int = 360,
+                 relative_error: float = 0.01):
+        """
+        Initialize sliding window histogram
+        初始化滑动窗口直方图
+
+        Args:
+            slot_seconds: Width of one slot / 每个时间槽宽度（秒）
+            num_slots: Number of slots kept (history = slot_seconds * num_slots) / 保留的槽数
+            relative_error: Histogram relative error / 直方图相对误差
+        """
+        self.slot_seconds = slot_seconds
+        self.num_slots = num_slots
+        self.relative_error = relative_error
+        self.lock = Lock()
+        self._slots: List[Optional[Tuple[int, LatencyHistogram]]] = [None] * num_slots
+        self.lifetime = LatencyHistogram(relative_error)
+
+    def record(self, value: float, now: Optional[float] = None):
+        """
+        Record a latency
+        记录延迟
+
+        Args:
+            value: Latency in seconds / 延迟（秒）
+            now: Epoch timestamp, defaults to current time / 时间戳
+        """
+        epoch = int((now if now is not None else time.time()) // self.slot_seconds)
+        position = epoch % self.num_slots
+        with self.lock:
+            slot = self._slots[position]
+            if slot is None or slot[0] != epoch:
+                slot = (epoch, LatencyHistogram(self.relative_error))
+                self._slots[position] = slot
+            slot[1].record(value)
+            self.lifetime.record(value)
+
+    def window(self, window_seconds: Optional[float] = None, now: Optional[float] = None) -> LatencyHistogram:
+        """
+        Merge slots inside the window
+        合并窗口内的时间槽
+
+        Args:
+            window_seconds: Window length, None for lifetime / 窗口长度，None 表示全部
+            now: Epoch timestamp / 时间戳
+
+        Returns:
+            Merged histogram / 合并后的直方图
+        """
+        with self.lock:
+            if window_seconds is None:
+                return self.lifetime.copy()
+            current = int((now if now is not None else time.time()) // self.slot_seconds)
+            oldest = current - max(1, math.ceil(window_seconds / self.slot_seconds)) + 1
+            merged = LatencyHistogram(self.relative_error)
+            for slot in self._slots:
+                if slot is not None and oldest <= slot[0] <= current:
+                    merged.merge(slot[1])
+            return merged
+
+    def reset(self):
+        """Clear all slots / 清除所有时间槽"""
+        with self.lock:
+            self._slots = [None] * self.num_slots
+            self.lifetime = LatencyHistogram(self.relative_error)
@@ -0,0 +1,521 @@
+"""
+LLM Gateway Module
+大模型调用网关模块
+
+Routes chat completions through a response cache keyed by model, generation
+parameters and normalized prompt, with TTL and LRU eviction persisted to disk.
+Identical in-flight requests are coalesced into one call, and requests can run
+in the background with a timeout so analysis pages do not block on the API.
+通过响应缓存发送对话补全请求（按模型、生成参数和规范化提示词建键，支持 TTL 与 LRU 淘汰并持久化到磁盘）。
+相同的进行中请求会合并为一次调用，请求可在后台执行并设置超时，分析页面不会被 API 阻塞。
+
+Backends / 后端:
+    OpenAIChatModel: openai package (1.x client, falls back to the legacy API) / openai 包
+    StubChatModel:   local deterministic model for tests and offline use / 本地确定性模型
+
+SCRAPER_LLM_BACKEND=stub selects the stub for the shared gateway.
+SCRAPER_LLM_BACKEND=stub 时全局网关使用本地模型。
+"""
+
+import asyncio
+import atexit
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from core.file_lock import file_lock, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_PATH = os.environ.get("SCRAPER_LLM_CACHE", os.path.join("data", "cache", "llm_responses.json"))
+DEFAULT_TTL_SECONDS = 24 * 3600
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_TIMEOUT = 60.0
+# Minimum seconds between cache file rewrites / 缓存文件两次重写的最小间隔（秒）
+SAVE_INTERVAL_SECONDS = 5.0
+
+Messages = List[Dict[str, str]]
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_messages(messages: Messages) -> Messages:
+    """
+    Normalize prompt messages so formatting-only differences share a cache entry
+    规范化提示词，使仅格式不同的请求共享缓存
+
+    Args:
+        messages: Chat messages / 对话消息
+
+    Returns:
+        Messages with role and whitespace-collapsed content / 折叠空白后的消息
+    """
+    return [{"role": message.get("role", "user"),
+             "content": _WHITESPACE.sub(" ", str(message.get("content", ""))).strip()}
+            for message in messages]
+
+
+def cache_key(model: str, messages: Messages, **params) -> str:
+    """
+    Cache key for a completion request
+    对话补全请求的缓存键
+
+    Args:
+        model: Model name / 模型名称
+        messages: Chat messages / 对话消息
+        **params: Generation parameters (max_tokens, temperature...) / 生成参数
+
+    Returns:
+        Hex digest / 十六进制摘要
+    """
+    payload = json.dumps({"model": model, "messages": normalize_messages(messages), "params": params},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """
+    LRU response cache with TTL, persisted as JSON
+    带 TTL 的 LRU 响应缓存（JSON 持久化）
+
+    Several processes (Streamlit, scheduler) share the file: saving merges this
+    process's new entries into it under a file lock.
+    多个进程共享同一文件：保存时在文件锁下把本进程新增的条目合并进去。
+    """
+
+    def __init__(self, path: Optional[str] = LLM_CACHE_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, save_interval: float = SAVE_INTERVAL_SECONDS):
+        """
+        Initialize cache
+        初始化缓存
+
+        Args:
+            path: Persistence file, None for memory only / 持久化文件，None 表示仅内存
+            ttl_seconds: Entry lifetime / 条目有效期（秒）
+            max_entries: Maximum entries before LRU eviction / LRU 淘汰前的最大条目数
+            save_interval: Minimum seconds between saves from maybe_save / maybe_save 的最小保存间隔
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.save_interval = save_interval
+        self.lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # 上次保存后新增的条目 / Entries added since the last save
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self._last_save = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get a fresh entry and mark it recently used
+        获取未过期的条目并标记为最近使用
+
+        Args:
+            key: Cache key / 缓存键
+            now: Current time / 当前时间
+
+        Returns:
+            Entry with text, model and created_at, or None / 缓存条目或 None
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and now - entry["created_at"] > self.ttl_seconds:
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, text: str, model: str, now: Optional[float] = None):
+        """
+        Store a response, evicting the least recently used entries
+        保存响应，并淘汰最久未使用的条目
+
+        Args:
+            key: Cache key / 缓存键
+            text: Response text / 响应文本
+            model: Model name / 模型名称
+            now: Current time / 当前时间
+        """
+        with self.lock:
+            entry = {"text": text, "model": model, "created_at": time.time() if now is None else now}
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            self.pending[key] = entry
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def clear(self):
+        """Remove all entries / 清空缓存"""
+        with self.lock:
+            self.entries.clear()
+            self.pending.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def maybe_save(self) -> bool:
+        """
+        Save new entries unless the last save was under save_interval ago
+        距上次保存超过 save_interval 时保存新增条目
+
+        Returns:
+            Whether saved / 是否保存
+        """
+        if time.time() - self._last_save < self.save_interval:
+            return False
+        return self.flush()
+
+    def flush(self) -> bool:
+        """Save if there are unsaved entries / 有未保存条目时保存"""
+        return self.save() if self.pending else False
+
+    def save(self, path: Optional[str] = None) -> bool:
+        """
+        Save unexpired entries (oldest use first)
+        保存未过期的条目
+
+        Saving to the init path merges the file's entries with the ones added
+        here since the last save, and loads the other processes' entries
+        into memory; any other path gets a snapshot of memory.
+        保存到初始化路径时合并文件中的条目与本进程新增条目，并把其他进程的条目载入内存；
+        保存到其他路径只写出内存快照。
+
+        Args:
+            path: File path, defaults to the one given at init / 文件路径
+
+        Returns:
+            Whether saved / 是否保存成功
+        """
+        path = path or self.path
+        if not path:
+            return False
+        now = time.time()
+        try:
+            with self._save_lock, file_lock(path):
+                with self.lock:
+                    merging = path == self.path
+                    pending = dict(self.pending) if merging else {}
+                    snapshot = None if merging else list(self.entries.items())
+                if merging:
+                    merged = OrderedDict(self._read(path)) if os.path.exists(path) else OrderedDict()
+                    for key, entry in pending.items():
+                        merged[key] = entry
+                        merged.move_to_end(key)
+                else:
+                    merged = OrderedDict(snapshot)
+                data = OrderedDict((key, entry) for key, entry in merged.items()
+                                   if now - entry["created_at"] <= self.ttl_seconds)
+                while len(data) > self.max_entries:
+                    data.popitem(last=False)
+                write_json_atomic(path, {"entries": data}, ensure_ascii=False)
+                if merging:
+                    with self.lock:
+                        for key in pending:
+                            if self.pending.get(key) is pending[key]:
+                                del self.pending[key]
+                        for key, entry in data.items():
+                            self.entries.setdefault(key, entry)
+                    self._last_save = now
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to save LLM response cache: {e}")
+            return False
+
+    @staticmethod
+    def _read(path: str) -> Dict[str, Dict[str, Any]]:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("entries", {})
+
+    def load(self, path: Optional[str] = None) -> bool:
+        """
+        Load saved entries, dropping expired ones
+        加载已保存的条目（丢弃过期条目）
+
+        Args:
+            path: File path, defaults to the one given at init / 文件路径
+
+        Returns:
+            Whether loaded / 是否加载成功
+        """
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            entries = self._read(path)
+            now = time.time()
+            with self.lock:
+                for key, entry in entries.items():
+                    if now - entry["created_at"] <= self.ttl_seconds:
+                        self.entries[key] = entry
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to load LLM response cache: {e}")
+            return False
+
+
+class StubChatModel:
+    """Local deterministic chat model for tests / 用于测试的本地确定性对话模型"""
+
+    def __init__(self, responder: Optional[Callable[[str, Messages], str]] = None, delay: float = 0.0):
+        """
+        Initialize stub
+        初始化本地模型
+
+        Args:
+            responder: Function (model, messages) -> text, defaults to an echo / 响应函数，默认回显
+            delay: Seconds to sleep per call (simulates latency) / 每次调用的延迟（秒）
+        """
+        self.responder = responder
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def complete(self, model: str, messages: Messages, **params) -> str:
+        """Return a canned response / 返回固定格式的响应"""
+        with self.lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.responder is not None:
+            return self.responder(model, messages)
+        prompt = messages[-1]["content"] if messages else ""
+        return f"[{model}] {_WHITESPACE.sub(' ', prompt).strip()[:200]}"
+
+
+class OpenAIChatModel:
+    """Chat completions through the openai package / 通过 openai 包调用对话补全"""
+
+    def __init__(self, api_key: Optional[str] = None):
+        """
+        Initialize backend
+        初始化后端
+
+        Args:
+            api_key: API key, defaults to OPENAI_API_KEY / API 密钥
+
+        Raises:
+            ImportError: openai package not installed / 未安装 openai 包
+        """
+        import openai
+        self.openai = openai
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.client = openai.OpenAI(api_key=self.api_key) if hasattr(openai, "OpenAI") else None
+        if self.client is None:
+            openai.api_key = self.api_key
+
+    def complete(self, model: str, messages: Messages, **params) -> str:
+        """Send one chat completion request / 发送一次对话补全请求"""
+        if self.client is not None:
+            response = self.client.chat.completions.create(model=model, messages=messages, **params)
+        else:
+            response = self.openai.ChatCompletion.create(model=model, messages=messages, **params)
+        return response.choices[0].message.content
+
+
+class LLMGateway:
+    """Cached, coalescing chat completion gateway / 带缓存与请求合并的对话补全网关"""
+
+    def __init__(self, backend: Any = None, cache: Optional[ResponseCache] = None,
+                 max_workers: int = 4, timeout: float = DEFAULT_TIMEOUT):
+        """
+        Initialize gateway
+        初始化网关
+
+        Args:
+            backend: Object with complete(model, messages, **params) -> str, None if unavailable / 模型后端
+            cache: Response cache, defaults to a memory-only cache / 响应缓存
+            max_workers: Background request threads / 后台请求线程数
+            timeout: Default wait for complete() in seconds / complete() 默认等待时间（秒）
+        """
+        self.backend = backend
+        self.cache = cache if cache is not None else ResponseCache(path=None)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.in_flight: Dict[str, Future] = {}
+        self.backend_calls = 0
+        self.coalesced = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def available(self) -> bool:
+        """Whether a model backend is configured / 是否配置了模型后端"""
+        return self.backend is not None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self.lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="llm")
+            return self._executor
+
+    def submit(self, messages: Messages, model: str, use_cache: bool = True, **params) -> Future:
+        """
+        Start a completion in the background
+        在后台发起对话补全
+
+        A cached response resolves immediately; an identical request already in
+        flight is shared instead of sent again.
+        命中缓存时立即完成；相同的进行中请求会被共享而不是重复发送。
+
+        Args:
+            messages: Chat messages / 对话消息
+            model: Model name / 模型名称
+            use_cache: Read and write the response cache / 是否使用缓存
+            **params: Generation parameters / 生成参数
+
+        Returns:
+            Future resolving to {"text", "model", "cached"} / 结果 Future
+
+        Raises:
+            RuntimeError: No backend configured / 未配置模型后端
+        """
+        if self.backend is None:
+            raise RuntimeError("No LLM backend configured")
+        key = cache_key(model, messages, **params)
+        if use_cache:
+            entry = self.cache.get(key)
+            if entry is not None:
+                future: Future = Future()
+                future.set_result({"text": entry["text"], "model": entry["model"], "cached": True})
+                return future
+
+        with self.lock:
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            future = Future()
+            self.in_flight[key] = future
+        self._get_executor().submit(self._run, key, future, messages, model, use_cache, params)
+        return future
+
+    def _run(self, key: str, future: Future, messages: Messages, model: str,
+             use_cache: bool, params: Dict[str, Any]):
+        try:
+            with self.lock:
+                self.backend_calls += 1
+            text = self.backend.complete(model, messages, **params)
+            if use_cache:
+                self.cache.put(key, text, model)
+                self.cache.maybe_save()
+            result = {"text": text, "model": model, "cached": False}
+        except BaseException as e:
+            with self.lock:
+                self.in_flight.pop(key, None)
+            future.set_exception(e)
+            return
+        with self.lock:
+            self.in_flight.pop(key, None)
+        future.set_result(result)
+
+    def complete(self, messages: Messages, model: str, timeout: Optional[float] = None,
+                 use_cache: bool = True, **params) -> Dict[str, Any]:
+        """
+        Run a completion and wait for it
+        执行对话补全并等待结果
+
+        Args:
+            messages: Chat messages / 对话消息
+            model: Model name / 模型名称
+            timeout: Seconds to wait, defaults to the gateway timeout / 等待时间（秒）
+            use_cache: Read and write the response cache / 是否使用缓存
+            **params: Generation parameters / 生成参数
+
+        Returns:
+            {"text", "model", "cached"} / 结果
+
+        Raises:
+            concurrent.futures.TimeoutError: No response in time (the request keeps running
+                and its response is still cached) / 超时（请求继续执行，结果仍会缓存）
+        """
+        future = self.submit(messages, model, use_cache=use_cache, **params)
+        return future.result(timeout=self.timeout if timeout is None else timeout)
+
+    async def acomplete(self, messages: Messages, model: str, timeout: Optional[float] = None,
+                        use_cache: bool = True, **params) -> Dict[str, Any]:
+        """
+        Await a completion without blocking the event loop
+        在事件循环中等待对话补全（不阻塞）
+
+        Raises:
+            asyncio.TimeoutError: No response in time / 超时
+        """
+        future = self.submit(messages, model, use_cache=use_cache, **params)
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)),
+                                      self.timeout if timeout is None else timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache and request counters / 缓存与请求计数"""
+        return {
+            "cache_entries": len(self.cache),
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+            "backend_calls": self.backend_calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self.in_flight),
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Stop background threads / 停止后台线程"""
+        with self.lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+        # 写出去抖期间累积的条目 / Flush entries held back by the save interval
+        self.cache.flush()
+
+
+def _default_backend() -> Any:
+    """Backend selected by environment / 根据环境变量选择后端"""
+    if os.getenv("SCRAPER_LLM_BACKEND", "").lower() == "stub":
+        return StubChatModel()
+    if not os.getenv("OPENAI_API_KEY"):
+        logger.warning("OPENAI_API_KEY not configured")
+        return None
+    try:
+        return OpenAIChatModel()
+    except ImportError:
+        logger.warning("OpenAI package not installed")
+        return None
+
+
+_global_gateway: Optional[LLMGateway] = None
+_global_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """
+    Get global LLM gateway instance
+    获取全局大模型网关实例
+
+    Returns:
+        LLM gateway with the persisted response cache / 使用持久化响应缓存的网关
+    """
+    global _global_gateway
+    if _global_gateway is None:
+        with _global_lock:
+            if _global_gateway is None:
+                cache = ResponseCache()
+                cache.load()
+                _global_gateway = LLMGateway(_default_backend(), cache)
+                atexit.register(cache.flush)
+    return _global_gateway
@@ -0,0 +1,442 @@
+"""
+Metrics Exporter Module
+指标导出模块
+
+Metrics registry with an OpenMetrics text endpoint for Prometheus
+指标注册表，提供供 Prometheus 抓取的 OpenMetrics 文本端点
+
+Metrics live in the memory of the process that scrapes, so the endpoint is
+served from inside that process: set SCRAPER_METRICS_PORT and TaskQueue.start()
+(or the first EnhancedScraper) starts it, exporting the queue, the caches and
+the monitoring dashboard of that process.
+指标保存在抓取进程内存中，因此端点由该进程提供：设置 SCRAPER_METRICS_PORT 后，
+TaskQueue.start()（或首个 EnhancedScraper）会启动它并导出本进程的队列、缓存和监控数据。
+"""
+
+import inspect
+import math
+import os
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from scrapers.logger import log_info, log_error, log_warning
+
+
+# Port to serve metrics on; unset keeps the exporter off / 指标端口，未设置时不启动
+METRICS_PORT_ENV = "SCRAPER_METRICS_PORT"
+METRICS_HOST_ENV = "SCRAPER_METRICS_HOST"
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Upper bounds for exported latency buckets (seconds) / 导出的延迟桶上界（秒）
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if math.isinf(bound) else repr(float(bound))
+
+
+class MetricFamily:
+    """One metric with its samples / 一个指标及其样本"""
+
+    def __init__(self, name: str, metric_type: str, help_text: str = "", unit: str = ""):
+        """
+        Initialize metric family
+        初始化指标族
+
+        Args:
+            name: Metric name without suffix / 指标名（不含后缀）
+            metric_type: counter, gauge, histogram, stateset or info / 指标类型
+            help_text: Help text / 帮助文本
+            unit: Unit, e.g. seconds / 单位
+        """
+        self.name = name
+        self.type = metric_type
+        self.help = help_text
+        self.unit = unit
+        self.samples: List[Tuple[str, Dict[str, Any], float]] = []
+
+    def add(self, value: float, labels: Dict[str, Any] = None, suffix: str = ""):
+        """
+        Add a sample
+        添加样本
+
+        Args:
+            value: Sample value / 样本值
+            labels: Label set / 标签
+            suffix: Sample suffix (_total, _bucket...) / 样本后缀
+        """
+        self.samples.append((self.name + suffix, labels or {}, value))
+
+    def add_histogram(self, labels: Dict[str, Any], bounds: Iterable[float],
+                      cumulative: List[int], count: int, total: float):
+        """
+        Add histogram samples
+        添加直方图样本
+
+        Args:
+            labels: Label set / 标签
+            bounds: Bucket upper bounds / 桶上界
+            cumulative: Cumulative counts per bound / 各上界累计数量
+            count: Total count / 总数
+            total: Sum of values / 值之和
+        """
+        for bound, value in zip(bounds, cumulative):
+            self.add(value, {**labels, "le": _format_bound(bound)}, "_bucket")
+        self.add(count, {**labels, "le": "+Inf"}, "_bucket")
+        self.add(count, labels, "_count")
+        self.add(total, labels, "_sum")
+
+    def render(self) -> List[str]:
+        """Render in OpenMetrics text format / 渲染为 OpenMetrics 文本"""
+        lines = [f"# TYPE {self.name} {self.type}"]
+        if self.unit:
+            lines.append(f"# UNIT {self.name} {self.unit}")
+        if self.help:
+            lines.append(f"# HELP {self.name} {_escape(self.help)}")
+        for sample_name, labels, value in self.samples:
+            if labels:
+                label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f"{sample_name}{{{label_text}}} {_format_value(value)}")
+            else:
+                lines.append(f"{sample_name} {_format_value(value)}")
+        return lines
+
+
+Collector = Callable[[], List[MetricFamily]]
+
+
+class MetricsRegistry:
+    """Registry of metric collectors / 指标收集器注册表"""
+
+    def __init__(self):
+        """Initialize registry / 初始化注册表"""
+        self.lock = Lock()
+        self.collectors: Dict[str, Collector] = {}
+
+    def register(self, name: str, collector: Collector):
+        """
+        Register a collector, replacing one with the same name
+        注册收集器（同名覆盖）
+
+        Args:
+            name: Collector name / 收集器名称
+            collector: Callable returning metric families / 返回指标族的函数
+        """
+        with self.lock:
+            self.collectors[name] = collector
+
+    def unregister(self, name: str):
+        """Remove a collector / 移除收集器"""
+        with self.lock:
+            self.collectors.pop(name, None)
+
+    def collect(self) -> List[MetricFamily]:
+        """
+        Run all collectors, merging families that share a name
+        运行所有收集器，合并同名指标族
+
+        Returns:
+            Metric families / 指标族列表
+        """
+        with self.lock:
+            collectors = list(self.collectors.items())
+
+        families: Dict[str, MetricFamily] = {}
+        for name, collector in collectors:
+            try:
+                for family in collector():
+                    existing = families.get(family.name)
+                    if existing is None:
+                        families[family.name] = family
+                    else:
+                        existing.samples.extend(family.samples)
+            except Exception as e:
+                log_error(f"指标收集失败 / Metrics collector failed: {name} - {e}")
+        return list(families.values())
+
+    def render(self) -> str:
+        """
+        Render all metrics in OpenMetrics text format
+        以 OpenMetrics 文本格式渲染所有指标
+
+        Returns:
+            Exposition text / 指标文本
+        """
+        lines = []
+        for family in self.collect():
+            lines.extend(family.render())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def register_dashboard(self, dashboard=None, name: str = "scraper"):
+        """
+        Export request counters and latency histograms of a monitoring dashboard
+        导出监控仪表板的请求计数和延迟直方图
+
+        Args:
+            dashboard: MonitoringDashboard, defaults to global instance (resolved on first scrape) / 监控仪表板
+            name: Collector name / 收集器名称
+        """
+        def collect() -> List[MetricFamily]:
+            if dashboard is None:
+                from core.monitoring import get_monitoring_dashboard
+                return collect_dashboard(get_monitoring_dashboard())
+            return collect_dashboard(dashboard)
+        
+        self.register(name, collect)
+
+    def register_task_queue(self, queue, queue_name: str = "default"):
+        """
+        Export depth and task states of a TaskQueue
+        导出任务队列深度和任务状态
+
+        Args:
+            queue: TaskQueue instance / 任务队列
+            queue_name: Queue label / 队列标签
+        """
+        self.register(f"task_queue:{queue_name}", lambda: collect_task_queue(queue, queue_name))
+
+    def unregister_task_queue(self, queue_name: str = "default"):
+        """Stop exporting a TaskQueue / 停止导出任务队列"""
+        self.unregister(f"task_queue:{queue_name}")
+
+    def register_cache(self, cache_name: str, source: Any):
+        """
+        Export hit/miss counters of a cache
+        导出缓存命中/未命中计数
+
+        A bound method is held through a weak reference so the registry does
+        not keep its owner alive; the collector removes itself once the owner
+        has been garbage collected.
+        绑定方法以弱引用持有，注册表不会延长其对象的生命周期；对象被回收后收集器自动移除。
+
+        Args:
+            cache_name: Cache label / 缓存标签
+            source: Callable returning {"hits", "misses"}, or an lru_cache function / 统计来源
+        """
+        name = f"cache:{cache_name}"
+        if not inspect.ismethod(source):
+            self.register(name, lambda: collect_cache(cache_name, source))
+            return
+
+        method_ref = weakref.WeakMethod(source)
+
+        def collect() -> List[MetricFamily]:
+            method = method_ref()
+            if method is None:
+                self.unregister(name)
+                return []
+            return collect_cache(cache_name, method)
+
+        self.register(name, collect)
+
+
+def collect_dashboard(dashboard) -> List[MetricFamily]:
+    """
+    Collect scraper metrics from a monitoring dashboard
+    从监控仪表板收集抓取指标
+
+    Args:
+        dashboard: MonitoringDashboard / 监控仪表板
+
+    Returns:
+        Metric families / 指标族列表
+    """
+    collector = dashboard.metrics_collector
+
+    requests = MetricFamily("scraper_requests", "counter", "Scraping requests by outcome")
+    items = MetricFamily("scraper_items", "counter", "Items scraped")
+    for platform, stats in collector.get_platform_stats().items():
+        requests.add(stats["successful"], {"platform": platform, "status": "success"}, "_total")
+        requests.add(stats["failed"], {"platform": platform, "status": "failure"}, "_total")
+        items.add(stats["items"], {"platform": platform}, "_total")
+
+    current = collector.get_current_stats()
+    captcha = MetricFamily("scraper_captcha_hits", "counter", "Requests blocked by captcha")
+    captcha.add(current["captcha_hits"], suffix="_total")
+    uptime = MetricFamily("scraper_uptime_seconds", "gauge", "Seconds since metrics reset", "seconds")
+    uptime.add(current["uptime_seconds"])
+
+    latency = MetricFamily("scraper_request_duration_seconds", "histogram",
+                           "Scraping request latency", "seconds")
+    for (platform, endpoint_type), window in list(collector.latency_histograms.items()):
+        histogram = window.window(None)
+        latency.add_histogram({"platform": platform, "endpoint": endpoint_type}, LATENCY_BUCKETS,
+                              histogram.cumulative_counts(LATENCY_BUCKETS),
+                              histogram.count, histogram.total)
+
+    invalid = MetricFamily("scraper_quality_invalid_ratio", "gauge", "Share of invalid records per source")
+    for source, metrics in dict(dashboard.quality_stats).items():
+        invalid.add(metrics.get("invalid_rate", 0.0), {"source": source})
+
+    return [requests, items, captcha, uptime, latency, invalid]
+
+
+def collect_task_queue(queue, queue_name: str) -> List[MetricFamily]:
+    """
+    Collect TaskQueue metrics
+    收集任务队列指标
+
+    Args:
+        queue: TaskQueue instance / 任务队列
+        queue_name: Queue label / 队列标签
+
+    Returns:
+        Metric families / 指标族列表
+    """
+    stats = queue.get_stats()
+
+    depth = MetricFamily("task_queue_depth", "gauge", "Entries waiting in the queue")
+    depth.add(stats["queue_size"], {"queue": queue_name})
+    tasks = MetricFamily("task_queue_tasks", "gauge", "Tasks by status")
+    for status in ("pending", "running", "completed", "failed", "cancelled"):
+        tasks.add(stats[status], {"queue": queue_name, "status": status})
+    workers = MetricFamily("task_queue_workers", "gauge", "Running worker threads")
+    workers.add(stats["workers"], {"queue": queue_name})
+
+    return [depth, tasks, workers]
+
+
+def collect_cache(cache_name: str, source: Any) -> List[MetricFamily]:
+    """
+    Collect cache hit metrics
+    收集缓存命中指标
+
+    Args:
+        cache_name: Cache label / 缓存标签
+        source: Callable returning {"hits", "misses"}, or an lru_cache function / 统计来源
+
+    Returns:
+        Metric families / 指标族列表
+    """
+    if hasattr(source, "cache_info"):
+        info = source.cache_info()
+        hits, misses = info.hits, info.misses
+    else:
+        stats = source()
+        hits, misses = stats.get("hits", 0), stats.get("misses", 0)
+
+    labels = {"cache": cache_name}
+    hit_family = MetricFamily("cache_hits", "counter", "Cache hits")
+    hit_family.add(hits, labels, "_total")
+    miss_family = MetricFamily("cache_misses", "counter", "Cache misses")
+    miss_family.add(misses, labels, "_total")
+    ratio = MetricFamily("cache_hit_ratio", "gauge", "Cache hit ratio since start")
+    lookups = hits + misses
+    ratio.add(hits / lookups if lookups else 0.0, labels)
+
+    return [hit_family, miss_family, ratio]
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """HTTP handler serving /metrics / 提供 /metrics 的 HTTP 处理器"""
+
+    registry: MetricsRegistry = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood stderr
+        pass
+
+
+def start_metrics_server(port: int = 9464, host: str = "127.0.0.1",
+                         registry: Optional[MetricsRegistry] = None) -> ThreadingHTTPServer:
+    """
+    Serve metrics over HTTP in a daemon thread
+    在守护线程中通过 HTTP 提供指标
+
+    Args:
+        port: Listen port, 0 picks a free one / 监听端口，0 为自动分配
+        host: Listen address / 监听地址
+        registry: Registry, defaults to the global one / 注册表，默认全局注册表
+
+    Returns:
+        Running server; call shutdown() to stop / 运行中的服务器，调用 shutdown() 停止
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,),
+                   {"registry": registry or get_metrics_registry()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, name="MetricsExporter", daemon=True).start()
+    log_info(f"指标导出服务已启动 / Metrics exporter listening on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+_global_server: Optional[ThreadingHTTPServer] = None
+_server_lock = Lock()
+
+
+def maybe_start_metrics_server() -> Optional[ThreadingHTTPServer]:
+    """
+    Start the exporter for this process once, if SCRAPER_METRICS_PORT is set
+    若设置了 SCRAPER_METRICS_PORT，则为本进程启动一次指标导出服务
+
+    Returns:
+        Running server, or None when disabled or the port is taken / 运行中的服务器；未开启或端口被占用时为 None
+    """
+    global _global_server
+    port = os.environ.get(METRICS_PORT_ENV)
+    if not port:
+        return None
+    with _server_lock:
+        if _global_server is None:
+            try:
+                _global_server = start_metrics_server(int(port), os.environ.get(METRICS_HOST_ENV, "127.0.0.1"))
+            except (OSError, ValueError) as e:
+                log_warning(f"无法启动指标导出服务 / Cannot start metrics exporter on port {port}: {e}")
+                return None
+    return _global_server
+
+
+_global_registry: Optional[MetricsRegistry] = None
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """
+    Get global metrics registry, pre-wired to the monitoring dashboard and numeric parse caches
+    获取全局指标注册表（已接入监控仪表板和数值解析缓存）
+
+    Returns:
+        Metrics registry / 指标注册表
+    """
+    global _global_registry
+    if _global_registry is None:
+        from core.processing import normalization
+
+        registry = MetricsRegistry()
+        registry.register_dashboard()
+        registry.register_cache("parse_price", normalization._parse_price_str)
+        registry.register_cache("parse_rating", normalization._parse_rating_str)
+        registry.register_cache("parse_count", normalization._parse_count_str)
+        _global_registry = registry
+    return _global_registry
+
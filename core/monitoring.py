@@ -7,23 +7,29 @@ Provides real-time monitoring of scraping operations
 """
 
 import time
-from datetime import datetime, timezone, timedelta
+import numpy as np
+from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional, Set
 from collections import deque
 from threading import Lock
 from scrapers.logger import log_info, log_error, log_warning
+from core.latency_histogram import SlidingWindowHistogram, LatencyHistogram, DEFAULT_PERCENTILES
+from core.time_series_buffer import EventRingBuffer, RollupSeries, ROLLUP_FIELDS
+from core.alert_engine import build_alert_engine
+from core.processing.anomaly_detector import anomaly_alerts, create_streaming_detector
 
 
 class MetricsCollector:
     """Metrics collector for monitoring / 用于监控的指标收集器"""
     
-    def __init__(self, max_history: int = 1000):
+    def __init__(self, max_history: int = 1000, anomaly_method: str = "ewma"):
         """
         Initialize metrics collector
         初始化指标收集器
         
         Args:
             max_history: Maximum number of historical records / 最大历史记录数
+            anomaly_method: Streaming detector per metric (ewma, zscore, iqr) / 每个指标的流式检测器
         """
         self.max_history = max_history
         self.lock = Lock()
@@ -42,18 +48,30 @@ class MetricsCollector:
         self.max_response_time = 0.0
         
         # Historical data (time-series)
-        self.request_history = deque(maxlen=max_history)
+        self.request_history = EventRingBuffer(max_history)
         self.error_history = deque(maxlen=max_history)
-        self.performance_history = deque(maxlen=max_history)
+        
+        # Pre-aggregated rollups: 1 hour per second, 1 day per minute
+        self.second_rollup = RollupSeries(resolution_seconds=1, num_buckets=3600)
+        self.minute_rollup = RollupSeries(resolution_seconds=60, num_buckets=1440)
         
         # Platform-specific metrics
         self.platform_metrics: Dict[str, Dict[str, Any]] = {}
         
+        # Latency histograms per (platform, endpoint type), each with its own lock
+        self.latency_histograms: Dict[tuple, SlidingWindowHistogram] = {}
+        self._histogram_lock = Lock()
+        
+        # Streaming anomaly detectors per metric (O(1) state each)
+        self.anomaly_method = anomaly_method
+        self.anomaly_detectors: Dict[str, Any] = {}
+        self.anomaly_history = deque(maxlen=max_history)
+        
         # Start time
         self.start_time = datetime.now(timezone.utc)
     
     def record_request(self, platform: str, success: bool, response_time: float, 
-                      items_count: int = 0, error_type: str = None):
+                      items_count: int = 0, error_type: str = None, endpoint_type: str = "page"):
         """
         Record a scraping request
         记录一次抓取请求
@@ -64,9 +82,12 @@ class MetricsCollector:
             response_time: Response time in seconds / 响应时间（秒）
             items_count: Number of items scraped / 抓取的项目数
             error_type: Type of error if failed / 失败时的错误类型
+            endpoint_type: Endpoint type (list, detail, review...) / 端点类型
         """
+        self._get_histogram(platform, endpoint_type).record(response_time)
+        
         with self.lock:
-            timestamp = datetime.now(timezone.utc).isoformat()
+            now = time.time()
             
             # Update global metrics
             self.total_requests += 1
@@ -104,26 +125,66 @@ class MetricsCollector:
             else:
                 platform_stats["failed"] += 1
             
+            self._observe_locked(f"response_time:{platform}", response_time, now)
+            
             # Add to history
-            self.request_history.append({
-                "timestamp": timestamp,
-                "platform": platform,
-                "success": success,
-                "response_time": response_time,
-                "items_count": items_count
-            })
+            self.request_history.append(now, platform, success, response_time, items_count, error_type)
+            captcha = error_type == "captcha"
+            self.second_rollup.add(now, success, response_time, items_count, captcha)
+            self.minute_rollup.add(now, success, response_time, items_count, captcha)
             
             if not success:
                 self.error_history.append({
-                    "timestamp": timestamp,
+                    "timestamp": datetime.fromtimestamp(now, timezone.utc).isoformat(),
                     "platform": platform,
                     "error_type": error_type
                 })
+    
+    def observe_metric(self, name: str, value: float, timestamp: Optional[float] = None) -> bool:
+        """
+        Feed a metric value to its streaming anomaly detector
+        将指标值送入其流式异常检测器
+        
+        Args:
+            name: Metric name / 指标名称
+            value: Observed value / 观测值
+            timestamp: Unix time, defaults to now / 时间戳
+            
+        Returns:
+            Whether the value is anomalous / 是否异常
+        """
+        with self.lock:
+            return self._observe_locked(name, value, timestamp if timestamp is not None else time.time())
+    
+    def _observe_locked(self, name: str, value: float, now: float) -> bool:
+        """Run the metric's detector; caller holds self.lock / 运行指标检测器（调用方持有锁）"""
+        detector = self.anomaly_detectors.get(name)
+        if detector is None:
+            detector = self.anomaly_detectors[name] = create_streaming_detector(self.anomaly_method)
+        if not detector.update(value):
+            return False
+        self.anomaly_history.append({
+            "timestamp": datetime.fromtimestamp(now, timezone.utc).isoformat(),
+            "metric": name,
+            "value": value
+        })
+        return True
+    
+    def get_metric_anomalies(self, count: int = 100, metric: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get recent streaming anomalies
+        获取最近的流式异常
+        
+        Args:
+            count: Number of anomalies to return / 返回的数量
+            metric: Only this metric / 仅此指标
             
-            self.performance_history.append({
-                "timestamp": timestamp,
-                "response_time": response_time
-            })
+        Returns:
+            Anomalies, oldest first / 异常列表（旧到新）
+        """
+        with self.lock:
+            anomalies = [a for a in self.anomaly_history if metric is None or a["metric"] == metric]
+        return anomalies[-count:]
     
     def get_current_stats(self) -> Dict[str, Any]:
         """
@@ -156,6 +217,60 @@ class MetricsCollector:
                 "requests_per_minute": (self.total_requests / uptime * 60) if uptime > 0 else 0
             }
     
+    def _get_histogram(self, platform: str, endpoint_type: str) -> SlidingWindowHistogram:
+        """Get or create latency histogram / 获取或创建延迟直方图"""
+        key = (platform, endpoint_type)
+        histogram = self.latency_histograms.get(key)
+        if histogram is None:
+            with self._histogram_lock:
+                histogram = self.latency_histograms.setdefault(key, SlidingWindowHistogram())
+        return histogram
+    
+    def get_latency_percentiles(self, platform: str = None, endpoint_type: str = None,
+                                window_seconds: Optional[float] = 300,
+                                percentiles=DEFAULT_PERCENTILES) -> Dict[str, Any]:
+        """
+        Get latency percentiles over a sliding window
+        获取滑动窗口内的延迟百分位
+        
+        Args:
+            platform: Platform filter, None for all / 平台过滤，None 表示全部
+            endpoint_type: Endpoint type filter, None for all / 端点类型过滤
+            window_seconds: Window length, None for lifetime / 窗口长度，None 表示全部
+            percentiles: Percentiles to compute / 要计算的百分位
+            
+        Returns:
+            {"count", "mean", "p50", "p90", "p95", "p99", "p999"} / 百分位统计
+        """
+        merged = LatencyHistogram()
+        now = time.time()
+        for (hist_platform, hist_endpoint), histogram in list(self.latency_histograms.items()):
+            if platform is not None and hist_platform != platform:
+                continue
+            if endpoint_type is not None and hist_endpoint != endpoint_type:
+                continue
+            merged.merge(histogram.window(window_seconds, now))
+        
+        result = {"count": merged.count, "mean": merged.mean()}
+        result.update(merged.percentiles(percentiles))
+        return result
+    
+    def get_latency_breakdown(self, window_seconds: Optional[float] = 300) -> Dict[str, Dict[str, Any]]:
+        """
+        Get latency percentiles per platform and endpoint type
+        按平台和端点类型获取延迟百分位
+        
+        Args:
+            window_seconds: Window length / 窗口长度
+            
+        Returns:
+            {"platform/endpoint": percentiles} / 各维度百分位
+        """
+        return {
+            f"{platform}/{endpoint_type}": self.get_latency_percentiles(platform, endpoint_type, window_seconds)
+            for platform, endpoint_type in list(self.latency_histograms.keys())
+        }
+    
     def get_platform_stats(self) -> Dict[str, Dict[str, Any]]:
         """
         Get platform-specific statistics
@@ -179,7 +294,8 @@ class MetricsCollector:
             Recent request records / 最近的请求记录
         """
         with self.lock:
-            return list(self.request_history)[-count:]
+            events = self.request_history.tail(count).copy()
+        return self.request_history.to_records(events)
     
     def get_recent_errors(self, count: int = 100) -> List[Dict[str, Any]]:
         """
@@ -195,35 +311,62 @@ class MetricsCollector:
         with self.lock:
             return list(self.error_history)[-count:]
     
-    def get_time_series_data(self, minutes: int = 60) -> Dict[str, List[Any]]:
+    def get_time_series_data(self, minutes: int = 60) -> Dict[str, Any]:
         """
-        Get time-series data for charting
-        获取用于图表的时间序列数据
+        Get time-series data for charting from pre-aggregated rollups
+        从预聚合汇总获取用于图表的时间序列数据
+        
+        Windows up to 5 minutes use per-second buckets, longer ones per-minute buckets.
+        5 分钟以内使用按秒汇总，更长窗口使用按分钟汇总。
         
         Args:
             minutes: Number of minutes to include / 包含的分钟数
             
         Returns:
-            Time-series data / 时间序列数据
+            Time-series data, one list entry per bucket / 时间序列数据，每个桶一项
         """
+        rollup = self.second_rollup if minutes <= 5 else self.minute_rollup
         with self.lock:
-            cutoff_time = datetime.now(timezone.utc) - timedelta(minutes=minutes)
-            
-            # Filter recent data
-            recent_requests = [
-                r for r in self.request_history 
-                if datetime.fromisoformat(r["timestamp"]) > cutoff_time
-            ]
-            
-            recent_performance = [
-                p for p in self.performance_history
-                if datetime.fromisoformat(p["timestamp"]) > cutoff_time
-            ]
+            series = rollup.query(minutes * 60, time.time())
+        
+        requests = series["requests"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            avg_latency = np.where(requests > 0, series["latency_sum"] / requests, 0.0)
+        
+        return {
+            "resolution_seconds": rollup.resolution,
+            "timestamps": series["timestamps"].tolist(),
+            "requests": requests.astype(int).tolist(),
+            "successful": series["successful"].astype(int).tolist(),
+            "failed": series["failed"].astype(int).tolist(),
+            "items": series["items"].astype(int).tolist(),
+            "avg_response_time": avg_latency.tolist(),
+            "max_response_time": series["latency_max"].tolist()
+        }
+    
+    def get_window_totals(self, window_seconds: float, now: Optional[float] = None) -> Dict[str, float]:
+        """
+        Sum rollup buckets over a trailing window
+        汇总最近一个窗口内的汇总桶
+        
+        Windows up to one hour use per-second buckets, longer ones per-minute buckets.
+        一小时以内使用按秒汇总，更长窗口使用按分钟汇总。
+        
+        Args:
+            window_seconds: Window length / 窗口长度（秒）
+            now: Epoch seconds, defaults to current time / 时间戳，默认当前时间
             
-            return {
-                "requests": recent_requests,
-                "performance": recent_performance
-            }
+        Returns:
+            {"requests", "successful", "failed", "items", "latency_sum", "latency_max", "captcha"}
+        """
+        now = time.time() if now is None else now
+        rollup = self.second_rollup if window_seconds <= 3600 else self.minute_rollup
+        with self.lock:
+            series = rollup.query(window_seconds, now)
+        
+        totals = {field: float(series[field].sum()) for field in ROLLUP_FIELDS}
+        totals["latency_max"] = float(series["latency_max"].max()) if len(series["latency_max"]) else 0.0
+        return totals
     
     def reset(self):
         """Reset all metrics / 重置所有指标"""
@@ -241,9 +384,15 @@ class MetricsCollector:
             
             self.request_history.clear()
             self.error_history.clear()
-            self.performance_history.clear()
+            self.second_rollup.clear()
+            self.minute_rollup.clear()
             
             self.platform_metrics.clear()
+            self.anomaly_detectors.clear()
+            self.anomaly_history.clear()
+            
+            with self._histogram_lock:
+                self.latency_histograms.clear()
             
             self.start_time = datetime.now(timezone.utc)
             
@@ -261,11 +410,18 @@ class MonitoringDashboard:
             "error_rate": 0.1,  # 10% error rate
             "captcha_rate": 0.05,  # 5% captcha rate
             "avg_response_time": 10.0,  # 10 seconds
+            "invalid_rate": 0.2,  # 20% invalid records
+            "p95_response_time": 30.0,  # 30 seconds
         }
         self.recent_alert_types: Set[str] = set()  # Track recent alerts to avoid duplicates
+        self.quality_stats: Dict[str, Dict[str, Any]] = {}  # Live data quality per source
+        # Windowed rules are evaluated on a timer, not per recorded request
+        self.alert_engine = build_alert_engine(self.metrics_collector, self.alert_thresholds,
+                                               on_alert=self._on_engine_alert)
     
     def record_scraping_operation(self, platform: str, success: bool, response_time: float,
-                                  items_count: int = 0, error_type: str = None):
+                                  items_count: int = 0, error_type: str = None,
+                                  endpoint_type: str = "page"):
         """
         Record a scraping operation
         记录一次抓取操作
@@ -276,9 +432,56 @@ class MonitoringDashboard:
             response_time: Response time in seconds / 响应时间（秒）
             items_count: Number of items scraped / 抓取的项目数
             error_type: Type of error if failed / 失败时的错误类型
+            endpoint_type: Endpoint type (list, detail, review...) / 端点类型
+        """
+        self.metrics_collector.record_request(platform, success, response_time, items_count,
+                                              error_type, endpoint_type)
+    
+    def record_quality_metrics(self, source: str, metrics: Dict[str, Any]):
+        """
+        Record live data quality metrics
+        记录实时数据质量指标
+        
+        Args:
+            source: Source name (platform or pipeline) / 来源名称（平台或流水线）
+            metrics: Quality metrics snapshot / 质量指标快照
+        """
+        self.quality_stats[source] = metrics
+        
+        alert_type = f"high_invalid_rate:{source}"
+        invalid_rate = metrics.get("invalid_rate", 0)
+        if metrics.get("input_count", 0) > 10 and invalid_rate > self.alert_thresholds["invalid_rate"]:
+            if alert_type not in self.recent_alert_types:
+                self._add_alert(
+                    "high_invalid_rate",
+                    f"[{source}] 无效数据比例过高: {invalid_rate:.1%}",
+                    "warning"
+                )
+                self.recent_alert_types.add(alert_type)
+        else:
+            self.recent_alert_types.discard(alert_type)
+    
+    def record_anomaly_table(self, table, min_methods: int = 2, limit: int = 50,
+                             source: str = "price_anomalies") -> int:
         """
-        self.metrics_collector.record_request(platform, success, response_time, items_count, error_type)
-        self._check_alerts()
+        Raise alerts from a batch anomaly table (e.g. nightly price checks)
+        根据批量异常表发出警报（例如每晚的价格检查）
+        
+        Alerts go through the alert engine, so a series that stays anomalous
+        across runs alerts once, and notifications use the engine's notifier.
+        警报经警报引擎发出：持续异常的序列只警报一次，通知走引擎的通知器。
+        
+        Args:
+            table: Result of detect_anomalies_batch / 批量检测结果
+            min_methods: Minimum methods flagging a point / 至少多少种方法判定为异常
+            limit: Maximum alerts / 最大警报数
+            source: Producer name; series missing from the next table resolve / 来源名，下次未出现的序列视为恢复
+            
+        Returns:
+            Number of alerts fired / 触发的警报数
+        """
+        alerts = anomaly_alerts(table, min_methods=min_methods, limit=limit)
+        return len(self.alert_engine.submit_external(alerts, source))
     
     def get_dashboard_data(self) -> Dict[str, Any]:
         """
@@ -294,53 +497,35 @@ class MonitoringDashboard:
             "recent_requests": self.metrics_collector.get_recent_requests(50),
             "recent_errors": self.metrics_collector.get_recent_errors(20),
             "time_series": self.metrics_collector.get_time_series_data(60),
+            "latency_percentiles": self.metrics_collector.get_latency_percentiles(),
+            "latency_breakdown": self.metrics_collector.get_latency_breakdown(),
+            "quality_stats": dict(self.quality_stats),
+            "metric_anomalies": self.metrics_collector.get_metric_anomalies(20),
+            "active_alerts": self.alert_engine.get_active_alerts(),
             "alerts": self.alerts[-10:]  # Last 10 alerts
         }
     
-    def _check_alerts(self):
-        """Check for alert conditions / 检查警报条件"""
-        stats = self.metrics_collector.get_current_stats()
-        
-        # Check error rate
-        if stats["total_requests"] > 10:  # Only check if we have enough data
-            error_rate = stats["failed_requests"] / stats["total_requests"]
-            if error_rate > self.alert_thresholds["error_rate"]:
-                # Only add alert if not recently added
-                if "high_error_rate" not in self.recent_alert_types:
-                    self._add_alert(
-                        "high_error_rate",
-                        f"错误率过高: {error_rate:.1%}",
-                        "warning"
-                    )
-                    self.recent_alert_types.add("high_error_rate")
-            else:
-                # Clear the recent alert if rate is back to normal
-                self.recent_alert_types.discard("high_error_rate")
-            
-            # Check captcha rate
-            captcha_rate = stats["captcha_hits"] / stats["total_requests"]
-            if captcha_rate > self.alert_thresholds["captcha_rate"]:
-                if "high_captcha_rate" not in self.recent_alert_types:
-                    self._add_alert(
-                        "high_captcha_rate",
-                        f"验证码触发率过高: {captcha_rate:.1%}",
-                        "warning"
-                    )
-                    self.recent_alert_types.add("high_captcha_rate")
-            else:
-                self.recent_alert_types.discard("high_captcha_rate")
-            
-            # Check average response time
-            if stats["avg_response_time"] > self.alert_thresholds["avg_response_time"]:
-                if "slow_response" not in self.recent_alert_types:
-                    self._add_alert(
-                        "slow_response",
-                        f"平均响应时间过长: {stats['avg_response_time']:.2f}秒",
-                        "info"
-                    )
-                    self.recent_alert_types.add("slow_response")
-            else:
-                self.recent_alert_types.discard("slow_response")
+    def check_alerts(self) -> List[Dict[str, Any]]:
+        """
+        Evaluate alert rules now (the engine timer does this periodically)
+        立即评估警报规则（引擎定时器会周期性执行）
+        
+        Returns:
+            Newly fired alerts / 新触发的警报
+        """
+        return self.alert_engine.evaluate_once()
+    
+    def start_alerting(self):
+        """Start the periodic alert evaluation thread / 启动周期性警报评估线程"""
+        self.alert_engine.start()
+    
+    def stop_alerting(self):
+        """Stop alert evaluation and flush notifications / 停止警报评估并发送剩余通知"""
+        self.alert_engine.stop()
+    
+    def _on_engine_alert(self, alert: Dict[str, Any]):
+        """Record an alert fired by the engine / 记录引擎触发的警报"""
+        self._add_alert(alert["type"], alert["message"], alert["severity"])
     
     def _add_alert(self, alert_type: str, message: str, severity: str):
         """
@@ -387,6 +572,8 @@ class MonitoringDashboard:
         self.metrics_collector.reset()
         self.alerts.clear()
         self.recent_alert_types.clear()
+        self.alert_engine.reset()
+        self.quality_stats.clear()
         log_info("监控仪表板已重置")
 
 
@@ -405,4 +592,5 @@ def get_monitoring_dashboard() -> MonitoringDashboard:
     global _global_dashboard
     if _global_dashboard is None:
         _global_dashboard = MonitoringDashboard()
+        _global_dashboard.start_alerting()
     return _global_dashboard
@@ -1,14 +1,367 @@
 """
 Anomaly detection for data analysis.
+
+Batch detectors work on whole series; the mask helpers operate along the last
+axis, so a 2D array of series (one row per metric or SKU) is checked in one
+vectorized pass, with NaN treated as missing. detect_anomalies_batch runs them
+over many series (2D array or long-format frame) in memory-bounded chunks and
+returns a sparse table of anomalous points. Streaming detectors keep O(1)
+state per metric and classify each new value against the history seen so far.
 """
 
-from typing import List, Dict, Tuple
+import math
+from typing import Any, Iterator, List, Dict, Optional, Sequence, Tuple
 import numpy as np
+import pandas as pd
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def rolling_mean_std(values, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean and population std of every full window along the last axis.
+
+    Uses cumulative sums of mean-centered values, so the cost is O(n) regardless
+    of window size. Windows whose values are all equal get an exact 0 std;
+    windows containing NaN get NaN.
+
+    Args:
+        values: 1D series or 2D array of series (one per row)
+        window: Window length
+
+    Returns:
+        Tuple of (means, stds), each with last axis n - window + 1, where entry
+        s describes values[..., s:s + window]
+    """
+    arr = np.asarray(values, dtype=float)
+    n = arr.shape[-1]
+    if window < 1 or n < window:
+        empty = np.empty(arr.shape[:-1] + (0,))
+        return empty, empty.copy()
+
+    missing = np.isnan(arr)
+    present = (~missing).sum(axis=-1, keepdims=True)
+    offset = np.where(present > 0, np.where(missing, 0.0, arr).sum(axis=-1, keepdims=True) / np.maximum(present, 1), 0.0)
+    centered = np.where(missing, 0.0, arr - offset)
+
+    def window_sums(values):
+        totals = np.concatenate([np.zeros(arr.shape[:-1] + (1,), dtype=values.dtype),
+                                 np.cumsum(values, axis=-1)], axis=-1)
+        return totals[..., window:] - totals[..., :-window]
+
+    window_mean = window_sums(centered) / window
+    variance = window_sums(centered * centered) / window - window_mean ** 2
+
+    # Count value changes so constant windows are detected exactly
+    changes = np.concatenate([np.zeros(arr.shape[:-1] + (1,), dtype=np.int64),
+                              np.cumsum(arr[..., 1:] != arr[..., :-1], axis=-1)], axis=-1)
+    constant = changes[..., window - 1:] == changes[..., :n - window + 1]
+    variance = np.where(constant, 0.0, np.maximum(variance, 0.0))
+    gaps = window_sums(missing.astype(np.int64)) > 0
+    window_mean = np.where(gaps, np.nan, window_mean + offset)
+    return window_mean, np.where(gaps, np.nan, np.sqrt(variance))
+
+
+def zscore_anomaly_mask(values, threshold: float = 2.5) -> np.ndarray:
+    """
+    Z-score anomalies along the last axis.
+
+    Args:
+        values: 1D series or 2D array of series
+        threshold: Z-score threshold
+
+    Returns:
+        Boolean mask shaped like values
+    """
+    z_scores = _zscores(np.asarray(values, dtype=float))
+    return z_scores > threshold
+
+
+def _zscores(arr: np.ndarray) -> np.ndarray:
+    """Absolute z-scores along the last axis ignoring NaN; NaN where undefined."""
+    present = ~np.isnan(arr)
+    count = present.sum(axis=-1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(present, arr, 0.0).sum(axis=-1, keepdims=True) / count
+        deviation = np.where(present, arr - mean, 0.0)
+        std = np.sqrt((deviation * deviation).sum(axis=-1, keepdims=True) / count)
+        return np.where(std > 0, np.abs(arr - mean) / std, np.nan)
+
+
+def _quartiles(arr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Linear-interpolated 25th/75th percentiles along the last axis ignoring NaN."""
+    if not np.isnan(arr).any():
+        return tuple(np.percentile(arr, [25, 75], axis=-1, keepdims=True))
+    ordered = np.sort(arr, axis=-1)  # NaN sorts last
+    count = (~np.isnan(arr)).sum(axis=-1, keepdims=True)
+    result = []
+    for q in (0.25, 0.75):
+        position = q * np.maximum(count - 1, 0)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, np.maximum(count - 1, 0))
+        low = np.take_along_axis(ordered, lower, axis=-1)
+        high = np.take_along_axis(ordered, upper, axis=-1)
+        value = low + (high - low) * (position - lower)
+        result.append(np.where(count > 0, value, np.nan))
+    return result[0], result[1]
+
+
+def iqr_anomaly_mask(values, k: float = 1.5) -> np.ndarray:
+    """
+    IQR anomalies along the last axis.
+
+    Args:
+        values: 1D series or 2D array of series
+        k: IQR multiplier
+
+    Returns:
+        Boolean mask shaped like values
+    """
+    arr = np.asarray(values, dtype=float)
+    q1, q3 = _quartiles(arr)
+    iqr = q3 - q1
+    return (arr < q1 - k * iqr) | (arr > q3 + k * iqr)
+
+
+def moving_average_anomaly_mask(values, window_size: int = 5, threshold: float = 2.0) -> np.ndarray:
+    """
+    Moving-average anomalies along the last axis.
+
+    Each value from index window_size on is compared with the mean and std of
+    the window_size values before it.
+
+    Args:
+        values: 1D series or 2D array of series
+        window_size: Size of the trailing window
+        threshold: Threshold multiplier for standard deviation
+
+    Returns:
+        Boolean mask shaped like values (the first window_size entries are False)
+    """
+    arr = np.asarray(values, dtype=float)
+    mask = np.zeros(arr.shape, dtype=bool)
+    if window_size < 1 or arr.shape[-1] <= window_size:
+        return mask
+    means, stds = rolling_mean_std(arr, window_size)
+    means, stds = means[..., :-1], stds[..., :-1]
+    current = arr[..., window_size:]
+    mask[..., window_size:] = (stds > 0) & (np.abs(current - means) > threshold * stds)
+    return mask
+
+
+BATCH_METHODS = ("zscore", "iqr", "moving_average")
+# Minimum observations per series for each batch method (as in the single-series detectors)
+BATCH_MIN_POINTS = {"zscore": 3, "iqr": 4}
+# Dense cells (series x time steps) processed per chunk
+DEFAULT_BATCH_CELLS = 4_000_000
+BATCH_COLUMNS = ["series", "position", "t", "value", "score", "method_count"]
+
+
+def _left_align(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Move each row's non-NaN values to the front, keeping their order."""
+    missing = np.isnan(matrix)
+    order = np.argsort(missing, axis=1, kind="stable")
+    return np.take_along_axis(matrix, order, axis=1), order, (~missing).sum(axis=1)
+
+
+def _detect_chunk(matrix: np.ndarray, counts: np.ndarray, methods: Sequence[str],
+                  params: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Run batch methods on left-aligned rows.
+
+    Returns:
+        Dict with "row" and "col" of anomalous cells, "score" (|z|), one
+        boolean array per method and "method_count"
+    """
+    masks = {}
+    for method in methods:
+        if method == "zscore":
+            mask = zscore_anomaly_mask(matrix, params["threshold"])
+        elif method == "iqr":
+            mask = iqr_anomaly_mask(matrix, params["k"])
+        else:
+            mask = moving_average_anomaly_mask(matrix, params["window_size"], params["ma_threshold"])
+        minimum = BATCH_MIN_POINTS.get(method)
+        if minimum:
+            mask &= (counts >= minimum)[:, None]
+        masks[method] = mask
+
+    combined = np.logical_or.reduce(list(masks.values()))
+    rows, cols = np.nonzero(combined)
+    result = {method: mask[rows, cols] for method, mask in masks.items()}
+    result["row"] = rows
+    result["col"] = cols
+    result["score"] = _zscores(matrix)[rows, cols]
+    result["method_count"] = np.sum([result[method] for method in methods], axis=0, dtype=np.int64)
+    return result
+
+
+def _chunk_bounds(lengths: np.ndarray, max_cells: int) -> Iterator[Tuple[int, int]]:
+    """Split consecutive series so rows * longest series stays within max_cells."""
+    start = 0
+    while start < len(lengths):
+        end = start + 1
+        width = lengths[start]
+        while end < len(lengths):
+            width_next = max(width, lengths[end])
+            if (end + 1 - start) * width_next > max_cells:
+                break
+            width = width_next
+            end += 1
+        yield start, end
+        start = end
+
+
+def detect_anomalies_batch(data, methods: Sequence[str] = BATCH_METHODS,
+                           series_ids: Optional[Sequence[Any]] = None,
+                           series_col: str = "sku", time_col: str = "t", value_col: str = "value",
+                           threshold: float = 2.5, k: float = 1.5,
+                           window_size: int = 5, ma_threshold: float = 2.0,
+                           max_cells: int = DEFAULT_BATCH_CELLS) -> pd.DataFrame:
+    """
+    Detect anomalies across many series at once.
+
+    Each series is checked independently with the same rules as
+    detect_anomalies, detect_anomalies_iqr and detect_anomalies_moving_average;
+    missing values are skipped. Series are processed in chunks of at most
+    max_cells dense cells.
+
+    Args:
+        data: 2D array (one series per row, NaN for missing) or long-format
+            DataFrame with series_col, time_col and value_col
+        methods: Subset of BATCH_METHODS
+        series_ids: Row labels for a 2D array (default: row numbers)
+        series_col: Series column of a long-format frame
+        time_col: Time column of a long-format frame (series are ordered by it)
+        value_col: Value column of a long-format frame
+        threshold: Z-score threshold
+        k: IQR multiplier
+        window_size: Moving-average window
+        ma_threshold: Moving-average std multiplier
+        max_cells: Chunk size in cells
+
+    Returns:
+        One row per anomalous point: series, position (index within the
+        series' observations), t (time value, or column index for arrays),
+        value, score (|z| within the series), method_count and one boolean
+        column per method
+    """
+    methods = list(methods)
+    unknown = [method for method in methods if method not in BATCH_METHODS]
+    if unknown or not methods:
+        raise ValueError(f"Unknown anomaly methods: {unknown or methods}")
+    params = {"threshold": threshold, "k": k, "window_size": window_size, "ma_threshold": ma_threshold}
+
+    if isinstance(data, pd.DataFrame):
+        parts = _detect_long(data, methods, params, series_col, time_col, value_col, max_cells)
+    else:
+        parts = _detect_matrix(np.asarray(data, dtype=float), methods, params, series_ids, max_cells)
+
+    parts = [part for part in parts if len(part)]
+    if not parts:
+        return pd.DataFrame({column: [] for column in BATCH_COLUMNS + methods})
+    table = pd.concat(parts, ignore_index=True)
+    logger.info(f"Batch detection: {len(table)} anomalies in {table['series'].nunique()} series")
+    return table
+
+
+def _chunk_table(found: Dict[str, np.ndarray], methods: Sequence[str], series, positions, times, values) -> pd.DataFrame:
+    table = pd.DataFrame({
+        "series": series,
+        "position": positions,
+        "t": times,
+        "value": values,
+        "score": found["score"],
+        "method_count": found["method_count"],
+    })
+    for method in methods:
+        table[method] = found[method]
+    return table
+
+
+def _detect_matrix(matrix: np.ndarray, methods, params, series_ids, max_cells) -> Iterator[pd.DataFrame]:
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    if matrix.ndim != 2:
+        raise ValueError("Expected a 2D array of series")
+    labels = np.asarray(series_ids if series_ids is not None else np.arange(len(matrix)), dtype=object)
+    rows_per_chunk = max(1, max_cells // max(matrix.shape[1], 1))
+    for start in range(0, len(matrix), rows_per_chunk):
+        chunk, order, counts = _left_align(matrix[start:start + rows_per_chunk])
+        found = _detect_chunk(chunk, counts, methods, params)
+        rows, cols = found["row"], found["col"]
+        yield _chunk_table(found, methods, labels[start + rows], cols,
+                           order[rows, cols], chunk[rows, cols])
+
+
+def _detect_long(frame: pd.DataFrame, methods, params, series_col, time_col, value_col,
+                 max_cells) -> Iterator[pd.DataFrame]:
+    frame = frame[[series_col, time_col, value_col]]
+    values = pd.to_numeric(frame[value_col], errors="coerce")
+    frame = frame[values.notna() & frame[series_col].notna()].assign(**{value_col: values})
+    if frame.empty:
+        return
+    frame = frame.sort_values([series_col, time_col], kind="stable")
+    codes, labels = pd.factorize(frame[series_col], sort=False)
+    lengths = np.bincount(codes)
+    starts = np.concatenate([[0], np.cumsum(lengths)])
+    positions = np.arange(len(frame)) - starts[codes]
+    flat_values = frame[value_col].to_numpy(dtype=float)
+    times = frame[time_col].to_numpy()
+
+    for first, last in _chunk_bounds(lengths, max_cells):
+        lo, hi = starts[first], starts[last]
+        matrix = np.full((last - first, lengths[first:last].max()), np.nan)
+        matrix[codes[lo:hi] - first, positions[lo:hi]] = flat_values[lo:hi]
+        found = _detect_chunk(matrix, lengths[first:last], methods, params)
+        rows, cols = found["row"], found["col"]
+        flat = starts[first + rows] + cols
+        yield _chunk_table(found, methods, np.asarray(labels, dtype=object)[first + rows], cols,
+                           times[flat], flat_values[flat])
+
+
+def anomaly_alerts(table: pd.DataFrame, min_methods: int = 2, alert_type: str = "price_anomaly",
+                   severity: str = "warning", limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Summarize a batch anomaly table as alerts, one per series.
+
+    Args:
+        table: Result of detect_anomalies_batch
+        min_methods: Points flagged by fewer methods are ignored
+        alert_type: Alert type
+        severity: Alert severity
+        limit: Maximum alerts, highest z-score first
+
+    Returns:
+        Alerts with type, severity, series, count, t, value, score and message
+    """
+    if table.empty:
+        return []
+    flagged = table[table["method_count"] >= min_methods]
+    if flagged.empty:
+        return []
+    latest = flagged.sort_values("position", kind="stable").groupby("series", sort=False).tail(1)
+    counts = flagged.groupby("series", sort=False).size()
+    latest = latest.assign(count=latest["series"].map(counts),
+                           rank=latest["score"].fillna(0)).sort_values("rank", ascending=False, kind="stable")
+
+    alerts = []
+    for row in latest.head(limit).itertuples(index=False):
+        score = None if pd.isna(row.score) else float(row.score)
+        alerts.append({
+            "type": alert_type,
+            "severity": severity,
+            "series": row.series,
+            "count": int(row.count),
+            "t": row.t,
+            "value": float(row.value),
+            "score": score,
+            "message": f"[{row.series}] {int(row.count)} 个异常点，最近 {row.t}: {row.value:g}",
+        })
+    return alerts
+
+
 def detect_anomalies(data: List[float], threshold: float = 2.5) -> List[int]:
     """
     Detect anomalies in a time series using z-score method.
@@ -103,17 +456,7 @@ def detect_anomalies_moving_average(data: List[float], window_size: int = 5, thr
     
     try:
         arr = np.array(data, dtype=float)
-        anomaly_indices = []
-        
-        for i in range(window_size, len(arr)):
-            # Calculate moving average and std
-            window = arr[i-window_size:i]
-            ma = np.mean(window)
-            std = np.std(window)
-            
-            # Check if current value is anomalous
-            if std > 0 and abs(arr[i] - ma) > threshold * std:
-                anomaly_indices.append(i)
+        anomaly_indices = np.nonzero(moving_average_anomaly_mask(arr, window_size, threshold))[0].tolist()
         
         logger.info(f"Moving average method: Detected {len(anomaly_indices)} anomalies")
         return anomaly_indices
@@ -228,3 +571,233 @@ def calculate_health_score(metrics_data: Dict[str, List[float]]) -> Tuple[float,
         logger.error(f"Error calculating health score: {e}")
         return 0.0, f"计算错误: {e}"
 
+
+
+# Streaming detectors
+
+
+class StreamingZScoreDetector:
+    """Online z-score detector using Welford's running mean and variance."""
+
+    def __init__(self, threshold: float = 2.5, min_samples: int = 3):
+        """
+        Args:
+            threshold: Z-score threshold
+            min_samples: Values seen before anomalies are reported
+        """
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation of values seen."""
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+    def score(self, value: float) -> float:
+        """Z-score of a value against the history (0 before min_samples or with zero std)."""
+        std = self.std
+        if self.count < self.min_samples or std == 0:
+            return 0.0
+        return abs(value - self.mean) / std
+
+    def update(self, value: float) -> bool:
+        """
+        Classify a value, then add it to the history.
+
+        Args:
+            value: New observation
+
+        Returns:
+            Whether the value is anomalous
+        """
+        anomalous = self.score(value) > self.threshold
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        return anomalous
+
+
+class EWMADetector:
+    """Online detector against an exponentially weighted mean and variance, for drifting metrics."""
+
+    def __init__(self, alpha: float = 0.1, threshold: float = 3.0, min_samples: int = 5):
+        """
+        Args:
+            alpha: Weight of the newest value (0 < alpha <= 1)
+            threshold: Threshold multiplier for the weighted standard deviation
+            min_samples: Values seen before anomalies are reported
+        """
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.count = 0
+        self.mean = 0.0
+        self.variance = 0.0
+
+    def score(self, value: float) -> float:
+        """Deviation of a value in weighted standard deviations (0 before min_samples)."""
+        std = math.sqrt(self.variance)
+        if self.count < self.min_samples or std == 0:
+            return 0.0
+        return abs(value - self.mean) / std
+
+    def update(self, value: float) -> bool:
+        """
+        Classify a value, then fold it into the weighted statistics.
+
+        Args:
+            value: New observation
+
+        Returns:
+            Whether the value is anomalous
+        """
+        anomalous = self.score(value) > self.threshold
+        self.count += 1
+        if self.count == 1:
+            self.mean = value
+            return anomalous
+        delta = value - self.mean
+        increment = self.alpha * delta
+        self.mean += increment
+        self.variance = (1 - self.alpha) * (self.variance + delta * increment)
+        return anomalous
+
+
+class P2Quantile:
+    """Streaming quantile estimate with the P-square algorithm (five markers, O(1) memory)."""
+
+    def __init__(self, q: float):
+        """
+        Args:
+            q: Quantile in (0, 1)
+        """
+        if not 0 < q < 1:
+            raise ValueError("q must be in (0, 1)")
+        self.q = q
+        self.count = 0
+        self.heights: List[float] = []
+        self.positions = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.desired = [1.0, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5.0]
+        self.increments = [0.0, q / 2, q, (1 + q) / 2, 1.0]
+
+    @property
+    def value(self) -> Optional[float]:
+        """Current estimate, None before any value."""
+        if not self.heights:
+            return None
+        if self.count < 5:
+            return float(np.percentile(self.heights, self.q * 100))
+        return self.heights[2]
+
+    def update(self, value: float):
+        """Add one observation."""
+        self.count += 1
+        if self.count <= 5:
+            self.heights.append(value)
+            self.heights.sort()
+            return
+
+        heights, positions = self.heights, self.positions
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if heights[i] <= value < heights[i + 1])
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        for i in range(1, 4):
+            offset = self.desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or \
+                    (offset <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        heights, positions = self.heights, self.positions
+        return heights[i] + step / (positions[i + 1] - positions[i - 1]) * (
+            (positions[i] - positions[i - 1] + step) * (heights[i + 1] - heights[i]) / (positions[i + 1] - positions[i])
+            + (positions[i + 1] - positions[i] - step) * (heights[i] - heights[i - 1]) / (positions[i] - positions[i - 1])
+        )
+
+
+class StreamingIQRDetector:
+    """Online IQR detector on P-square estimates of the quartiles."""
+
+    def __init__(self, k: float = 1.5, min_samples: int = 20):
+        """
+        Args:
+            k: IQR multiplier
+            min_samples: Values seen before anomalies are reported
+        """
+        self.k = k
+        self.min_samples = min_samples
+        self.q1 = P2Quantile(0.25)
+        self.q3 = P2Quantile(0.75)
+
+    @property
+    def count(self) -> int:
+        """Values seen."""
+        return self.q1.count
+
+    def bounds(self) -> Optional[Tuple[float, float]]:
+        """Current (lower, upper) bounds, None before min_samples."""
+        if self.count < self.min_samples:
+            return None
+        q1, q3 = self.q1.value, self.q3.value
+        iqr = q3 - q1
+        return q1 - self.k * iqr, q3 + self.k * iqr
+
+    def update(self, value: float) -> bool:
+        """
+        Classify a value, then add it to the quartile estimates.
+
+        Args:
+            value: New observation
+
+        Returns:
+            Whether the value is outside the current bounds
+        """
+        bounds = self.bounds()
+        anomalous = bounds is not None and not bounds[0] <= value <= bounds[1]
+        self.q1.update(value)
+        self.q3.update(value)
+        return anomalous
+
+
+STREAMING_DETECTORS = {
+    "zscore": StreamingZScoreDetector,
+    "ewma": EWMADetector,
+    "iqr": StreamingIQRDetector,
+}
+
+
+def create_streaming_detector(method: str = "ewma", **kwargs):
+    """
+    Create a streaming detector by name.
+
+    Args:
+        method: One of "zscore", "ewma", "iqr"
+        **kwargs: Detector parameters
+
+    Returns:
+        Detector with an update(value) -> bool method
+    """
+    if method not in STREAMING_DETECTORS:
+        raise ValueError(f"Unknown streaming detector: {method}")
+    return STREAMING_DETECTORS[method](**kwargs)
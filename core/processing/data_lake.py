@@ -0,0 +1,550 @@
+"""
+Query layer over all historical scrape outputs.
+
+Every scraper run writes ``data/<platform>/<platform>_products_<YYYYmmdd_HHMMSS>.json``.
+DataLake treats those files (plus NDJSON and Parquet partitions dropped in the
+same directories) as one dataset and streams it in bounded chunks:
+
+- partition pruning: platform directories and file timestamps are checked
+  against the platform/time predicates before a file is opened;
+- column pushdown: only the requested fields (and the raw fields needed to
+  parse requested numeric columns) are materialized per chunk;
+- row predicates are applied per chunk, and pushed into the Parquet reader
+  when a Parquet engine is installed;
+- aggregates are combined from per-chunk partials, so trends across months of
+  data never hold more than one chunk of rows in memory.
+"""
+
+import json
+import logging
+import os
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from core.processing.normalization import FIELD_SOURCES, NUMERIC_COLUMNS, normalize_frame
+from core.processing.product_frame import ProductFrame
+
+logger = logging.getLogger(__name__)
+
+DATA_ROOT = "data"
+DEFAULT_CHUNK_SIZE = 50_000
+PARTITION_SUFFIXES = {
+    ".json": "json",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".parquet": "parquet",
+}
+# Columns added to every row from the partition itself
+PARTITION_COLUMNS = ("platform", "scraped_at", "day")
+
+# File names use local time and day partitions cover a whole day, so pruning
+# keeps this much slack; rows are then filtered on their exact scrape time
+PRUNE_SLACK = timedelta(days=1)
+
+_TIMESTAMP_RE = re.compile(r"(\d{8})_(\d{6})")
+_DAY_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+Filter = Tuple[str, str, Any]
+TimeBound = Union[datetime, date, str, None]
+
+_OPERATORS = {
+    "==": lambda column, value: column == value,
+    "!=": lambda column, value: column != value,
+    "<": lambda column, value: column < value,
+    "<=": lambda column, value: column <= value,
+    ">": lambda column, value: column > value,
+    ">=": lambda column, value: column >= value,
+    "in": lambda column, value: column.isin(list(value)),
+    "not in": lambda column, value: ~column.isin(list(value)),
+}
+
+
+def _to_datetime(value: TimeBound, end: bool = False) -> Optional[datetime]:
+    """Coerce a bound to a naive UTC datetime; a bare date covers the whole day."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    if end:
+        return datetime(value.year, value.month, value.day, 23, 59, 59, 999999)
+    return datetime(value.year, value.month, value.day)
+
+
+class Partition:
+    """One file of scrape output."""
+
+    def __init__(self, path: str, platform: str, fmt: str, timestamp: Optional[datetime],
+                 prunable: bool = True):
+        self.path = path
+        self.platform = platform
+        self.format = fmt
+        # Best-known scrape time, default for rows without their own
+        self.timestamp = timestamp
+        # Whether the timestamp comes from the name and may be used for pruning
+        self.prunable = prunable
+
+    @classmethod
+    def from_path(cls, path: str, platform: str) -> Optional["Partition"]:
+        """
+        Describe a file, or None when it is not a lake format.
+
+        The timestamp comes from the file name ("..._20240501_120000.json" or
+        "day=2024-05-01.ndjson"), falling back to the modification time.
+        """
+        fmt = PARTITION_SUFFIXES.get(os.path.splitext(path)[1].lower())
+        if fmt is None:
+            return None
+        name = os.path.basename(path)
+        match = _TIMESTAMP_RE.search(name)
+        if match:
+            try:
+                return cls(path, platform, fmt, datetime.strptime("".join(match.groups()), "%Y%m%d%H%M%S"))
+            except ValueError:
+                pass
+        match = _DAY_RE.search(name)
+        if match:
+            return cls(path, platform, fmt, datetime.fromisoformat(match.group(1)))
+        modified = datetime.fromtimestamp(os.path.getmtime(path), timezone.utc).replace(tzinfo=None)
+        return cls(path, platform, fmt, modified, prunable=False)
+
+    def __repr__(self) -> str:
+        return f"Partition({self.path!r}, {self.platform!r}, {self.format!r}, {self.timestamp!r})"
+
+
+class DataLake:
+    """Chunked, pruned queries over data/<platform> scrape outputs."""
+
+    def __init__(self, root: str = DATA_ROOT, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            root: Directory holding one subdirectory per platform
+            chunk_size: Maximum rows per streamed chunk
+        """
+        self.root = root
+        self.chunk_size = chunk_size
+
+    def platforms(self) -> List[str]:
+        """Platforms with at least one partition."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, name)) and self._files(name)
+        )
+
+    def _files(self, platform: str) -> List[str]:
+        directory = os.path.join(self.root, platform)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if os.path.splitext(name)[1].lower() in PARTITION_SUFFIXES
+        )
+
+    def partitions(self, platforms: Optional[Sequence[str]] = None, since: TimeBound = None,
+                   until: TimeBound = None) -> List[Partition]:
+        """
+        Partitions that can hold matching rows, oldest first.
+
+        Args:
+            platforms: Platform names, None for all
+            since: Earliest scrape time (inclusive)
+            until: Latest scrape time (inclusive); a date covers the whole day
+
+        Returns:
+            Pruned partitions
+        """
+        since_dt = _to_datetime(since)
+        until_dt = _to_datetime(until, end=True)
+        result = []
+        for platform in (platforms if platforms is not None else self.platforms()):
+            for path in self._files(platform):
+                partition = Partition.from_path(path, platform)
+                if partition is None:
+                    continue
+                if partition.prunable:
+                    if since_dt is not None and partition.timestamp + PRUNE_SLACK < since_dt:
+                        continue
+                    if until_dt is not None and partition.timestamp - PRUNE_SLACK > until_dt:
+                        continue
+                result.append(partition)
+        result.sort(key=lambda partition: (partition.timestamp or datetime.min, partition.path))
+        return result
+
+    def scan(self, columns: Optional[Sequence[str]] = None, platforms: Optional[Sequence[str]] = None,
+             since: TimeBound = None, until: TimeBound = None,
+             filters: Optional[Iterable[Filter]] = None,
+             partitions: Optional[Sequence[Partition]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream matching rows in chunks.
+
+        Args:
+            columns: Output columns, None for all. Numeric columns
+                ("price_numeric", ...) are parsed from their source fields.
+            platforms: Platform names, None for all
+            since: Earliest scrape time (inclusive)
+            until: Latest scrape time (inclusive)
+            filters: Row predicates as (column, op, value); op is one of
+                ==, !=, <, <=, >, >=, in, not in
+            partitions: Scan exactly these partitions instead of pruning by platform/time
+
+        Yields:
+            DataFrames of at most chunk_size rows with the requested columns
+        """
+        filters = list(filters or [])
+        platforms = self._prune_platforms(platforms, filters)
+        since_dt = _to_datetime(since)
+        until_dt = _to_datetime(until, end=True)
+        needed = self._needed_fields(columns, filters)
+        wanted = list(columns or []) + [column for column, _, _ in filters]
+        parse_numeric = columns is None or any(column in NUMERIC_COLUMNS.values() for column in wanted)
+
+        if partitions is None:
+            partitions = self.partitions(platforms, since_dt, until_dt)
+        for partition in partitions:
+            try:
+                for chunk in self._read_partition(partition, needed, filters):
+                    chunk = self._prepare(chunk, partition, needed, parse_numeric)
+                    if since_dt is not None or until_dt is not None:
+                        stamps = chunk["scraped_at"]
+                        keep = pd.Series(True, index=chunk.index)
+                        if since_dt is not None:
+                            keep &= stamps >= since_dt
+                        if until_dt is not None:
+                            keep &= stamps <= until_dt
+                        chunk = chunk[keep]
+                    for column, op, value in filters:
+                        chunk = chunk[_OPERATORS[op](chunk[column], value).fillna(False).astype(bool)]
+                    if columns is not None:
+                        chunk = chunk[list(columns)]
+                    if len(chunk):
+                        yield chunk.reset_index(drop=True)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable partition {partition.path}: {e}")
+
+    def read(self, columns: Optional[Sequence[str]] = None, **query) -> ProductFrame:
+        """
+        Materialize matching rows as a ProductFrame.
+
+        Prefer aggregate() for large ranges; this holds every matching row.
+
+        Args:
+            columns: Output columns, None for all
+            **query: platforms, since, until, filters as for scan()
+
+        Returns:
+            ProductFrame of matching rows
+        """
+        chunks = list(self.scan(columns=columns, **query))
+        df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=list(columns or []))
+        return ProductFrame(df)
+
+    def column(self, kind: str, positive_only: bool = True, **query) -> np.ndarray:
+        """
+        One parsed numeric column across all matching rows (for medians and quantiles).
+
+        Args:
+            kind: One of "price", "rating", "review_count"
+            positive_only: Drop zero/negative values as well as unparseable ones
+            **query: platforms, since, until, filters as for scan()
+
+        Returns:
+            Array of floats
+        """
+        name = NUMERIC_COLUMNS[kind]
+        parts = []
+        for chunk in self.scan(columns=[name], **query):
+            values = chunk[name].to_numpy(dtype=float)
+            values = values[~np.isnan(values)]
+            parts.append(values[values > 0] if positive_only else values)
+        return np.concatenate(parts) if parts else np.array([], dtype=float)
+
+    def aggregate(self, group_by: Union[str, Sequence[str], None] = None, **query) -> pd.DataFrame:
+        """
+        Per-group product, price, rating and review aggregates, combined chunk by chunk.
+
+        Price and rating statistics use parsed positive values only; missing
+        group values are reported as "Unknown".
+
+        Args:
+            group_by: Column or columns to group by (e.g. "brand", ["platform", "day"]),
+                None for one overall row
+            **query: platforms, since, until, filters as for scan()
+
+        Returns:
+            One row per group: products, price_count, price_mean, price_min,
+            price_max, price_std, rating_count, rating_mean, review_count_sum,
+            market_share_percent; sorted by products descending
+        """
+        keys = _keys(group_by)
+        columns = keys + list(NUMERIC_COLUMNS.values())
+        partials = [self._partial_aggregate(chunk, keys) for chunk in self.scan(columns=columns, **query)]
+        return self._combine(partials, keys)
+
+    def summarize(self, groupings: Optional[Dict[str, Union[str, Sequence[str], None]]] = None,
+                  values: Sequence[str] = (), **query) -> Dict[str, Any]:
+        """
+        Several aggregate() results and numeric columns from a single scan.
+
+        Every partition is read once however many groupings are requested.
+
+        Args:
+            groupings: Result name -> group_by as for aggregate(); groupings
+                containing "day" are ordered by day as in daily_trends()
+            values: Numeric kinds ("price", "rating", "review_count") to collect
+                as positive-value arrays, as for column()
+            **query: platforms, since, until, filters as for scan()
+
+        Returns:
+            {"overall": aggregate(), <name>: aggregate per grouping, <kind>: array per value}
+        """
+        groupings = {"overall": None, **(groupings or {})}
+        keys = {name: _keys(group_by) for name, group_by in groupings.items()}
+        columns = list(dict.fromkeys([key for name in keys for key in keys[name]] + list(NUMERIC_COLUMNS.values())))
+        partials: Dict[str, List[pd.DataFrame]] = {name: [] for name in groupings}
+        parts: Dict[str, List[np.ndarray]] = {kind: [] for kind in values}
+
+        for chunk in self.scan(columns=columns, **query):
+            for name, group_keys in keys.items():
+                partials[name].append(self._partial_aggregate(chunk, group_keys))
+            for kind in values:
+                column = chunk[NUMERIC_COLUMNS[kind]].to_numpy(dtype=float)
+                parts[kind].append(column[column > 0])
+
+        result: Dict[str, Any] = {}
+        for name, group_keys in keys.items():
+            combined = self._combine(partials[name], group_keys)
+            result[name] = _sort_daily(combined, group_keys) if "day" in group_keys else combined
+        for kind in values:
+            result[kind] = np.concatenate(parts[kind]) if parts[kind] else np.array([], dtype=float)
+        return result
+
+    @staticmethod
+    def _combine(partials: List[pd.DataFrame], keys: List[str]) -> pd.DataFrame:
+        """Merge per-chunk partial aggregates into final statistics."""
+        result_columns = keys + ["products", "price_count", "price_mean", "price_min", "price_max",
+                                 "price_std", "rating_count", "rating_mean", "review_count_sum",
+                                 "market_share_percent"]
+        if not partials:
+            return pd.DataFrame(columns=result_columns)
+
+        combined = pd.concat(partials, ignore_index=True)
+        sums = ["products", "price_count", "price_sum", "price_sumsq", "rating_count", "rating_sum",
+                "review_count_sum"]
+        if keys:
+            grouped = combined.groupby(keys, sort=False)
+            totals = grouped[sums].sum()
+            totals["price_min"] = grouped["price_min"].min()
+            totals["price_max"] = grouped["price_max"].max()
+            totals = totals.reset_index()
+        else:
+            totals = combined[sums].sum().to_frame().T
+            totals["price_min"] = combined["price_min"].min()
+            totals["price_max"] = combined["price_max"].max()
+
+        count = totals["price_count"].where(totals["price_count"] > 0)
+        totals["price_mean"] = totals["price_sum"] / count
+        variance = (totals["price_sumsq"] - totals["price_sum"] ** 2 / count) / (count - 1).where(count > 1)
+        totals["price_std"] = np.sqrt(variance.clip(lower=0))
+        totals["rating_mean"] = totals["rating_sum"] / totals["rating_count"].where(totals["rating_count"] > 0)
+        totals["market_share_percent"] = totals["products"] / totals["products"].sum() * 100
+
+        totals = totals[result_columns].sort_values("products", ascending=False, kind="stable")
+        for column in ("products", "price_count", "rating_count"):
+            totals[column] = totals[column].astype(int)
+        return totals.round(2).reset_index(drop=True)
+
+    def daily_trends(self, group_by: Union[str, Sequence[str], None] = None, **query) -> pd.DataFrame:
+        """
+        aggregate() per scrape day, ordered by day.
+
+        Args:
+            group_by: Extra grouping columns besides the day
+            **query: platforms, since, until, filters as for scan()
+
+        Returns:
+            Aggregates with a "day" column, oldest first
+        """
+        keys = ["day"] + _keys(group_by)
+        return _sort_daily(self.aggregate(group_by=keys, **query), keys)
+
+    # Internal helpers
+
+    @staticmethod
+    def _prune_platforms(platforms: Optional[Sequence[str]], filters: List[Filter]) -> Optional[List[str]]:
+        """Turn platform equality/membership filters into directory pruning."""
+        selected = None if platforms is None else set(platforms)
+        for column, op, value in filters:
+            if column != "platform" or op not in ("==", "in"):
+                continue
+            allowed = {value} if op == "==" else set(value)
+            selected = allowed if selected is None else selected & allowed
+        return None if selected is None else sorted(selected)
+
+    @staticmethod
+    def _needed_fields(columns: Optional[Sequence[str]], filters: List[Filter]) -> Optional[List[str]]:
+        """Raw record fields that must be materialized, None for all."""
+        if columns is None:
+            return None
+        wanted = set(columns) | {column for column, _, _ in filters}
+        needed = set()
+        for column in wanted:
+            if column in PARTITION_COLUMNS:
+                continue
+            needed.add(column)
+            for kind, numeric in NUMERIC_COLUMNS.items():
+                if column == numeric:
+                    needed.update(FIELD_SOURCES[kind])
+        needed.add("scraped_at")
+        return sorted(needed)
+
+    def _read_partition(self, partition: Partition, needed: Optional[List[str]],
+                        filters: List[Filter]) -> Iterator[pd.DataFrame]:
+        if partition.format == "parquet":
+            yield from self._read_parquet(partition, needed, filters)
+        elif partition.format == "ndjson":
+            yield from self._read_ndjson(partition, needed)
+        else:
+            yield from self._read_json(partition, needed)
+
+    def _frame(self, records: List[Dict[str, Any]], needed: Optional[List[str]]) -> pd.DataFrame:
+        if needed is None:
+            return pd.DataFrame(records)
+        # Build only the needed columns instead of the full record width
+        data = {field: [record.get(field) for record in records] for field in needed}
+        return pd.DataFrame(data)
+
+    def _read_json(self, partition: Partition, needed: Optional[List[str]]) -> Iterator[pd.DataFrame]:
+        """Scraper snapshot files; each one holds a single run, so it is loaded whole."""
+        with open(partition.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            items = data.get("items") or []
+            scraped_at = data.get("scraped_at")
+        else:
+            items = data if isinstance(data, list) else []
+            scraped_at = None
+        items = [item for item in items if isinstance(item, dict)]
+        for start in range(0, len(items), self.chunk_size):
+            chunk = self._frame(items[start:start + self.chunk_size], needed)
+            if scraped_at and ("scraped_at" not in chunk.columns or chunk["scraped_at"].isna().all()):
+                chunk["scraped_at"] = scraped_at
+            yield chunk
+
+    def _read_ndjson(self, partition: Partition, needed: Optional[List[str]]) -> Iterator[pd.DataFrame]:
+        records = []
+        with open(partition.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    records.append(record)
+                if len(records) >= self.chunk_size:
+                    yield self._frame(records, needed)
+                    records = []
+        if records:
+            yield self._frame(records, needed)
+
+    def _read_parquet(self, partition: Partition, needed: Optional[List[str]],
+                      filters: List[Filter]) -> Iterator[pd.DataFrame]:
+        # Push plain field predicates into the reader; numeric columns are parsed later
+        pushable = [(column, op, value) for column, op, value in filters
+                    if column not in PARTITION_COLUMNS and column not in NUMERIC_COLUMNS.values()]
+        try:
+            df = pd.read_parquet(partition.path, columns=needed, filters=pushable or None)
+        except ImportError:
+            logger.warning(f"No Parquet engine installed, skipping {partition.path}")
+            return
+        except (KeyError, ValueError):
+            # Requested fields absent from this file's schema
+            df = pd.read_parquet(partition.path)
+            if needed is not None:
+                df = df.reindex(columns=needed)
+        for start in range(0, len(df), self.chunk_size):
+            yield df.iloc[start:start + self.chunk_size]
+
+    def _prepare(self, chunk: pd.DataFrame, partition: Partition, needed: Optional[List[str]],
+                 parse_numeric: bool) -> pd.DataFrame:
+        """Add partition columns and parse numeric columns when requested."""
+        chunk = chunk.reindex(columns=needed) if needed is not None else chunk.copy()
+        if "platform" in chunk.columns:
+            chunk["platform"] = chunk["platform"].fillna(partition.platform)
+        else:
+            chunk["platform"] = partition.platform
+
+        if "scraped_at" not in chunk.columns:
+            chunk["scraped_at"] = None
+        stamps = pd.to_datetime(chunk["scraped_at"], errors="coerce", utc=True, format="ISO8601")
+        stamps = stamps.dt.tz_convert(None)
+        if partition.timestamp is not None:
+            stamps = stamps.fillna(pd.Timestamp(partition.timestamp))
+        chunk["scraped_at"] = stamps
+        chunk["day"] = stamps.dt.strftime("%Y-%m-%d")
+
+        if parse_numeric:
+            normalize_frame(chunk, inplace=True)
+        return chunk
+
+    @staticmethod
+    def _partial_aggregate(chunk: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+        prices = chunk["price_numeric"].where(chunk["price_numeric"] > 0)
+        ratings = chunk["rating_numeric"].where(chunk["rating_numeric"] > 0)
+        reviews = chunk["review_count_numeric"].where(chunk["review_count_numeric"] > 0)
+        parts = pd.DataFrame({
+            "products": 1,
+            "price_count": prices.notna().astype(int),
+            "price_sum": prices.fillna(0),
+            "price_sumsq": (prices ** 2).fillna(0),
+            "price_min": prices,
+            "price_max": prices,
+            "rating_count": ratings.notna().astype(int),
+            "rating_sum": ratings.fillna(0),
+            "review_count_sum": reviews.fillna(0),
+        })
+        if not keys:
+            grouped = parts.agg({name: ("min" if name == "price_min" else "max" if name == "price_max" else "sum")
+                                 for name in parts.columns})
+            return grouped.to_frame().T
+
+        for key in keys:
+            values = chunk[key].astype(object)
+            parts[key] = values.where(values.notna() & (values != ""), "Unknown")
+        grouped = parts.groupby(keys, sort=False)
+        totals = grouped[["products", "price_count", "price_sum", "price_sumsq",
+                          "rating_count", "rating_sum", "review_count_sum"]].sum()
+        totals["price_min"] = grouped["price_min"].min()
+        totals["price_max"] = grouped["price_max"].max()
+        return totals.reset_index()
+
+
+def _keys(group_by: Union[str, Sequence[str], None]) -> List[str]:
+    return [group_by] if isinstance(group_by, str) else list(group_by or [])
+
+
+def _sort_daily(result: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    keys = ["day"] + [key for key in keys if key != "day"]
+    return result.sort_values(keys, kind="stable").reset_index(drop=True)
+
+
+_global_lake: Optional[DataLake] = None
+
+
+def get_data_lake() -> DataLake:
+    """Get the shared lake over the default data directory."""
+    global _global_lake
+    if _global_lake is None:
+        _global_lake = DataLake()
+    return _global_lake
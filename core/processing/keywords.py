@@ -0,0 +1,404 @@
+"""
+Keyword extraction engine for product titles and reviews.
+
+Titles are tokenized once per distinct text: repeated titles in a batch are
+collapsed, tokens are cached per title hash (and persisted, so unchanged
+products are not re-tokenized across daily runs), and large batches of new
+titles are tokenized in chunks on a process pool whose per-chunk Counters are
+merged. Counts, n-grams and TF-IDF scores are all derived from the cached
+token sequences.
+"""
+
+import hashlib
+import importlib.util
+import json
+import logging
+import math
+import multiprocessing
+import os
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core.file_lock import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STOPWORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'from', 'up', 'about', 'into', 'through', 'during',
+    '的', '了', '和', '是', '在', '有', '个', '为', '与', '等', '及',
+})
+
+HAS_JIEBA = importlib.util.find_spec("jieba") is not None
+
+# Fewer new titles than this are tokenized in-process
+PARALLEL_MIN_TITLES = 20_000
+CHUNK_SIZE = 5_000
+TOKEN_CACHE_MAX_ENTRIES = 1_000_000
+# Process pools start workers from a clean interpreter: forking a process that
+# runs scraper and UI threads can copy locks held mid-operation
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+TokenSeq = Tuple[str, ...]
+
+
+def tokenize(text: str, use_jieba: bool = HAS_JIEBA) -> TokenSeq:
+    """
+    Split one text into normalized tokens (stopwords are not removed).
+
+    With jieba: lowercased segments longer than one character that are not
+    pure digits. Without: whitespace words with punctuation stripped, longer
+    than two characters.
+
+    Args:
+        text: Text to tokenize
+        use_jieba: Use jieba segmentation
+
+    Returns:
+        Tokens in text order
+    """
+    if use_jieba:
+        import jieba
+        tokens = []
+        for word in jieba.cut(text):
+            word = word.strip().lower()
+            if len(word) > 1 and not word.isdigit():
+                tokens.append(word)
+        return tuple(tokens)
+
+    tokens = []
+    for word in text.lower().split():
+        word = ''.join(c for c in word if c.isalnum())
+        if len(word) > 2:
+            tokens.append(word)
+    return tuple(tokens)
+
+
+def ngrams(tokens: Sequence[str], n: int) -> List[str]:
+    """
+    Space-joined n-grams of a token sequence.
+
+    Args:
+        tokens: Tokens
+        n: Gram size
+
+    Returns:
+        List of n-grams (the tokens themselves for n == 1)
+    """
+    if n == 1:
+        return list(tokens)
+    return [' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+
+
+def _count_sequences(sequences: List[TokenSeq], weights: List[int],
+                     stopwords: frozenset) -> Tuple[Counter, Counter]:
+    """Weighted term and document frequencies of token sequences, stopwords removed."""
+    term_counts = Counter()
+    doc_counts = Counter()
+    for tokens, weight in zip(sequences, weights):
+        kept = [token for token in tokens if token not in stopwords]
+        if weight == 1:
+            term_counts.update(kept)
+            doc_counts.update(set(kept))
+        else:
+            for token in kept:
+                term_counts[token] += weight
+            for token in set(kept):
+                doc_counts[token] += weight
+    return term_counts, doc_counts
+
+
+def _init_tokenize_worker(use_jieba: bool):
+    """Worker initializer: load the jieba dictionary once per worker process."""
+    if use_jieba:
+        import jieba
+        jieba.initialize()
+
+
+def _tokenize_chunk(texts: List[str], weights: List[int], use_jieba: bool,
+                    stopwords: frozenset) -> Tuple[List[TokenSeq], Counter, Counter]:
+    """Worker: tokenize a chunk and count weighted term and document frequencies."""
+    sequences = [tokenize(text, use_jieba) for text in texts]
+    term_counts, doc_counts = _count_sequences(sequences, weights, stopwords)
+    return sequences, term_counts, doc_counts
+
+
+class TokenCache:
+    """
+    Token sequences per text hash, persisted compactly as a vocabulary plus id lists.
+
+    Entries are kept in LRU order (hits move to the end), so trimming to
+    max_entries drops the texts not seen for longest.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = TOKEN_CACHE_MAX_ENTRIES):
+        """
+        Args:
+            path: Persistence file, None for memory only
+            max_entries: Entries kept on save (least recently used dropped first)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[str, TokenSeq]" = OrderedDict()
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str, mode: str) -> str:
+        """Cache key for a text under a tokenizer mode."""
+        return hashlib.blake2b(f"{mode}\0{text}".encode('utf-8'), digest_size=8).hexdigest()
+
+    def get(self, key: str) -> Optional[TokenSeq]:
+        with self.lock:
+            tokens = self.entries.get(key)
+            if tokens is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+        return tokens
+
+    def put(self, key: str, tokens: TokenSeq):
+        with self.lock:
+            self.entries[key] = tokens
+            self.entries.move_to_end(key)
+            self.dirty = True
+
+    def load(self) -> bool:
+        """
+        Merge the persisted cache into memory.
+
+        Returns:
+            Whether a cache file was loaded
+        """
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            vocab = data['vocab']
+            with self.lock:
+                # Persisted entries are older than anything seen in this process
+                loaded = OrderedDict((key, tuple(vocab[i] for i in ids))
+                                     for key, ids in data['entries'].items() if key not in self.entries)
+                loaded.update(self.entries)
+                self.entries = loaded
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to load token cache {self.path}: {e}")
+            return False
+
+    def save(self) -> bool:
+        """
+        Persist the cache if it changed.
+
+        Returns:
+            Whether a file was written
+        """
+        if not self.path or not self.dirty:
+            return False
+        try:
+            with self.lock:
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+                items = list(self.entries.items())
+                self.dirty = False
+            vocab: Dict[str, int] = {}
+            entries = {key: [vocab.setdefault(token, len(vocab)) for token in tokens] for key, tokens in items}
+            write_json_atomic(self.path, {'vocab': list(vocab), 'entries': entries},
+                              ensure_ascii=False, separators=(',', ':'))
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to save token cache {self.path}: {e}")
+            return False
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class KeywordCorpus:
+    """Tokenized texts with term and document frequencies."""
+
+    def __init__(self, sequences: List[TokenSeq], weights: List[int], term_counts: Counter,
+                 doc_counts: Counter, documents: int, stopwords: frozenset):
+        # One entry per distinct text with its multiplicity
+        self.sequences = sequences
+        self.weights = weights
+        self.term_counts = term_counts
+        self.doc_counts = doc_counts
+        self.documents = documents
+        self.stopwords = stopwords
+
+    def top_terms(self, top_n: int = 50) -> Dict[str, int]:
+        """
+        Most frequent tokens.
+
+        Args:
+            top_n: Number of terms
+
+        Returns:
+            {term: count}, largest first
+        """
+        return dict(self.term_counts.most_common(top_n))
+
+    def ngram_counts(self, n: int) -> Counter:
+        """
+        Counts of n-grams over stopword-filtered token sequences.
+
+        Args:
+            n: Gram size
+
+        Returns:
+            Counter of n-grams
+        """
+        if n == 1:
+            return self.term_counts
+        counts = Counter()
+        for tokens, weight in zip(self.sequences, self.weights):
+            grams = ngrams([token for token in tokens if token not in self.stopwords], n)
+            if weight == 1:
+                counts.update(grams)
+            else:
+                for gram in grams:
+                    counts[gram] += weight
+        return counts
+
+    def top_ngrams(self, n: int = 2, top_n: int = 50) -> Dict[str, int]:
+        """
+        Most frequent n-grams.
+
+        Args:
+            n: Gram size
+            top_n: Number of n-grams
+
+        Returns:
+            {n-gram: count}, largest first
+        """
+        return dict(self.ngram_counts(n).most_common(top_n))
+
+    def tfidf(self, top_n: int = 50) -> Dict[str, float]:
+        """
+        Corpus-level TF-IDF: total term count times smoothed inverse document frequency.
+
+        Each text is a document; idf = ln((1 + N) / (1 + df)) + 1, so terms that
+        appear in every title rank below equally frequent but more specific ones.
+
+        Args:
+            top_n: Number of terms
+
+        Returns:
+            {term: score}, highest first
+        """
+        total = self.documents
+        scores = {
+            term: count * (math.log((1 + total) / (1 + self.doc_counts[term])) + 1)
+            for term, count in self.term_counts.items()
+        }
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_n]
+        return {term: round(score, 4) for term, score in ranked}
+
+
+class KeywordEngine:
+    """Cached, parallel tokenization with Counter-based keyword statistics."""
+
+    def __init__(self, cache_path: Optional[str] = None, stopwords: Optional[Iterable[str]] = None,
+                 use_jieba: Optional[bool] = None, workers: Optional[int] = None,
+                 parallel_min_titles: int = PARALLEL_MIN_TITLES, chunk_size: int = CHUNK_SIZE):
+        """
+        Args:
+            cache_path: Token cache file, None for an in-memory cache
+            stopwords: Stopwords, defaults to DEFAULT_STOPWORDS
+            use_jieba: Use jieba segmentation, defaults to whether it is installed
+            workers: Tokenization processes, defaults to the CPU count
+            parallel_min_titles: New titles needed before using the pool
+            chunk_size: Titles per pool task
+        """
+        self.use_jieba = HAS_JIEBA if use_jieba is None else use_jieba
+        if not self.use_jieba and use_jieba is None:
+            logger.warning("jieba not installed, using basic word splitting")
+        self.mode = "jieba" if self.use_jieba else "basic"
+        self.stopwords = frozenset(DEFAULT_STOPWORDS if stopwords is None else stopwords)
+        self.workers = workers or os.cpu_count() or 1
+        self.parallel_min_titles = parallel_min_titles
+        self.chunk_size = chunk_size
+        self.cache = TokenCache(cache_path)
+        self.cache.load()
+
+    def add_stopwords(self, words: Iterable[str]):
+        """Extend the stopword set (cached tokens stay valid; stopwords apply at count time)."""
+        self.stopwords = self.stopwords | {word.lower() for word in words}
+
+    def build(self, texts: Iterable[str]) -> KeywordCorpus:
+        """
+        Tokenize texts (cached, parallel for large batches) and count frequencies.
+
+        Args:
+            texts: Texts, one document each
+
+        Returns:
+            KeywordCorpus
+        """
+        multiplicity = Counter(texts)
+        documents = sum(multiplicity.values())
+
+        sequences: List[TokenSeq] = []
+        weights: List[int] = []
+
+        missing_texts, missing_weights, missing_keys = [], [], []
+        for text, weight in multiplicity.items():
+            key = TokenCache.key(text, self.mode)
+            tokens = self.cache.get(key)
+            if tokens is None:
+                missing_texts.append(text)
+                missing_weights.append(weight)
+                missing_keys.append(key)
+                continue
+            sequences.append(tokens)
+            weights.append(weight)
+
+        # Count cached sequences here, new ones in the tokenizing workers
+        term_counts, doc_counts = _count_sequences(sequences, weights, self.stopwords)
+
+        if missing_texts:
+            for new_sequences, chunk_terms, chunk_docs in self._tokenize(missing_texts, missing_weights):
+                sequences.extend(new_sequences)
+                term_counts.update(chunk_terms)
+                doc_counts.update(chunk_docs)
+            weights.extend(missing_weights)
+            for key, tokens in zip(missing_keys, sequences[-len(missing_texts):]):
+                self.cache.put(key, tokens)
+
+        logger.info(f"Keyword corpus built: {documents} texts, {len(multiplicity)} distinct, "
+                    f"{len(missing_texts)} tokenized")
+        return KeywordCorpus(sequences, weights, term_counts, doc_counts, documents, self.stopwords)
+
+    def _tokenize(self, texts: List[str], weights: List[int]):
+        """Yield (sequences, term Counter, doc Counter) per chunk, in input order."""
+        chunks = [(texts[i:i + self.chunk_size], weights[i:i + self.chunk_size])
+                  for i in range(0, len(texts), self.chunk_size)]
+        if len(texts) >= self.parallel_min_titles and self.workers > 1 and len(chunks) > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks)),
+                                         mp_context=multiprocessing.get_context(POOL_START_METHOD),
+                                         initializer=_init_tokenize_worker,
+                                         initargs=(self.use_jieba,)) as pool:
+                    futures = [pool.submit(_tokenize_chunk, chunk_texts, chunk_weights,
+                                           self.use_jieba, self.stopwords)
+                               for chunk_texts, chunk_weights in chunks]
+                    results = [future.result() for future in futures]
+                yield from results
+                return
+            except (BrokenProcessPool, OSError, AssertionError) as e:
+                # AssertionError: daemonic processes cannot start a pool
+                logger.warning(f"Tokenization pool unavailable, tokenizing in-process: {e}")
+        for chunk_texts, chunk_weights in chunks:
+            yield _tokenize_chunk(chunk_texts, chunk_weights, self.use_jieba, self.stopwords)
+
+    def save_cache(self) -> bool:
+        """Persist the token cache if it changed."""
+        return self.cache.save()
@@ -0,0 +1,337 @@
+"""
+商品字段数值规范化模块
+Numeric Normalization Module for scraped product fields
+
+价格、评分和计数字符串（"$1,299.00"、"12,99 €"、"4.5 out of 5 stars"、
+"1,234 ratings"、"2.3K"）只解析一次为浮点数，分析器直接读取数值列，
+不再在每个方法里重复解析字符串。
+Parses price, rating and count strings ("$1,299.00", "12,99 €",
+"4.5 out of 5 stars", "1,234 ratings", "2.3K") into floats once, so the
+analyzers read numeric columns instead of re-parsing strings per method.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+import math
+import re
+
+import numpy as np
+import pandas as pd
+
+# 按优先级排列的来源字段及其对应的数值列 / Source fields in precedence order, and the numeric column each one feeds
+FIELD_SOURCES = {
+    "price": ("price", "current_price"),
+    "rating": ("rating", "average_rating"),
+    "review_count": ("review_count",),
+}
+
+NUMERIC_COLUMNS = {
+    "price": "price_numeric",
+    "rating": "rating_numeric",
+    "review_count": "review_count_numeric",
+}
+
+_NUMBER_RE = re.compile(r"\d[\d.,'\u00a0\u202f]*")
+_RATING_RE = re.compile(r"\d+(?:[.,]\d+)?")
+_COUNT_RE = re.compile(r"(\d[\d.,'\u00a0\u202f]*)\s*([kKmM万w]?)")
+_GROUP_CHARS_RE = re.compile(r"['\u00a0\u202f]")
+_COUNT_MULTIPLIERS = {"k": 1_000, "m": 1_000_000, "万": 10_000, "w": 10_000}
+
+
+def _to_float(token: str, decimal: Optional[str] = None) -> float:
+    """
+    将带本地化分隔符的数字转换为浮点数
+    Convert a numeric token with locale-specific separators to float
+
+    未指定小数点时：'.' 和 ',' 同时出现取最后一个为小数点；单个 ',' 后跟 1-2 位
+    数字视为小数逗号（"12,99"），否则 ',' 为千分位（"1,234"）。
+    Without an explicit decimal separator the last of '.'/',' is the decimal
+    mark when both appear; a lone ',' followed by 1-2 digits is a decimal
+    comma ("12,99"), otherwise ',' groups thousands ("1,234").
+    """
+    token = _GROUP_CHARS_RE.sub("", token).rstrip(".,")
+    if not token:
+        return math.nan
+
+    if decimal is None:
+        has_dot = "." in token
+        has_comma = "," in token
+        if has_dot and has_comma:
+            decimal = "." if token.rfind(".") > token.rfind(",") else ","
+        elif has_comma:
+            head, _, tail = token.rpartition(",")
+            decimal = "," if token.count(",") == 1 and len(tail) in (1, 2) else "."
+        elif token.count(".") > 1:
+            decimal = ","
+        else:
+            decimal = "."
+
+    group = "," if decimal == "." else "."
+    token = token.replace(group, "")
+    if decimal == ",":
+        token = token.replace(",", ".")
+    try:
+        return float(token)
+    except ValueError:
+        return math.nan
+
+
+@lru_cache(maxsize=65536)
+def _parse_price_str(text: str, decimal: Optional[str]) -> float:
+    match = _NUMBER_RE.search(text)
+    return _to_float(match.group(), decimal) if match else math.nan
+
+
+@lru_cache(maxsize=65536)
+def _parse_rating_str(text: str, scale: float) -> float:
+    match = _RATING_RE.search(text)
+    if not match:
+        return math.nan
+    rating = float(match.group().replace(",", "."))
+    return rating if 0 <= rating <= scale else math.nan
+
+
+@lru_cache(maxsize=65536)
+def _parse_count_str(text: str) -> float:
+    match = _COUNT_RE.search(text)
+    if not match:
+        return math.nan
+    token, suffix = match.groups()
+    if suffix:
+        value = _to_float(token, ".") * _COUNT_MULTIPLIERS[suffix.lower()]
+    else:
+        # 计数没有小数部分，所有分隔符都是千分位 / Counts have no fractional part, so every separator is a group mark
+        digits = re.sub(r"[^\d]", "", token)
+        value = float(digits) if digits else math.nan
+    return float(math.floor(value)) if not math.isnan(value) else value
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or value == "" or (isinstance(value, float) and math.isnan(value))
+
+
+def parse_price(value: Any, decimal: Optional[str] = None, default: float = 0.0) -> float:
+    """
+    解析价格，如 "$1,299.00"、"12,99 €" 或 "¥999"
+    Parse a price value such as "$1,299.00", "12,99 €" or "¥999"
+
+    Args:
+        value: 原始价格（字符串或数字） / Raw price (string or number)
+        decimal: 强制小数点（'.' 或 ','），None 时自动识别 / Force the decimal separator; autodetected if None
+        default: 无法解析时的返回值 / Value returned when nothing can be parsed
+
+    Returns:
+        价格浮点数 / Price as float
+    """
+    if _is_missing(value) or isinstance(value, bool):
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    result = _parse_price_str(str(value), decimal)
+    return default if math.isnan(result) else result
+
+
+def parse_rating(value: Any, scale: float = 5.0, default: float = 0.0) -> float:
+    """
+    解析评分，如 "4.5 out of 5 stars" 或 "4,5 von 5 Sternen"
+    Parse a rating such as "4.5 out of 5 stars" or "4,5 von 5 Sternen"
+
+    Args:
+        value: 原始评分（字符串或数字） / Raw rating (string or number)
+        scale: 最高有效评分 / Maximum valid rating
+        default: 无法解析出有效值时的返回值 / Value returned when nothing valid can be parsed
+
+    Returns:
+        [0, scale] 内的评分 / Rating as float within [0, scale]
+    """
+    if _is_missing(value) or isinstance(value, bool):
+        return default
+    if isinstance(value, (int, float)):
+        return float(value) if 0 <= value <= scale else default
+    result = _parse_rating_str(str(value), scale)
+    return default if math.isnan(result) else result
+
+
+def parse_count(value: Any, default: int = 0) -> int:
+    """
+    解析计数，如 "1,234 ratings"、"1.234 Bewertungen" 或 "2.3K"
+    Parse a count such as "1,234 ratings", "1.234 Bewertungen" or "2.3K"
+
+    Args:
+        value: 原始计数（字符串或数字） / Raw count (string or number)
+        default: 无法解析时的返回值 / Value returned when nothing can be parsed
+
+    Returns:
+        整数计数 / Count as int
+    """
+    if _is_missing(value) or isinstance(value, bool):
+        return default
+    if isinstance(value, (int, float)):
+        return int(value)
+    result = _parse_count_str(str(value))
+    return default if math.isnan(result) else int(result)
+
+
+_SERIES_PARSERS = {
+    "price": lambda text: _parse_price_str(text, None),
+    "rating": lambda text: _parse_rating_str(text, 5.0),
+    "review_count": _parse_count_str,
+}
+
+
+def normalize_series(series: pd.Series, kind: str) -> pd.Series:
+    """
+    将一列原始值解析为浮点数（无法解析为 NaN）
+    Parse a column of raw values into floats (NaN where unparseable)
+
+    数值列直接透传；字符串列每个不同取值只解析一次再映射回去，重复字符串没有额外开销。
+    Numeric columns are passed through; string columns are parsed once per
+    distinct value and mapped back, so repeated strings cost nothing extra.
+
+    Args:
+        series: 原始值 / Raw values
+        kind: "price"、"rating" 或 "review_count" / One of "price", "rating", "review_count"
+
+    Returns:
+        与输入对齐的浮点列 / Float series aligned with the input
+    """
+    if kind not in _SERIES_PARSERS:
+        raise ValueError(f"Unknown numeric kind: {kind}")
+
+    if pd.api.types.is_bool_dtype(series):
+        return pd.Series(np.nan, index=series.index, dtype=float)
+    if pd.api.types.is_numeric_dtype(series):
+        values = series.astype(float)
+        if kind == "rating":
+            values = values.where((values >= 0) & (values <= 5.0))
+        return values
+
+    parser = _SERIES_PARSERS[kind]
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    parsed = np.empty(len(uniques) + 1, dtype=float)
+    parsed[-1] = np.nan
+    for i, raw in enumerate(uniques):
+        if isinstance(raw, bool) or _is_missing(raw):
+            parsed[i] = np.nan
+        elif isinstance(raw, (int, float)):
+            parsed[i] = float(raw) if kind != "rating" or 0 <= raw <= 5.0 else np.nan
+        else:
+            parsed[i] = parser(str(raw))
+    return pd.Series(parsed[codes], index=series.index, dtype=float)
+
+
+def normalize_frame(df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """
+    添加 price_numeric、rating_numeric 和 review_count_numeric 列
+    Add price_numeric, rating_numeric and review_count_numeric columns
+
+    已有的值（如采集时写入的）直接复用；只解析缺失的行，取第一个能解析的来源字段。
+    Values already present (e.g. stored at ingest time) are reused; only
+    missing rows are parsed, taking the first source field that parses.
+
+    Args:
+        df: 商品数据框 / Product frame
+        inplace: 是否直接修改 df 而非副本 / Modify df instead of a copy
+
+    Returns:
+        带数值列的数据框 / Frame with numeric columns
+    """
+    if not inplace:
+        df = df.copy()
+
+    for kind, sources in FIELD_SOURCES.items():
+        column = NUMERIC_COLUMNS[kind]
+        if column in df.columns:
+            values = pd.to_numeric(df[column], errors="coerce").astype(float)
+        else:
+            values = pd.Series(np.nan, index=df.index, dtype=float)
+
+        for source in sources:
+            if not values.isna().any():
+                break
+            if source in df.columns:
+                missing = values.isna()
+                values[missing] = normalize_series(df.loc[missing, source], kind)
+        df[column] = values
+
+    return df
+
+
+def normalize_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    就地为单条商品记录写入数值字段
+    Store numeric fields on a single product record in place
+
+    Args:
+        record: 商品记录 / Product record
+
+    Returns:
+        带 *_numeric 字段的同一记录（无法解析为 None） / The same record with *_numeric fields (None when unparseable)
+    """
+    parsers = {"price": parse_price, "rating": parse_rating, "review_count": parse_count}
+    for kind, sources in FIELD_SOURCES.items():
+        column = NUMERIC_COLUMNS[kind]
+        if column in record:
+            continue
+        value = None
+        for source in sources:
+            raw = record.get(source)
+            if _is_missing(raw):
+                continue
+            parsed = parsers[kind](raw, default=None)
+            if parsed is not None:
+                value = parsed
+                break
+        record[column] = value
+    return record
+
+
+def normalize_records(records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    就地为每条记录写入数值字段（采集时规范化）
+    Store numeric fields on every record in place (ingest-time normalization)
+
+    Args:
+        records: 商品记录 / Product records
+
+    Returns:
+        同一批记录的列表 / List of the same records
+    """
+    return [normalize_record(record) for record in records]
+
+
+def numeric_column(products: List[Dict[str, Any]], kind: str) -> np.ndarray:
+    """
+    获取每个商品的某一数值字段，与输入列表对齐
+    Get one numeric kind for every product, aligned with the input list
+
+    Args:
+        products: 商品记录 / Product records
+        kind: "price"、"rating" 或 "review_count" / One of "price", "rating", "review_count"
+
+    Returns:
+        浮点数组，无法解析为 NaN / Array of floats, NaN where unparseable
+    """
+    if not products:
+        return np.array([], dtype=float)
+    column = NUMERIC_COLUMNS[kind]
+    frame = pd.DataFrame(products, columns=[column, *FIELD_SOURCES[kind]])
+    return normalize_frame(frame, inplace=True)[column].to_numpy()
+
+
+def numeric_values(products: List[Dict[str, Any]], kind: str, positive_only: bool = True) -> np.ndarray:
+    """
+    从商品列表获取某一数值字段的解析值
+    Get the parsed values of one numeric kind from a product list
+
+    Args:
+        products: 商品记录 / Product records
+        kind: "price"、"rating" 或 "review_count" / One of "price", "rating", "review_count"
+        positive_only: 同时去掉零和负值 / Drop zero/negative values as well as unparseable ones
+
+    Returns:
+        浮点数组 / Array of floats
+    """
+    values = numeric_column(products, kind)
+    values = values[~np.isnan(values)]
+    return values[values > 0] if positive_only else values
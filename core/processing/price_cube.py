@@ -0,0 +1,460 @@
+"""
+Sparse product x platform x day price cube.
+
+Only observed cells are stored: dictionary-encoded product and platform codes,
+an epoch-day integer and the price, sorted by (product, platform, day) with
+one cell per coordinate (the lowest price when a product was seen several
+times on a platform that day). Cross-platform questions -- cheapest platform
+per product, price spread, who undercuts whom -- are sorts and segment
+reductions over these arrays instead of per-product Python loops.
+
+Products are matched across platforms by a shared identifier (GTIN/EAN/UPC,
+normalized to GTIN-14) when records carry one; otherwise by product_key,
+which is platform-scoped, so such products only ever appear on one platform.
+Identifiers are currently captured only by Amazon detail scraping (see
+product_identity.extract_identifiers); multi-platform list scrapes carry none,
+so cross-platform comparison stays empty until their records gain them.
+"""
+
+import importlib.util
+import re
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from core.processing.product_frame import ProductFrame
+
+HAS_SCIPY = importlib.util.find_spec("scipy") is not None
+
+# Record fields holding identifiers shared across platforms, most specific first
+# (filled by product_identity.extract_identifiers on detail pages)
+SHARED_ID_FIELDS = ("gtin", "ean", "upc", "isbn")
+CUBE_COLUMNS = ["product_key", "platform", "scraped_at", "day", "price_numeric", *SHARED_ID_FIELDS]
+
+_NON_DIGITS = re.compile(r"\D")
+_EPOCH = date(1970, 1, 1).toordinal()
+
+DayLike = Union[date, datetime, str, None]
+
+
+def _day_number(value: DayLike) -> Optional[int]:
+    """Days since 1970-01-01, None for None."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.toordinal() - _EPOCH
+
+
+def _day_labels(days: np.ndarray) -> np.ndarray:
+    return np.datetime_as_string(days.astype("datetime64[D]"), unit="D")
+
+
+def shared_product_keys(df: pd.DataFrame, product_col: str = "product_key") -> pd.Series:
+    """
+    Cross-platform product labels for a frame.
+
+    Args:
+        df: Product rows
+        product_col: Fallback key column
+
+    Returns:
+        "gtin:<14 digits>" where a shared identifier is present, else the
+        fallback key (NaN when neither exists)
+    """
+    keys = df[product_col].astype(object) if product_col in df.columns else pd.Series(np.nan, index=df.index, dtype=object)
+    for field in reversed(SHARED_ID_FIELDS):
+        if field not in df.columns:
+            continue
+        digits = df[field].astype("string").str.replace(_NON_DIGITS, "", regex=True)
+        valid = digits.str.len().isin([8, 10, 12, 13, 14]).fillna(False).astype(bool)
+        keys = keys.where(~valid, "gtin:" + digits.str.zfill(14).astype(object))
+    return keys
+
+
+class _Dictionary:
+    """Incremental label -> code encoding shared across chunks."""
+
+    def __init__(self):
+        self.codes: Dict[Any, int] = {}
+        self.labels: List[Any] = []
+
+    def encode(self, values: pd.Series) -> np.ndarray:
+        local_codes, uniques = pd.factorize(values, sort=False)
+        mapping = np.empty(len(uniques), dtype=np.int64)
+        for index, label in enumerate(uniques):
+            code = self.codes.get(label)
+            if code is None:
+                code = self.codes[label] = len(self.labels)
+                self.labels.append(label)
+            mapping[index] = code
+        return mapping[local_codes]
+
+
+class PriceCube:
+    """Observed prices as sorted sparse coordinates with dictionary-encoded labels."""
+
+    def __init__(self, products: np.ndarray, platforms: np.ndarray, days: np.ndarray,
+                 prices: np.ndarray, product_labels: Sequence[Any], platform_labels: Sequence[Any],
+                 canonical: bool = False):
+        """
+        Build a cube from coordinate arrays.
+
+        Args:
+            products: Product code per observation
+            platforms: Platform code per observation
+            days: Days since 1970-01-01 per observation
+            prices: Price per observation
+            product_labels: Label per product code
+            platform_labels: Label per platform code
+            canonical: Arrays are already sorted and deduplicated
+        """
+        products = np.asarray(products, dtype=np.int64)
+        platforms = np.asarray(platforms, dtype=np.int64)
+        days = np.asarray(days, dtype=np.int64)
+        prices = np.asarray(prices, dtype=float)
+        if not canonical and len(prices):
+            # Sort by (product, platform, day, price) and keep the lowest price per cell
+            order = np.lexsort((prices, days, platforms, products))
+            products, platforms, days, prices = products[order], platforms[order], days[order], prices[order]
+            first = np.ones(len(prices), dtype=bool)
+            first[1:] = ((products[1:] != products[:-1]) | (platforms[1:] != platforms[:-1])
+                         | (days[1:] != days[:-1]))
+            products, platforms, days, prices = products[first], platforms[first], days[first], prices[first]
+        self.products = products
+        self.platforms = platforms
+        self.days = days
+        self.prices = prices
+        self.product_labels = np.asarray(list(product_labels), dtype=object)
+        self.platform_labels = np.asarray(list(platform_labels), dtype=object)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, product_col: str = "product_key", platform: Optional[str] = None,
+                   day: DayLike = None) -> "PriceCube":
+        """
+        Build a cube from product rows.
+
+        Args:
+            df: Rows with price_numeric (or price), platform, day/scraped_at and product_col
+            product_col: Fallback product key column (shared identifiers take precedence)
+            platform: Platform for rows without one
+            day: Day for rows without a day/scraped_at
+
+        Returns:
+            PriceCube
+        """
+        builder = _CubeBuilder(product_col)
+        builder.add(df, platform, day)
+        return builder.build()
+
+    @classmethod
+    def from_records(cls, products: Iterable[Dict[str, Any]], product_col: str = "product_key",
+                     platform: Optional[str] = None, day: DayLike = None) -> "PriceCube":
+        """
+        Build a cube from product records.
+
+        Args:
+            products: Product records
+            product_col: Fallback product key field
+            platform: Platform for records without one
+            day: Day for records without scraped_at
+
+        Returns:
+            PriceCube
+        """
+        return cls.from_frame(ProductFrame.from_records(products).df, product_col, platform, day)
+
+    @classmethod
+    def from_lake(cls, lake, product_col: str = "product_key", **query) -> "PriceCube":
+        """
+        Build a cube from data lake partitions, chunk by chunk.
+
+        Args:
+            lake: DataLake
+            product_col: Fallback product key column
+            **query: platforms, since, until, filters as for DataLake.scan
+
+        Returns:
+            PriceCube
+        """
+        builder = _CubeBuilder(product_col)
+        columns = list(dict.fromkeys(CUBE_COLUMNS + [product_col]))
+        for chunk in lake.scan(columns=columns, **query):
+            builder.add(chunk)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        """(products, platforms, distinct days)."""
+        return len(self.product_labels), len(self.platform_labels), len(np.unique(self.days))
+
+    @property
+    def day_range(self) -> Optional[Tuple[str, str]]:
+        """First and last observed day as ISO dates."""
+        if not len(self):
+            return None
+        labels = _day_labels(np.array([self.days.min(), self.days.max()]))
+        return str(labels[0]), str(labels[1])
+
+    def _codes(self, labels: Optional[Iterable[Any]], dictionary: np.ndarray) -> Optional[np.ndarray]:
+        if labels is None:
+            return None
+        if isinstance(labels, str):
+            labels = [labels]
+        wanted = set(labels)
+        return np.array([code for code, label in enumerate(dictionary) if label in wanted], dtype=np.int64)
+
+    def slice(self, products: Optional[Iterable[Any]] = None, platforms: Optional[Iterable[Any]] = None,
+              since: DayLike = None, until: DayLike = None) -> "PriceCube":
+        """
+        Cells matching label and day filters (dictionaries are kept).
+
+        Args:
+            products: Product labels
+            platforms: Platform labels
+            since: First day (inclusive)
+            until: Last day (inclusive)
+
+        Returns:
+            PriceCube sharing the label dictionaries
+        """
+        mask = np.ones(len(self), dtype=bool)
+        product_codes = self._codes(products, self.product_labels)
+        if product_codes is not None:
+            mask &= np.isin(self.products, product_codes)
+        platform_codes = self._codes(platforms, self.platform_labels)
+        if platform_codes is not None:
+            mask &= np.isin(self.platforms, platform_codes)
+        if since is not None:
+            mask &= self.days >= _day_number(since)
+        if until is not None:
+            mask &= self.days <= _day_number(until)
+        return PriceCube(self.products[mask], self.platforms[mask], self.days[mask], self.prices[mask],
+                         self.product_labels, self.platform_labels, canonical=True)
+
+    def snapshot(self, day: DayLike = None, max_age_days: Optional[int] = None) -> "PriceCube":
+        """
+        Latest price per (product, platform) at or before a day.
+
+        Args:
+            day: As-of day, defaults to the last observed day
+            max_age_days: Drop prices older than this many days before day
+
+        Returns:
+            PriceCube with one cell per (product, platform); days are when each price was seen
+        """
+        cube = self if day is None else self.slice(until=day)
+        if max_age_days is not None and len(cube):
+            as_of = _day_number(day) if day is not None else int(cube.days.max())
+            cube = cube.slice(since=date.fromordinal(as_of - max_age_days + _EPOCH))
+        if not len(cube):
+            return cube
+        # Cells are sorted by day within (product, platform): keep the last of each run
+        last = np.ones(len(cube), dtype=bool)
+        last[:-1] = (cube.products[1:] != cube.products[:-1]) | (cube.platforms[1:] != cube.platforms[:-1])
+        return PriceCube(cube.products[last], cube.platforms[last], cube.days[last], cube.prices[last],
+                         self.product_labels, self.platform_labels, canonical=True)
+
+    def to_sparse(self, day: DayLike = None, max_age_days: Optional[int] = None):
+        """
+        Snapshot as a product x platform scipy.sparse CSR matrix.
+
+        Args:
+            day: As-of day
+            max_age_days: Staleness limit as for snapshot()
+
+        Returns:
+            csr_matrix of latest prices (absent cells are implicit zeros)
+
+        Raises:
+            ImportError: scipy is not installed
+        """
+        if not HAS_SCIPY:
+            raise ImportError("scipy is required for to_sparse()")
+        from scipy.sparse import csr_matrix
+
+        snap = self.snapshot(day, max_age_days)
+        shape = (len(self.product_labels), len(self.platform_labels))
+        return csr_matrix((snap.prices, (snap.products, snap.platforms)), shape=shape)
+
+    def cheapest_platform(self, day: DayLike = None, max_age_days: Optional[int] = None,
+                          min_platforms: int = 1) -> pd.DataFrame:
+        """
+        Cheapest platform per product.
+
+        Args:
+            day: As-of day
+            max_age_days: Staleness limit as for snapshot()
+            min_platforms: Only products listed on at least this many platforms
+
+        Returns:
+            Frame of product, platform, price, platforms (listing count), runner_up_price
+        """
+        snap = self.snapshot(day, max_age_days)
+        columns = ["product", "platform", "price", "platforms", "runner_up_price"]
+        if not len(snap):
+            return pd.DataFrame(columns=columns)
+        order = np.lexsort((snap.prices, snap.products))
+        products, platforms, prices = snap.products[order], snap.platforms[order], snap.prices[order]
+        starts = np.flatnonzero(np.r_[True, products[1:] != products[:-1]])
+        counts = np.diff(np.r_[starts, len(products)])
+        runner_up = np.where(counts > 1, prices[np.minimum(starts + 1, len(prices) - 1)], np.nan)
+        keep = counts >= min_platforms
+        starts = starts[keep]
+        return pd.DataFrame({
+            "product": self.product_labels[products[starts]],
+            "platform": self.platform_labels[platforms[starts]],
+            "price": prices[starts],
+            "platforms": counts[keep],
+            "runner_up_price": runner_up[keep],
+        }, columns=columns)
+
+    def price_spread(self, day: DayLike = None, max_age_days: Optional[int] = None,
+                     min_platforms: int = 2) -> pd.DataFrame:
+        """
+        Cross-platform price spread per product.
+
+        Args:
+            day: As-of day
+            max_age_days: Staleness limit as for snapshot()
+            min_platforms: Only products listed on at least this many platforms
+
+        Returns:
+            Frame of product, min_price, max_price, spread, spread_percent
+            (of min_price) and platforms, widest spread first
+        """
+        snap = self.snapshot(day, max_age_days)
+        columns = ["product", "min_price", "max_price", "spread", "spread_percent", "platforms"]
+        if not len(snap):
+            return pd.DataFrame(columns=columns)
+        # Snapshot cells are grouped by product already
+        starts = np.flatnonzero(np.r_[True, snap.products[1:] != snap.products[:-1]])
+        counts = np.diff(np.r_[starts, len(snap)])
+        low = np.minimum.reduceat(snap.prices, starts)
+        high = np.maximum.reduceat(snap.prices, starts)
+        keep = counts >= min_platforms
+        result = pd.DataFrame({
+            "product": self.product_labels[snap.products[starts[keep]]],
+            "min_price": low[keep],
+            "max_price": high[keep],
+            "spread": (high - low)[keep],
+            "spread_percent": ((high - low) / low * 100)[keep],
+            "platforms": counts[keep],
+        }, columns=columns)
+        return result.sort_values("spread_percent", ascending=False, kind="stable").reset_index(drop=True)
+
+    def undercuts(self, platform: str, threshold: float = 0.0, day: DayLike = None,
+                  max_age_days: Optional[int] = None) -> pd.DataFrame:
+        """
+        Products where another platform is cheaper than the given one.
+
+        Args:
+            platform: Reference platform
+            threshold: Minimum undercut as a fraction of the reference price (0.05 = 5%)
+            day: As-of day
+            max_age_days: Staleness limit as for snapshot()
+
+        Returns:
+            Frame of product, price, competitor_platform, competitor_price and
+            undercut_percent, deepest undercut first
+        """
+        columns = ["product", "price", "competitor_platform", "competitor_price", "undercut_percent"]
+        codes = self._codes(platform, self.platform_labels)
+        snap = self.snapshot(day, max_age_days)
+        if not len(snap) or not len(codes):
+            return pd.DataFrame(columns=columns)
+        ours = snap.platforms == codes[0]
+        reference = np.full(len(self.product_labels), np.nan)
+        reference[snap.products[ours]] = snap.prices[ours]
+
+        # Cheapest competitor per product
+        others = ~ours
+        products, platforms, prices = snap.products[others], snap.platforms[others], snap.prices[others]
+        order = np.lexsort((prices, products))
+        products, platforms, prices = products[order], platforms[order], prices[order]
+        first = np.r_[True, products[1:] != products[:-1]] if len(products) else np.zeros(0, dtype=bool)
+        products, platforms, prices = products[first], platforms[first], prices[first]
+
+        own = reference[products]
+        with np.errstate(invalid="ignore"):
+            undercut = (own - prices) / own
+            hit = ~np.isnan(own) & (undercut > threshold)
+        result = pd.DataFrame({
+            "product": self.product_labels[products[hit]],
+            "price": own[hit],
+            "competitor_platform": self.platform_labels[platforms[hit]],
+            "competitor_price": prices[hit],
+            "undercut_percent": undercut[hit] * 100,
+        }, columns=columns)
+        return result.sort_values("undercut_percent", ascending=False, kind="stable").reset_index(drop=True)
+
+    def history(self, product: Any) -> pd.DataFrame:
+        """
+        Price history of one product.
+
+        Args:
+            product: Product label
+
+        Returns:
+            Frame indexed by ISO day with one column per platform
+        """
+        cube = self.slice(products=[product])
+        frame = pd.DataFrame({
+            "day": _day_labels(cube.days),
+            "platform": self.platform_labels[cube.platforms],
+            "price": cube.prices,
+        })
+        return frame.pivot(index="day", columns="platform", values="price").sort_index()
+
+
+class _CubeBuilder:
+    """Accumulates encoded coordinates chunk by chunk."""
+
+    def __init__(self, product_col: str):
+        self.product_col = product_col
+        self.product_dictionary = _Dictionary()
+        self.platform_dictionary = _Dictionary()
+        self.parts: List[Tuple[np.ndarray, ...]] = []
+
+    def add(self, df: pd.DataFrame, platform: Optional[str] = None, day: DayLike = None):
+        if "price_numeric" not in df.columns:
+            df = ProductFrame.coerce(df).df
+        prices = pd.to_numeric(df["price_numeric"], errors="coerce")
+        keys = shared_product_keys(df, self.product_col)
+        platforms = df["platform"].astype(object) if "platform" in df.columns else pd.Series(np.nan, index=df.index, dtype=object)
+        if platform is not None:
+            platforms = platforms.where(platforms.notna() & (platforms != ""), platform)
+
+        time_col = "day" if "day" in df.columns else "scraped_at" if "scraped_at" in df.columns else None
+        if time_col is not None:
+            stamps = pd.to_datetime(df[time_col], errors="coerce", utc=True, format="ISO8601")
+            days = stamps.dt.tz_convert(None).to_numpy(dtype="datetime64[D]").astype(np.int64)
+            days = pd.Series(np.where(stamps.isna(), np.nan, days), index=df.index)
+        else:
+            days = pd.Series(np.nan, index=df.index)
+        default_day = _day_number(day) if day is not None else _day_number(datetime.now().date())
+        days = days.fillna(default_day)
+
+        valid = (prices > 0) & keys.notna() & platforms.notna() & (platforms != "")
+        if not valid.any():
+            return
+        self.parts.append((
+            self.product_dictionary.encode(keys[valid]),
+            self.platform_dictionary.encode(platforms[valid].map(str)),
+            days[valid].to_numpy(dtype=np.int64),
+            prices[valid].to_numpy(dtype=float),
+        ))
+
+    def build(self) -> PriceCube:
+        if self.parts:
+            arrays = [np.concatenate(part) for part in zip(*self.parts)]
+        else:
+            arrays = [np.zeros(0, dtype=np.int64)] * 3 + [np.zeros(0)]
+        return PriceCube(*arrays, self.product_dictionary.labels, self.platform_dictionary.labels)
@@ -0,0 +1,190 @@
+"""
+Columnar product store shared across analyses.
+
+A ProductFrame converts a product list to a DataFrame once: price, rating and
+review count are parsed into float columns, and low-cardinality string
+columns (brand, platform, ...) are stored as categoricals. Derived values
+(filtered numeric arrays, group keys, counts, text lists) are memoized, so
+running several analyses over the same products parses and converts once.
+"""
+
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Union
+
+import numpy as np
+import pandas as pd
+
+from core.processing.normalization import NUMERIC_COLUMNS, normalize_frame
+
+CATEGORICAL_COLUMNS = ("brand", "platform", "seller", "category")
+
+
+class ProductFrame:
+    """Typed, normalized product columns with memoized derived values."""
+
+    def __init__(self, df: pd.DataFrame, normalized: bool = False):
+        """
+        Wrap a product DataFrame.
+
+        Args:
+            df: Product frame; it is modified in place
+            normalized: Whether numeric columns and categoricals are already present
+        """
+        if not normalized:
+            normalize_frame(df, inplace=True)
+            for column in CATEGORICAL_COLUMNS:
+                if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+                    try:
+                        df[column] = df[column].astype("category")
+                    except TypeError:
+                        # Unhashable values (lists, dicts) stay as objects
+                        pass
+        self.df = df
+        self._cache: Dict[Hashable, Any] = {}
+
+    @classmethod
+    def from_records(cls, products: Iterable[Dict[str, Any]]) -> "ProductFrame":
+        """
+        Build a frame from product records.
+
+        Args:
+            products: Product records
+
+        Returns:
+            ProductFrame
+        """
+        return cls(pd.DataFrame(list(products)))
+
+    @classmethod
+    def coerce(cls, data: Union["ProductFrame", pd.DataFrame, Iterable[Dict[str, Any]], None]) -> "ProductFrame":
+        """
+        Return data as a ProductFrame, converting only when needed.
+
+        Args:
+            data: ProductFrame, DataFrame or product records
+
+        Returns:
+            ProductFrame (the same object if one was passed)
+        """
+        if isinstance(data, ProductFrame):
+            return data
+        if isinstance(data, pd.DataFrame):
+            return cls(data.copy())
+        return cls.from_records(data or [])
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    @property
+    def empty(self) -> bool:
+        """Whether the frame has no products."""
+        return len(self.df) == 0
+
+    def memo(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Compute a derived value once per frame.
+
+        Args:
+            key: Cache key
+            compute: Zero-argument function producing the value
+
+        Returns:
+            Cached value
+        """
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def numeric(self, kind: str, positive_only: bool = True) -> np.ndarray:
+        """
+        Parsed values of one numeric kind with unparseable rows dropped.
+
+        Args:
+            kind: One of "price", "rating", "review_count"
+            positive_only: Also drop zero/negative values
+
+        Returns:
+            Array of floats (shared; do not modify)
+        """
+        def compute():
+            values = self.df[NUMERIC_COLUMNS[kind]].to_numpy(dtype=float)
+            values = values[~np.isnan(values)]
+            return values[values > 0] if positive_only else values
+
+        return self.memo(("numeric", kind, positive_only), compute)
+
+    def filled_numeric(self) -> pd.DataFrame:
+        """
+        Numeric columns with unparseable values as 0.
+
+        Returns:
+            Frame of price_numeric, rating_numeric, review_count_numeric
+        """
+        columns = list(NUMERIC_COLUMNS.values())
+        return self.memo("filled_numeric", lambda: self.df[columns].fillna(0))
+
+    def group_key(self, column: str, missing: str = "Unknown") -> pd.Series:
+        """
+        Categorical column with absent, null and empty values mapped to a label.
+
+        Args:
+            column: Column name
+            missing: Label for missing values
+
+        Returns:
+            Categorical series aligned with the frame
+        """
+        def compute():
+            if column not in self.df.columns:
+                return pd.Series(pd.Categorical([missing] * len(self.df)), index=self.df.index, name=column)
+            series = self.df[column]
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                series = series.map(lambda value: value if isinstance(value, Hashable) else str(value))
+                series = series.astype("category")
+
+            # Remap category codes instead of touching every row as an object
+            labels = [missing if label == "" else label for label in series.cat.categories]
+            if missing not in labels:
+                labels.append(missing)
+            categories = pd.unique(pd.Series(labels, dtype=object))
+            position = {label: index for index, label in enumerate(categories)}
+            mapping = np.array([position[label] for label in labels] + [position[missing]], dtype=np.int64)
+            codes = mapping[series.cat.codes.to_numpy()]
+            return pd.Series(pd.Categorical.from_codes(codes, categories), index=self.df.index, name=column)
+
+        return self.memo(("group_key", column, missing), compute)
+
+    def value_counts(self, column: str, missing: str = "Unknown") -> pd.Series:
+        """
+        Row counts per value of a column, largest first, unused categories dropped.
+
+        Args:
+            column: Column name
+            missing: Label for missing values
+
+        Returns:
+            Counts indexed by value
+        """
+        def compute():
+            counts = self.group_key(column, missing).value_counts(sort=True)
+            return counts[counts > 0]
+
+        return self.memo(("value_counts", column, missing), compute)
+
+    def texts(self, field: str) -> List[str]:
+        """
+        Non-empty values of a text column as strings.
+
+        Args:
+            field: Column name
+
+        Returns:
+            List of strings (shared; do not modify)
+        """
+        def compute():
+            if field not in self.df.columns:
+                return []
+            values = self.df[field]
+            values = values[values.notna()]
+            return [str(value) for value in values if value]
+
+        return self.memo(("texts", field), compute)
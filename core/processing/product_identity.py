@@ -0,0 +1,449 @@
+"""
+Canonical product URLs and stable product identities.
+
+Scraped product links are raw hrefs: often relative, and carrying tracking
+parameters that differ on every visit. This module canonicalizes them per
+platform, extracts the native product ID where the URL exposes one, and maps
+every observation to a stable product key (e.g. "amazon:B08N5WRWNW") plus a
+dense integer ID for joins across runs. It also pulls the manufacturer
+identifiers (GTIN/EAN/UPC/ISBN) that let the same product be matched across
+platforms out of detail pages.
+"""
+
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+import json
+import logging
+import os
+import re
+
+from core.file_lock import file_lock, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_IDENTITY_PATH = os.environ.get(
+    "SCRAPER_PRODUCT_IDENTITY", os.path.join("data", "aggregates", "product_ids.json"))
+
+# Query parameters that never identify a product
+TRACKING_PARAMS = {
+    "ref", "ref_", "refid", "pf_rd_p", "pf_rd_r", "pd_rd_r", "pd_rd_w", "pd_rd_wg",
+    "qid", "sr", "keywords", "crid", "sprefix", "content-id", "psc", "th",
+    "spm", "scm", "pvid", "algo_pvid", "algo_exp_id", "aff_platform", "aff_trace_key",
+    "gclid", "fbclid", "msclkid", "yclid", "mc_cid", "mc_eid", "igshid",
+    "_trkparms", "_trksid", "hash", "epid", "amdata", "mkcid", "mkrid", "campid",
+    "clickid", "click_id", "source", "from", "sessionid", "session_id", "trk",
+    "search_query", "sp_atk", "xptdk", "wid", "lid", "marketplace",
+}
+TRACKING_PREFIXES = ("utm_", "pf_rd_", "pd_rd_", "_trk", "mkt_", "aff_", "sc_")
+
+# Per-platform rules: site root for relative links, product ID patterns
+# (matched against path + query) and query params that must be kept.
+PLATFORM_URL_RULES: Dict[str, Dict[str, Any]] = {
+    "amazon": {"base_url": "https://www.amazon.com",
+               "id_patterns": [r"/(?:dp|gp/product|gp/aw/d)/([A-Z0-9]{10})"]},
+    "ebay": {"base_url": "https://www.ebay.com", "id_patterns": [r"/itm/(?:[^/?]+/)?(\d{9,})"]},
+    "aliexpress": {"base_url": "https://www.aliexpress.com", "id_patterns": [r"/item/(?:[^/?]+/)?(\d+)\.html"]},
+    "etsy": {"base_url": "https://www.etsy.com", "id_patterns": [r"/listing/(\d+)"]},
+    "mercari": {"base_url": "https://www.mercari.com", "id_patterns": [r"/item/(m?\d+)"]},
+    "shopee": {"base_url": "https://shopee.com", "id_patterns": [r"-i\.(\d+\.\d+)", r"/product/(\d+/\d+)"]},
+    "lazada": {"base_url": "https://www.lazada.com", "id_patterns": [r"-i(\d+)(?:-s\d+)?\.html"]},
+    "flipkart": {"base_url": "https://www.flipkart.com", "id_patterns": [r"[?&]pid=([A-Z0-9]+)", r"/p/(itm[a-z0-9]+)"],
+                 "keep_params": {"pid"}},
+    "target": {"base_url": "https://www.target.com", "id_patterns": [r"/A-(\d+)"]},
+    "temu": {"base_url": "https://www.temu.com", "id_patterns": [r"-g-(\d+)\.html", r"[?&]goods_id=(\d+)"],
+             "keep_params": {"goods_id"}},
+    "ozon": {"base_url": "https://www.ozon.ru", "id_patterns": [r"/product/(?:[^/?]*-)?(\d+)/?"]},
+    "wildberries": {"base_url": "https://www.wildberries.ru", "id_patterns": [r"/catalog/(\d+)/detail"]},
+    "coupang": {"base_url": "https://www.coupang.com", "id_patterns": [r"/vp/products/(\d+)"]},
+    "allegro": {"base_url": "https://allegro.pl", "id_patterns": [r"/oferta/(?:[^/?]*-)?(\d+)"]},
+    "mercadolibre": {"base_url": "https://www.mercadolibre.com", "id_patterns": [r"(ML[A-Z])-?(\d+)"]},
+    "rakuten_japan": {"base_url": "https://item.rakuten.co.jp", "id_patterns": [r"^/([^/?]+/[^/?]+)"]},
+    "noon": {"base_url": "https://www.noon.com", "id_patterns": [r"/([A-Z0-9]{10,})/p"]},
+    "cdiscount": {"base_url": "https://www.cdiscount.com", "id_patterns": [r"/f-\d+-([a-z0-9]+)\.html"]},
+    "jumia": {"base_url": "https://www.jumia.com.ng", "id_patterns": [r"-(\d+)\.html"]},
+    "joom": {"base_url": "https://www.joom.com", "id_patterns": [r"/products/([0-9a-f]{24})"]},
+    "tiktokshop": {"base_url": "https://shop.tiktok.com", "id_patterns": [r"/product/(\d+)"]},
+    "falabella": {"base_url": "https://www.falabella.com", "id_patterns": [r"/product/(\d+)"]},
+    "tokopedia": {"base_url": "https://www.tokopedia.com", "id_patterns": [r"^/([^/?]+/[^/?]+)"]},
+    "otto": {"base_url": "https://www.otto.de", "id_patterns": [r"/p/(?:[^/?]*-)?([A-Z0-9]{6,})/?"]},
+    "yandex_market": {"base_url": "https://market.yandex.ru", "id_patterns": [r"/product--[^/]+/(\d+)", r"/product/(\d+)"]},
+    "fordeal": {"base_url": "https://www.fordeal.com", "id_patterns": [r"-(\d+)(?:\.html)?/?$"]},
+    "onbuy": {"base_url": "https://www.onbuy.com", "id_patterns": [r"~p(\d+)"]},
+    "faire": {"base_url": "https://www.faire.com", "id_patterns": [r"/product/(p_[a-z0-9]+)"]},
+    "fyndia": {"base_url": "https://www.fyndia.com", "id_patterns": [r"/products?/([^/?]+)"]},
+}
+
+_COMPILED_ID_PATTERNS = {
+    platform: [re.compile(pattern) for pattern in rules.get("id_patterns", [])]
+    for platform, rules in PLATFORM_URL_RULES.items()
+}
+
+# Record fields holding a native product ID, by platform
+NATIVE_ID_FIELDS = {"amazon": "asin"}
+
+# JSON-LD properties and detail-table labels -> shared identifier field
+IDENTIFIER_KEYS = {
+    "gtin": "gtin", "gtin8": "gtin", "gtin12": "upc", "gtin13": "ean", "gtin14": "gtin",
+    "upc": "upc", "ean": "ean", "isbn": "isbn", "isbn-13": "isbn", "isbn13": "isbn",
+}
+_IDENTIFIER_LENGTHS = (8, 10, 12, 13, 14)
+_DIGIT_RUN = re.compile(r"\d[\d\s-]*\d")
+
+
+def _is_tracking_param(name: str, keep: Iterable[str] = ()) -> bool:
+    lowered = name.lower()
+    if lowered in keep:
+        return False
+    return lowered in TRACKING_PARAMS or lowered.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str, platform: Optional[str] = None, base_url: Optional[str] = None) -> str:
+    """
+    Canonicalize a product URL.
+
+    Resolves relative links, lowercases scheme and host, drops the fragment,
+    the default port, tracking parameters and trailing slashes, and sorts the
+    remaining query parameters.
+
+    Args:
+        url: Raw href or absolute URL
+        platform: Platform name, selects per-platform rules
+        base_url: URL the link was found on; defaults to the platform root
+
+    Returns:
+        Canonical URL, or "" for empty or non-http links
+    """
+    if not url:
+        return ""
+    url = url.strip()
+    rules = PLATFORM_URL_RULES.get(platform or "", {})
+
+    base = base_url or rules.get("base_url")
+    if base:
+        url = urljoin(base, url)
+    elif url.startswith("//"):
+        url = "https:" + url
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        return ""
+
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    keep = rules.get("keep_params", set())
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_param(key, keep)
+    )
+
+    path = re.sub(r"/{2,}", "/", parts.path) or "/"
+    # Amazon appends /ref=... path segments for tracking
+    path = re.sub(r"/ref=[^/]*$", "", path)
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+
+def extract_product_id(url: str, platform: str) -> Optional[str]:
+    """
+    Extract the platform-native product ID from a URL.
+
+    Args:
+        url: Product URL (raw or canonical)
+        platform: Platform name
+
+    Returns:
+        Product ID, or None if the platform has no rule or nothing matched
+    """
+    patterns = _COMPILED_ID_PATTERNS.get(platform)
+    if not url or not patterns:
+        return None
+    parts = urlsplit(url)
+    target = parts.path + ("?" + parts.query if parts.query else "")
+    for pattern in patterns:
+        match = pattern.search(target)
+        if match:
+            return "".join(group for group in match.groups() if group)
+    return None
+
+
+def normalize_identifier(value: Any) -> Optional[str]:
+    """
+    First GTIN- or ISBN-shaped digit run (8, 10, 12, 13 or 14 digits) in a value.
+
+    Args:
+        value: Raw identifier text (may hold several, space separated)
+
+    Returns:
+        Digits, or None
+    """
+    if value is None:
+        return None
+    for run in _DIGIT_RUN.findall(str(value)):
+        for candidate in (run.replace(" ", "").replace("-", ""), *run.split()):
+            digits = candidate.replace("-", "")
+            if digits.isdigit() and len(digits) in _IDENTIFIER_LENGTHS:
+                return digits
+    return None
+
+
+def _json_ld_identifiers(node: Any, found: Dict[str, str]):
+    if isinstance(node, list):
+        for item in node:
+            _json_ld_identifiers(item, found)
+    elif isinstance(node, dict):
+        for key, value in node.items():
+            field = IDENTIFIER_KEYS.get(key.lower())
+            if field is not None:
+                digits = normalize_identifier(value)
+                if digits:
+                    found.setdefault(field, digits)
+            elif isinstance(value, (list, dict)):
+                _json_ld_identifiers(value, found)
+
+
+def extract_identifiers(soup: Any) -> Dict[str, str]:
+    """
+    Shared product identifiers on a detail page.
+
+    Reads schema.org JSON-LD (gtin, gtin8/12/13/14, isbn) and label/value rows
+    of spec tables and detail bullets ("UPC", "EAN", "ISBN-13").
+
+    Args:
+        soup: Parsed detail page (BeautifulSoup)
+
+    Returns:
+        Subset of {"gtin", "ean", "upc", "isbn"} mapped to digits
+    """
+    found: Dict[str, str] = {}
+    for script in soup.select('script[type="application/ld+json"]'):
+        try:
+            _json_ld_identifiers(json.loads(script.string or ""), found)
+        except ValueError:
+            continue
+
+    pairs = []
+    for row in soup.select("tr"):
+        cells = row.select("th, td")
+        if len(cells) >= 2:
+            pairs.append((cells[0].get_text(" ", strip=True), cells[1].get_text(" ", strip=True)))
+    for item in soup.select("#detailBullets_feature_div li, #detailBulletsWrapper_feature_div li"):
+        label, _, value = item.get_text(" ", strip=True).partition(":")
+        pairs.append((label, value))
+    for label, value in pairs:
+        # Amazon pads labels with direction marks: "UPC ‏ : ‎"
+        field = IDENTIFIER_KEYS.get(re.sub(r"[^a-z0-9-]", "", label.lower()))
+        if field is not None and field not in found:
+            digits = normalize_identifier(value)
+            if digits:
+                found[field] = digits
+    return found
+
+
+def product_key(record: Dict[str, Any], platform: Optional[str] = None,
+                base_url: Optional[str] = None) -> Optional[str]:
+    """
+    Compute a stable product key for one observation.
+
+    Prefers a native ID field (e.g. Amazon ASIN), then an ID extracted from
+    the URL, then the canonical URL itself.
+
+    Args:
+        record: Product record
+        platform: Platform name; defaults to record["platform"]
+        base_url: URL the record was scraped from, for relative links
+
+    Returns:
+        Key like "amazon:B08N5WRWNW" or "ebay:url:https://...", or None
+    """
+    platform = (platform or record.get("platform") or "unknown").lower()
+
+    native_field = NATIVE_ID_FIELDS.get(platform)
+    if native_field and record.get(native_field):
+        return f"{platform}:{record[native_field]}"
+
+    canonical = record.get("canonical_url") or canonicalize_url(
+        record.get("url", ""), platform, base_url or record.get("source_url"))
+    if not canonical:
+        return None
+
+    native_id = extract_product_id(canonical, platform)
+    if native_id:
+        return f"{platform}:{native_id}"
+    return f"{platform}:url:{canonical}"
+
+
+def annotate_products(products: List[Dict[str, Any]], platform: Optional[str] = None,
+                      base_url: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Add canonical_url and product_key fields to records in place.
+
+    Args:
+        products: Product records
+        platform: Platform name; defaults to each record's "platform"
+        base_url: URL the records were scraped from
+
+    Returns:
+        The same records
+    """
+    for record in products:
+        record_platform = platform or record.get("platform")
+        if record.get("url"):
+            record["canonical_url"] = canonicalize_url(record["url"], record_platform, base_url)
+        record["product_key"] = product_key(record, record_platform, base_url)
+    return products
+
+
+class ProductIdentityIndex:
+    """
+    Maps product keys to dense integer IDs that are stable across runs.
+
+    The file is append-only: assign() reloads it and writes new keys under an
+    inter-process lock, so concurrent scraper processes never hand out the
+    same ID twice.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the index.
+
+        Args:
+            path: JSON file to persist the mapping; in-memory only if None
+        """
+        self.path = path
+        self.lock = Lock()
+        self.key_to_id: Dict[str, int] = {}
+        self.keys: List[str] = []
+        self._dirty = False
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f).get("keys", [])
+        except Exception as e:
+            logger.error(f"Error loading product identity index: {e}")
+            return
+        with self.lock:
+            # Keys assigned here but not yet saved go after the stored ones
+            known = set(stored)
+            pending = [key for key in self.keys if key not in known]
+            self.keys = stored + pending
+            self.key_to_id = {key: i for i, key in enumerate(self.keys)}
+            self._dirty = bool(pending)
+
+    def get_id(self, key: str) -> int:
+        """
+        Get the integer ID for a key, assigning the next ID if new.
+
+        Args:
+            key: Product key
+
+        Returns:
+            Integer ID
+        """
+        identity = self.key_to_id.get(key)
+        if identity is not None:
+            return identity
+        with self.lock:
+            identity = self.key_to_id.get(key)
+            if identity is None:
+                identity = len(self.keys)
+                self.keys.append(key)
+                self.key_to_id[key] = identity
+                self._dirty = True
+            return identity
+
+    def lookup(self, identity: int) -> Optional[str]:
+        """Return the product key for an integer ID."""
+        return self.keys[identity] if 0 <= identity < len(self.keys) else None
+
+    def resolve(self, record: Dict[str, Any], platform: Optional[str] = None,
+                base_url: Optional[str] = None) -> Optional[int]:
+        """
+        Resolve an observation to its integer product ID.
+
+        Args:
+            record: Product record (uses record["product_key"] when present)
+            platform: Platform name
+            base_url: URL the record was scraped from
+
+        Returns:
+            Integer ID, or None if no key could be derived
+        """
+        key = record.get("product_key") or product_key(record, platform, base_url)
+        return self.get_id(key) if key else None
+
+    def resolve_all(self, products: List[Dict[str, Any]], platform: Optional[str] = None,
+                    base_url: Optional[str] = None) -> List[Optional[int]]:
+        """Resolve many observations, in order."""
+        return [self.resolve(record, platform, base_url) for record in products]
+
+    def assign(self, products: List[Dict[str, Any]], platform: Optional[str] = None,
+               base_url: Optional[str] = None) -> List[Optional[int]]:
+        """
+        Resolve records and set their "product_uid" field, persisting new keys.
+
+        With a path, the file is reloaded and rewritten under its lock so the
+        IDs agree with every other process sharing it.
+
+        Args:
+            products: Product records, updated in place
+            platform: Platform name; defaults to each record's "platform"
+            base_url: URL the records were scraped from
+
+        Returns:
+            Integer IDs, in order (None where no key could be derived)
+        """
+        if not self.path:
+            ids = self.resolve_all(products, platform, base_url)
+        else:
+            with file_lock(self.path):
+                if os.path.exists(self.path):
+                    self._load()
+                ids = self.resolve_all(products, platform, base_url)
+                self._write()
+        for record, identity in zip(products, ids):
+            if identity is not None:
+                record["product_uid"] = identity
+        return ids
+
+    def _write(self):
+        if not self._dirty:
+            return
+        with self.lock:
+            write_json_atomic(self.path, {"keys": self.keys}, ensure_ascii=False)
+            self._dirty = False
+
+    def save(self):
+        """Persist the mapping if it changed, merging keys saved by other processes."""
+        if not self.path or not self._dirty:
+            return
+        with file_lock(self.path):
+            if os.path.exists(self.path):
+                self._load()
+            self._write()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+_global_index: Optional[ProductIdentityIndex] = None
+_global_lock = Lock()
+
+
+def get_product_identity_index() -> ProductIdentityIndex:
+    """Get the shared index persisted at PRODUCT_IDENTITY_PATH."""
+    global _global_index
+    if _global_index is None:
+        with _global_lock:
+            if _global_index is None:
+                _global_index = ProductIdentityIndex(PRODUCT_IDENTITY_PATH)
+    return _global_index
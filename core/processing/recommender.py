@@ -1,18 +1,48 @@
 """
-AI recommendation system stub.
+AI recommendation system.
+
+Recommendations are real model completions when a model is configured, so
+callers (the daily report job, the prototype page) wait at most
+RECOMMENDATION_TIMEOUT seconds before falling back to a generic text.
 """
 
+import json
 from typing import Any
 
+from core.llm_gateway import get_llm_gateway
+
+RECOMMENDATION_MODEL = "gpt-4o-mini"
+# Seconds to wait for the model; much shorter than the gateway default
+RECOMMENDATION_TIMEOUT = 15.0
+FALLBACK_RECOMMENDATION = "AI分析建议：根据输入数据，建议优化策略并持续监控关键指标。（示例实现）"
 
-def ai_recommendation(data: Any) -> str:
+
+def ai_recommendation(data: Any, timeout: float = RECOMMENDATION_TIMEOUT) -> str:
     """
     Generate AI recommendations based on data.
     
+    Responses come from the shared LLM gateway, so repeated identical inputs
+    are served from its cache; without a configured model, on error or after
+    the timeout a generic recommendation is returned.
+    
     Args:
         data: Input data for analysis
+        timeout: Seconds to wait for the model
         
     Returns:
         Recommendation string
     """
-    return f"AI分析建议：根据输入数据，建议优化策略并持续监控关键指标。（示例实现）"
+    gateway = get_llm_gateway()
+    if not gateway.available:
+        return FALLBACK_RECOMMENDATION
+    try:
+        payload = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False, default=str)
+        response = gateway.complete(
+            [{"role": "user", "content": f"请根据以下数据给出简洁的优化建议（不超过5条）：\n{payload[:3000]}"}],
+            model=RECOMMENDATION_MODEL,
+            timeout=timeout,
+            max_tokens=400,
+        )
+        return response["text"]
+    except Exception:
+        return FALLBACK_RECOMMENDATION
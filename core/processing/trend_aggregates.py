@@ -0,0 +1,489 @@
+"""
+Materialized daily market aggregates.
+
+Each scrape batch is folded into one row per (day, platform, category, brand)
+holding counts, price sums and sums of squares, a 1-5 star rating histogram
+and review deltas (growth in review count per product since it was last
+seen). Trend and lifecycle queries read these rows instead of re-scanning
+product lists, so a year of history is a few thousand rows per platform.
+
+Batches are identified (by output file path for scraper runs), so replaying
+the same batch or backfilling from the data lake never double-counts. Several
+scraper processes share one file: reads reload it when it changed on disk and
+save() merges this process's unsaved batches into the file under a lock.
+"""
+
+import itertools
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from core.file_lock import file_lock, write_json_atomic
+from core.processing.product_frame import ProductFrame
+
+logger = logging.getLogger(__name__)
+
+TREND_AGGREGATES_PATH = os.environ.get(
+    "SCRAPER_TREND_AGGREGATES", os.path.join("data", "aggregates", "trend_aggregates.json"))
+
+KEY_COLUMNS = ("day", "platform", "category", "brand")
+# Stored per key; min/max combine with min/max, everything else adds
+AGGREGATE_FIELDS = (
+    "products", "new_products",
+    "price_count", "price_sum", "price_sumsq", "price_min", "price_max",
+    "rating_count", "rating_sum", "rating_1", "rating_2", "rating_3", "rating_4", "rating_5",
+    "review_count", "review_sum", "review_delta",
+)
+_MIN_FIELD = AGGREGATE_FIELDS.index("price_min")
+_MAX_FIELD = AGGREGATE_FIELDS.index("price_max")
+# Lower bounds of the 2..5 star buckets (same cut-offs as the analyzers' rating distribution)
+RATING_BUCKET_EDGES = (1.5, 2.5, 3.5, 4.5)
+MAX_BATCH_IDS = 10_000
+
+Key = Tuple[int, str, str, str]
+DayLike = Union[date, datetime, str, None]
+# rows, last-seen review counts, batch ids
+State = Tuple[Dict[Key, List[float]], Dict[str, float], Dict[str, None]]
+
+
+def _day_ordinal(value: DayLike) -> int:
+    if value is None:
+        return datetime.now(timezone.utc).date().toordinal()
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.toordinal()
+
+
+def _labels(df: pd.DataFrame, column: str, default: Optional[str] = None) -> pd.Series:
+    """String labels for a key column with missing values as "Unknown"."""
+    if column not in df.columns:
+        return pd.Series(default or "Unknown", index=df.index, dtype=object)
+    values = df[column].astype(object)
+    if default is not None:
+        values = values.where(values.notna() & (values != ""), default)
+    values = values.where(values.notna() & (values != ""), "Unknown")
+    return values.map(str)
+
+
+def _merge_row(rows: Dict[Key, List[float]], key: Key, row: List[float]):
+    current = rows.get(key)
+    if current is None:
+        rows[key] = list(row)
+        return
+    for index, value in enumerate(row):
+        if index == _MIN_FIELD or index == _MAX_FIELD:
+            if np.isnan(value):
+                continue
+            if np.isnan(current[index]):
+                current[index] = value
+            elif index == _MIN_FIELD:
+                current[index] = min(current[index], value)
+            else:
+                current[index] = max(current[index], value)
+        else:
+            current[index] += value
+
+
+def _mark_batch(batches: Dict[str, None], batch_id: str):
+    batches[batch_id] = None
+    while len(batches) > MAX_BATCH_IDS:
+        batches.pop(next(iter(batches)))
+
+
+class TrendAggregates:
+    """Daily (platform, category, brand) aggregates, updated incrementally per batch."""
+
+    def __init__(self, path: Optional[str] = TREND_AGGREGATES_PATH):
+        """
+        Args:
+            path: Persistence file, None for memory only
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.rows: Dict[Key, List[float]] = {}
+        # product_key -> review count when last seen (for review deltas and new products)
+        self.last_reviews: Dict[str, float] = {}
+        self.batches: Dict[str, None] = {}
+        self._frame: Optional[pd.DataFrame] = None
+        # Batches folded in since the last save: batch id -> (rows, last-seen review counts)
+        self._pending: Dict[str, Tuple[Dict[Key, List[float]], Dict[str, float]]] = {}
+        self._anonymous = itertools.count()
+        # Modification time of the file when memory last matched it
+        self._synced_mtime: Optional[float] = None
+
+    def ingest(self, products: Union[List[Dict[str, Any]], ProductFrame, pd.DataFrame],
+               platform: Optional[str] = None, day: DayLike = None,
+               batch_id: Optional[str] = None) -> int:
+        """
+        Fold one scrape batch into the aggregates.
+
+        Args:
+            products: Product records or frame; a "day" column overrides day
+            platform: Platform for rows without one
+            day: Scrape day, defaults to today (UTC)
+            batch_id: Batch identity (absolute output path for scraper runs);
+                a batch already ingested is skipped
+
+        Returns:
+            Number of products folded in
+        """
+        self.refresh()
+        if batch_id is not None and batch_id in self.batches:
+            return 0
+        with self.lock:
+            if batch_id is not None and batch_id in self.batches:
+                return 0
+            folded = self._fold(products, platform, day, batch_id)
+            if folded and batch_id is not None:
+                _mark_batch(self.batches, batch_id)
+        return folded
+
+    def _fold(self, products: Union[List[Dict[str, Any]], ProductFrame, pd.DataFrame],
+              platform: Optional[str], day: DayLike, batch_id: Optional[str]) -> int:
+        """Fold products into memory and into the pending batch (caller holds the lock)."""
+        frame = ProductFrame.coerce(products)
+        if frame.empty:
+            return 0
+        df = frame.df
+
+        # Keys
+        if "day" in df.columns:
+            days = df["day"].map(_day_ordinal).to_numpy()
+        else:
+            days = np.full(len(df), _day_ordinal(day), dtype=np.int64)
+        keys = pd.DataFrame({
+            "day": days,
+            "platform": _labels(df, "platform", platform),
+            "category": _labels(df, "category"),
+            "brand": _labels(df, "brand"),
+        })
+
+        # Per-row values
+        prices = df["price_numeric"].to_numpy(dtype=float)
+        prices = np.where(prices > 0, prices, np.nan)
+        ratings = df["rating_numeric"].to_numpy(dtype=float)
+        ratings = np.where(ratings > 0, ratings, np.nan)
+        reviews = df["review_count_numeric"].to_numpy(dtype=float)
+        reviews = np.where(reviews >= 0, reviews, np.nan)
+        buckets = np.digitize(ratings, RATING_BUCKET_EDGES) + 1
+
+        product_keys = df["product_key"].tolist() if "product_key" in df.columns else [None] * len(df)
+        new_products = np.zeros(len(df))
+        deltas = np.zeros(len(df))
+
+        if self.path:
+            pending_rows, pending_reviews = self._pending.setdefault(
+                batch_id if batch_id is not None else f"\0{next(self._anonymous)}", ({}, {}))
+        else:
+            pending_rows, pending_reviews = None, {}
+        for index, product in enumerate(product_keys):
+            if not isinstance(product, str) or not product:
+                continue
+            previous = self.last_reviews.get(product)
+            current = reviews[index]
+            if previous is None:
+                new_products[index] = 1
+            elif not np.isnan(current) and current > previous:
+                deltas[index] = current - previous
+            if not np.isnan(current):
+                self.last_reviews[product] = pending_reviews[product] = float(current)
+            elif previous is None:
+                self.last_reviews[product] = pending_reviews[product] = 0.0
+
+        values = pd.DataFrame({
+            "products": 1.0,
+            "new_products": new_products,
+            "price_count": ~np.isnan(prices),
+            "price_sum": np.nan_to_num(prices),
+            "price_sumsq": np.nan_to_num(prices) ** 2,
+            "price_min": prices,
+            "price_max": prices,
+            "rating_count": ~np.isnan(ratings),
+            "rating_sum": np.nan_to_num(ratings),
+            **{f"rating_{star}": (buckets == star) & ~np.isnan(ratings) for star in range(1, 6)},
+            "review_count": ~np.isnan(reviews),
+            "review_sum": np.nan_to_num(reviews),
+            "review_delta": deltas,
+        }, index=df.index)
+        grouped = pd.concat([keys, values], axis=1).groupby(list(KEY_COLUMNS), sort=False)
+        sums = grouped.sum()
+        sums["price_min"] = grouped["price_min"].min()
+        sums["price_max"] = grouped["price_max"].max()
+
+        for key, row in zip(sums.index, sums[list(AGGREGATE_FIELDS)].to_numpy(dtype=float)):
+            key = (int(key[0]), key[1], key[2], key[3])
+            row = row.tolist()
+            _merge_row(self.rows, key, row)
+            if pending_rows is not None:
+                _merge_row(pending_rows, key, row)
+        self._frame = None
+        return len(df)
+
+    def ingest_lake(self, lake, platforms: Optional[Sequence[str]] = None) -> int:
+        """
+        Backfill from data lake partitions not ingested yet.
+
+        Args:
+            lake: DataLake
+            platforms: Platform filter
+
+        Returns:
+            Number of products folded in
+        """
+        columns = ["platform", "category", "brand", "day", "product_key",
+                   "price_numeric", "rating_numeric", "review_count_numeric"]
+        self.refresh()
+        total = 0
+        for partition in lake.partitions(platforms):
+            batch_id = os.path.abspath(partition.path)
+            if batch_id in self.batches:
+                continue
+            for chunk in lake.scan(columns=columns, partitions=[partition]):
+                with self.lock:
+                    total += self._fold(chunk, None, None, batch_id)
+            with self.lock:
+                _mark_batch(self.batches, batch_id)
+        return total
+
+    def frame(self) -> pd.DataFrame:
+        """
+        All rows as a DataFrame (cached until the next ingest).
+
+        Returns:
+            Frame with KEY_COLUMNS ("day" as ISO date) and AGGREGATE_FIELDS
+        """
+        self.refresh()
+        with self.lock:
+            if self._frame is None:
+                if self.rows:
+                    keys = pd.DataFrame(list(self.rows.keys()), columns=list(KEY_COLUMNS))
+                    values = pd.DataFrame(list(self.rows.values()), columns=list(AGGREGATE_FIELDS))
+                    frame = pd.concat([keys, values], axis=1)
+                    frame["day"] = frame["day"].map(lambda ordinal: date.fromordinal(ordinal).isoformat())
+                    self._frame = frame.sort_values("day", kind="stable").reset_index(drop=True)
+                else:
+                    self._frame = pd.DataFrame(columns=list(KEY_COLUMNS) + list(AGGREGATE_FIELDS))
+            return self._frame
+
+    def query(self, group_by: Union[str, Sequence[str], None] = "day",
+              platform: Union[str, Sequence[str], None] = None,
+              category: Optional[str] = None, brand: Optional[str] = None,
+              since: DayLike = None, until: DayLike = None) -> pd.DataFrame:
+        """
+        Aggregates per group with derived statistics.
+
+        Args:
+            group_by: Key column(s) among day/platform/category/brand, None for one row
+            platform: Platform or list of platforms
+            category: Category filter
+            brand: Brand filter
+            since: First day (inclusive)
+            until: Last day (inclusive)
+
+        Returns:
+            Summed AGGREGATE_FIELDS plus price_mean, price_std, rating_mean and
+            review_mean (mean review count per observation)
+        """
+        frame = self.frame()
+        mask = pd.Series(True, index=frame.index)
+        for column, value in (("platform", platform), ("category", category), ("brand", brand)):
+            if isinstance(value, str):
+                mask &= frame[column] == value
+            elif value is not None:
+                mask &= frame[column].isin(list(value))
+        if since is not None:
+            mask &= frame["day"] >= date.fromordinal(_day_ordinal(since)).isoformat()
+        if until is not None:
+            mask &= frame["day"] <= date.fromordinal(_day_ordinal(until)).isoformat()
+        frame = frame[mask]
+
+        keys = [group_by] if isinstance(group_by, str) else list(group_by or [])
+        sums = [field for field in AGGREGATE_FIELDS if field not in ("price_min", "price_max")]
+        if keys:
+            grouped = frame.groupby(keys, sort=True)
+            result = grouped[sums].sum()
+            result["price_min"] = grouped["price_min"].min()
+            result["price_max"] = grouped["price_max"].max()
+            result = result.reset_index()
+        else:
+            result = frame[sums].sum().to_frame().T
+            result["price_min"] = frame["price_min"].min()
+            result["price_max"] = frame["price_max"].max()
+
+        price_count = result["price_count"].where(result["price_count"] > 0)
+        result["price_mean"] = result["price_sum"] / price_count
+        variance = (result["price_sumsq"] - result["price_sum"] ** 2 / price_count) / (price_count - 1).where(price_count > 1)
+        result["price_std"] = np.sqrt(variance.astype(float).clip(lower=0))
+        result["rating_mean"] = result["rating_sum"] / result["rating_count"].where(result["rating_count"] > 0)
+        result["review_mean"] = result["review_sum"] / result["review_count"].where(result["review_count"] > 0)
+        return result
+
+    def summary(self, **filters) -> Dict[str, Any]:
+        """
+        One row of query() over all matching rows as a dict.
+
+        Args:
+            **filters: platform, category, brand, since, until as for query()
+
+        Returns:
+            Aggregates, or {} when nothing matches
+        """
+        result = self.query(group_by=None, **filters)
+        row = result.iloc[0].to_dict() if len(result) else {}
+        if not row or not row.get("products"):
+            return {}
+        return {key: (None if isinstance(value, float) and np.isnan(value) else value) for key, value in row.items()}
+
+    # Persistence
+
+    def save(self, path: Optional[str] = None) -> bool:
+        """
+        Merge batches folded in since the last save into the file.
+
+        Holds the file lock while re-reading the file, adding every pending
+        batch it does not already contain and replacing it, so concurrent
+        scraper processes never drop each other's batches. Memory then matches
+        the merged file. Saving to any other path writes a snapshot of memory.
+
+        Args:
+            path: File path, defaults to the one given at init
+
+        Returns:
+            Whether saved
+        """
+        path = path or self.path
+        if not path:
+            return False
+        try:
+            with file_lock(path), self.lock:
+                if path == self.path:
+                    rows, last_reviews, batches = self._read(path)
+                    self._apply_pending(rows, last_reviews, batches)
+                else:
+                    rows, last_reviews, batches = self.rows, self.last_reviews, self.batches
+                write_json_atomic(path, {
+                    "fields": list(AGGREGATE_FIELDS),
+                    "rows": [list(key) + [None if np.isnan(v) else v for v in values]
+                             for key, values in rows.items()],
+                    "last_reviews": last_reviews,
+                    "batches": list(batches),
+                }, ensure_ascii=False, separators=(",", ":"))
+                if path == self.path:
+                    self.rows, self.last_reviews, self.batches = rows, last_reviews, batches
+                    self._pending.clear()
+                    self._synced_mtime = os.stat(path).st_mtime
+                    self._frame = None
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to save trend aggregates: {e}")
+            return False
+
+    def load(self, path: Optional[str] = None) -> bool:
+        """
+        Replace memory with the saved aggregates plus batches not saved yet.
+
+        Args:
+            path: File path, defaults to the one given at init
+
+        Returns:
+            Whether loaded
+        """
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            mtime = os.stat(path).st_mtime
+            rows, last_reviews, batches = self._read(path)
+            with self.lock:
+                self._apply_pending(rows, last_reviews, batches)
+                self.rows, self.last_reviews, self.batches = rows, last_reviews, batches
+                if path == self.path:
+                    self._synced_mtime = mtime
+                self._frame = None
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to load trend aggregates: {e}")
+            return False
+
+    def refresh(self) -> bool:
+        """
+        Reload the file if another process changed it since the last sync.
+
+        Returns:
+            Whether memory was reloaded
+        """
+        if not self.path:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if mtime == self._synced_mtime:
+            return False
+        return self.load()
+
+    @staticmethod
+    def _read(path: str) -> State:
+        """Rows, last-seen review counts and batch ids stored in a file (empty when missing)."""
+        rows: Dict[Key, List[float]] = {}
+        if not os.path.exists(path):
+            return rows, {}, {}
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        positions = [data["fields"].index(field) if field in data["fields"] else None
+                     for field in AGGREGATE_FIELDS]
+        for raw in data["rows"]:
+            key, values = tuple(raw[:4]), raw[4:]
+            row = [float("nan") if position is None or values[position] is None else float(values[position])
+                   for position in positions]
+            for index, position in enumerate(positions):
+                if position is None and index not in (_MIN_FIELD, _MAX_FIELD):
+                    row[index] = 0.0
+            _merge_row(rows, (int(key[0]), key[1], key[2], key[3]), row)
+        batches = dict.fromkeys(data.get("batches", []))
+        return rows, dict(data.get("last_reviews", {})), batches
+
+    def _apply_pending(self, rows: Dict[Key, List[float]], last_reviews: Dict[str, float],
+                       batches: Dict[str, None]):
+        """Add pending batches missing from a stored state (caller holds the lock)."""
+        for batch_id, (batch_rows, batch_reviews) in self._pending.items():
+            if batch_id in batches:
+                continue
+            for key, row in batch_rows.items():
+                _merge_row(rows, key, row)
+            last_reviews.update(batch_reviews)
+            if not batch_id.startswith("\0"):
+                _mark_batch(batches, batch_id)
+
+    def reset(self):
+        """Clear all aggregates."""
+        with self.lock:
+            self.rows.clear()
+            self.last_reviews.clear()
+            self.batches.clear()
+            self._pending.clear()
+            self._frame = None
+
+
+_global_aggregates: Optional[TrendAggregates] = None
+_global_lock = threading.Lock()
+
+
+def get_trend_aggregates() -> TrendAggregates:
+    """Get the shared aggregates (reads reload the file when another process saved it)."""
+    global _global_aggregates
+    if _global_aggregates is None:
+        with _global_lock:
+            if _global_aggregates is None:
+                aggregates = TrendAggregates()
+                aggregates.load()
+                _global_aggregates = aggregates
+    return _global_aggregates
@@ -0,0 +1,343 @@
+"""
+Sampling Profiler Module
+采样分析器模块
+
+Opt-in, low-overhead stack sampler for running crawls and Streamlit handlers
+可选开启的低开销栈采样器，用于运行中的抓取任务和 Streamlit 处理线程
+
+Samples are aggregated as collapsed stacks (flamegraph.pl / speedscope input)
+and as a top-N hot-function table.
+采样结果聚合为折叠栈（flamegraph.pl / speedscope 输入）以及热点函数排行。
+
+Enable with config/profiler_config.json ("enabled": true) or the SCRAPER_PROFILE=1
+environment variable. With "signal_toggle": true, sending SIGUSR2 toggles it at
+runtime.
+通过 config/profiler_config.json 或环境变量 SCRAPER_PROFILE=1 开启；
+配置 "signal_toggle": true 后可发送 SIGUSR2 信号在运行时切换。
+"""
+
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from scrapers.logger import log_info, log_error, log_warning
+
+
+CONFIG_PATH = os.path.join("config", "profiler_config.json")
+
+DEFAULT_CONFIG = {
+    "enabled": False,
+    "interval_seconds": 0.01,
+    # TaskQueue workers are named Worker-N, Streamlit runs pages in ScriptRunner threads
+    "thread_prefixes": ["Worker-", "ScriptRunner"],
+    "max_depth": 64,
+    "output_dir": os.path.join("logs", "profiles"),
+    # Installing a signal handler replaces the process's own; opt in explicitly
+    "signal_toggle": False,
+    "signal": "SIGUSR2",
+}
+
+
+def load_profiler_config(path: str = CONFIG_PATH) -> Dict[str, Any]:
+    """
+    Load profiler config merged over defaults
+    加载分析器配置（覆盖默认值）
+
+    Args:
+        path: Config file path / 配置文件路径
+
+    Returns:
+        Config / 配置
+    """
+    config = dict(DEFAULT_CONFIG)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                config.update(json.load(f))
+        except Exception as e:
+            log_error(f"加载分析器配置失败 / Failed to load profiler config: {e}")
+    if os.environ.get("SCRAPER_PROFILE") == "1":
+        config["enabled"] = True
+    return config
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Periodic stack sampler for selected threads / 对选定线程的周期性栈采样器"""
+
+    def __init__(self, interval: float = 0.01, thread_prefixes: Optional[List[str]] = None,
+                 max_depth: int = 64, output_dir: str = DEFAULT_CONFIG["output_dir"]):
+        """
+        Initialize profiler
+        初始化分析器
+
+        Args:
+            interval: Seconds between samples / 采样间隔（秒）
+            thread_prefixes: Thread name prefixes to sample, None for all / 采样的线程名前缀，None 表示全部
+            max_depth: Max frames kept per stack / 每个栈保留的最大帧数
+            output_dir: Directory for dump() / dump() 的输出目录
+        """
+        self.interval = interval
+        self.output_dir = output_dir
+        self.thread_prefixes = tuple(thread_prefixes) if thread_prefixes else None
+        self.max_depth = max_depth
+        self.lock = threading.Lock()
+        self.stacks: Dict[str, int] = {}
+        self.sample_count = 0
+        self.started_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether sampling is active / 是否正在采样"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def _wanted_threads(self) -> Dict[int, str]:
+        own = threading.get_ident()
+        wanted = {}
+        for thread in threading.enumerate():
+            if thread.ident is None or thread.ident == own:
+                continue
+            if self.thread_prefixes is None or thread.name.startswith(self.thread_prefixes):
+                wanted[thread.ident] = thread.name
+        return wanted
+
+    def sample_once(self):
+        """Take one sample of every selected thread / 对所有选定线程采样一次"""
+        wanted = self._wanted_threads()
+        if not wanted:
+            return
+        frames = sys._current_frames()
+        collected: List[str] = []
+        for ident in wanted:
+            frame = frames.get(ident)
+            labels = []
+            while frame is not None and len(labels) < self.max_depth:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            if labels:
+                collected.append(";".join(reversed(labels)))
+
+        with self.lock:
+            for stack in collected:
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            self.sample_count += len(collected)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample_once()
+            except Exception as e:
+                log_error(f"采样失败 / Sampling failed: {e}")
+
+    def start(self):
+        """Start sampling in a daemon thread / 在守护线程中开始采样"""
+        if self.running:
+            return
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="SamplingProfiler", daemon=True)
+        self._thread.start()
+        log_info(f"采样分析器已启动 / Sampling profiler started (interval={self.interval}s)")
+
+    def stop(self):
+        """Stop sampling / 停止采样"""
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join(timeout=max(1.0, self.interval * 5))
+        self._thread = None
+        log_info(f"采样分析器已停止 / Sampling profiler stopped ({self.sample_count} samples)")
+
+    def toggle(self) -> bool:
+        """
+        Start if stopped, stop if running
+        切换采样状态
+
+        Returns:
+            Whether sampling is now active / 切换后是否在采样
+        """
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+        return self.running
+
+    def reset(self):
+        """Clear collected samples / 清除采样数据"""
+        with self.lock:
+            self.stacks.clear()
+            self.sample_count = 0
+
+    def collapsed_stacks(self) -> Dict[str, int]:
+        """Copy of collapsed stacks with sample counts / 折叠栈及采样次数"""
+        with self.lock:
+            return dict(self.stacks)
+
+    def top_functions(self, n: int = 20) -> List[Dict[str, Any]]:
+        """
+        Hottest functions by self and inclusive samples
+        按自身和累计采样数排序的热点函数
+
+        Args:
+            n: Number of rows / 行数
+
+        Returns:
+            [{"function", "self", "total", "self_pct", "total_pct"}] / 热点函数列表
+        """
+        stacks = self.collapsed_stacks()
+        total_samples = sum(stacks.values())
+        if not total_samples:
+            return []
+
+        self_counts: Dict[str, int] = {}
+        total_counts: Dict[str, int] = {}
+        for stack, count in stacks.items():
+            frames = stack.split(";")
+            self_counts[frames[-1]] = self_counts.get(frames[-1], 0) + count
+            # Recursive functions count once per stack for inclusive time
+            for label in set(frames):
+                total_counts[label] = total_counts.get(label, 0) + count
+
+        rows = [
+            {
+                "function": label,
+                "self": self_counts.get(label, 0),
+                "total": total,
+                "self_pct": self_counts.get(label, 0) / total_samples * 100,
+                "total_pct": total / total_samples * 100,
+            }
+            for label, total in total_counts.items()
+        ]
+        rows.sort(key=lambda row: (row["self"], row["total"]), reverse=True)
+        return rows[:n]
+
+    def write_collapsed(self, path: str) -> str:
+        """
+        Write collapsed stacks file
+        写出折叠栈文件
+
+        Args:
+            path: Output path / 输出路径
+
+        Returns:
+            Written path, empty on failure / 写出的路径，失败时为空
+        """
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in sorted(self.collapsed_stacks().items(), key=lambda item: -item[1]):
+                    f.write(f"{stack} {count}\n")
+            log_info(f"折叠栈已保存 / Collapsed stacks saved: {path}")
+            return path
+        except Exception as e:
+            log_error(f"保存折叠栈失败 / Failed to save collapsed stacks: {e}")
+            return ""
+
+    def dump(self, output_dir: Optional[str] = None) -> str:
+        """Write a timestamped collapsed stacks file / 写出带时间戳的折叠栈文件"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return self.write_collapsed(os.path.join(output_dir or self.output_dir, f"profile_{timestamp}.folded"))
+
+
+_global_profiler: Optional[SamplingProfiler] = None
+_config: Optional[Dict[str, Any]] = None
+_toggle_requested = threading.Event()
+_toggle_thread: Optional[threading.Thread] = None
+
+
+def get_profiler() -> SamplingProfiler:
+    """
+    Get global profiler configured from config/profiler_config.json
+    获取全局分析器（按 config/profiler_config.json 配置）
+
+    Returns:
+        Sampling profiler / 采样分析器
+    """
+    global _global_profiler, _config
+    if _global_profiler is None:
+        _config = load_profiler_config()
+        _global_profiler = SamplingProfiler(
+            interval=_config["interval_seconds"],
+            thread_prefixes=_config["thread_prefixes"],
+            max_depth=_config["max_depth"],
+            output_dir=_config["output_dir"],
+        )
+    return _global_profiler
+
+
+def _toggle_loop(profiler: SamplingProfiler):
+    while True:
+        _toggle_requested.wait()
+        _toggle_requested.clear()
+        try:
+            if not profiler.toggle():
+                profiler.dump()
+        except Exception as e:
+            log_error(f"切换分析器失败 / Failed to toggle profiler: {e}")
+
+
+def install_signal_toggle(signal_name: Optional[str] = None) -> bool:
+    """
+    Toggle the global profiler with a signal; stopping also dumps a collapsed stacks file
+    用信号切换全局分析器；停止时同时写出折叠栈文件
+
+    The handler only sets an event; a daemon thread does the toggling, joining
+    and logging outside signal context.
+    信号处理函数只设置事件，由守护线程执行切换、等待与日志记录。
+
+    Args:
+        signal_name: Signal name, defaults to config (SIGUSR2) / 信号名，默认取配置
+
+    Returns:
+        Whether the handler was installed / 是否安装成功
+    """
+    profiler = get_profiler()
+    signum = getattr(signal, signal_name or _config["signal"], None)
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return False
+
+    global _toggle_thread
+    if _toggle_thread is None:
+        _toggle_thread = threading.Thread(target=_toggle_loop, args=(profiler,),
+                                          name="ProfilerToggle", daemon=True)
+        _toggle_thread.start()
+
+    def handler(_signum, _frame):
+        _toggle_requested.set()
+
+    signal.signal(signum, handler)
+    return True
+
+
+def maybe_start_profiler() -> Optional[SamplingProfiler]:
+    """
+    Start the global profiler if enabled in config, and install the signal
+    toggle if "signal_toggle" is set
+    若配置开启则启动全局分析器；配置 "signal_toggle" 时安装信号开关
+
+    Returns:
+        Profiler if started / 已启动时返回分析器
+    """
+    profiler = get_profiler()
+    if _config["signal_toggle"]:
+        try:
+            install_signal_toggle()
+        except Exception as e:
+            log_warning(f"无法安装分析器信号 / Cannot install profiler signal: {e}")
+    if _config["enabled"]:
+        profiler.start()
+        return profiler
+    return None
@@ -0,0 +1,343 @@
+"""
+JSON Schema Validator Compiler Module
+JSON Schema 验证器编译模块
+
+Compiles JSON Schemas from data/schema and config/schema into DataValidator rule plans
+将 data/schema 和 config/schema 中的 JSON Schema 编译为 DataValidator 规则计划
+"""
+
+import hashlib
+import io
+import json
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from core.data_validation import DataValidator, ValidationRule
+from scrapers.logger import log_info, log_warning
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Directories searched for schema files, in priority order / 按优先级搜索的 Schema 目录
+SCHEMA_DIRS = [
+    PROJECT_ROOT / "data" / "schema",
+    PROJECT_ROOT / "config" / "schema",
+]
+
+# JSON Schema type -> ValidationRule type / JSON Schema 类型到验证规则类型的映射
+TYPE_MAP = {
+    "string": "string",
+    "number": "number",
+    "integer": "integer",
+    "boolean": "boolean",
+    "array": "list",
+    "object": "dict",
+}
+
+PYTHON_TYPES = {
+    "string": (str,),
+    "number": (int, float),
+    "integer": (int,),
+    "boolean": (bool,),
+    "array": (list,),
+    "object": (dict,),
+}
+
+# Patterns used for the "format" keyword / "format" 关键字使用的正则
+FORMAT_PATTERNS = {
+    "date-time": r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:?\d{2})?$",
+    "date": r"^\d{4}-\d{2}-\d{2}$",
+    "email": r"^[^@\s]+@[^@\s]+\.[^@\s]+$",
+    "uri": r"^[a-zA-Z][a-zA-Z0-9+.-]*://\S+$",
+}
+
+# Compiled rule plans keyed by schema hash / 按 Schema 哈希缓存的已编译规则
+_compiled_cache: Dict[str, Tuple[ValidationRule, ...]] = {}
+_cache_lock = Lock()
+
+
+def schema_hash(schema: Dict[str, Any]) -> str:
+    """
+    Calculate a stable hash for a schema
+    计算 Schema 的稳定哈希值
+
+    Args:
+        schema: JSON Schema dict / JSON Schema 字典
+
+    Returns:
+        Hex digest / 十六进制摘要
+    """
+    canonical = json.dumps(schema, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _type_checker(types: List[str]):
+    """Build an isinstance checker for union types / 为联合类型构建类型检查函数"""
+    allowed: Tuple[type, ...] = ()
+    for type_name in types:
+        allowed += PYTHON_TYPES.get(type_name, ())
+    return lambda value: isinstance(value, allowed)
+
+
+def _compile_property(field: str, spec: Dict[str, Any], required: bool) -> List[ValidationRule]:
+    """
+    Compile a single property schema into validation rules
+    将单个属性 Schema 编译为验证规则
+
+    Only the first rule of a field reports it as missing, so a required field
+    yields a single "缺失" error instead of one per rule.
+
+    Args:
+        field: Property name / 属性名
+        spec: Property schema / 属性 Schema
+        required: Whether property is required / 属性是否必需
+
+    Returns:
+        List of rules / 规则列表
+    """
+    rules: List[ValidationRule] = []
+
+    def add(rule_type: str, params: Dict[str, Any]):
+        rules.append(ValidationRule(field, rule_type, params, required=required and not rules))
+
+    schema_type = spec.get("type")
+    if isinstance(schema_type, list):
+        non_null = [t for t in schema_type if t != "null"]
+        if len(non_null) == 1:
+            schema_type = non_null[0]
+        elif non_null:
+            add("custom", {"validator": _type_checker(non_null)})
+            schema_type = None
+        else:
+            schema_type = None
+
+    if schema_type in TYPE_MAP:
+        add("type", {"type": TYPE_MAP[schema_type]})
+
+    if "minLength" in spec or "maxLength" in spec:
+        add("length", {"min": spec.get("minLength"), "max": spec.get("maxLength")})
+    if "minItems" in spec or "maxItems" in spec:
+        add("length", {"min": spec.get("minItems"), "max": spec.get("maxItems")})
+    if "minimum" in spec or "maximum" in spec:
+        add("range", {"min": spec.get("minimum"), "max": spec.get("maximum")})
+
+    if "pattern" in spec:
+        # JSON Schema patterns are unanchored / Schema 正则为非锚定匹配
+        add("regex", {"pattern": spec["pattern"], "search": True})
+    elif spec.get("format") in FORMAT_PATTERNS:
+        add("regex", {"pattern": FORMAT_PATTERNS[spec["format"]]})
+
+    if "enum" in spec:
+        add("enum", {"values": list(spec["enum"])})
+    elif "const" in spec:
+        add("enum", {"values": [spec["const"]]})
+
+    # Nested objects are validated by their own compiled plan
+    if schema_type == "object" and ("properties" in spec or "required" in spec):
+        nested = DataValidator()
+        nested.rules = list(_compile_rules(spec))
+        add("custom", {"validator": lambda value: not isinstance(value, dict) or nested.validate(value)[0]})
+
+    if not rules and required:
+        add("required", {})
+
+    return rules
+
+
+def _compile_rules(schema: Dict[str, Any]) -> Tuple[ValidationRule, ...]:
+    """Compile an object schema into a flat tuple of rules / 将对象 Schema 编译为规则元组"""
+    properties = schema.get("properties") or {}
+    required = set(schema.get("required") or [])
+
+    rules: List[ValidationRule] = []
+    for field, spec in properties.items():
+        rules.extend(_compile_property(field, spec or {}, field in required))
+
+    # Required fields without a property definition still have to be present
+    for field in sorted(required - set(properties)):
+        rules.append(ValidationRule(field, "required", {}, required=True))
+
+    return tuple(rules)
+
+
+def compile_schema(schema: Dict[str, Any], use_cache: bool = True) -> DataValidator:
+    """
+    Compile a JSON Schema into a DataValidator
+    将 JSON Schema 编译为 DataValidator
+
+    Compiled rule plans are cached by schema hash; each call returns a fresh
+    DataValidator so callers may add their own rules without touching the cache.
+
+    Args:
+        schema: JSON Schema dict / JSON Schema 字典
+        use_cache: Whether to use the compiled plan cache / 是否使用编译缓存
+
+    Returns:
+        Configured validator / 配置好的验证器
+    """
+    key = schema_hash(schema)
+
+    rules = _compiled_cache.get(key) if use_cache else None
+    if rules is None:
+        rules = _compile_rules(schema)
+        if use_cache:
+            with _cache_lock:
+                rules = _compiled_cache.setdefault(key, rules)
+        log_info(f"Schema 已编译: {schema.get('title', key[:12])}, 规则数={len(rules)}")
+
+    validator = DataValidator()
+    validator.rules = list(rules)
+    return validator
+
+
+def clear_schema_cache():
+    """Clear compiled schema cache / 清除已编译 Schema 缓存"""
+    with _cache_lock:
+        _compiled_cache.clear()
+
+
+def find_schema_file(name: str) -> Optional[Path]:
+    """
+    Locate a schema file by name in the schema directories
+    在 Schema 目录中按名称查找 Schema 文件
+
+    Args:
+        name: Schema name with or without .json suffix / Schema 名称（可不带 .json 后缀）
+
+    Returns:
+        Schema path or None / Schema 路径或 None
+    """
+    filename = name if name.endswith(".json") else f"{name}.json"
+    for schema_dir in SCHEMA_DIRS:
+        path = schema_dir / filename
+        if path.exists():
+            return path
+    return None
+
+
+def load_schema(name: str) -> Dict[str, Any]:
+    """
+    Load schema JSON by name
+    按名称加载 Schema JSON
+
+    Args:
+        name: Schema name / Schema 名称
+
+    Returns:
+        Schema dict / Schema 字典
+    """
+    path = find_schema_file(name)
+    if path is None:
+        raise FileNotFoundError(f"未找到 Schema: {name}")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_schema_validator(name: str) -> DataValidator:
+    """
+    Load and compile a schema by name
+    按名称加载并编译 Schema
+
+    Args:
+        name: Schema name, e.g. "records_schema" / Schema 名称
+
+    Returns:
+        Configured validator / 配置好的验证器
+    """
+    return compile_schema(load_schema(name))
+
+
+def get_platform_validator(platform: str) -> DataValidator:
+    """
+    Get validator for a platform from data/schema/<platform>_product_schema.json
+    从 data/schema/<platform>_product_schema.json 获取平台验证器
+
+    Args:
+        platform: Platform name / 平台名称
+
+    Returns:
+        Configured validator / 配置好的验证器
+    """
+    return load_schema_validator(f"{platform.lower()}_product_schema")
+
+
+def iter_validate_ndjson(source: Union[str, Path, io.TextIOBase],
+                         validator: DataValidator) -> Iterator[Dict[str, Any]]:
+    """
+    Validate NDJSON records one line at a time
+    逐行验证 NDJSON 记录
+
+    Only one record is held in memory at a time, so arbitrarily large files
+    can be validated with bounded memory.
+
+    Args:
+        source: File path or open text stream / 文件路径或已打开的文本流
+        validator: Validator to apply / 使用的验证器
+
+    Yields:
+        {"line", "data", "valid", "errors"} per non-empty line / 每个非空行的验证结果
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, "r", encoding="utf-8") as f:
+            yield from iter_validate_ndjson(f, validator)
+        return
+
+    for line_no, line in enumerate(source, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield {"line": line_no, "data": None, "valid": False, "errors": [f"JSON 解析失败: {e}"]}
+            continue
+        if not isinstance(record, dict):
+            yield {"line": line_no, "data": record, "valid": False, "errors": ["记录应为 JSON 对象"]}
+            continue
+
+        is_valid, errors = validator.validate(record)
+        yield {"line": line_no, "data": record, "valid": is_valid, "errors": errors}
+
+
+def validate_ndjson(source: Union[str, Path, io.TextIOBase], validator: DataValidator,
+                    max_invalid_samples: int = 100) -> Dict[str, Any]:
+    """
+    Validate an NDJSON file and summarize results
+    验证 NDJSON 文件并汇总结果
+
+    Args:
+        source: File path or open text stream / 文件路径或已打开的文本流
+        validator: Validator to apply / 使用的验证器
+        max_invalid_samples: Max invalid records kept in the report / 报告中保留的最大无效样本数
+
+    Returns:
+        Summary report / 汇总报告
+    """
+    total = 0
+    valid = 0
+    error_counts: Dict[str, int] = {}
+    invalid_samples: List[Dict[str, Any]] = []
+
+    for result in iter_validate_ndjson(source, validator):
+        total += 1
+        if result["valid"]:
+            valid += 1
+            continue
+        for error in result["errors"]:
+            error_counts[error] = error_counts.get(error, 0) + 1
+        if len(invalid_samples) < max_invalid_samples:
+            invalid_samples.append(result)
+
+    invalid = total - valid
+    if invalid:
+        log_warning(f"NDJSON 验证发现无效记录: {invalid}/{total}")
+    log_info(f"NDJSON 验证完成: 总数={total}, 有效={valid}, 无效={invalid}")
+
+    return {
+        "total_count": total,
+        "valid_count": valid,
+        "invalid_count": invalid,
+        "error_counts": error_counts,
+        "invalid_samples": invalid_samples,
+    }
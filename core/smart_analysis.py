@@ -8,6 +8,14 @@ import json
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import logging
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+from core.llm_gateway import LLMGateway, get_llm_gateway
+from core.processing.normalization import numeric_column, numeric_values
+from core.processing.data_lake import DataLake, get_data_lake
+from core.processing.trend_aggregates import TrendAggregates, get_trend_aggregates
 
 logger = logging.getLogger(__name__)
 
@@ -15,22 +23,23 @@ logger = logging.getLogger(__name__)
 class SmartAnalysisEngine:
     """智能分析引擎 / Smart Analysis Engine"""
     
-    def __init__(self):
-        """初始化分析引擎 / Initialize analysis engine"""
+    AI_INSIGHTS_MODEL = "gpt-3.5-turbo"
+    
+    def __init__(self, llm: Optional[LLMGateway] = None, ai_timeout: Optional[float] = None,
+                 aggregates: Optional[TrendAggregates] = None):
+        """
+        初始化分析引擎 / Initialize analysis engine
+        
+        Args:
+            llm: 大模型网关，默认全局实例 / LLM gateway, defaults to the shared one
+            ai_timeout: AI 洞察等待时间（秒） / Seconds to wait for AI insights
+            aggregates: 每日趋势预聚合，默认全局实例 / Daily trend aggregates, defaults to the shared one
+        """
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
-        self.has_openai = self.openai_api_key is not None
-        
-        if self.has_openai:
-            try:
-                import openai
-                self.openai = openai
-                self.openai.api_key = self.openai_api_key
-                logger.info("OpenAI API initialized successfully")
-            except ImportError:
-                logger.warning("OpenAI package not installed")
-                self.has_openai = False
-        else:
-            logger.warning("OPENAI_API_KEY not configured")
+        self.llm = llm or get_llm_gateway()
+        self.has_openai = self.llm.available
+        self.ai_timeout = ai_timeout
+        self.aggregates = aggregates or get_trend_aggregates()
     
     def analyze_market_data(self, product_data: List[Dict[str, Any]], 
                            country: str = "US",
@@ -66,14 +75,17 @@ class SmartAnalysisEngine:
         # 政策和法规分析 / Policy and regulation analysis
         analysis["policy_insights"] = self._analyze_policies(country, category)
         
+        # 已采集平台的趋势与生命周期读取每日预聚合 / Trends and lifecycle of scraped platforms read the daily aggregates
+        filters = self._aggregate_filters(product_data)
+        
         # 热销产品和关键词分析 / Hot products and keyword analysis
-        analysis["trending_products"] = self._analyze_trending_products(product_data)
+        analysis["trending_products"] = self._analyze_trending_products(product_data, filters)
         
         # 成本和利润分析 / Cost and profit analysis
         analysis["profit_analysis"] = self._analyze_profitability(product_data)
         
         # 产品生命周期分析 / Product lifecycle analysis
-        analysis["lifecycle_analysis"] = self._analyze_product_lifecycle(product_data)
+        analysis["lifecycle_analysis"] = self._analyze_product_lifecycle(product_data, filters)
         
         # 竞争分析 / Competition analysis
         analysis["competition_analysis"] = self._analyze_competition(product_data)
@@ -84,42 +96,77 @@ class SmartAnalysisEngine:
         
         return analysis
     
+    def analyze_history(self, lake: Optional[DataLake] = None,
+                        platforms: Optional[List[str]] = None,
+                        since: Any = None, until: Any = None) -> Dict[str, Any]:
+        """
+        分析全部历史采集数据（分块聚合，不需要全部载入内存）
+        Analyze all historical scrape outputs with chunked aggregates
+        
+        Args:
+            lake: 数据湖，默认 data/ 目录 / Data lake, defaults to data/
+            platforms: 平台过滤 / Platform filter
+            since: 起始时间 / Earliest scrape time
+            until: 结束时间 / Latest scrape time
+            
+        Returns:
+            基础统计、竞争分析和每日趋势 / Basic stats, competition and daily trends
+        """
+        lake = lake or get_data_lake()
+        query = {"platforms": platforms, "since": since, "until": until}
+        analysis = {
+            "timestamp": datetime.now().isoformat(),
+            "platforms": platforms or lake.platforms(),
+        }
+        
+        # 一次扫描得到总体、品牌和每日聚合 / One scan for overall, brand and daily aggregates
+        summary = lake.summarize({"brands": "brand", "daily": "day"}, values=["price"], **query)
+        overall = summary["overall"]
+        if overall.empty:
+            analysis["basic_stats"] = {"error": "No data available"}
+            return analysis
+        
+        row = overall.iloc[0]
+        prices = summary["price"]
+        products = int(row["products"])
+        analysis["data_points"] = products
+        analysis["basic_stats"] = {
+            "total_products": products,
+            "price_range": {
+                "min": float(row["price_min"]) if prices.size else 0,
+                "max": float(row["price_max"]) if prices.size else 0,
+                "average": float(row["price_mean"]) if prices.size else 0,
+                "median": float(np.sort(prices)[prices.size // 2]) if prices.size else 0
+            },
+            "rating_stats": {
+                "average": float(row["rating_mean"]) if row["rating_count"] else 0
+            },
+            "review_stats": {
+                "average": float(row["review_count_sum"]) / products,
+                "total": int(row["review_count_sum"])
+            }
+        }
+        
+        brands = summary["brands"]
+        brands = brands[brands["brand"] != "Unknown"]
+        analysis["competition_analysis"] = {
+            "main_brands": [
+                {"brand": record["brand"], "count": int(record["products"]),
+                 "market_share_percent": round(record["products"] / products * 100, 2)}
+                for record in brands.head(10).to_dict("records")
+            ]
+        }
+        analysis["daily_trends"] = summary["daily"].to_dict("records")
+        return analysis
+    
     def _calculate_basic_stats(self, product_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """计算基础统计数据 / Calculate basic statistics"""
         if not product_data:
             return {"error": "No data available"}
         
-        prices = []
-        ratings = []
-        review_counts = []
-        
-        for product in product_data:
-            # 提取价格
-            price_str = product.get('current_price', product.get('price', ''))
-            if price_str:
-                try:
-                    price = float(price_str.replace('$', '').replace(',', '').strip())
-                    prices.append(price)
-                except:
-                    pass
-            
-            # 提取评分
-            rating_str = product.get('average_rating', product.get('rating', ''))
-            if rating_str:
-                try:
-                    rating = float(rating_str.split()[0])
-                    ratings.append(rating)
-                except:
-                    pass
-            
-            # 提取评论数
-            review_str = product.get('review_count', '')
-            if review_str:
-                try:
-                    review_count = int(''.join(filter(str.isdigit, review_str)))
-                    review_counts.append(review_count)
-                except:
-                    pass
+        prices = numeric_values(product_data, 'price', positive_only=False).tolist()
+        ratings = numeric_values(product_data, 'rating', positive_only=False).tolist()
+        review_counts = [int(c) for c in numeric_values(product_data, 'review_count', positive_only=False)]
         
         stats = {
             "total_products": len(product_data),
@@ -268,9 +315,20 @@ class SmartAnalysisEngine:
             logger.error(f"Error analyzing policies: {e}")
             return {"error": str(e)}
     
-    def _analyze_trending_products(self, product_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """分析热销产品类别和关键词搜索量
-        Analyze trending product categories and keyword search volume"""
+    def _aggregate_filters(self, product_data: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """商品所属平台都有预聚合时返回查询过滤条件，否则 None
+        Aggregate query filters when every product's platform has aggregates, else None"""
+        platforms = {product.get('platform') for product in product_data}
+        if not platforms or None in platforms or "" in platforms:
+            return None
+        filters = {"platform": sorted(platforms)}
+        return filters if self.aggregates.summary(**filters) else None
+    
+    def _analyze_trending_products(self, product_data: List[Dict[str, Any]],
+                                   filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """分析热销产品类别和关键词搜索量（有预聚合时品牌与类别读取预聚合）
+        Analyze trending product categories and keyword search volume
+        (brands and categories come from the aggregates when filters are given)"""
         
         trending = {
             "top_categories": [],
@@ -278,13 +336,13 @@ class SmartAnalysisEngine:
             "search_volume_trends": {}
         }
         
-        # 提取品牌和关键词
+        # 提取品牌和关键词（标题不在预聚合中） / Brands and keywords (titles are not aggregated)
         brands = {}
         keywords = {}
         
         for product in product_data:
             brand = product.get('brand', 'Unknown')
-            if brand and brand != 'Unknown':
+            if filters is None and brand and brand != 'Unknown':
                 brands[brand] = brands.get(brand, 0) + 1
             
             title = product.get('title', '')
@@ -295,11 +353,24 @@ class SmartAnalysisEngine:
                         keywords[word] = keywords.get(word, 0) + 1
         
         # 获取前10个品牌和关键词
-        trending["top_brands"] = sorted(brands.items(), key=lambda x: x[1], reverse=True)[:10]
+        if filters is not None:
+            trending.update(self._trending_from_aggregates(self.aggregates, filters))
+        else:
+            trending["top_brands"] = sorted(brands.items(), key=lambda x: x[1], reverse=True)[:10]
         trending["popular_keywords"] = sorted(keywords.items(), key=lambda x: x[1], reverse=True)[:20]
         
         return trending
     
+    @staticmethod
+    def _trending_from_aggregates(aggregates: TrendAggregates, filters: Dict[str, Any]) -> Dict[str, Any]:
+        """预聚合中商品数最多的品牌与类别 / Brands and categories with the most products in the aggregates"""
+        def top(column: str) -> List[Any]:
+            rows = aggregates.query(column, **filters)
+            rows = rows[rows[column] != "Unknown"].sort_values("products", ascending=False, kind="stable")
+            return [(name, int(count)) for name, count in zip(rows[column].head(10), rows["products"].head(10))]
+        
+        return {"top_brands": top("brand"), "top_categories": top("category")}
+    
     def _analyze_profitability(self, product_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """分析成本、售价、平台佣金、潜在利润
         Analyze cost, selling price, platform commission, potential profit"""
@@ -312,15 +383,7 @@ class SmartAnalysisEngine:
             "profit_analysis": []
         }
         
-        prices = []
-        for product in product_data:
-            price_str = product.get('current_price', product.get('price', ''))
-            if price_str:
-                try:
-                    price = float(price_str.replace('$', '').replace(',', '').strip())
-                    prices.append(price)
-                except:
-                    pass
+        prices = numeric_values(product_data, 'price', positive_only=False).tolist()
         
         if prices:
             avg_price = sum(prices) / len(prices)
@@ -341,9 +404,16 @@ class SmartAnalysisEngine:
         
         return profitability
     
-    def _analyze_product_lifecycle(self, product_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """分析产品生命周期（评论、退货率、用户评价关键词）
-        Analyze product lifecycle (reviews, return rate, user review keywords)"""
+    def _analyze_product_lifecycle(self, product_data: List[Dict[str, Any]],
+                                   filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """分析产品生命周期（评论、退货率、用户评价关键词；有预聚合时读取预聚合）
+        Analyze product lifecycle (reviews, return rate, user review keywords;
+        read from the aggregates when filters are given)"""
+        
+        if filters is not None:
+            lifecycle = self._lifecycle_from_aggregates(self.aggregates.summary(**filters))
+            lifecycle["common_keywords"] = []
+            return lifecycle
         
         lifecycle = {
             "average_reviews": 0,
@@ -352,52 +422,81 @@ class SmartAnalysisEngine:
             "estimated_lifecycle_stage": "growth"
         }
         
-        review_counts = []
-        ratings = []
-        
-        for product in product_data:
-            # 评论数
-            review_str = product.get('review_count', '')
-            if review_str:
-                try:
-                    count = int(''.join(filter(str.isdigit, review_str)))
-                    review_counts.append(count)
-                except:
-                    pass
-            
-            # 评分
-            rating_str = product.get('average_rating', product.get('rating', ''))
-            if rating_str:
-                try:
-                    rating = float(rating_str.split()[0])
-                    ratings.append(rating)
-                except:
-                    pass
+        review_counts = numeric_values(product_data, 'review_count', positive_only=False).tolist()
+        ratings = numeric_values(product_data, 'rating', positive_only=False).tolist()
         
         if review_counts:
             lifecycle["average_reviews"] = sum(review_counts) / len(review_counts)
         
         if ratings:
-            avg_rating = sum(ratings) / len(ratings)
-            if avg_rating >= 4.5:
-                lifecycle["review_sentiment"] = "highly positive"
-            elif avg_rating >= 4.0:
-                lifecycle["review_sentiment"] = "positive"
-            elif avg_rating >= 3.0:
-                lifecycle["review_sentiment"] = "neutral"
-            else:
-                lifecycle["review_sentiment"] = "negative"
-            
-            # 根据评分和评论数判断生命周期阶段
-            if lifecycle["average_reviews"] > 1000 and avg_rating >= 4.0:
-                lifecycle["estimated_lifecycle_stage"] = "maturity"
-            elif lifecycle["average_reviews"] > 100:
-                lifecycle["estimated_lifecycle_stage"] = "growth"
-            else:
-                lifecycle["estimated_lifecycle_stage"] = "introduction"
+            self._classify_lifecycle(lifecycle, sum(ratings) / len(ratings))
+        
+        return lifecycle
+    
+    def _classify_lifecycle(self, lifecycle: Dict[str, Any], avg_rating: float):
+        """根据平均评分和评论数判断情感与生命周期阶段
+        Set review sentiment and lifecycle stage from average rating and reviews"""
+        if avg_rating >= 4.5:
+            lifecycle["review_sentiment"] = "highly positive"
+        elif avg_rating >= 4.0:
+            lifecycle["review_sentiment"] = "positive"
+        elif avg_rating >= 3.0:
+            lifecycle["review_sentiment"] = "neutral"
+        else:
+            lifecycle["review_sentiment"] = "negative"
         
+        # 根据评分和评论数判断生命周期阶段
+        if lifecycle["average_reviews"] > 1000 and avg_rating >= 4.0:
+            lifecycle["estimated_lifecycle_stage"] = "maturity"
+        elif lifecycle["average_reviews"] > 100:
+            lifecycle["estimated_lifecycle_stage"] = "growth"
+        else:
+            lifecycle["estimated_lifecycle_stage"] = "introduction"
+    
+    def _lifecycle_from_aggregates(self, summary: Dict[str, Any]) -> Dict[str, Any]:
+        """由预聚合汇总得到生命周期 / Lifecycle from an aggregates summary"""
+        lifecycle = {
+            "average_reviews": summary["review_mean"] or 0,
+            "review_sentiment": "positive",
+            "estimated_lifecycle_stage": "growth",
+            "review_growth": int(summary["review_delta"]),
+            "new_products": int(summary["new_products"])
+        }
+        if summary["rating_mean"] is not None:
+            self._classify_lifecycle(lifecycle, summary["rating_mean"])
         return lifecycle
     
+    def analyze_trends_from_aggregates(self, aggregates: Optional[TrendAggregates] = None,
+                                       platform: Any = None,
+                                       category: Optional[str] = None,
+                                       since: Any = None, until: Any = None) -> Dict[str, Any]:
+        """
+        基于每日预聚合的热销与生命周期分析（不扫描商品列表）
+        Trending and lifecycle analysis read from the daily aggregates (no product scan)
+        
+        Args:
+            aggregates: 预聚合，默认引擎的实例 / Aggregates, defaults to the engine's
+            platform: 平台或平台列表过滤 / Platform (or list of platforms) filter
+            category: 类别过滤 / Category filter
+            since: 起始日期 / First day
+            until: 结束日期 / Last day
+            
+        Returns:
+            热销品牌/类别、生命周期和每日评论增长 / Trending brands/categories, lifecycle and daily review growth
+        """
+        aggregates = aggregates or self.aggregates
+        filters = {"platform": platform, "category": category, "since": since, "until": until}
+        summary = aggregates.summary(**filters)
+        if not summary:
+            return {"error": "No data available"}
+        
+        daily = aggregates.query("day", **filters)
+        return {
+            "trending_products": self._trending_from_aggregates(aggregates, filters),
+            "lifecycle_analysis": self._lifecycle_from_aggregates(summary),
+            "daily_review_growth": dict(zip(daily["day"], daily["review_delta"].astype(int)))
+        }
+    
     def _analyze_competition(self, product_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """分析竞争情况（主要品牌、市场占比、定价策略、推广渠道）
         Analyze competition (main brands, market share, pricing strategy, promotion channels)"""
@@ -412,21 +511,15 @@ class SmartAnalysisEngine:
         # 统计品牌
         brands = {}
         brand_prices = {}
+        prices = numeric_column(product_data, 'price')
         
-        for product in product_data:
+        for product, price in zip(product_data, prices):
             brand = product.get('brand', 'Unknown')
             if brand and brand != 'Unknown':
                 brands[brand] = brands.get(brand, 0) + 1
                 
-                price_str = product.get('current_price', product.get('price', ''))
-                if price_str:
-                    try:
-                        price = float(price_str.replace('$', '').replace(',', '').strip())
-                        if brand not in brand_prices:
-                            brand_prices[brand] = []
-                        brand_prices[brand].append(price)
-                    except:
-                        pass
+                if not np.isnan(price):
+                    brand_prices.setdefault(brand, []).append(float(price))
         
         # 计算市场份额
         total_products = len(product_data)
@@ -510,24 +603,28 @@ class SmartAnalysisEngine:
 请用简洁专业的语言回答，每个要点不超过2句话。
 """
             
-            response = self.openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
+            # 相同提示词直接命中响应缓存，进行中的相同请求会被合并
+            response = self.llm.complete(
+                [
                     {"role": "system", "content": "你是一位专业的电商市场分析师，擅长数据分析和商业洞察。"},
                     {"role": "user", "content": prompt}
                 ],
+                model=self.AI_INSIGHTS_MODEL,
+                timeout=self.ai_timeout,
                 max_tokens=500,
                 temperature=0.7
             )
             
-            ai_insight = response.choices[0].message.content
-            
             return {
-                "ai_generated_insights": ai_insight,
-                "model": "gpt-3.5-turbo",
+                "ai_generated_insights": response["text"],
+                "model": response["model"],
+                "cached": response["cached"],
                 "timestamp": datetime.now().isoformat()
             }
             
+        except FutureTimeoutError:
+            logger.warning("AI insights timed out; the response will be cached when it arrives")
+            return {"error": "timeout", "message": "AI insights are still being generated"}
         except Exception as e:
             logger.error(f"Error generating AI insights: {e}")
             return {"error": str(e), "message": "Failed to generate AI insights"}
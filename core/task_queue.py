@@ -15,6 +15,8 @@ from enum import Enum
 from queue import Queue, Empty
 from threading import Thread, Lock
 from scrapers.logger import log_info, log_error, log_warning
+from core.sampling_profiler import maybe_start_profiler
+from core.metrics_exporter import get_metrics_registry, maybe_start_metrics_server
 
 
 class TaskStatus(Enum):
@@ -91,14 +93,16 @@ class Task:
 class TaskQueue:
     """Task queue with priority support / 支持优先级的任务队列"""
     
-    def __init__(self, max_workers: int = 4):
+    def __init__(self, max_workers: int = 4, name: str = "default"):
         """
         Initialize task queue
         初始化任务队列
         
         Args:
             max_workers: Maximum number of worker threads / 最大工作线程数
+            name: Queue label in exported metrics / 导出指标中的队列标签
         """
+        self.name = name
         self.queue = Queue()
         self.tasks: Dict[str, Task] = {}
         self.lock = Lock()
@@ -267,6 +271,14 @@ class TaskQueue:
         
         self.running = True
         
+        # 按配置开启采样分析（或 SIGUSR2 切换） / Start sampling profiler if enabled (or toggle via SIGUSR2)
+        maybe_start_profiler()
+        
+        # 导出本进程的队列深度与任务状态（设置 SCRAPER_METRICS_PORT 时提供 HTTP 端点）
+        # Export this process's queue depth and task states (served over HTTP when SCRAPER_METRICS_PORT is set)
+        get_metrics_registry().register_task_queue(self, self.name)
+        maybe_start_metrics_server()
+        
         for i in range(self.max_workers):
             worker = Thread(target=self._worker, name=f"Worker-{i+1}", daemon=True)
             worker.start()
@@ -294,6 +306,7 @@ class TaskQueue:
                 worker.join(timeout=5)
         
         self.workers.clear()
+        get_metrics_registry().unregister_task_queue(self.name)
         log_info("任务队列已停止")
     
     def cancel_task(self, task_id: str) -> bool:
@@ -0,0 +1,254 @@
+"""
+Ring Buffer Time Series Module
+环形缓冲时间序列模块
+
+Fixed-width numpy event storage and pre-aggregated per-second / per-minute rollups
+基于 numpy 的定长事件存储，以及按秒/按分钟预聚合的汇总序列
+
+Neither class is thread-safe on its own; callers guard them with their own lock.
+两个类本身都不是线程安全的，由调用方加锁保护。
+"""
+
+import math
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+# One request event: 8 + 2 + 1 + 4 + 4 + 2 = 21 bytes / 每个事件 21 字节
+EVENT_DTYPE = np.dtype([
+    ("ts", "f8"),        # Epoch seconds / 时间戳（秒）
+    ("platform", "u2"),  # Interned platform id / 平台 ID
+    ("status", "u1"),    # 1 success, 0 failure / 1 成功，0 失败
+    ("latency", "f4"),   # Response time in seconds / 响应时间（秒）
+    ("items", "u4"),     # Items scraped / 抓取项目数
+    ("error", "u2"),     # Interned error type id, 0 for none / 错误类型 ID，0 表示无
+])
+
+ROLLUP_FIELDS = ("requests", "successful", "failed", "items", "latency_sum", "latency_max", "captcha")
+
+
+class StringInterner:
+    """Map strings to small integer ids / 字符串到整数 ID 的映射"""
+
+    def __init__(self, reserve_empty: bool = False):
+        """
+        Initialize interner
+        初始化映射
+
+        Args:
+            reserve_empty: Reserve id 0 for None / 为 None 保留 ID 0
+        """
+        self.names: List[Optional[str]] = [None] if reserve_empty else []
+        self.ids: Dict[Optional[str], int] = {None: 0} if reserve_empty else {}
+
+    def intern(self, name: Optional[str]) -> int:
+        """Get or assign id / 获取或分配 ID"""
+        index = self.ids.get(name)
+        if index is None:
+            index = len(self.names)
+            self.names.append(name)
+            self.ids[name] = index
+        return index
+
+    def get(self, name: Optional[str]) -> Optional[int]:
+        """Get id without assigning / 获取 ID（不分配）"""
+        return self.ids.get(name)
+
+    def name(self, index: int) -> Optional[str]:
+        """Get name for id / 获取 ID 对应的名称"""
+        return self.names[index]
+
+
+class EventRingBuffer:
+    """Fixed-capacity columnar ring buffer of request events / 定长列式请求事件环形缓冲"""
+
+    def __init__(self, capacity: int = 1000):
+        """
+        Initialize ring buffer
+        初始化环形缓冲
+
+        Args:
+            capacity: Maximum number of events kept / 最大事件数
+        """
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=EVENT_DTYPE)
+        self.platforms = StringInterner()
+        self.errors = StringInterner(reserve_empty=True)
+        self._head = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, ts: float, platform: str, success: bool, latency: float,
+               items: int = 0, error_type: str = None):
+        """
+        Append an event, overwriting the oldest when full
+        追加事件，满时覆盖最旧事件
+
+        Args:
+            ts: Epoch seconds / 时间戳（秒）
+            platform: Platform name / 平台名称
+            success: Whether request was successful / 是否成功
+            latency: Response time in seconds / 响应时间（秒）
+            items: Items scraped / 抓取项目数
+            error_type: Error type / 错误类型
+        """
+        self.data[self._head] = (
+            ts, self.platforms.intern(platform), 1 if success else 0,
+            latency, items, self.errors.intern(error_type)
+        )
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def _segments(self) -> List[np.ndarray]:
+        """Chronological views without copying / 按时间顺序的视图（不复制）"""
+        if self._size < self.capacity:
+            return [self.data[:self._size]]
+        return [self.data[self._head:], self.data[:self._head]]
+
+    def tail(self, count: int) -> np.ndarray:
+        """
+        Get the most recent events, oldest first
+        获取最近的事件（按时间升序）
+
+        Args:
+            count: Number of events / 事件数
+
+        Returns:
+            Structured array / 结构化数组
+        """
+        count = max(0, min(count, self._size))
+        if count == 0:
+            return self.data[:0]
+        start = (self._head - count) % self.capacity
+        if start + count <= self.capacity:
+            return self.data[start:start + count]
+        return np.concatenate([self.data[start:], self.data[:self._head]])
+
+    def since(self, cutoff: float) -> np.ndarray:
+        """
+        Get events newer than a timestamp in O(window)
+        获取某时间之后的事件，复杂度 O(窗口)
+
+        Args:
+            cutoff: Epoch seconds / 时间戳（秒）
+
+        Returns:
+            Structured array / 结构化数组
+        """
+        parts = []
+        for segment in self._segments():
+            if len(segment) == 0:
+                continue
+            start = int(np.searchsorted(segment["ts"], cutoff, side="right"))
+            if start < len(segment):
+                parts.append(segment[start:])
+        if not parts:
+            return self.data[:0]
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def to_records(self, events: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Convert events to dicts for display
+        将事件转换为字典以便展示
+
+        Args:
+            events: Structured array / 结构化数组
+
+        Returns:
+            Request records / 请求记录
+        """
+        return [
+            {
+                "timestamp": datetime.fromtimestamp(float(event["ts"]), timezone.utc).isoformat(),
+                "platform": self.platforms.name(int(event["platform"])),
+                "success": bool(event["status"]),
+                "response_time": float(event["latency"]),
+                "items_count": int(event["items"]),
+                "error_type": self.errors.name(int(event["error"]))
+            }
+            for event in events
+        ]
+
+    def clear(self):
+        """Clear all events / 清除所有事件"""
+        self._head = 0
+        self._size = 0
+
+
+class RollupSeries:
+    """Pre-aggregated counters in fixed-width time buckets / 定宽时间桶的预聚合计数"""
+
+    def __init__(self, resolution_seconds: int = 1, num_buckets: int = 3600):
+        """
+        Initialize rollup series
+        初始化汇总序列
+
+        Args:
+            resolution_seconds: Bucket width / 桶宽度（秒）
+            num_buckets: Buckets kept (history = resolution * buckets) / 保留的桶数
+        """
+        self.resolution = resolution_seconds
+        self.num_buckets = num_buckets
+        self.epochs = np.full(num_buckets, -1, dtype=np.int64)
+        self.values = np.zeros((len(ROLLUP_FIELDS), num_buckets), dtype=np.float64)
+
+    def add(self, ts: float, success: bool, latency: float, items: int = 0, captcha: bool = False):
+        """
+        Add one request to its bucket
+        将一次请求累加到对应桶
+
+        Args:
+            ts: Epoch seconds / 时间戳（秒）
+            success: Whether request was successful / 是否成功
+            latency: Response time in seconds / 响应时间（秒）
+            items: Items scraped / 抓取项目数
+            captcha: Whether request hit a captcha / 是否触发验证码
+        """
+        epoch = int(ts // self.resolution)
+        index = epoch % self.num_buckets
+        if self.epochs[index] != epoch:
+            self.epochs[index] = epoch
+            self.values[:, index] = 0.0
+        column = self.values[:, index]
+        column[0] += 1
+        column[1 if success else 2] += 1
+        if success:
+            column[3] += items
+        column[4] += latency
+        if latency > column[5]:
+            column[5] = latency
+        if captcha:
+            column[6] += 1
+
+    def query(self, window_seconds: float, now: float) -> Dict[str, np.ndarray]:
+        """
+        Get bucket values covering a window, empty buckets as zero
+        获取窗口内各桶的值，空桶为 0
+
+        Args:
+            window_seconds: Window length / 窗口长度（秒）
+            now: Epoch seconds / 时间戳（秒）
+
+        Returns:
+            {"timestamps", "requests", "successful", "failed", "items", "latency_sum", "latency_max", "captcha"}
+        """
+        count = min(self.num_buckets, max(1, math.ceil(window_seconds / self.resolution)))
+        current = int(now // self.resolution)
+        wanted = np.arange(current - count + 1, current + 1, dtype=np.int64)
+        indices = wanted % self.num_buckets
+        valid = self.epochs[indices] == wanted
+        values = np.where(valid, self.values[:, indices], 0.0)
+
+        result = {"timestamps": wanted * self.resolution}
+        for row, field in enumerate(ROLLUP_FIELDS):
+            result[field] = values[row]
+        return result
+
+    def clear(self):
+        """Clear all buckets / 清除所有桶"""
+        self.epochs.fill(-1)
+        self.values.fill(0.0)
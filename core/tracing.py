@@ -0,0 +1,327 @@
+"""
+Lightweight Tracing Module
+轻量级链路追踪模块
+
+Context-manager spans with parent/child links, OTLP/JSON file export and
+collapsed-stack flame summaries per run
+支持父子关系的上下文管理器 span、OTLP/JSON 文件导出以及每次运行的火焰图摘要
+
+Spans opened outside a ``trace_run`` block are no-ops, so instrumented hot
+paths cost almost nothing when no run is being traced.
+在 ``trace_run`` 之外打开的 span 不做任何记录，未追踪时热点路径几乎没有开销。
+
+Scraper runs are traced only when sampled: SCRAPER_TRACE_SAMPLE is the
+fraction of runs traced (default 0, off). The export file rotates by size and
+flame summaries go to logs/flames, not next to the scraped data.
+抓取运行按 SCRAPER_TRACE_SAMPLE 比例采样追踪（默认 0，即关闭）；导出文件按大小轮转，
+火焰图摘要写入 logs/flames 而非数据目录。
+"""
+
+import json
+import logging
+import os
+import random
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional
+
+from core.file_lock import file_lock
+
+# Standard logging: scrapers.logger would import the scrapers package, which imports this module
+logger = logging.getLogger(__name__)
+
+TRACE_EXPORT_PATH = os.environ.get("SCRAPER_TRACE_FILE", os.path.join("logs", "traces.jsonl"))
+TRACE_MAX_BYTES = 10 * 1024 * 1024
+TRACE_BACKUP_COUNT = 5
+FLAME_DIR = os.environ.get("SCRAPER_FLAME_DIR", os.path.join("logs", "flames"))
+
+# Fraction of scraper runs traced (0 = off, 1 = every run) / 追踪的抓取运行比例
+TRACE_SAMPLE_RATE = float(os.environ.get("SCRAPER_TRACE_SAMPLE", "0"))
+
+SERVICE_NAME = "ecommerce-scraper"
+
+# Stages counted as network time in run summaries / 运行摘要中计为网络耗时的阶段
+NETWORK_STAGES = ("fetch",)
+
+
+class Span:
+    """One timed operation / 一次计时操作"""
+
+    __slots__ = ("name", "trace", "span_id", "parent", "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, name: str, trace: "Trace", parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent = parent
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.status = "ok"
+
+    def set_attribute(self, key: str, value: Any):
+        """Set attribute / 设置属性"""
+        self.attributes[key] = value
+
+    @property
+    def duration_ns(self) -> int:
+        """Duration in nanoseconds / 持续时间（纳秒）"""
+        return (self.end_ns or time.time_ns()) - self.start_ns
+
+    def path(self) -> List[str]:
+        """Names from root to this span / 从根到当前 span 的名称"""
+        names = []
+        span = self
+        while span is not None:
+            names.append(span.name)
+            span = span.parent
+        return names[::-1]
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Convert to an OTLP/JSON span / 转换为 OTLP/JSON span"""
+        data = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": 2 if self.status == "error" else 1},
+        }
+        if self.parent is not None:
+            data["parentSpanId"] = self.parent.span_id
+        return data
+
+
+class _NoopSpan:
+    """Span used outside a traced run / 未追踪时使用的空 span"""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class Trace:
+    """All spans of one run / 一次运行的全部 span"""
+
+    def __init__(self):
+        """Initialize trace / 初始化追踪"""
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self.lock = Lock()
+        self.root: Optional[Span] = None
+
+    def _finish(self, span: Span):
+        with self.lock:
+            self.spans.append(span)
+
+    def collapsed_stacks(self) -> Dict[str, int]:
+        """
+        Self time per stack path in microseconds
+        每条调用路径的自身耗时（微秒）
+
+        Returns:
+            {"amazon.run;fetch;parse": micros} / 折叠栈
+        """
+        child_time: Dict[str, int] = {}
+        for span in self.spans:
+            if span.parent is not None:
+                child_time[span.parent.span_id] = child_time.get(span.parent.span_id, 0) + span.duration_ns
+
+        stacks: Dict[str, int] = {}
+        for span in self.spans:
+            self_ns = max(0, span.duration_ns - child_time.get(span.span_id, 0))
+            key = ";".join(span.path())
+            stacks[key] = stacks.get(key, 0) + self_ns // 1000
+        return stacks
+
+    def stage_totals(self) -> Dict[str, float]:
+        """
+        Self time per span name in seconds
+        按 span 名称汇总的自身耗时（秒）
+
+        Returns:
+            {"fetch": secs, "parse": secs, ...} / 各阶段耗时
+        """
+        totals: Dict[str, float] = {}
+        for stack, micros in self.collapsed_stacks().items():
+            stage = stack.rsplit(";", 1)[-1]
+            totals[stage] = totals.get(stage, 0.0) + micros / 1e6
+        return totals
+
+    def write_flame_summary(self, path: str) -> str:
+        """
+        Write collapsed stacks (flamegraph.pl / speedscope format)
+        写出折叠栈（flamegraph.pl / speedscope 格式）
+
+        Args:
+            path: Output path / 输出路径
+
+        Returns:
+            Written path, empty on failure / 写出的路径，失败时为空
+        """
+        try:
+            stacks = self.collapsed_stacks()
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, micros in sorted(stacks.items(), key=lambda item: -item[1]):
+                    f.write(f"{stack} {micros}\n")
+            return path
+        except Exception as e:
+            logger.error(f"写入火焰图摘要失败 / Failed to write flame summary: {e}")
+            return ""
+
+    def summary_line(self) -> str:
+        """One-line network vs CPU breakdown / 网络与计算耗时的单行摘要"""
+        totals = self.stage_totals()
+        total = sum(totals.values()) or 1e-9
+        network = sum(secs for stage, secs in totals.items() if stage in NETWORK_STAGES)
+        top = sorted(totals.items(), key=lambda item: -item[1])[:5]
+        stages = ", ".join(f"{stage}={secs:.2f}s" for stage, secs in top)
+        return f"network={network / total * 100:.0f}% ({stages})"
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Convert to an OTLP/JSON export request / 转换为 OTLP/JSON 导出请求"""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{
+                    "scope": {"name": "core.tracing"},
+                    "spans": [span.to_otlp() for span in self.spans],
+                }],
+            }]
+        }
+
+    def export(self, path: str = TRACE_EXPORT_PATH):
+        """
+        Append the trace as one OTLP/JSON line (OpenTelemetry file exporter layout),
+        rotating the file past TRACE_MAX_BYTES
+        以一行 OTLP/JSON 追加导出（与 OpenTelemetry 文件导出器格式一致），超过 TRACE_MAX_BYTES 时轮转
+
+        Args:
+            path: Export file / 导出文件
+        """
+        line = json.dumps(self.to_otlp(), ensure_ascii=False, separators=(",", ":")) + "\n"
+        try:
+            with file_lock(path):
+                if os.path.exists(path) and os.path.getsize(path) >= TRACE_MAX_BYTES:
+                    _rotate(path)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(line)
+        except Exception as e:
+            logger.error(f"导出追踪失败 / Failed to export trace: {e}")
+
+
+def _rotate(path: str):
+    """Rotate: traces.jsonl -> traces.jsonl.1 -> ... / 轮转文件"""
+    for index in range(TRACE_BACKUP_COUNT - 1, 0, -1):
+        source = f"{path}.{index}"
+        if os.path.exists(source):
+            os.replace(source, f"{path}.{index + 1}")
+    os.replace(path, f"{path}.1")
+
+
+def run_sampled() -> bool:
+    """Whether to trace this run, per TRACE_SAMPLE_RATE / 按 TRACE_SAMPLE_RATE 决定是否追踪本次运行"""
+    return TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Any]:
+    """
+    Time a block as a child of the current span
+    将代码块计时为当前 span 的子 span
+
+    Args:
+        name: Span name (fetch, parse, extract, validate, dedup, save...) / span 名称
+        **attributes: Span attributes / span 属性
+
+    Yields:
+        Span, or a no-op span outside a traced run / Span，未追踪时为空 span
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield _NOOP_SPAN
+        return
+
+    current = Span(name, parent.trace, parent, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException:
+        current.status = "error"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        current.trace._finish(current)
+
+
+@contextmanager
+def trace_run(name: str, export_path: Optional[str] = TRACE_EXPORT_PATH, sampled: bool = True,
+              **attributes) -> Iterator[Optional[Trace]]:
+    """
+    Trace one run; nested spans attach to it and the trace is exported on exit
+    追踪一次运行：其中的 span 挂在该追踪下，退出时导出
+
+    Args:
+        name: Root span name / 根 span 名称
+        export_path: OTLP/JSON file, None to skip export / 导出文件，None 表示不导出
+        sampled: False runs the block untraced / 为 False 时不追踪
+        **attributes: Root span attributes / 根 span 属性
+
+    Yields:
+        Trace, or None when not sampled / 追踪对象，未采样时为 None
+    """
+    if not sampled:
+        yield None
+        return
+
+    trace = Trace()
+    root = Span(name, trace, None, attributes)
+    trace.root = root
+    token = _current_span.set(root)
+    try:
+        yield trace
+    except BaseException:
+        root.status = "error"
+        raise
+    finally:
+        root.end_ns = time.time_ns()
+        _current_span.reset(token)
+        trace._finish(root)
+        if export_path:
+            trace.export(export_path)
+        logger.info(f"[TRACE] {name} {root.duration_ns / 1e9:.2f}s {trace.summary_line()}")
+
+
+def flame_summary_path(output_path: str) -> str:
+    """
+    Flame summary path for an output file, under FLAME_DIR
+    输出文件对应的火焰图摘要路径（位于 FLAME_DIR）
+
+    Args:
+        output_path: Scraped data file / 采集数据文件
+
+    Returns:
+        logs/flames/<name>.flame.txt / 摘要路径
+    """
+    os.makedirs(FLAME_DIR, exist_ok=True)
+    name = os.path.splitext(os.path.basename(output_path))[0]
+    return os.path.join(FLAME_DIR, f"{name}.flame.txt")
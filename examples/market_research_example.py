@@ -322,6 +322,9 @@ def example_7_comprehensive_report():
     )
     
     print(f"\n✓ 综合分析报告已生成: {report_path}")
+    
+    # 图表在后台渲染，等待完成
+    analyzer.wait_for_charts()
     print("\n报告包含以下内容:")
     print("  - 竞品矩阵分析")
     print("  - 价格分布统计和图表")
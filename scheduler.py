@@ -1,6 +1,7 @@
 import time
 import json
 import os
+from datetime import datetime, timedelta, timezone
 from apscheduler.schedulers.background import BackgroundScheduler
 from dotenv import load_dotenv
 from scrapers.logger import log_info, log_error
@@ -9,6 +10,10 @@ from core.processing.recommender import ai_recommendation
 from publishers.mail_sender import send_email
 from core.ai.evolution_engine import analyze_logs_with_gpt
 from core.ai.auto_patch import generate_autopatch
+from core.advanced_analysis import AdvancedAnalyzer
+from core.monitoring import get_monitoring_dashboard
+from core.processing.data_lake import get_data_lake
+from core.processing.trend_aggregates import get_trend_aggregates
 
 load_dotenv()
 
@@ -63,12 +68,35 @@ def job_self_learn():
     # except Exception as e:
     #     log_error(f"[Job] 自学习失败: {e}")
 
+def job_trend_backfill():
+    log_info("[Job] 回填每日趋势聚合")
+    try:
+        aggregates = get_trend_aggregates()
+        count = aggregates.ingest_lake(get_data_lake())
+        if count:
+            aggregates.save()
+        log_info(f"[Job] 趋势聚合回填 {count} 条")
+    except Exception as e:
+        log_error(f"[Job] 趋势聚合回填失败: {e}")
+
+def job_price_anomalies():
+    log_info("[Job] 检测价格异常")
+    try:
+        since = datetime.now(timezone.utc) - timedelta(days=cfg.get("anomaly_lookback_days", 30))
+        table = AdvancedAnalyzer().detect_price_anomalies(since=since)
+        fired = get_monitoring_dashboard().record_anomaly_table(table)
+        log_info(f"[Job] 价格异常点={len(table)}，新警报={fired}")
+    except Exception as e:
+        log_error(f"[Job] 价格异常检测失败: {e}")
+
 def start_scheduler():
     sched = BackgroundScheduler()
     sched.add_job(job_collect, 'interval', minutes=cfg.get("poll_interval_minutes", 60))
     hh, mm = cfg.get("report_time", "08:00").split(":")
     sched.add_job(job_daily_report, 'cron', hour=int(hh), minute=int(mm))
     sched.add_job(job_evolution_check, 'interval', hours=cfg.get("evolution_check_interval_hours", 2))
+    sched.add_job(job_trend_backfill, 'cron', hour=cfg.get("trend_backfill_hour", 2), minute=0)
+    sched.add_job(job_price_anomalies, 'cron', hour=cfg.get("anomaly_check_hour", 3), minute=0)
     for hour in cfg.get("self_learn_hours", []):
         sched.add_job(job_self_learn, 'cron', hour=hour, minute=0)
     sched.start()
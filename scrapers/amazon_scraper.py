@@ -15,10 +15,18 @@ from bs4 import BeautifulSoup
 import time
 import random
 import json
+import logging
 import os
 from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional
-from scrapers.logger import log_info, log_error, log_warning
+from scrapers.logger import log_info, log_error, log_warning, log_sampled
+from scrapers.event_log import emit_event
+from scrapers.base_scraper import BaseScraper
+from core.tracing import span, trace_run, run_sampled, flame_summary_path
+from core.processing.normalization import normalize_records
+from core.processing.product_identity import annotate_products, extract_identifiers, get_product_identity_index
+from core.processing.trend_aggregates import get_trend_aggregates
+from core.crawl.fingerprint_store import FingerprintStore
 
 # === AUTO_TUNING_CONFIG_START ===
 # 这个配置块会被自迭代引擎动态调整
@@ -67,6 +75,11 @@ SCROLL_CYCLES = 3
 class AmazonScraper:
     """Amazon爬虫核心类 / Amazon Scraper Core Class"""
     
+    PLATFORM_NAME = "amazon"
+    
+    # 与其他平台共用的流式质量检查 / Running quality check shared with the other platforms
+    _check_quality = BaseScraper._check_quality
+    
     def __init__(self, data_dir: str = "data/amazon"):
         """
         初始化爬虫
@@ -84,6 +97,9 @@ class AmazonScraper:
             'Accept-Encoding': 'gzip, deflate, br',
             'Connection': 'keep-alive',
         })
+        
+        # 本次采集的流式质量检查器（首次输入时创建） / Running quality checker for this crawl, created on first feed
+        self.quality_checker = None
     
     def _get_random_user_agent(self) -> str:
         """获取随机User-Agent / Get random User-Agent"""
@@ -112,24 +128,30 @@ class AmazonScraper:
         
         try:
             self.session.headers['User-Agent'] = self._get_random_user_agent()
-            log_info(f"正在获取页面 / Fetching page: {url}")
+            log_info("正在获取页面 / Fetching page: %s", url)
             
             start_time = time.time()
-            response = self.session.get(url, timeout=30)
+            with span("fetch", url=url) as fetch_span:
+                response = self.session.get(url, timeout=30)
+                fetch_span.set_attribute("http.status_code", response.status_code)
             elapsed = time.time() - start_time
-            log_info(f"[LIST_TIME] secs={elapsed:.2f}")
+            log_info("[LIST_TIME] secs=%.2f", elapsed)
+            emit_event("fetch", "amazon", url=url, secs=round(elapsed, 3), status=response.status_code)
             
             if response.status_code == 503:
                 log_warning(f"检测到验证码或限流 / Captcha or rate limit detected: {url}")
+                emit_event("captcha", "amazon", url=url, status=503)
                 self._wait()
                 return self._fetch_page(url, retries + 1)
             
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'lxml')
+            with span("parse"):
+                soup = BeautifulSoup(response.content, 'lxml')
             
             # 检测验证码页面 / Check for captcha page
             if soup.find('form', {'action': '/errors/validateCaptcha'}):
                 log_warning("检测到Amazon验证码页面 / Amazon captcha page detected")
+                emit_event("captcha", "amazon", url=url)
                 self._wait()
                 return self._fetch_page(url, retries + 1)
             
@@ -137,12 +159,14 @@ class AmazonScraper:
             
         except requests.RequestException as e:
             log_error(f"[ERROR] 请求失败 / Request failed: {url} - {e}")
+            emit_event("error", "amazon", kind="request", url=url, message=str(e))
             if retries < MAX_RETRIES - 1:
                 self._wait()
                 return self._fetch_page(url, retries + 1)
             return None
         except Exception as e:
             log_error(f"[EXCEPTION] 页面解析异常 / Page parsing exception: {e}")
+            emit_event("error", "amazon", kind="exception", url=url, message=str(e))
             return None
     
     def _extract_text(self, item, selectors: List[str], attr: str = None) -> str:
@@ -158,21 +182,22 @@ class AmazonScraper:
         Returns:
             提取的文本 / Extracted text
         """
-        for selector in selectors:
-            try:
-                element = item.select_one(selector)
-                if element:
-                    if attr:
-                        value = element.get(attr, '').strip()
-                        if value:
-                            return value
-                    else:
-                        text = element.get_text(strip=True)
-                        if text:
-                            return text
-            except Exception:
-                continue
-        return ""
+        with span("extract"):
+            for selector in selectors:
+                try:
+                    element = item.select_one(selector)
+                    if element:
+                        if attr:
+                            value = element.get(attr, '').strip()
+                            if value:
+                                return value
+                        else:
+                            text = element.get_text(strip=True)
+                            if text:
+                                return text
+                except Exception:
+                    continue
+            return ""
     
     def _extract_price(self, item) -> str:
         """
@@ -258,9 +283,10 @@ class AmazonScraper:
                         }
                         
                         products.append(product)
+                        log_sampled("提取商品 / Extracted item: %s", asin)
                         
                     except Exception as e:
-                        log_error(f"[ERROR] 提取商品信息失败 / Failed to extract product info: {e}")
+                        log_sampled("[ERROR] 提取商品信息失败 / Failed to extract product info: %s", e, level=logging.ERROR)
                         continue
                 
                 if products:
@@ -358,6 +384,9 @@ class AmazonScraper:
                         if key and value:
                             detail['specifications'][key] = value
             
+            # 提取跨平台商品标识（UPC/EAN/ISBN，用于跨平台比价） / Extract shared identifiers for cross-platform matching
+            detail.update(extract_identifiers(soup))
+            
             # 提取BSR排名 / Extract BSR ranking
             bsr_elem = soup.select_one('div#detailBulletsWrapper_feature_div')
             if bsr_elem:
@@ -464,12 +493,28 @@ class AmazonScraper:
                 reviews.append(review)
                 
             except Exception as e:
-                log_error(f"[ERROR] 提取评论失败 / Failed to extract review: {e}")
+                log_sampled("[ERROR] 提取评论失败 / Failed to extract review: %s", e, level=logging.ERROR)
                 continue
         
         log_info(f"评论采集完成，共 {len(reviews)} 条 / Review scraping completed, {len(reviews)} reviews")
         return reviews
     
+    def _update_trend_aggregates(self, products: List[Dict[str, Any]], filepath: str):
+        """
+        把本批商品并入每日趋势聚合
+        Fold this batch into the daily trend aggregates
+        
+        Args:
+            products: 商品列表 / Product list
+            filepath: 本批输出文件（批次标识） / Batch output file (batch identity)
+        """
+        try:
+            aggregates = get_trend_aggregates()
+            aggregates.ingest(products, "amazon", batch_id=os.path.abspath(filepath))
+            aggregates.save()
+        except Exception as e:
+            log_warning(f"[amazon] 更新趋势聚合失败 / Failed to update trend aggregates: {e}")
+    
     def save_data(self, data: List[Dict[str, Any]], filename: str = None) -> str:
         """
         保存数据到JSON文件
@@ -489,7 +534,9 @@ class AmazonScraper:
         filepath = os.path.join(self.data_dir, filename)
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
+            # 分配跨运行稳定的整数商品ID / Assign integer product IDs stable across runs
+            get_product_identity_index().assign(data, "amazon")
+            with span("save", items=len(data)), open(filepath, 'w', encoding='utf-8') as f:
                 json.dump({
                     "items": data,
                     "total_count": len(data),
@@ -497,13 +544,16 @@ class AmazonScraper:
                 }, f, ensure_ascii=False, indent=2)
             
             log_info(f"数据已保存 / Data saved: {filepath}")
+            emit_event("save", "amazon", items=len(data), path=filepath)
             return filepath
             
         except Exception as e:
             log_error(f"[ERROR] 保存数据失败 / Failed to save data: {e}")
+            emit_event("error", "amazon", kind="save", message=str(e))
             return ""
     
-    def run(self, url: str, max_items: int = 50, deep_detail: bool = False) -> List[Dict[str, Any]]:
+    def run(self, url: str, max_items: int = 50, deep_detail: bool = False,
+            incremental: bool = False) -> List[Dict[str, Any]]:
         """
         运行完整的采集流程
         Run complete scraping workflow
@@ -512,30 +562,64 @@ class AmazonScraper:
             url: 目标URL / Target URL
             max_items: 最大商品数 / Maximum items
             deep_detail: 是否采集详情 / Whether to scrape detail
+            incremental: 只为新增或列表卡片变化的商品采集详情 / Only fetch details for new or changed cards
             
         Returns:
             商品列表 / Product list
         """
-        # 采集列表页 / Scrape list page
-        products = self.scrape_list_page(url, max_items)
-        
-        # 如果需要详情，采集每个商品的详情 / Scrape details if needed
-        if deep_detail and products:
-            log_info(f"开始采集 {len(products)} 个商品的详情 / Starting detail scraping for {len(products)} products")
-            for i, product in enumerate(products[:10]):  # 限制详情采集数量 / Limit detail scraping
-                self._wait()
-                detail = self.scrape_product_detail(product['asin'])
-                product.update(detail)
-                log_info(f"详情采集进度 / Detail scraping progress: {i+1}/{min(len(products), 10)}")
+        filepath = None
+        if incremental and not deep_detail:
+            log_warning("incremental 仅在 deep_detail 时生效，已忽略 / incremental only applies with deep_detail, ignored")
+        with trace_run("amazon.run", sampled=run_sampled(), url=url) as trace:
+            # 采集列表页 / Scrape list page
+            products = self.scrape_list_page(url, max_items)
+            
+            # 入库前解析数值字段并生成商品标识，随即计入质量统计 / Numeric fields and product keys, then quality counters
+            if products:
+                with span("normalize", items=len(products)):
+                    normalize_records(products)
+                    annotate_products(products, "amazon", base_url=url)
+                self._check_quality(products)
+            
+            # 如果需要详情，采集每个商品的详情 / Scrape details if needed
+            if deep_detail and products:
+                store = None
+                if incremental:
+                    store = FingerprintStore(os.path.join(self.data_dir, ".list_fingerprints.json"))
+                    targets, _ = store.split(products, lambda p: p.get('asin'))
+                else:
+                    targets = [(product, product['asin'], None) for product in products]
+            
+                targets = targets[:10]  # 限制详情采集数量 / Limit detail scraping
+                log_info(f"开始采集 {len(targets)} 个商品的详情 / Starting detail scraping for {len(targets)} products")
+                for i, (product, asin, fingerprint) in enumerate(targets):
+                    self._wait()
+                    detail = self.scrape_product_detail(asin)
+                    product.update(detail)
+                    if store is not None and detail:
+                        store.update(asin, fingerprint, detail)
+                    log_info("详情采集进度 / Detail scraping progress: %d/%d", i + 1, len(targets))
+            
+                if store is not None:
+                    store.save()
+            
+            # 保存数据（详情可能补充价格等字段，需重新解析） / Save data, re-parsing fields details may have filled
+            if products:
+                if deep_detail:
+                    with span("normalize", items=len(products)):
+                        normalize_records(products)
+                filepath = self.save_data(products)
+                if isinstance(filepath, str) and filepath:
+                    self._update_trend_aggregates(products, filepath)
         
-        # 保存数据 / Save data
-        if products:
-            self.save_data(products)
+        if trace is not None and isinstance(filepath, str) and filepath:
+            trace.write_flame_summary(flame_summary_path(filepath))
         
         return products
 
 
-def scrape_amazon(url: str, max_items: int = 50, deep_detail: bool = False) -> List[Dict[str, Any]]:
+def scrape_amazon(url: str, max_items: int = 50, deep_detail: bool = False,
+                  incremental: bool = False) -> List[Dict[str, Any]]:
     """
     便捷函数：采集Amazon数据
     Convenience function: Scrape Amazon data
@@ -544,12 +628,13 @@ def scrape_amazon(url: str, max_items: int = 50, deep_detail: bool = False) -> L
         url: 目标URL / Target URL
         max_items: 最大商品数 / Maximum items
         deep_detail: 是否采集详情 / Whether to scrape detail
+        incremental: 增量详情采集 / Incremental detail scraping
         
     Returns:
         商品列表 / Product list
     """
     scraper = AmazonScraper()
-    return scraper.run(url, max_items, deep_detail)
+    return scraper.run(url, max_items, deep_detail, incremental=incremental)
 
 
 if __name__ == "__main__":
@@ -12,7 +12,14 @@ import os
 from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional
 from abc import ABC, abstractmethod
-from scrapers.logger import log_info, log_error, log_warning
+from scrapers.logger import log_info, log_error, log_warning, log_sampled
+from scrapers.event_log import emit_event
+from core.tracing import span, trace_run, run_sampled, flame_summary_path
+from core.processing.normalization import normalize_records
+from core.processing.product_identity import annotate_products, product_key, get_product_identity_index
+from core.processing.trend_aggregates import get_trend_aggregates
+from core.crawl.fingerprint_store import FingerprintStore
+from scrapers.selector_stats import get_selector_stats, field_slot
 
 
 class BaseScraper(ABC):
@@ -60,6 +67,12 @@ class BaseScraper(ABC):
         self.user_agents = self.DEFAULT_USER_AGENTS
         self.wait_time = self.DEFAULT_WAIT_TIME.copy()
         self.max_retries = self.DEFAULT_MAX_RETRIES
+        
+        # 选择器命中统计，用于按命中率排序降级选择器 / Selector hit stats for hit-rate ordered fallbacks
+        self.selector_stats = get_selector_stats()
+        
+        # 本次采集的流式质量检查器（首次输入时创建） / Running quality checker for this crawl, created on first feed
+        self.quality_checker = None
     
     def _get_random_user_agent(self) -> str:
         """获取随机User-Agent / Get random User-Agent"""
@@ -99,16 +112,21 @@ class BaseScraper(ABC):
         
         try:
             self.session.headers['User-Agent'] = self._get_random_user_agent()
-            log_info(f"[{self.PLATFORM_NAME}] 正在获取页面 / Fetching page: {url}")
+            log_info("[%s] 正在获取页面 / Fetching page: %s", self.PLATFORM_NAME, url)
             
             start_time = time.time()
-            response = self.session.get(url, timeout=timeout)
+            with span("fetch", url=url) as fetch_span:
+                response = self.session.get(url, timeout=timeout)
+                fetch_span.set_attribute("http.status_code", response.status_code)
             elapsed = time.time() - start_time
-            log_info(f"[{self.PLATFORM_NAME}] [LIST_TIME] secs={elapsed:.2f}")
+            log_info("[%s] [LIST_TIME] secs=%.2f", self.PLATFORM_NAME, elapsed)
+            emit_event("fetch", self.PLATFORM_NAME, url=url, secs=round(elapsed, 3),
+                       status=response.status_code)
             
             # 处理常见HTTP状态码 / Handle common HTTP status codes
             if response.status_code == 503:
                 log_warning(f"[{self.PLATFORM_NAME}] 检测到限流或验证码 / Rate limit or captcha detected")
+                emit_event("captcha", self.PLATFORM_NAME, url=url, status=503)
                 self._wait(3.0, 5.0)
                 return self._fetch_page(url, retries + 1, timeout)
             
@@ -120,11 +138,13 @@ class BaseScraper(ABC):
             response.raise_for_status()
             
             # 使用lxml解析器提高速度 / Use lxml parser for better speed
-            soup = BeautifulSoup(response.content, 'lxml')
+            with span("parse"):
+                soup = BeautifulSoup(response.content, 'lxml')
             
             # 检测验证码页面（平台特定） / Detect captcha page (platform-specific)
             if self._is_captcha_page(soup):
                 log_warning(f"[{self.PLATFORM_NAME}] 检测到验证码页面 / Captcha page detected")
+                emit_event("captcha", self.PLATFORM_NAME, url=url)
                 self._wait(5.0, 8.0)
                 return self._fetch_page(url, retries + 1, timeout)
             
@@ -132,6 +152,7 @@ class BaseScraper(ABC):
             
         except requests.Timeout:
             log_error(f"[{self.PLATFORM_NAME}] [ERROR] 请求超时 / Request timeout: {url}")
+            emit_event("error", self.PLATFORM_NAME, kind="timeout", url=url, message="timeout")
             if retries < self.max_retries - 1:
                 self._wait()
                 return self._fetch_page(url, retries + 1, timeout)
@@ -139,6 +160,7 @@ class BaseScraper(ABC):
             
         except requests.RequestException as e:
             log_error(f"[{self.PLATFORM_NAME}] [ERROR] 请求失败 / Request failed: {url} - {e}")
+            emit_event("error", self.PLATFORM_NAME, kind="request", url=url, message=str(e))
             if retries < self.max_retries - 1:
                 self._wait()
                 return self._fetch_page(url, retries + 1, timeout)
@@ -146,6 +168,7 @@ class BaseScraper(ABC):
             
         except Exception as e:
             log_error(f"[{self.PLATFORM_NAME}] [EXCEPTION] 页面解析异常 / Page parsing exception: {e}")
+            emit_event("error", self.PLATFORM_NAME, kind="exception", url=url, message=str(e))
             return None
     
     def _is_captcha_page(self, soup: BeautifulSoup) -> bool:
@@ -163,7 +186,7 @@ class BaseScraper(ABC):
         # Subclasses can override this method for platform-specific captcha detection
         return False
     
-    def _extract_text(self, item, selectors: List[str], attr: str = None) -> str:
+    def _extract_text(self, item, selectors: List[str], attr: str = None, field: str = None) -> str:
         """
         使用多个选择器提取文本（降级策略）
         Extract text using multiple selectors (fallback strategy)
@@ -172,25 +195,98 @@ class BaseScraper(ABC):
             item: BeautifulSoup元素 / BeautifulSoup element
             selectors: 选择器列表 / Selector list
             attr: 属性名(用于提取属性值) / Attribute name (for extracting attribute value)
+            field: 字段名，给出时记录命中并按命中率排序 / Field name; records hits and orders by hit rate
             
         Returns:
             提取的文本 / Extracted text
         """
-        for selector in selectors:
-            try:
-                element = item.select_one(selector)
-                if element:
-                    if attr:
-                        value = element.get(attr, '').strip()
+        with span("extract"):
+            if field:
+                slot = field_slot(field)
+                selectors = self.selector_stats.ordered(self.PLATFORM_NAME, slot, selectors)
+            for selector in selectors:
+                try:
+                    element = item.select_one(selector)
+                    if element:
+                        if attr:
+                            value = element.get(attr, '').strip()
+                        else:
+                            value = element.get_text(strip=True)
                         if value:
+                            if field:
+                                self.selector_stats.record_hit(self.PLATFORM_NAME, slot, selector)
                             return value
-                    else:
-                        text = element.get_text(strip=True)
-                        if text:
-                            return text
-            except Exception:
-                continue
-        return ""
+                except Exception:
+                    continue
+            if field:
+                log_sampled("[%s] 字段未命中 / Field not found: %s", self.PLATFORM_NAME, field)
+            return ""
+    
+    def _ordered_selectors(self, slot: str, selectors: List[str]) -> List[str]:
+        """
+        按历史命中率排序降级选择器
+        Order fallback selectors by historical hit rate
+        
+        Args:
+            slot: 槽位（"list" 或 "field:<name>"） / Slot ("list" or "field:<name>")
+            selectors: 原始降级顺序 / Original fallback order
+            
+        Returns:
+            排序后的选择器 / Ordered selectors
+        """
+        return self.selector_stats.ordered(self.PLATFORM_NAME, slot, selectors)
+    
+    def _record_selector_hit(self, slot: str, selector: str, items: int = 1):
+        """
+        记录选择器命中
+        Record a selector hit
+        
+        Args:
+            slot: 槽位 / Slot
+            selector: 命中的选择器 / Matching selector
+            items: 本次命中得到的商品数 / Items produced by this hit
+        """
+        self.selector_stats.record_hit(self.PLATFORM_NAME, slot, selector, items)
+    
+    def _check_quality(self, products: List[Dict[str, Any]]):
+        """
+        把刚提取的一页商品输入本次采集的质量检查器，并发布累计指标
+        Feed a freshly extracted page into this crawl's quality checker and
+        publish the running counters
+        
+        检查器随爬虫实例存在，计数在多次 run 间累计；大页面按 publish_every 周期发布。
+        The checker lives with the scraper instance, so counters accumulate
+        across runs; large pages also publish every publish_every records.
+        
+        Args:
+            products: 已生成标识的商品列表 / Annotated product list
+        """
+        # 延迟导入：core.data_validation 经 scrapers.logger 导入 scrapers 包
+        # Lazy import: core.data_validation imports the scrapers package through scrapers.logger
+        from core.data_validation import create_scrape_quality_checker
+        try:
+            if self.quality_checker is None:
+                self.quality_checker = create_scrape_quality_checker(self.PLATFORM_NAME)
+            self.quality_checker.add_batch(products)
+            self.quality_checker.publish()
+        except Exception as e:
+            log_warning(f"[{self.PLATFORM_NAME}] 数据质量检查失败 / Data quality check failed: {e}")
+    
+    def _update_trend_aggregates(self, products: List[Dict[str, Any]], filepath: str):
+        """
+        把本批商品并入每日趋势聚合
+        Fold this batch into the daily trend aggregates
+        
+        Args:
+            products: 商品列表 / Product list
+            filepath: 本批输出文件（批次标识） / Batch output file (batch identity)
+        """
+        try:
+            aggregates = get_trend_aggregates()
+            aggregates.ingest(products, self.PLATFORM_NAME, batch_id=os.path.abspath(filepath))
+            aggregates.save()
+        except Exception as e:
+            log_warning(f"[{self.PLATFORM_NAME}] 更新趋势聚合失败 / Failed to update trend aggregates: {e}")
     
     def save_data(self, data: List[Dict[str, Any]], filename: str = None) -> str:
         """
@@ -211,7 +307,9 @@ class BaseScraper(ABC):
         filepath = os.path.join(self.data_dir, filename)
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
+            # 分配跨运行稳定的整数商品ID / Assign integer product IDs stable across runs
+            get_product_identity_index().assign(data, self.PLATFORM_NAME)
+            with span("save", items=len(data)), open(filepath, 'w', encoding='utf-8') as f:
                 json.dump({
                     "platform": self.PLATFORM_NAME,
                     "items": data,
@@ -220,10 +318,12 @@ class BaseScraper(ABC):
                 }, f, ensure_ascii=False, indent=2)
             
             log_info(f"[{self.PLATFORM_NAME}] 数据已保存 / Data saved: {filepath}")
+            emit_event("save", self.PLATFORM_NAME, items=len(data), path=filepath)
             return filepath
             
         except Exception as e:
             log_error(f"[{self.PLATFORM_NAME}] [ERROR] 保存数据失败 / Failed to save data: {e}")
+            emit_event("error", self.PLATFORM_NAME, kind="save", message=str(e))
             return ""
     
     @abstractmethod
@@ -256,7 +356,12 @@ class BaseScraper(ABC):
         # Default implementation returns empty dict, subclasses can override
         return {}
     
-    def run(self, url: str, max_items: int = 50, deep_detail: bool = False) -> List[Dict[str, Any]]:
+    def supports_detail(self) -> bool:
+        """是否实现了详情采集 / Whether the subclass implements detail scraping"""
+        return type(self).scrape_product_detail is not BaseScraper.scrape_product_detail
+    
+    def run(self, url: str, max_items: int = 50, deep_detail: bool = False,
+            incremental: bool = False) -> List[Dict[str, Any]]:
         """
         运行完整的采集流程
         Run complete scraping workflow
@@ -265,32 +370,72 @@ class BaseScraper(ABC):
             url: 目标URL / Target URL
             max_items: 最大商品数 / Maximum items
             deep_detail: 是否采集详情 / Whether to scrape detail
+            incremental: 只为新增或列表卡片变化的商品采集详情 / Only fetch details for new or changed cards
             
         Returns:
             商品列表 / Product list
         """
-        log_info(f"[{self.PLATFORM_NAME}] 开始采集 / Starting scraping: {url}")
-        
-        # 采集列表页 / Scrape list page
-        products = self.scrape_list_page(url, max_items)
-        
-        # 如果需要详情，采集每个商品的详情 / Scrape details if needed
-        if deep_detail and products:
-            log_info(f"[{self.PLATFORM_NAME}] 开始采集详情 / Starting detail scraping for {len(products)} products")
-            detail_limit = min(len(products), 10)  # 限制详情采集数量 / Limit detail scraping
-            for i, product in enumerate(products[:detail_limit]):
-                self._wait()
-                product_id = product.get('id', product.get('asin', ''))
-                if product_id:
+        filepath = None
+        if deep_detail and not self.supports_detail():
+            # 没有详情页解析时 deep_detail/incremental 只会空跑 / Without a detail parser both would be silent no-ops
+            log_warning(f"[{self.PLATFORM_NAME}] 该平台不支持详情采集，忽略 deep_detail/incremental / "
+                        f"Detail scraping not supported, ignoring deep_detail/incremental")
+            deep_detail = False
+        elif incremental and not deep_detail:
+            log_warning(f"[{self.PLATFORM_NAME}] incremental 仅在 deep_detail 时生效，已忽略 / "
+                        f"incremental only applies with deep_detail, ignored")
+        with trace_run(f"{self.PLATFORM_NAME}.run", sampled=run_sampled(), url=url) as trace:
+            log_info(f"[{self.PLATFORM_NAME}] 开始采集 / Starting scraping: {url}")
+            
+            # 采集列表页 / Scrape list page
+            products = self.scrape_list_page(url, max_items)
+            
+            # 入库前解析数值字段并生成商品标识，随即计入质量统计 / Numeric fields and product keys, then quality counters
+            if products:
+                with span("normalize", items=len(products)):
+                    normalize_records(products)
+                    annotate_products(products, self.PLATFORM_NAME, base_url=url)
+                self._check_quality(products)
+            
+            # 如果需要详情，采集每个商品的详情 / Scrape details if needed
+            if deep_detail and products:
+                store = None
+                candidates = [p for p in products if p.get('id', p.get('asin', ''))]
+                if incremental:
+                    store = FingerprintStore(os.path.join(self.data_dir, ".list_fingerprints.json"))
+                    targets, _ = store.split(
+                        candidates, lambda p: product_key(p, self.PLATFORM_NAME, url) or p.get('id', p.get('asin')))
+                else:
+                    targets = [(product, None, None) for product in candidates]
+            
+                detail_limit = min(len(targets), 10)  # 限制详情采集数量 / Limit detail scraping
+                log_info(f"[{self.PLATFORM_NAME}] 开始采集详情 / Starting detail scraping for {detail_limit} products")
+                for i, (product, key, fingerprint) in enumerate(targets[:detail_limit]):
+                    self._wait()
+                    product_id = product.get('id', product.get('asin', ''))
                     detail = self.scrape_product_detail(product_id)
                     product.update(detail)
-                log_info(f"[{self.PLATFORM_NAME}] 详情采集进度 / Detail progress: {i+1}/{detail_limit}")
+                    if store is not None and detail:
+                        store.update(key, fingerprint, detail)
+                    log_info("[%s] 详情采集进度 / Detail progress: %d/%d", self.PLATFORM_NAME, i + 1, detail_limit)
+            
+                if store is not None:
+                    store.save()
+            
+            # 保存数据（详情可能补充价格等字段，需重新解析） / Save data, re-parsing fields details may have filled
+            if products:
+                if deep_detail:
+                    with span("normalize", items=len(products)):
+                        normalize_records(products)
+                filepath = self.save_data(products)
+                if isinstance(filepath, str) and filepath:
+                    self._update_trend_aggregates(products, filepath)
+            else:
+                log_warning(f"[{self.PLATFORM_NAME}] 零结果 / Zero results: {url}")
         
-        # 保存数据 / Save data
-        if products:
-            self.save_data(products)
-        else:
-            log_warning(f"[{self.PLATFORM_NAME}] 零结果 / Zero results: {url}")
+        if trace is not None and isinstance(filepath, str) and filepath:
+            trace.write_flame_summary(flame_summary_path(filepath))
+        self.selector_stats.save()
         
         log_info(f"[{self.PLATFORM_NAME}] 采集完成，共 {len(products)} 个商品 / Completed, {len(products)} products")
         return products
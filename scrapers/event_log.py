@@ -0,0 +1,219 @@
+"""
+结构化事件日志模块
+Structured Event Log Module
+
+抓取器以 NDJSON 追加固定字段的事件，读取端按字节偏移增量消费。
+Scrapers append fixed-field events as NDJSON; readers consume them
+incrementally from a remembered byte offset.
+
+事件字段 / Event fields:
+    ts        - Unix 时间戳 / Unix timestamp
+    type      - fetch | captcha | error | save
+    platform  - 平台名称 / Platform name
+    其余字段按类型 / Type-specific: secs, status, url, kind, message, items, path
+"""
+
+import json
+import os
+import time
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.file_lock import file_lock
+
+EVENT_LOG_PATH = os.environ.get("SCRAPER_EVENT_LOG", os.path.join("logs", "events.ndjson"))
+
+EVENT_TYPES = ("fetch", "captcha", "error", "save")
+
+
+class EventLogger:
+    """NDJSON 事件写入器（按大小轮转） / NDJSON event writer with size rotation"""
+
+    def __init__(self, path: str = EVENT_LOG_PATH, max_bytes: int = 10 * 1024 * 1024,
+                 backup_count: int = 5):
+        """
+        初始化事件写入器
+        Initialize event writer
+
+        Args:
+            path: 事件日志路径 / Event log path
+            max_bytes: 轮转阈值 / Rotation size threshold
+            backup_count: 保留的历史文件数 / Number of rotated files kept
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = max(1, backup_count)
+        self.lock = Lock()
+        self._file = None
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _reopen_if_rotated(self):
+        """其他进程轮转后重新打开 / Reopen after another process rotated the file"""
+        try:
+            current = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            current = None
+        if current != os.fstat(self._file.fileno()).st_ino:
+            self._file.close()
+            self._open()
+
+    def _rotate(self):
+        """
+        轮转: events.ndjson -> events.ndjson.1 -> ...
+        Rotate files
+
+        多个抓取进程共享同一文件，轮转在 file_lock 下进行；取锁后重新检查大小，
+        其他进程已轮转时只重新打开。
+        Several scraper processes share the file, so rotation runs under
+        file_lock and re-checks the size once locked; if another process
+        already rotated, the file is only reopened.
+        """
+        with file_lock(self.path):
+            self._file.close()
+            if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                for index in range(self.backup_count - 1, 0, -1):
+                    source = f"{self.path}.{index}"
+                    if os.path.exists(source):
+                        os.replace(source, f"{self.path}.{index + 1}")
+                os.replace(self.path, f"{self.path}.1")
+            self._open()
+
+    def emit(self, event_type: str, platform: Optional[str] = None, **fields):
+        """
+        写入一条事件
+        Write one event
+
+        Args:
+            event_type: 事件类型 / Event type
+            platform: 平台名称 / Platform name
+            **fields: 类型相关字段 / Type-specific fields
+        """
+        event = {"ts": round(time.time(), 3), "type": event_type, "platform": platform}
+        event.update(fields)
+        line = json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n"
+        try:
+            with self.lock:
+                if self._file is None or self._file.closed:
+                    self._open()
+                else:
+                    self._reopen_if_rotated()
+                self._file.write(line)
+                self._file.flush()
+                if self._file.tell() >= self.max_bytes:
+                    self._rotate()
+        except OSError:
+            # 事件日志不能影响抓取 / Event logging must never break scraping
+            pass
+
+    def close(self):
+        """关闭文件 / Close file"""
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class EventLogReader:
+    """增量事件读取器（记住字节偏移，支持轮转） / Incremental reader that survives rotation"""
+
+    def __init__(self, path: str = EVENT_LOG_PATH):
+        """
+        初始化读取器
+        Initialize reader
+
+        Args:
+            path: 事件日志路径 / Event log path
+        """
+        self.path = path
+        self.offset = 0
+        self.inode: Optional[int] = None
+
+    def get_state(self) -> Dict[str, Any]:
+        """获取读取位置 / Get read position"""
+        return {"offset": self.offset, "inode": self.inode}
+
+    def set_state(self, state: Dict[str, Any]):
+        """恢复读取位置 / Restore read position"""
+        self.offset = int(state.get("offset", 0))
+        self.inode = state.get("inode")
+
+    def _read_from(self, path: str, offset: int) -> Tuple[List[Dict[str, Any]], int]:
+        """从偏移读取完整行 / Read complete lines from offset"""
+        events = []
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    # 写入中的半行，下次再读 / Partial line still being written
+                    break
+                offset += len(raw)
+                try:
+                    events.append(json.loads(raw))
+                except ValueError:
+                    continue
+        return events, offset
+
+    def _find_rotated(self) -> Optional[str]:
+        """查找旧 inode 对应的轮转文件 / Find rotated file holding the old inode"""
+        index = 1
+        while os.path.exists(f"{self.path}.{index}"):
+            candidate = f"{self.path}.{index}"
+            if os.stat(candidate).st_ino == self.inode:
+                return candidate
+            index += 1
+        return None
+
+    def read_new(self) -> List[Dict[str, Any]]:
+        """
+        读取上次之后的新事件
+        Read events appended since the last call
+
+        Returns:
+            新事件列表 / New events
+        """
+        if not os.path.exists(self.path):
+            return []
+
+        events: List[Dict[str, Any]] = []
+        stat = os.stat(self.path)
+        if self.inode is not None and stat.st_ino != self.inode:
+            # 文件已轮转：先读完旧文件剩余部分 / Rotated: drain the old file first
+            rotated = self._find_rotated()
+            if rotated:
+                events, _ = self._read_from(rotated, self.offset)
+            self.offset = 0
+        elif stat.st_size < self.offset:
+            # 文件被截断 / File truncated
+            self.offset = 0
+
+        self.inode = stat.st_ino
+        new_events, self.offset = self._read_from(self.path, self.offset)
+        events.extend(new_events)
+        return events
+
+
+_global_logger: Optional[EventLogger] = None
+
+
+def get_event_logger() -> EventLogger:
+    """
+    获取全局事件写入器
+    Get global event writer
+
+    Returns:
+        事件写入器 / Event writer
+    """
+    global _global_logger
+    if _global_logger is None:
+        _global_logger = EventLogger()
+    return _global_logger
+
+
+def emit_event(event_type: str, platform: Optional[str] = None, **fields):
+    """写入事件（便捷函数） / Emit event (convenience)"""
+    get_event_logger().emit(event_type, platform, **fields)
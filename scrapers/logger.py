@@ -1,42 +1,276 @@
 """
 日志记录模块
 Logging Module
+
+日志记录只把 LogRecord 放入队列，格式化、文件轮转和控制台输出都在后台
+监听线程中按批完成，抓取热路径不再阻塞在磁盘或控制台 I/O 上。
+Logging calls only enqueue the LogRecord; formatting, rotation and console
+output happen in batches on a background listener thread, so the scraping
+hot path never blocks on disk or console I/O.
+
+消息支持 %-风格的惰性参数：log_info("Found %d items", n) 只有在真正输出时才格式化。
+Messages take lazy %-style args: log_info("Found %d items", n) is only
+formatted if the record is actually written.
 """
+import atexit
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import queue
+import threading
+from typing import Dict, List, Optional
+
+from core.file_lock import file_lock
 
 # 确保日志目录存在 / Ensure log directory exists
 os.makedirs("logs", exist_ok=True)
 
-# 配置日志 / Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('scraper.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_FILE = 'scraper.log'
+LOG_MAX_BYTES = int(os.environ.get("SCRAPER_LOG_MAX_BYTES", 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get("SCRAPER_LOG_BACKUP_COUNT", 5))
+LOG_BATCH_SIZE = 256
+# 逐条目调试日志的采样间隔（每 N 条输出 1 条） / Sampling interval for per-item debug lines
+LOG_SAMPLE_EVERY = int(os.environ.get("SCRAPER_LOG_SAMPLE_EVERY", 100))
+
+
+# 可以留到监听线程再格式化的参数类型 / Arg types safe to format later on the listener thread
+_LAZY_ARG_TYPES = (str, int, float, type(None))
+
+
+class _BatchFlushMixin:
+    """写入时不逐条 flush，由监听线程每批 flush 一次 / Defer flush to once per batch"""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class BatchRotatingFileHandler(_BatchFlushMixin, logging.handlers.WatchedFileHandler):
+    """
+    多进程共享的按大小轮转文件处理器（按批刷新）
+    Size-rotated file handler shared by several processes, flushed per batch
+
+    scraper.log 由调度器、Streamlit 和子进程池同时写入。写入前检查 inode，
+    文件被其他进程轮转后自动重新打开；轮转在 file_lock 下进行并在取锁后重新
+    检查大小，同一时刻只有一个进程改名备份文件。
+    scraper.log is written by the scheduler, Streamlit and worker pools at
+    once. Each process reopens the file once another one has rotated it
+    (inode check); rotation runs under file_lock and re-checks the size after
+    taking the lock, so only one process renames the backups.
+    """
+
+    def __init__(self, filename: str, maxBytes: int = 0, backupCount: int = 0,
+                 encoding: Optional[str] = None, delay: bool = False):
+        super().__init__(filename, mode='a', encoding=encoding, delay=delay)
+        self.maxBytes = maxBytes
+        self.backupCount = backupCount
+
+    def flush_batch(self):
+        super().flush_batch()
+        if self.maxBytes > 0:
+            self._rotate_if_needed()
+
+    def _size(self) -> int:
+        try:
+            return os.path.getsize(self.baseFilename)
+        except OSError:
+            return 0
+
+    def _rotate_if_needed(self):
+        if self._size() < self.maxBytes:
+            return
+        with file_lock(self.baseFilename):
+            # 其他进程可能已经轮转过 / Another process may have rotated already
+            if self._size() < self.maxBytes:
+                return
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+            if self.backupCount > 0:
+                for i in range(self.backupCount - 1, 0, -1):
+                    source = f"{self.baseFilename}.{i}"
+                    if os.path.exists(source):
+                        os.replace(source, f"{self.baseFilename}.{i + 1}")
+                os.replace(self.baseFilename, f"{self.baseFilename}.1")
+            else:
+                os.remove(self.baseFilename)
+        self.stream = self._open()
+        self._statstream()
+
+
+class BatchStreamHandler(_BatchFlushMixin, logging.StreamHandler):
+    """按批刷新的控制台处理器 / Console handler flushed per batch"""
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    不在调用线程格式化消息的队列处理器
+    Queue handler that leaves formatting to the listener thread
+
+    标准 QueueHandler.prepare 会在调用线程中格式化消息；这里参数全是不可变
+    标量时原样入队，在监听线程输出时才合并。含可变对象（dict、list 等）的
+    参数会立即合并，避免输出前被调用方修改。
+    The stock prepare() formats in the calling thread; records whose args are
+    all immutable scalars are enqueued as-is and merged by the listener.
+    Anything else (dicts, lists, ...) is merged right away so later mutation
+    by the caller cannot change the logged message.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if args and not (isinstance(args, tuple) and all(isinstance(a, _LAZY_ARG_TYPES) for a in args)):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """批量取出记录并每批 flush 一次的监听器 / Listener that drains records in batches"""
+
+    def __init__(self, log_queue, *handlers, batch_size: int = LOG_BATCH_SIZE):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+
+    def _flush_handlers(self):
+        for handler in self.handlers:
+            flush = getattr(handler, "flush_batch", handler.flush)
+            try:
+                flush()
+            except Exception:
+                # 与 logging 一致：输出失败不影响业务 / Like logging itself, never raise on I/O errors
+                pass
+
+    def _monitor(self):
+        q = self.queue
+        has_task_done = hasattr(q, 'task_done')
+        stopping = False
+        while not stopping:
+            batch = [q.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            for record in batch:
+                if record is self._sentinel:
+                    stopping = True
+                else:
+                    self.handle(record)
+                if has_task_done:
+                    q.task_done()
+            self._flush_handlers()
+
+
+_listener: Optional[BatchingQueueListener] = None
+_listener_lock = threading.Lock()
+
+
+def setup_logging(log_file: str = LOG_FILE, level: int = logging.INFO, console: bool = True,
+                  max_bytes: int = LOG_MAX_BYTES, backup_count: int = LOG_BACKUP_COUNT,
+                  batch_size: int = LOG_BATCH_SIZE) -> BatchingQueueListener:
+    """
+    配置异步批量日志（可重复调用，后一次替换前一次）
+    Configure asynchronous batched logging (re-callable, replaces previous setup)
+
+    Args:
+        log_file: 日志文件 / Log file
+        level: 日志级别 / Log level
+        console: 是否输出到控制台 / Whether to log to console
+        max_bytes: 轮转阈值 / Rotation size threshold
+        backup_count: 保留的轮转文件数 / Rotated files kept
+        batch_size: 每批最多处理的记录数 / Max records per batch
+
+    Returns:
+        后台监听器 / Background listener
+    """
+    global _listener
+    with _listener_lock:
+        root = logging.getLogger()
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+        for handler in [h for h in root.handlers if isinstance(h, LazyQueueHandler)]:
+            root.removeHandler(handler)
+
+        formatter = logging.Formatter(LOG_FORMAT)
+        handlers: List[logging.Handler] = [
+            BatchRotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count,
+                                     encoding='utf-8', delay=True)
+        ]
+        if console:
+            handlers.append(BatchStreamHandler())
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        root.addHandler(LazyQueueHandler(log_queue))
+        root.setLevel(level)
+
+        _listener = BatchingQueueListener(log_queue, *handlers, batch_size=batch_size)
+        _listener.start()
+        return _listener
+
+
+def shutdown_logging():
+    """停止监听线程并写出剩余日志 / Stop listener and write pending records"""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+
+setup_logging()
+atexit.register(shutdown_logging)
 
 logger = logging.getLogger('scrapers')
 
+_sample_counters: Dict[str, int] = {}
+_sample_lock = threading.Lock()
+
 
-def log_info(message: str):
+def log_info(message: str, *args):
     """记录信息日志 / Log info message"""
-    logger.info(message)
+    logger.info(message, *args)
 
 
-def log_error(message: str):
+def log_error(message: str, *args):
     """记录错误日志 / Log error message"""
-    logger.error(message)
+    logger.error(message, *args)
 
 
-def log_warning(message: str):
+def log_warning(message: str, *args):
     """记录警告日志 / Log warning message"""
-    logger.warning(message)
+    logger.warning(message, *args)
 
 
-def log_debug(message: str):
+def log_debug(message: str, *args):
     """记录调试日志 / Log debug message"""
-    logger.debug(message)
+    logger.debug(message, *args)
+
+
+def log_sampled(message: str, *args, every: int = None, level: int = logging.DEBUG):
+    """
+    按消息模板采样记录（用于逐条目的日志）
+    Log only every N-th call per message template (for per-item lines)
+
+    Args:
+        message: 消息模板 / Message template
+        *args: 惰性参数 / Lazy args
+        every: 采样间隔，默认 LOG_SAMPLE_EVERY / Sampling interval
+        level: 日志级别 / Log level
+    """
+    if not logger.isEnabledFor(level):
+        return
+    every = every or LOG_SAMPLE_EVERY
+    with _sample_lock:
+        count = _sample_counters.get(message, 0)
+        _sample_counters[message] = count + 1
+    if count % every == 0:
+        logger.log(level, message, *args)
@@ -33,9 +33,11 @@ Multi-Platform Scraper Module - Support for 28 e-commerce platforms
 28. Temu
 """
 
+import logging
 from typing import List, Dict, Any
 from scrapers.base_scraper import BaseScraper
-from scrapers.logger import log_info, log_error, log_warning
+from scrapers.selector_stats import LIST_SLOT
+from scrapers.logger import log_info, log_warning, log_sampled
 
 
 # ==================== Fordeal ====================
@@ -56,25 +58,26 @@ class FordealScraper(BaseScraper):
             "div.item-card"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["div.title", "h3", "h4"]),
-                            "price": self._extract_text(item, ["div.price", "span.price", "span[class*='price']"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["div.title", "h3", "h4"], field="title"),
+                            "price": self._extract_text(item, ["div.price", "span.price", "span[class*='price']"], field="price"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -98,26 +101,27 @@ class MercariScraper(BaseScraper):
             "div[class*='item']"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["div[data-testid='ItemName']", "h3", "div.item-name"]),
-                            "price": self._extract_text(item, ["div[data-testid='ItemPrice']", "span.price", "div.price"]),
-                            "condition": self._extract_text(item, ["div[data-testid='ItemCondition']", "span.condition"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["div[data-testid='ItemName']", "h3", "div.item-name"], field="title"),
+                            "price": self._extract_text(item, ["div[data-testid='ItemPrice']", "span.price", "div.price"], field="price"),
+                            "condition": self._extract_text(item, ["div[data-testid='ItemCondition']", "span.condition"], field="condition"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -141,25 +145,26 @@ class FyndiaScraper(BaseScraper):
             "article[class*='product']"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["h3.product-title", "div.title", "h4"]),
-                            "price": self._extract_text(item, ["span.price", "div.price"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["h3.product-title", "div.title", "h4"], field="title"),
+                            "price": self._extract_text(item, ["span.price", "div.price"], field="price"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -183,27 +188,28 @@ class TokopediaScraper(BaseScraper):
             "div.product-card"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["div.prd_link-product-name", "span.product-name"]),
-                            "price": self._extract_text(item, ["div.prd_link-product-price", "span.price"]),
-                            "rating": self._extract_text(item, ["span.rating", "div[class*='rating']"]),
-                            "location": self._extract_text(item, ["span.prd_link-shop-loc", "span.location"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["div.prd_link-product-name", "span.product-name"], field="title"),
+                            "price": self._extract_text(item, ["div.prd_link-product-price", "span.price"], field="price"),
+                            "rating": self._extract_text(item, ["span.rating", "div[class*='rating']"], field="rating"),
+                            "location": self._extract_text(item, ["span.prd_link-shop-loc", "span.location"], field="location"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -227,26 +233,27 @@ class OnbuyScraper(BaseScraper):
             "article.product"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["h4.product-title", "a.product-link"]),
-                            "price": self._extract_text(item, ["span.price-value", "div.price"]),
-                            "rating": self._extract_text(item, ["span.rating-value"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["h4.product-title", "a.product-link"], field="title"),
+                            "price": self._extract_text(item, ["span.price-value", "div.price"], field="price"),
+                            "rating": self._extract_text(item, ["span.rating-value"], field="rating"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -270,26 +277,27 @@ class JoomScraper(BaseScraper):
             "article.product"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["div.goods-item__title", "h3", "div.title"]),
-                            "price": self._extract_text(item, ["div.goods-item__price", "span.price"]),
-                            "rating": self._extract_text(item, ["div.rating", "span.rating-value"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["div.goods-item__title", "h3", "div.title"], field="title"),
+                            "price": self._extract_text(item, ["div.goods-item__price", "span.price"], field="price"),
+                            "rating": self._extract_text(item, ["div.rating", "span.rating-value"], field="rating"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -313,26 +321,27 @@ class YandexMarketScraper(BaseScraper):
             "div[class*='ProductCard']"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["h3", "a[class*='title']", "span.title"]),
-                            "price": self._extract_text(item, ["span[class*='price']", "div.price"]),
-                            "rating": self._extract_text(item, ["div[class*='rating']"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["h3", "a[class*='title']", "span.title"], field="title"),
+                            "price": self._extract_text(item, ["span[class*='price']", "div.price"], field="price"),
+                            "rating": self._extract_text(item, ["div[class*='rating']"], field="rating"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -356,26 +365,27 @@ class FaireScraper(BaseScraper):
             "article.product"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["h3", "div.product-name", "a.title"]),
-                            "price": self._extract_text(item, ["span.price", "div.price"]),
-                            "brand": self._extract_text(item, ["div.brand-name", "span.brand"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["h3", "div.product-name", "a.title"], field="title"),
+                            "price": self._extract_text(item, ["span.price", "div.price"], field="price"),
+                            "brand": self._extract_text(item, ["div.brand-name", "span.brand"], field="brand"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -399,27 +409,28 @@ class AliExpressScraper(BaseScraper):
             "a.search-card-item"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["h1", "h3", "div.title", "span.title"]),
-                            "price": self._extract_text(item, ["div.price", "span.price"]),
-                            "orders": self._extract_text(item, ["span.order", "div[class*='order']"]),
-                            "rating": self._extract_text(item, ["span.rating", "div.rating"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["h1", "h3", "div.title", "span.title"], field="title"),
+                            "price": self._extract_text(item, ["div.price", "span.price"], field="price"),
+                            "orders": self._extract_text(item, ["span.order", "div[class*='order']"], field="orders"),
+                            "rating": self._extract_text(item, ["span.rating", "div.rating"], field="rating"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -443,10 +454,10 @@ class EbayScraper(BaseScraper):
             "div.srp-results li"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         # Skip placeholder items
@@ -455,19 +466,20 @@ class EbayScraper(BaseScraper):
                         
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["h3.s-item__title", "div.s-item__title"]),
-                            "price": self._extract_text(item, ["span.s-item__price", "div.s-item__price"]),
-                            "condition": self._extract_text(item, ["span.SECONDARY_INFO", "span.s-item__condition"]),
-                            "shipping": self._extract_text(item, ["span.s-item__shipping", "span[class*='shipping']"]),
-                            "url": self._extract_text(item, ["a.s-item__link"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["h3.s-item__title", "div.s-item__title"], field="title"),
+                            "price": self._extract_text(item, ["span.s-item__price", "div.s-item__price"], field="price"),
+                            "condition": self._extract_text(item, ["span.SECONDARY_INFO", "span.s-item__condition"], field="condition"),
+                            "shipping": self._extract_text(item, ["span.s-item__shipping", "span[class*='shipping']"], field="shipping"),
+                            "url": self._extract_text(item, ["a.s-item__link"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"] and product["title"] != "Shop on eBay":
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -491,26 +503,27 @@ class TiktokShopScraper(BaseScraper):
             "a[class*='product']"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["div[class*='title']", "span.title", "h3"]),
-                            "price": self._extract_text(item, ["div[class*='price']", "span.price"]),
-                            "sold": self._extract_text(item, ["span[class*='sold']", "div.sold"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["div[class*='title']", "span.title", "h3"], field="title"),
+                            "price": self._extract_text(item, ["div[class*='price']", "span.price"], field="price"),
+                            "sold": self._extract_text(item, ["span[class*='sold']", "div.sold"], field="sold"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -534,27 +547,28 @@ class RakutenJapanScraper(BaseScraper):
             "div[class*='item']"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["h2", "div.title", "a.title"]),
-                            "price": self._extract_text(item, ["span.price", "div.price"]),
-                            "rating": self._extract_text(item, ["span.rating", "div[class*='rating']"]),
-                            "review_count": self._extract_text(item, ["span.review", "span[class*='review']"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["h2", "div.title", "a.title"], field="title"),
+                            "price": self._extract_text(item, ["span.price", "div.price"], field="price"),
+                            "rating": self._extract_text(item, ["span.rating", "div[class*='rating']"], field="rating"),
+                            "review_count": self._extract_text(item, ["span.review", "span[class*='review']"], field="review_count"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -578,26 +592,27 @@ class OzonScraper(BaseScraper):
             "article"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["span.tsBody500Medium", "div.title", "h3"]),
-                            "price": self._extract_text(item, ["span[class*='price']", "div.price"]),
-                            "rating": self._extract_text(item, ["div[class*='rating']"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["span.tsBody500Medium", "div.title", "h3"], field="title"),
+                            "price": self._extract_text(item, ["span[class*='price']", "div.price"], field="price"),
+                            "rating": self._extract_text(item, ["div[class*='rating']"], field="rating"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -621,27 +636,28 @@ class EtsyScraper(BaseScraper):
             "div.listing-card"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["h3", "h2.v2-listing-card__title"]),
-                            "price": self._extract_text(item, ["span.currency-value", "span.price"]),
-                            "rating": self._extract_text(item, ["span[class*='rating']"]),
-                            "shop": self._extract_text(item, ["p.shop-name", "span.shop"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["h3", "h2.v2-listing-card__title"], field="title"),
+                            "price": self._extract_text(item, ["span.currency-value", "span.price"], field="price"),
+                            "rating": self._extract_text(item, ["span[class*='rating']"], field="rating"),
+                            "shop": self._extract_text(item, ["p.shop-name", "span.shop"], field="shop"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -665,26 +681,27 @@ class MercadolibreScraper(BaseScraper):
             "div.andes-card"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["h2.ui-search-item__title", "h2"]),
-                            "price": self._extract_text(item, ["span.price-tag-fraction", "div.price"]),
-                            "shipping": self._extract_text(item, ["p.ui-search-item__shipping", "span.shipping"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["h2.ui-search-item__title", "h2"], field="title"),
+                            "price": self._extract_text(item, ["span.price-tag-fraction", "div.price"], field="price"),
+                            "shipping": self._extract_text(item, ["p.ui-search-item__shipping", "span.shipping"], field="shipping"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -708,26 +725,27 @@ class NoonScraper(BaseScraper):
             "div[data-qa='product-card']"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["div[class*='title']", "h3", "span.title"]),
-                            "price": self._extract_text(item, ["div[class*='price']", "span.price"]),
-                            "rating": self._extract_text(item, ["div[class*='rating']"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["div[class*='title']", "h3", "span.title"], field="title"),
+                            "price": self._extract_text(item, ["div[class*='price']", "span.price"], field="price"),
+                            "rating": self._extract_text(item, ["div[class*='rating']"], field="rating"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -751,26 +769,27 @@ class WildberriesScraper(BaseScraper):
             "div[class*='card']"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["span.goods-name", "h3", "div.title"]),
-                            "price": self._extract_text(item, ["span.price", "div[class*='price']"]),
-                            "rating": self._extract_text(item, ["span.rating", "div.rating"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["span.goods-name", "h3", "div.title"], field="title"),
+                            "price": self._extract_text(item, ["span.price", "div[class*='price']"], field="price"),
+                            "rating": self._extract_text(item, ["span.rating", "div.rating"], field="rating"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -794,27 +813,28 @@ class ShopeeScraper(BaseScraper):
             "div.shopee-search-item-result__item"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["div.ie3A+n", "div[class*='title']"]),
-                            "price": self._extract_text(item, ["span.ZEgDH9", "div.price"]),
-                            "sold": self._extract_text(item, ["div.r6HknA", "span.sold"]),
-                            "location": self._extract_text(item, ["div.zGGwiV", "div.location"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["div.ie3A+n", "div[class*='title']"], field="title"),
+                            "price": self._extract_text(item, ["span.ZEgDH9", "div.price"], field="price"),
+                            "sold": self._extract_text(item, ["div.r6HknA", "span.sold"], field="sold"),
+                            "location": self._extract_text(item, ["div.zGGwiV", "div.location"], field="location"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -838,27 +858,28 @@ class CoupangScraper(BaseScraper):
             "div.product-item"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["div.name", "div.title"]),
-                            "price": self._extract_text(item, ["strong.price-value", "span.price"]),
-                            "rating": self._extract_text(item, ["span.rating", "div[class*='rating']"]),
-                            "delivery": self._extract_text(item, ["span.delivery", "div.delivery"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["div.name", "div.title"], field="title"),
+                            "price": self._extract_text(item, ["strong.price-value", "span.price"], field="price"),
+                            "rating": self._extract_text(item, ["span.rating", "div[class*='rating']"], field="rating"),
+                            "delivery": self._extract_text(item, ["span.delivery", "div.delivery"], field="delivery"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -882,26 +903,27 @@ class FlipkartScraper(BaseScraper):
             "div._13oc-S"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["div._4rR01T", "a.s1Q9rs", "div.title"]),
-                            "price": self._extract_text(item, ["div._30jeq3", "div.price"]),
-                            "rating": self._extract_text(item, ["div._3LWZlK", "span.rating"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["div._4rR01T", "a.s1Q9rs", "div.title"], field="title"),
+                            "price": self._extract_text(item, ["div._30jeq3", "div.price"], field="price"),
+                            "rating": self._extract_text(item, ["div._3LWZlK", "span.rating"], field="rating"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -925,26 +947,27 @@ class AllegroScraper(BaseScraper):
             "article"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["h2", "div.mpof_ki_title", "a[class*='title']"]),
-                            "price": self._extract_text(item, ["span.mpof_ki_price", "span.price"]),
-                            "delivery": self._extract_text(item, ["span.mpof_ki_delivery", "span.delivery"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["h2", "div.mpof_ki_title", "a[class*='title']"], field="title"),
+                            "price": self._extract_text(item, ["span.mpof_ki_price", "span.price"], field="price"),
+                            "delivery": self._extract_text(item, ["span.mpof_ki_delivery", "span.delivery"], field="delivery"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -968,26 +991,27 @@ class TargetScraper(BaseScraper):
             "li[class*='styles__StyledCol']"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["a[data-test='product-title']", "div.title"]),
-                            "price": self._extract_text(item, ["span[data-test='current-price']", "span.price"]),
-                            "rating": self._extract_text(item, ["div[data-test='ratings']"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["a[data-test='product-title']", "div.title"], field="title"),
+                            "price": self._extract_text(item, ["span[data-test='current-price']", "span.price"], field="price"),
+                            "rating": self._extract_text(item, ["div[data-test='ratings']"], field="rating"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -1011,26 +1035,27 @@ class FalabellaScraper(BaseScraper):
             "div[class*='product']"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["b.pod-title", "div.title"]),
-                            "price": self._extract_text(item, ["span.copy14", "span.price"]),
-                            "rating": self._extract_text(item, ["span.rating"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["b.pod-title", "div.title"], field="title"),
+                            "price": self._extract_text(item, ["span.copy14", "span.price"], field="price"),
+                            "rating": self._extract_text(item, ["span.rating"], field="rating"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -1054,26 +1079,27 @@ class CdiscountScraper(BaseScraper):
             "ul.prdtList li"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["h3.prdtBILTit", "a.title"]),
-                            "price": self._extract_text(item, ["span.price", "div.price"]),
-                            "rating": self._extract_text(item, ["span.rating"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["h3.prdtBILTit", "a.title"], field="title"),
+                            "price": self._extract_text(item, ["span.price", "div.price"], field="price"),
+                            "rating": self._extract_text(item, ["span.rating"], field="rating"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -1097,26 +1123,27 @@ class OttoScraper(BaseScraper):
             "div[class*='product']"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["h2", "p.find_tile__name"]),
-                            "price": self._extract_text(item, ["span.find_tile__price", "span.price"]),
-                            "rating": self._extract_text(item, ["span.rating"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["h2", "p.find_tile__name"], field="title"),
+                            "price": self._extract_text(item, ["span.find_tile__price", "span.price"], field="price"),
+                            "rating": self._extract_text(item, ["span.rating"], field="rating"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -1140,29 +1167,30 @@ class JumiaScraper(BaseScraper):
             "article[class*='product']"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["h3.name", "div.title"]),
-                            "price": self._extract_text(item, ["div.prc", "span.price"]),
-                            "rating": self._extract_text(item, ["div.stars", "span.rating"]),
-                            "discount": self._extract_text(item, ["div.bdg", "span.discount"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='data-src'),
+                            "title": self._extract_text(item, ["h3.name", "div.title"], field="title"),
+                            "price": self._extract_text(item, ["div.prc", "span.price"], field="price"),
+                            "rating": self._extract_text(item, ["div.stars", "span.rating"], field="rating"),
+                            "discount": self._extract_text(item, ["div.bdg", "span.discount"], field="discount"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='data-src', field="image"),
                         }
                         if not product["image"]:
-                            product["image"] = self._extract_text(item, ["img"], attr='src')
+                            product["image"] = self._extract_text(item, ["img"], attr='src', field="image")
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -1186,27 +1214,28 @@ class LazadaScraper(BaseScraper):
             "div[class*='product']"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["div.RfADt", "div.title", "h3"]),
-                            "price": self._extract_text(item, ["span.ooOxS", "span.price"]),
-                            "rating": self._extract_text(item, ["span.qzqFw", "span.rating"]),
-                            "location": self._extract_text(item, ["span.oa6ri", "span.location"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["div.RfADt", "div.title", "h3"], field="title"),
+                            "price": self._extract_text(item, ["span.ooOxS", "span.price"], field="price"),
+                            "rating": self._extract_text(item, ["span.qzqFw", "span.rating"], field="rating"),
+                            "location": self._extract_text(item, ["span.oa6ri", "span.location"], field="location"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -1230,27 +1259,28 @@ class TemuScraper(BaseScraper):
             "div[data-role='product']"
         ]
         
-        for selector in selectors:
+        for selector in self._ordered_selectors(LIST_SLOT, selectors):
             items = soup.select(selector)
             if items:
-                log_info(f"[{self.PLATFORM_NAME}] 找到 {len(items)} 个商品 / Found {len(items)} items")
+                log_info("[%s] 找到 %d 个商品 / Found %d items", self.PLATFORM_NAME, len(items), len(items))
                 for item in items[:max_items]:
                     try:
                         product = {
                             "platform": self.PLATFORM_NAME,
-                            "title": self._extract_text(item, ["div[class*='title']", "h3", "span.title"]),
-                            "price": self._extract_text(item, ["div[class*='price']", "span.price"]),
-                            "rating": self._extract_text(item, ["div[class*='rating']", "span.rating"]),
-                            "sold": self._extract_text(item, ["span[class*='sold']", "div.sold"]),
-                            "url": self._extract_text(item, ["a"], attr='href'),
-                            "image": self._extract_text(item, ["img"], attr='src'),
+                            "title": self._extract_text(item, ["div[class*='title']", "h3", "span.title"], field="title"),
+                            "price": self._extract_text(item, ["div[class*='price']", "span.price"], field="price"),
+                            "rating": self._extract_text(item, ["div[class*='rating']", "span.rating"], field="rating"),
+                            "sold": self._extract_text(item, ["span[class*='sold']", "div.sold"], field="sold"),
+                            "url": self._extract_text(item, ["a"], attr='href', field="url"),
+                            "image": self._extract_text(item, ["img"], attr='src', field="image"),
                         }
                         if product["title"]:
                             products.append(product)
                     except Exception as e:
-                        log_error(f"[{self.PLATFORM_NAME}] 提取失败 / Extract failed: {e}")
+                        log_sampled("[%s] 提取失败 / Extract failed: %s", self.PLATFORM_NAME, e, level=logging.ERROR)
                         continue
                 if products:
+                    self._record_selector_hit(LIST_SLOT, selector, len(products))
                     break
         
         return products
@@ -1309,7 +1339,8 @@ def get_scraper(platform_name: str) -> BaseScraper:
         raise ValueError(f"不支持的平台 / Unsupported platform: {platform_name}")
 
 
-def scrape_platform(platform_name: str, url: str, max_items: int = 50, deep_detail: bool = False) -> List[Dict[str, Any]]:
+def scrape_platform(platform_name: str, url: str, max_items: int = 50, deep_detail: bool = False,
+                    incremental: bool = False) -> List[Dict[str, Any]]:
     """
     便捷函数：采集指定平台的数据
     Convenience function: Scrape data from specified platform
@@ -1319,9 +1350,10 @@ def scrape_platform(platform_name: str, url: str, max_items: int = 50, deep_deta
         url: 目标URL / Target URL
         max_items: 最大商品数 / Maximum items
         deep_detail: 是否采集详情 / Whether to scrape detail
+        incremental: 增量详情采集 / Incremental detail scraping
         
     Returns:
         商品列表 / Product list
     """
     scraper = get_scraper(platform_name)
-    return scraper.run(url, max_items, deep_detail)
+    return scraper.run(url, max_items, deep_detail, incremental=incremental)
@@ -0,0 +1,338 @@
+"""
+选择器命中统计模块
+Selector Hit Statistics Module
+
+记录每个平台每天哪个列表选择器和字段选择器命中，以及每次命中的平均商品数，
+并按命中率重排降级选择器，让最可能命中的选择器最先尝试。
+Records which list and field selectors matched per platform and day, with
+average items per hit, and reorders fallback selectors by hit rate so the most
+likely one is tried first.
+
+存储格式紧凑：字符串只在表中出现一次，每行是 [日期序号, 平台, 槽位, 选择器, 命中数, 商品数] 六个整数。
+Storage is compact: strings appear once in a table and each row is six ints
+[day ordinal, platform, slot, selector, hits, items].
+
+多个进程共享同一文件：保存时在文件锁下重新读取磁盘数据并加上本进程的新增命中。
+Several processes share one file: saving re-reads it under a file lock and
+adds only this process's hits since its last save.
+"""
+
+import json
+import os
+import threading
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from core.file_lock import file_lock, write_json_atomic
+from scrapers.logger import log_error
+
+# (day, platform, slot, selector) 名称键 -> [命中数, 商品数] / Name-keyed rows -> [hits, items]
+NamedRows = Dict[Tuple[int, str, str, str], List[int]]
+
+
+SELECTOR_STATS_PATH = os.environ.get("SCRAPER_SELECTOR_STATS", os.path.join("logs", "selector_stats.json"))
+# 每组至少命中这么多次才开始重排 / Hits needed per slot before reordering
+REORDER_MIN_HITS = 20
+# 每组每新增这么多次命中重新计算一次顺序 / Recompute order after this many new hits per slot
+REORDER_EVERY = 50
+RETENTION_DAYS = 30
+
+LIST_SLOT = "list"
+
+
+def field_slot(field: str) -> str:
+    """字段选择器的槽位名 / Slot name for a field selector"""
+    return f"field:{field}"
+
+
+class SelectorStats:
+    """按平台/日统计选择器命中并据此排序 / Per platform/day selector hit counts with hit-rate ordering"""
+
+    def __init__(self, path: Optional[str] = SELECTOR_STATS_PATH, reorder: bool = True,
+                 min_hits: int = REORDER_MIN_HITS, retention_days: int = RETENTION_DAYS):
+        """
+        初始化统计
+        Initialize stats
+
+        Args:
+            path: 持久化文件，None 表示只在内存中 / Persistence file, None for memory only
+            reorder: 是否按命中率重排 / Whether to reorder by hit rate
+            min_hits: 开始重排所需的命中数 / Hits needed before reordering
+            retention_days: 保留天数 / Days kept
+        """
+        self.path = path
+        self.reorder = reorder
+        self.min_hits = min_hits
+        self.retention_days = retention_days
+        self.lock = threading.Lock()
+        self.strings: List[str] = []
+        self.ids: Dict[str, int] = {}
+        # (day, platform, slot, selector) -> [hits, items]
+        self.daily: Dict[Tuple[int, int, int, int], List[int]] = {}
+        # (platform, slot) -> {selector: hits}, all retained days
+        self.totals: Dict[Tuple[int, int], Dict[int, int]] = {}
+        self.group_hits: Dict[Tuple[int, int], int] = {}
+        # 上次保存后的新增命中 / Hits since the last save, same keys as daily
+        self.pending: Dict[Tuple[int, int, int, int], List[int]] = {}
+        self._order_cache: Dict[Tuple[str, str, Tuple[str, ...]], Tuple[int, List[str]]] = {}
+
+    def _intern(self, name: str) -> int:
+        index = self.ids.get(name)
+        if index is None:
+            index = len(self.strings)
+            self.strings.append(name)
+            self.ids[name] = index
+        return index
+
+    def _add(self, key: Tuple[int, int, int, int], hits: int, items: int):
+        row = self.daily.setdefault(key, [0, 0])
+        row[0] += hits
+        row[1] += items
+        group_key = (key[1], key[2])
+        group = self.totals.setdefault(group_key, {})
+        group[key[3]] = group.get(key[3], 0) + hits
+        self.group_hits[group_key] = self.group_hits.get(group_key, 0) + hits
+
+    def record_hit(self, platform: str, slot: str, selector: str, items: int = 1,
+                   day: Optional[date] = None):
+        """
+        记录一次选择器命中
+        Record one selector hit
+
+        Args:
+            platform: 平台名称 / Platform name
+            slot: 槽位（"list" 或 "field:<name>"） / Slot ("list" or "field:<name>")
+            selector: 命中的选择器 / Matching selector
+            items: 本次命中得到的商品数 / Items produced by this hit
+            day: 日期，默认今天 / Day, defaults to today
+        """
+        day_ordinal = (day or date.today()).toordinal()
+        with self.lock:
+            platform_id = self._intern(platform)
+            slot_id = self._intern(slot)
+            selector_id = self._intern(selector)
+            key = (day_ordinal, platform_id, slot_id, selector_id)
+            self._add(key, 1, items)
+            delta = self.pending.setdefault(key, [0, 0])
+            delta[0] += 1
+            delta[1] += items
+
+    def ordered(self, platform: str, slot: str, selectors: Sequence[str]) -> Sequence[str]:
+        """
+        按命中次数排序选择器（并列时保持原顺序）
+        Order selectors by hit count, keeping the original order for ties
+
+        Args:
+            platform: 平台名称 / Platform name
+            slot: 槽位 / Slot
+            selectors: 原始降级顺序 / Original fallback order
+
+        Returns:
+            排序后的选择器 / Ordered selectors
+        """
+        if not self.reorder or len(selectors) < 2:
+            return selectors
+        platform_id = self.ids.get(platform)
+        slot_id = self.ids.get(slot)
+        if platform_id is None or slot_id is None:
+            return selectors
+        total = self.group_hits.get((platform_id, slot_id), 0)
+        if total < self.min_hits:
+            return selectors
+
+        key = (platform, slot, tuple(selectors))
+        version = total // REORDER_EVERY
+        cached = self._order_cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        with self.lock:
+            group = self.totals.get((platform_id, slot_id), {})
+            hits = {selector: group.get(self.ids.get(selector, -1), 0) for selector in selectors}
+        order = sorted(selectors, key=lambda selector: -hits[selector])
+        self._order_cache[key] = (version, order)
+        return order
+
+    def rows(self, platform: Optional[str] = None, days: int = 14,
+             today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """
+        按日展开的命中记录（用于热力图）
+        Per-day hit rows for the heatmap
+
+        Args:
+            platform: 平台过滤，None 表示全部 / Platform filter, None for all
+            days: 最近天数 / Trailing days
+            today: 截止日期 / End day
+
+        Returns:
+            [{"day", "platform", "slot", "selector", "hits", "items", "avg_items"}] / 命中记录
+        """
+        first_day = (today or date.today()).toordinal() - days + 1
+        with self.lock:
+            snapshot = list(self.daily.items())
+            names = list(self.strings)
+
+        result = []
+        for (day_ordinal, platform_id, slot_id, selector_id), (hits, items) in snapshot:
+            if day_ordinal < first_day:
+                continue
+            if platform is not None and names[platform_id] != platform:
+                continue
+            result.append({
+                "day": date.fromordinal(day_ordinal).isoformat(),
+                "platform": names[platform_id],
+                "slot": names[slot_id],
+                "selector": names[selector_id],
+                "hits": hits,
+                "items": items,
+                "avg_items": items / hits if hits else 0.0,
+            })
+        result.sort(key=lambda row: (row["day"], row["platform"], row["slot"], -row["hits"]))
+        return result
+
+    def platforms(self) -> List[str]:
+        """有记录的平台 / Platforms with recorded hits"""
+        with self.lock:
+            return sorted({self.strings[platform_id] for platform_id, _ in self.totals})
+
+    def _named(self, rows: Dict[Tuple[int, int, int, int], List[int]]) -> NamedRows:
+        names = self.strings
+        return {(day_ordinal, names[platform_id], names[slot_id], names[selector_id]): list(values)
+                for (day_ordinal, platform_id, slot_id, selector_id), values in rows.items()}
+
+    @staticmethod
+    def _read(path: str) -> NamedRows:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        strings = data["strings"]
+        rows: NamedRows = {}
+        for day_ordinal, platform_id, slot_id, selector_id, hits, items in data["rows"]:
+            key = (day_ordinal, strings[platform_id], strings[slot_id], strings[selector_id])
+            row = rows.setdefault(key, [0, 0])
+            row[0] += hits
+            row[1] += items
+        return rows
+
+    @staticmethod
+    def _serialize(rows: NamedRows) -> Dict[str, Any]:
+        strings: List[str] = []
+        ids: Dict[str, int] = {}
+
+        def intern(name: str) -> int:
+            if name not in ids:
+                ids[name] = len(strings)
+                strings.append(name)
+            return ids[name]
+
+        return {
+            "strings": strings,
+            "rows": [[day_ordinal, intern(platform), intern(slot), intern(selector), hits, items]
+                     for (day_ordinal, platform, slot, selector), (hits, items) in rows.items()],
+        }
+
+    def _replace(self, rows: NamedRows):
+        self.daily.clear()
+        self.totals.clear()
+        self.group_hits.clear()
+        self._order_cache.clear()
+        for (day_ordinal, platform, slot, selector), (hits, items) in rows.items():
+            key = (day_ordinal, self._intern(platform), self._intern(slot), self._intern(selector))
+            self._add(key, hits, items)
+
+    def save(self, path: Optional[str] = None, today: Optional[date] = None) -> bool:
+        """
+        保存统计：在文件锁下合并磁盘数据与本进程新增命中，并删除过期天
+        Save stats: merge on-disk rows with this process's new hits under a
+        file lock, dropping expired days
+
+        保存到初始化路径时，内存随后更新为合并结果（包含其他进程的命中）；
+        保存到其他路径只写出内存快照。
+        Saving to the init path also refreshes memory with the merged rows
+        (including other processes' hits); any other path gets a snapshot.
+
+        Args:
+            path: 文件路径，默认初始化时的路径 / File path
+            today: 当前日期 / Current day
+
+        Returns:
+            是否成功 / Whether saved
+        """
+        path = path or self.path
+        if not path:
+            return False
+        cutoff = (today or date.today()).toordinal() - self.retention_days + 1
+        try:
+            with file_lock(path), self.lock:
+                if path == self.path:
+                    merged = self._read(path) if os.path.exists(path) else {}
+                    for key, (hits, items) in self._named(self.pending).items():
+                        row = merged.setdefault(key, [0, 0])
+                        row[0] += hits
+                        row[1] += items
+                else:
+                    merged = self._named(self.daily)
+                merged = {key: values for key, values in merged.items() if key[0] >= cutoff}
+                write_json_atomic(path, self._serialize(merged), ensure_ascii=False, separators=(",", ":"))
+                if path == self.path:
+                    self._replace(merged)
+                    self.pending.clear()
+            return True
+        except Exception as e:
+            log_error("保存选择器统计失败 / Failed to save selector stats: %s", e)
+            return False
+
+    def load(self, path: Optional[str] = None) -> bool:
+        """
+        加载统计（与内存中的数据合并）
+        Load stats, merging into memory
+
+        Args:
+            path: 文件路径 / File path
+
+        Returns:
+            是否成功 / Whether loaded
+        """
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            rows = self._read(path)
+            with self.lock:
+                for (day_ordinal, platform, slot, selector), (hits, items) in rows.items():
+                    key = (day_ordinal, self._intern(platform), self._intern(slot), self._intern(selector))
+                    self._add(key, hits, items)
+            return True
+        except Exception as e:
+            log_error("加载选择器统计失败 / Failed to load selector stats: %s", e)
+            return False
+
+    def reset(self):
+        """清除所有统计 / Clear all stats"""
+        with self.lock:
+            self.daily.clear()
+            self.totals.clear()
+            self.group_hits.clear()
+            self.pending.clear()
+            self._order_cache.clear()
+
+
+_global_stats: Optional[SelectorStats] = None
+_global_lock = threading.Lock()
+
+
+def get_selector_stats() -> SelectorStats:
+    """
+    获取全局选择器统计（首次调用时从文件加载）
+    Get global selector stats, loaded from file on first use
+
+    Returns:
+        选择器统计 / Selector stats
+    """
+    global _global_stats
+    if _global_stats is None:
+        with _global_lock:
+            if _global_stats is None:
+                stats = SelectorStats()
+                stats.load()
+                _global_stats = stats
+    return _global_stats
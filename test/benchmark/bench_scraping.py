@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+抓取热点路径基准测试
+Scraping Hot Path Benchmarks
+
+回放 fixtures/ 中录制的 HTML 页面，依次测量抓取（本地 HTTP 替身服务器）、解析、提取、
+规范化、验证、去重和保存各阶段，报告 pages/s、items/s 与内存峰值。
+Replays the recorded HTML pages in fixtures/ through fetch (against a local HTTP
+stand-in server), parse, extract, normalize, validate, dedup and save, reporting
+pages/s, items/s and peak memory per stage.
+
+结果以 pytest-benchmark 相同的 JSON 结构保存在 .benchmarks/ 中，可在提交之间比较；
+解析或提取阶段中位数变慢超过阈值时以非零状态退出。
+Results are saved under .benchmarks/ in the pytest-benchmark JSON layout so runs
+can be compared between commits; a parse or extract median slower than the
+threshold exits non-zero.
+
+用法 / Usage:
+    python test/benchmark/bench_scraping.py
+    python test/benchmark/bench_scraping.py --compare latest --threshold 0.2
+    python test/benchmark/bench_scraping.py --platform ebay --platform amazon --rounds 5
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# 事件日志写到临时目录，避免污染 logs/ / Keep benchmark events out of logs/
+_SCRATCH_DIR = tempfile.mkdtemp(prefix="scraper_bench_")
+os.environ.setdefault("SCRAPER_EVENT_LOG", os.path.join(_SCRATCH_DIR, "events.ndjson"))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from core.data_validation import DataDeduplicator, DataValidator, ValidationRule, create_amazon_validator  # noqa: E402
+from core.processing.normalization import normalize_records  # noqa: E402
+from core.processing.product_identity import annotate_products  # noqa: E402
+from scrapers.amazon_scraper import AmazonScraper  # noqa: E402
+from scrapers.multi_platform_scraper import PLATFORM_SCRAPERS  # noqa: E402
+from scrapers.selector_stats import SelectorStats  # noqa: E402
+
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures"
+RESULTS_DIR = PROJECT_ROOT / ".benchmarks"
+
+# 只有这些阶段的回归会导致失败 / Only regressions in these stages fail the run
+REGRESSION_STAGES = ("parse", "extract")
+DEFAULT_THRESHOLD = 0.20
+DEFAULT_ROUNDS = 10
+
+
+def _generic_validator() -> DataValidator:
+    validator = DataValidator()
+    validator.add_rule(ValidationRule("title", "length", {"min": 1}))
+    validator.add_rule(ValidationRule("url", "type", {"type": "string"}))
+    return validator
+
+
+CASES: Dict[str, Dict[str, Any]] = {
+    "amazon": {
+        "fixture": "amazon_search.html",
+        "scraper": lambda data_dir: AmazonScraper(data_dir=data_dir),
+        "validator": create_amazon_validator,
+        "dedup_fields": ["asin"],
+    },
+    "ebay": {"fixture": "ebay_list.html"},
+    "jumia": {"fixture": "jumia_list.html"},
+    "lazada": {"fixture": "lazada_list.html"},
+    "mercari": {"fixture": "mercari_list.html"},
+}
+
+
+class BenchmarkRunner:
+    """
+    pytest-benchmark 风格的计时器（等价于 benchmark.pedantic）
+    pytest-benchmark style timer, equivalent to benchmark.pedantic
+    """
+
+    def __init__(self, rounds: int = DEFAULT_ROUNDS, warmup_rounds: int = 1):
+        """
+        初始化计时器
+        Initialize runner
+
+        Args:
+            rounds: 计时轮数 / Timed rounds
+            warmup_rounds: 预热轮数 / Untimed warmup rounds
+        """
+        self.rounds = rounds
+        self.warmup_rounds = warmup_rounds
+        self.benchmarks: List[Dict[str, Any]] = []
+
+    def __call__(self, name: str, group: str, target: Callable, setup: Optional[Callable] = None,
+                 pages: int = 1, items: int = 0) -> Dict[str, Any]:
+        """
+        计时一个目标函数
+        Time one target
+
+        Args:
+            name: 基准名称 / Benchmark name
+            group: 分组（平台） / Group (platform)
+            target: 被计时的函数，接收 setup 的返回值 / Timed callable, receives setup()'s result
+            setup: 每轮计时前调用，不计入时间 / Called untimed before every round
+            pages: 每轮处理的页面数 / Pages per round
+            items: 每轮处理的商品数 / Items per round
+
+        Returns:
+            pytest-benchmark 格式的结果 / Result in the pytest-benchmark layout
+        """
+        def run_once(timed: bool) -> float:
+            args = setup() if setup else ()
+            start = time.perf_counter()
+            target(*args)
+            return time.perf_counter() - start if timed else 0.0
+
+        for _ in range(self.warmup_rounds):
+            run_once(False)
+
+        gc_was_enabled = gc.isenabled()
+        gc.collect()
+        gc.disable()
+        try:
+            timings = [run_once(True) for _ in range(self.rounds)]
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        # 单独跑一轮测内存峰值，避免 tracemalloc 影响计时 / Separate traced round so tracing does not skew timings
+        args = setup() if setup else ()
+        tracemalloc.start()
+        try:
+            target(*args)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        mean = statistics.fmean(timings)
+        result = {
+            "name": f"{group}::{name}",
+            "group": group,
+            "stage": name,
+            "stats": {
+                "min": min(timings),
+                "max": max(timings),
+                "mean": mean,
+                "stddev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+                "median": statistics.median(timings),
+                "rounds": len(timings),
+                "ops": 1.0 / mean if mean else 0.0,
+            },
+            "extra_info": {
+                "pages": pages,
+                "items": items,
+                "pages_per_sec": pages / mean if mean else 0.0,
+                "items_per_sec": items / mean if mean else 0.0,
+                "peak_memory_bytes": peak,
+            },
+        }
+        self.benchmarks.append(result)
+        return result
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server(directory: Path = FIXTURE_DIR) -> ThreadingHTTPServer:
+    """
+    启动本地 HTTP 替身服务器提供录制页面
+    Start a local HTTP stand-in server for the recorded pages
+
+    Args:
+        directory: 页面目录 / Fixture directory
+
+    Returns:
+        服务器（server.server_address 为监听地址） / Server
+    """
+    handler = partial(_QuietHandler, directory=str(directory))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, name="BenchFixtureServer", daemon=True).start()
+    return server
+
+
+def _make_scraper(name: str, case: Dict[str, Any], data_dir: str):
+    factory = case.get("scraper")
+    scraper = factory(data_dir) if factory else PLATFORM_SCRAPERS[name](data_dir=data_dir)
+    # 每个用例使用独立的内存统计，结果不受历史命中影响 / Fresh in-memory stats keep runs reproducible
+    if hasattr(scraper, "selector_stats"):
+        scraper.selector_stats = SelectorStats(path=None)
+    # 基准中不做礼貌等待 / No politeness delays while benchmarking
+    scraper._wait = lambda *args, **kwargs: None
+    return scraper
+
+
+def run_case(name: str, runner: BenchmarkRunner, base_url: str, data_dir: str) -> List[Dict[str, Any]]:
+    """
+    对一个平台跑完整条流水线
+    Benchmark the whole pipeline for one platform
+
+    Args:
+        name: 平台名称 / Platform name
+        runner: 计时器 / Runner
+        base_url: 替身服务器地址 / Stand-in server URL
+        data_dir: 保存目录 / Save directory
+
+    Returns:
+        该平台的结果 / Results for this platform
+    """
+    case = CASES[name]
+    html = (FIXTURE_DIR / case["fixture"]).read_bytes()
+    url = f"{base_url}/{case['fixture']}"
+    scraper = _make_scraper(name, case, data_dir)
+    results = []
+
+    fetch_page = scraper._fetch_page
+    soup = BeautifulSoup(html, "lxml")
+    scraper._fetch_page = lambda *args, **kwargs: soup
+    products = scraper.scrape_list_page(url, max_items=100)
+    if not products:
+        raise RuntimeError(f"[{name}] fixture produced no products")
+    count = len(products)
+
+    results.append(runner("fetch", name, lambda: fetch_page(url), items=count))
+    results.append(runner("parse", name, lambda: BeautifulSoup(html, "lxml"), items=count))
+    results.append(runner("extract", name, lambda: scraper.scrape_list_page(url, max_items=100), items=count))
+
+    def copies():
+        return ([dict(product) for product in products],)
+
+    def normalize(records):
+        normalize_records(records)
+        annotate_products(records, name, base_url=url)
+
+    results.append(runner("normalize", name, normalize, setup=copies, items=count))
+    normalized = [dict(product) for product in products]
+    normalize(normalized)
+
+    validator = case.get("validator", _generic_validator)()
+    results.append(runner("validate", name, lambda: validator.validate_batch(normalized), items=count))
+
+    dedup_fields = case.get("dedup_fields", ["product_key"])
+    results.append(runner("dedup", name, lambda dedup: dedup.deduplicate(normalized),
+                          setup=lambda: (DataDeduplicator(hash_fields=dedup_fields),), items=count))
+    results.append(runner("save", name, lambda: scraper.save_data(normalized, f"bench_{name}.json"),
+                          items=count))
+    return results
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], cwd=PROJECT_ROOT, capture_output=True, text=True,
+                              timeout=30).stdout.strip()
+    except Exception:
+        return ""
+
+
+def commit_info() -> Dict[str, Any]:
+    """当前提交信息 / Current commit info"""
+    return {
+        "id": _git("rev-parse", "HEAD") or "unknown",
+        "branch": _git("rev-parse", "--abbrev-ref", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "time": _git("log", "-1", "--format=%cI"),
+    }
+
+
+def machine_info() -> Dict[str, Any]:
+    """机器信息 / Machine info"""
+    return {
+        "node": platform.node(),
+        "processor": platform.processor(),
+        "machine": platform.machine(),
+        "python_version": platform.python_version(),
+        "system": platform.system(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def saved_runs(results_dir: Path = RESULTS_DIR) -> List[Path]:
+    """按编号排序的已保存结果 / Saved runs ordered by number"""
+    if not results_dir.exists():
+        return []
+    return sorted(results_dir.glob("[0-9][0-9][0-9][0-9]_*.json"))
+
+
+def save_run(report: Dict[str, Any], results_dir: Path = RESULTS_DIR) -> Path:
+    """
+    以 NNNN_<commit>.json 保存结果
+    Save a run as NNNN_<commit>.json
+
+    Args:
+        report: 运行结果 / Run report
+        results_dir: 保存目录 / Results directory
+
+    Returns:
+        保存路径 / Saved path
+    """
+    results_dir.mkdir(parents=True, exist_ok=True)
+    runs = saved_runs(results_dir)
+    number = int(runs[-1].name[:4]) + 1 if runs else 1
+    commit = report["commit_info"]
+    suffix = commit["id"][:8] + ("_dirty" if commit["dirty"] else "")
+    path = results_dir / f"{number:04d}_{suffix}.json"
+    path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return path
+
+
+def resolve_baseline(spec: str, results_dir: Path = RESULTS_DIR) -> Optional[Path]:
+    """
+    解析比较基线：latest、编号前缀或文件路径
+    Resolve a baseline: "latest", a run number prefix, or a file path
+    """
+    if spec == "latest":
+        runs = saved_runs(results_dir)
+        return runs[-1] if runs else None
+    if Path(spec).exists():
+        return Path(spec)
+    matches = [run for run in saved_runs(results_dir) if run.name.startswith(spec.zfill(4))]
+    return matches[-1] if matches else None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD,
+            stages=REGRESSION_STAGES) -> List[Dict[str, Any]]:
+    """
+    比较两次运行的中位数
+    Compare medians of two runs
+
+    Args:
+        current: 当前结果 / Current report
+        baseline: 基线结果 / Baseline report
+        threshold: 允许的相对变慢比例 / Allowed relative slowdown
+        stages: 参与判定的阶段 / Stages that can fail the run
+
+    Returns:
+        [{"name", "baseline", "current", "change", "regression"}] / 比较结果
+    """
+    previous = {bench["name"]: bench for bench in baseline.get("benchmarks", [])}
+    rows = []
+    for bench in current["benchmarks"]:
+        old = previous.get(bench["name"])
+        if old is None:
+            continue
+        old_median = old["stats"]["median"]
+        new_median = bench["stats"]["median"]
+        change = (new_median - old_median) / old_median if old_median else 0.0
+        rows.append({
+            "name": bench["name"],
+            "baseline": old_median,
+            "current": new_median,
+            "change": change,
+            "regression": bench["stage"] in stages and change > threshold,
+        })
+    return rows
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """结果表格 / Results table"""
+    lines = [f"{'benchmark':<22}{'median ms':>11}{'pages/s':>10}{'items/s':>12}{'peak KiB':>10}"]
+    for bench in report["benchmarks"]:
+        extra = bench["extra_info"]
+        lines.append(
+            f"{bench['name']:<22}{bench['stats']['median'] * 1000:>11.2f}{extra['pages_per_sec']:>10.1f}"
+            f"{extra['items_per_sec']:>12.0f}{extra['peak_memory_bytes'] / 1024:>10.0f}"
+        )
+    return "\n".join(lines)
+
+
+def run_benchmarks(platforms: Optional[List[str]] = None, rounds: int = DEFAULT_ROUNDS) -> Dict[str, Any]:
+    """
+    跑选定平台的基准
+    Run benchmarks for the selected platforms
+
+    Args:
+        platforms: 平台列表，None 表示全部 / Platforms, None for all
+        rounds: 每阶段计时轮数 / Timed rounds per stage
+
+    Returns:
+        pytest-benchmark 格式的报告 / Report in the pytest-benchmark layout
+    """
+    runner = BenchmarkRunner(rounds=rounds)
+    server = start_fixture_server()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with tempfile.TemporaryDirectory(prefix="scraper_bench_data_") as data_dir:
+            for name in platforms or list(CASES):
+                run_case(name, runner, base_url, data_dir)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    return {
+        "machine_info": machine_info(),
+        "commit_info": commit_info(),
+        "benchmarks": runner.benchmarks,
+        "datetime": datetime.now(timezone.utc).isoformat(),
+        "version": "1.0",
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口 / Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Scraping hot path benchmarks / 抓取热点路径基准测试")
+    parser.add_argument("--platform", action="append", choices=sorted(CASES),
+                        help="Platform to run, repeatable (default: all)")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="Timed rounds per stage")
+    parser.add_argument("--compare", metavar="RUN",
+                        help="Baseline to compare against: latest, a run number, or a JSON path")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed parse/extract median slowdown, e.g. 0.2 for 20%%")
+    parser.add_argument("--json", metavar="PATH", help="Also write the report to PATH")
+    parser.add_argument("--no-save", action="store_true", help="Do not save the run under .benchmarks/")
+    parser.add_argument("--log-level", default="WARNING", help="Scraper log level while benchmarking")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(args.log_level.upper())
+
+    # 先确定基线，避免与本次保存的结果比较 / Resolve baseline before saving this run
+    baseline_path = resolve_baseline(args.compare) if args.compare else None
+    if args.compare and baseline_path is None:
+        print(f"No baseline found for --compare {args.compare}; nothing to compare")
+
+    report = run_benchmarks(args.platform, args.rounds)
+    print(format_report(report))
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if not args.no_save:
+        print(f"\nSaved: {save_run(report)}")
+
+    if baseline_path is None:
+        return 0
+
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    rows = compare(report, baseline, args.threshold)
+    print(f"\nCompared with {baseline_path.name} (threshold {args.threshold:.0%}):")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"  {row['name']:<22}{row['baseline'] * 1000:>9.2f} -> {row['current'] * 1000:>9.2f} ms "
+              f"({row['change']:+.1%}){flag}")
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(f"\n{len(regressions)} parse/extract regression(s) above {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
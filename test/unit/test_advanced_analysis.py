@@ -9,7 +9,8 @@ import shutil
 from pathlib import Path
 import pandas as pd
 
-from core.advanced_analysis import AdvancedAnalyzer
+from core.advanced_analysis import AdvancedAnalyzer, HAS_WORDCLOUD
+from core.processing.product_frame import ProductFrame
 
 
 class TestAdvancedAnalyzer(unittest.TestCase):
@@ -228,6 +229,29 @@ class TestAdvancedAnalyzer(unittest.TestCase):
         trends = self.analyzer.analyze_market_trends([])
         self.assertEqual(trends, {})
     
+    def test_product_frame_input(self):
+        """测试传入 ProductFrame 时结果一致且被缓存 / Test ProductFrame input matches and is memoized"""
+        frame = ProductFrame.from_records(self.sample_products)
+        
+        from_list = self.analyzer.analyze_brand_concentration(self.sample_products)
+        from_frame = self.analyzer.analyze_brand_concentration(frame)
+        self.assertEqual(from_list['hhi_index'], from_frame['hhi_index'])
+        self.assertEqual(from_list['top_brands'][0], from_frame['top_brands'][0])
+        
+        matrix = self.analyzer.analyze_competitor_matrix(frame)
+        pd.testing.assert_frame_equal(
+            matrix.reset_index(drop=True),
+            self.analyzer.analyze_competitor_matrix(self.sample_products).reset_index(drop=True)
+        )
+        self.assertIn(('competitor_matrix', 'brand'), frame._cache)
+        
+        # 返回副本，修改不影响缓存
+        matrix['brand'] = 'changed'
+        self.assertNotIn('changed', self.analyzer.analyze_competitor_matrix(frame)['brand'].tolist())
+        
+        self.assertEqual(self.analyzer.analyze_market_trends(frame),
+                         self.analyzer.analyze_market_trends(self.sample_products))
+    
     def test_comprehensive_report(self):
         """测试综合报告生成 / Test comprehensive report generation"""
         report_path = self.analyzer.generate_comprehensive_report(
@@ -251,6 +275,39 @@ class TestAdvancedAnalyzer(unittest.TestCase):
         self.assertIn('market_trends', report)
         
         self.assertEqual(report['total_products'], len(self.sample_products))
+        self.assertTrue(self.analyzer.wait_for_charts(timeout=30))
+        for chart_path in report['charts'].values():
+            self.assertTrue(Path(chart_path).exists())
+    
+    def test_parallel_report_matches_serial(self):
+        """测试并行报告与串行结果一致 / Test parallel report matches the serial one"""
+        import json
+        reports = []
+        for parallel in (False, True):
+            path = self.analyzer.generate_comprehensive_report(
+                self.sample_products, report_name=f'report_{parallel}.json',
+                render_charts=False, parallel=parallel
+            )
+            with open(path, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+            report.pop('generated_at')
+            reports.append(report)
+        
+        self.assertEqual(reports[0], reports[1])
+        self.assertNotIn('charts', reports[1])
+        self.assertEqual(list(Path(self.output_dir).glob('*.png')), [])
+    
+    def test_charts_cached_by_content(self):
+        """测试相同数据的图表只渲染一次 / Test charts for identical data render once"""
+        for name in ('first.json', 'second.json'):
+            self.analyzer.generate_comprehensive_report(self.sample_products, report_name=name, parallel=False)
+            self.assertTrue(self.analyzer.wait_for_charts(timeout=30))
+        
+        charts = 3 if HAS_WORDCLOUD else 2
+        renderer = self.analyzer.chart_renderer
+        self.assertEqual(renderer.rendered, charts)
+        self.assertEqual(renderer.cache_hits, charts)
+        self.assertEqual(len(list(Path(self.output_dir).glob('*.png'))), charts)
 
 
 if __name__ == '__main__':
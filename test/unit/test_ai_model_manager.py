@@ -0,0 +1,128 @@
+"""
+Tests for AI model manager benchmarking and routing
+AI 模型管理器测速与路由测试
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.ai_model_manager import AIModelManager, _percentile
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible /chat/completions stub / OpenAI 兼容的本地桩服务"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        behaviour = self.server.behaviours.get(body["model"], {})
+        time.sleep(behaviour.get("delay", 0))
+        if behaviour.get("fail"):
+            self.send_response(500)
+            self.end_headers()
+            self.wfile.write(b"upstream error")
+            return
+        payload = json.dumps({
+            "choices": [{"message": {"role": "assistant", "content": f"hello from {body['model']}"}}],
+            "usage": {"prompt_tokens": 3, "completion_tokens": 8},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    """Local OpenAI-compatible server / 本地 OpenAI 兼容服务"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.behaviours = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def manager(tmp_path, stub_server):
+    """Manager with three models on the stub server / 在桩服务上配置三个模型的管理器"""
+    manager = AIModelManager(config_file=str(tmp_path / "config" / "ai_models.json"))
+    api_base = f"http://127.0.0.1:{stub_server.server_address[1]}/v1"
+    stub_server.behaviours.update({"slow": {"delay": 0.3}, "fast": {"delay": 0.02}, "broken": {"fail": True}})
+    for name in ("slow", "fast", "broken"):
+        manager.add_model("openai", name, "sk-test", custom_endpoint=api_base)
+    manager.add_model("google", "gemini-pro", "key")
+    manager.ids = {model["model_name"]: model["id"] for model in manager.list_models()}
+    return manager
+
+
+class TestPercentile:
+    """Nearest-rank percentile tests / 最近秩百分位测试"""
+
+    def test_nearest_rank(self):
+        """Test ranks follow ceil(q/100*n) / 测试秩为 ceil(q/100*n)"""
+        values = [float(v) for v in range(1, 11)]
+        assert _percentile(values, 50) == 5.0
+        assert _percentile(values, 95) == 10.0
+        assert _percentile(values, 0) == 1.0
+        assert _percentile([3.0, 7.0], 50) == 3.0
+
+
+class TestBenchmark:
+    """Test concurrent benchmarking / 测试并发测速"""
+
+    def test_models_are_probed_in_parallel(self, manager):
+        """Test wall time is bounded by the slowest model / 测试总耗时取决于最慢的模型"""
+        start = time.perf_counter()
+        results = manager.benchmark_models(rounds=2, timeout=5)
+        elapsed = time.perf_counter() - start
+        assert set(results) == {manager.ids[name] for name in ("slow", "fast", "broken")}
+        assert elapsed < 0.6 + 0.5
+
+        fast, slow, broken = (results[manager.ids[name]] for name in ("fast", "slow", "broken"))
+        assert fast["healthy"] and slow["healthy"] and not broken["healthy"]
+        assert fast["samples"] == 2 and fast["latency_p50"] < slow["latency_p50"]
+        assert slow["latency_min"] >= 0.3
+        assert fast["tokens_per_second"] > slow["tokens_per_second"] > 0
+        assert "upstream error" in broken["last_error"]
+
+    def test_results_are_persisted(self, manager):
+        """Test benchmark results survive a restart / 测试测速结果持久化"""
+        manager.benchmark_models(rounds=1, timeout=5)
+        restored = AIModelManager(config_file=manager.config_file)
+        assert restored.get_model_stats(manager.ids["fast"])["healthy"]
+        assert restored.get_fastest_model()["model_name"] == "fast"
+
+
+class TestRouter:
+    """Test latency-based routing / 测试按延迟路由"""
+
+    def test_ranking_and_fallback(self, manager, stub_server):
+        """Test fastest healthy model first, fallback on failure / 测试最快健康模型优先与失败回退"""
+        assert manager.get_fastest_model() is None
+        manager.benchmark_models(rounds=1, timeout=5)
+        assert manager.rank_models() == [manager.ids[name] for name in ("fast", "slow", "broken")]
+
+        result = manager.complete_with_fallback("hi")
+        assert result["success"] and result["model_id"] == manager.ids["fast"]
+        assert result["text"] == "hello from fast"
+
+        stub_server.behaviours["fast"] = {"fail": True}
+        result = manager.complete_with_fallback("hi")
+        assert result["model_id"] == manager.ids["slow"]
+        assert [attempt["success"] for attempt in result["attempts"]] == [False, True]
+
+    def test_no_routable_models(self, tmp_path):
+        """Test empty configuration / 测试没有可路由的模型"""
+        manager = AIModelManager(config_file=str(tmp_path / "ai_models.json"))
+        manager.add_model("google", "gemini-pro", "key")
+        assert manager.benchmark_models() == {}
+        assert manager.complete_with_fallback("hi")["success"] is False
@@ -0,0 +1,237 @@
+"""
+Tests for Alert Engine Module
+警报引擎模块测试
+"""
+
+import threading
+import time
+import pytest
+import pandas as pd
+from unittest.mock import patch
+
+from core.alert_engine import AlertEngine, AlertNotifier, AlertRule, email_handler, load_alert_config
+from core.monitoring import MetricsCollector
+from core.processing.anomaly_detector import anomaly_alerts
+
+
+def _record(collector, count, success=True, response_time=1.0, error_type=None):
+    for _ in range(count):
+        collector.record_request("amazon", success, response_time, 1, error_type)
+
+
+class TestAlertRule:
+    """Test AlertRule class / 测试 AlertRule 类"""
+
+    def test_ratio_needs_min_count(self):
+        """Test ratio rules wait for enough requests / 测试比例规则需要足够的请求数"""
+        collector = MetricsCollector()
+        rule = AlertRule({"name": "err", "kind": "ratio", "numerator": "failed",
+                          "denominator": "requests", "min_count": 10, "threshold": 0.1})
+
+        _record(collector, 5, success=False)
+        assert rule.measure(collector, time.time()) is None
+
+        _record(collector, 5)
+        assert rule.measure(collector, time.time()) == pytest.approx(0.5)
+
+    def test_rate_over_window(self):
+        """Test rate is events per second over the window / 测试速率为窗口内每秒事件数"""
+        collector = MetricsCollector()
+        rule = AlertRule({"name": "fail_rate", "kind": "rate", "field": "failed",
+                          "window_seconds": 10, "threshold": 0.5})
+        _record(collector, 6, success=False)
+
+        value = rule.measure(collector, time.time())
+        assert value == pytest.approx(0.6)
+        assert rule.breached(value, {})
+
+    def test_window_excludes_old_events(self):
+        """Test events outside the window are ignored / 测试窗口外的事件被忽略"""
+        collector = MetricsCollector()
+        rule = AlertRule({"name": "err", "kind": "ratio", "window_seconds": 60, "threshold": 0.1})
+        _record(collector, 5, success=False)
+
+        assert rule.measure(collector, time.time() + 120) is None
+
+    def test_threshold_key_uses_shared_thresholds(self):
+        """Test threshold_key looks up the shared thresholds dict / 测试按 threshold_key 查找阈值"""
+        rule = AlertRule({"name": "err", "kind": "ratio", "threshold_key": "error_rate", "threshold": 0.1})
+
+        assert rule.breached(0.2, {})
+        assert not rule.breached(0.2, {"error_rate": 0.5})
+
+    def test_unknown_kind_raises(self):
+        """Test unknown rule kinds are rejected / 测试拒绝未知规则类型"""
+        with pytest.raises(ValueError):
+            AlertRule({"name": "x", "kind": "median"})
+
+
+class TestAlertEngine:
+    """Test AlertEngine class / 测试 AlertEngine 类"""
+
+    def _engine(self, collector, **kwargs):
+        rules = [{"name": "high_error_rate", "kind": "ratio", "numerator": "failed",
+                  "denominator": "requests", "min_count": 1, "threshold": 0.3}]
+        return AlertEngine(collector, rules=rules, **kwargs)
+
+    def test_dedup_until_resolved(self):
+        """Test a firing rule alerts once until it resolves / 测试触发中的规则只警报一次"""
+        collector = MetricsCollector()
+        engine = self._engine(collector, cooldown_seconds=0)
+        _record(collector, 5, success=False)
+
+        now = time.time()
+        assert len(engine.evaluate_once(now)) == 1
+        assert engine.evaluate_once(now) == []
+        assert engine.get_active_alerts()[0]["type"] == "high_error_rate"
+
+        # Recover, then breach again
+        _record(collector, 50)
+        assert engine.evaluate_once(now) == []
+        assert engine.get_active_alerts() == []
+        _record(collector, 100, success=False)
+        assert len(engine.evaluate_once(now)) == 1
+
+    def test_cooldown_suppresses_flapping(self):
+        """Test re-fires within the cooldown are suppressed / 测试冷却期内的再次触发被抑制"""
+        collector = MetricsCollector()
+        engine = self._engine(collector, cooldown_seconds=300)
+        now = time.time()
+
+        _record(collector, 5, success=False)
+        assert len(engine.evaluate_once(now)) == 1
+        _record(collector, 50)
+        engine.evaluate_once(now)
+        _record(collector, 100, success=False)
+
+        assert engine.evaluate_once(now) == []
+        assert engine.suppressed_count == 1
+
+    def test_silence(self):
+        """Test silenced rules do not alert / 测试被屏蔽的规则不警报"""
+        collector = MetricsCollector()
+        engine = self._engine(collector)
+        now = time.time()
+        engine.silence("high_error_rate", 60, now=now)
+        _record(collector, 5, success=False)
+
+        assert engine.evaluate_once(now) == []
+
+    def test_absence_rule(self):
+        """Test absence fires once traffic stops for a full window / 测试流量中断一个窗口后触发"""
+        collector = MetricsCollector()
+        engine = AlertEngine(collector, rules=[
+            {"name": "no_traffic", "kind": "absence", "window_seconds": 60}
+        ])
+        _record(collector, 3)
+        now = time.time()
+
+        assert engine.evaluate_once(now) == []
+        fired = engine.evaluate_once(now + 120)
+        assert [alert["type"] for alert in fired] == ["no_traffic"]
+
+    def test_percentile_rule(self):
+        """Test percentile rules read the latency histograms / 测试百分位规则读取延迟直方图"""
+        collector = MetricsCollector()
+        engine = AlertEngine(collector, rules=[
+            {"name": "p95", "kind": "percentile", "percentile": "p95", "threshold": 5.0}
+        ])
+        _record(collector, 20, response_time=10.0)
+
+        fired = engine.evaluate_once()
+        assert fired[0]["value"] == pytest.approx(10.0, rel=0.02)
+
+    def test_notifications_are_async(self):
+        """Test notifications are sent from a background thread / 测试通知在后台线程发送"""
+        collector = MetricsCollector()
+        sent = []
+        release = threading.Event()
+
+        def slow_handler(alert):
+            release.wait(5)
+            sent.append((alert["type"], threading.current_thread().name))
+
+        notifier = AlertNotifier([slow_handler], min_severity="warning")
+        engine = self._engine(collector, notifier=notifier)
+        _record(collector, 5, success=False)
+
+        start = time.time()
+        engine.evaluate_once()
+        assert time.time() - start < 1.0
+        assert sent == []
+
+        release.set()
+        assert notifier.flush()
+        assert sent == [("high_error_rate", "AlertNotifier")]
+        engine.stop()
+
+    def test_external_alerts_dedup_and_notify(self):
+        """Test external batches share dedup, cooldown and the notifier / 测试外部警报复用去重、冷却与通知器"""
+        sent = []
+        notifier = AlertNotifier([sent.append], min_severity="warning")
+        engine = AlertEngine(MetricsCollector(), rules=[], notifier=notifier, cooldown_seconds=300)
+        batch = [{"type": "price_anomaly", "series": s, "message": s, "severity": "warning"} for s in ("a", "b")]
+        now = time.time()
+
+        assert len(engine.submit_external(batch, "nightly", now=now)) == 2
+        assert engine.submit_external(batch, "nightly", now=now + 10) == []
+        assert {alert["type"] for alert in engine.get_active_alerts()} == {"price_anomaly:a", "price_anomaly:b"}
+
+        # "b" resolves, then re-fires inside the cooldown
+        engine.submit_external(batch[:1], "nightly", now=now + 20)
+        assert [alert["type"] for alert in engine.get_active_alerts()] == ["price_anomaly:a"]
+        assert engine.submit_external(batch, "nightly", now=now + 30) == []
+        assert engine.suppressed_count == 1
+        assert notifier.flush()
+        assert [alert["series"] for alert in sent] == ["a", "b"]
+        engine.stop()
+
+    def test_anomaly_alerts_are_emailed(self):
+        """Test anomaly alerts without a threshold are mailed / 测试无阈值的异常警报可发送邮件"""
+        table = pd.DataFrame({"series": ["sku-1"], "position": [9], "t": ["2024-05-02"], "value": [99.0],
+                              "score": [6.5], "method_count": [2]})
+        notifier = AlertNotifier([email_handler()], min_severity="warning")
+        engine = AlertEngine(MetricsCollector(), rules=[], notifier=notifier)
+
+        with patch("publishers.mail_sender.send_email") as send_email:
+            assert len(engine.submit_external(anomaly_alerts(table), "price_anomalies")) == 1
+            assert notifier.flush()
+
+        subject, body = send_email.call_args.args[:2]
+        assert subject == "[ALERT][warning] price_anomaly"
+        assert "Value: 99" in body and "Score: 6.5" in body and "Threshold" not in body
+        engine.stop()
+
+    def test_notifier_skips_low_severity(self):
+        """Test alerts below min_severity are not sent / 测试低于最低严重程度的警报不发送"""
+        notifier = AlertNotifier([lambda alert: None], min_severity="warning")
+        assert not notifier.submit({"type": "slow", "severity": "info"})
+
+    def test_timer_evaluates(self):
+        """Test the timer thread evaluates rules / 测试定时线程评估规则"""
+        collector = MetricsCollector()
+        fired = []
+        engine = self._engine(collector, on_alert=fired.append, interval=0.01)
+        _record(collector, 5, success=False)
+
+        engine.start()
+        try:
+            deadline = time.time() + 2
+            while not fired and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            engine.stop()
+        assert len(fired) == 1
+        assert not engine.running
+
+
+def test_load_alert_config_overrides(tmp_path):
+    """Test config file overrides defaults / 测试配置文件覆盖默认值"""
+    path = tmp_path / "alert_rules.json"
+    path.write_text('{"evaluation_interval_seconds": 5, "notify": {"email": true}}', encoding="utf-8")
+
+    config = load_alert_config(str(path))
+    assert config["evaluation_interval_seconds"] == 5
+    assert config["notify"]["email"] is True
+    assert config["notify"]["min_severity"] == "warning"
+    assert config["rules"]
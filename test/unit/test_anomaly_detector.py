@@ -0,0 +1,238 @@
+"""
+Tests for anomaly detection
+异常检测测试
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.advanced_analysis import AdvancedAnalyzer
+from core.monitoring import MonitoringDashboard
+from core.processing.data_lake import DataLake
+from core.processing.anomaly_detector import (
+    EWMADetector,
+    P2Quantile,
+    StreamingIQRDetector,
+    StreamingZScoreDetector,
+    anomaly_alerts,
+    create_streaming_detector,
+    detect_anomalies,
+    detect_anomalies_batch,
+    detect_anomalies_iqr,
+    detect_anomalies_moving_average,
+    iqr_anomaly_mask,
+    moving_average_anomaly_mask,
+    rolling_mean_std,
+    zscore_anomaly_mask,
+)
+
+
+def _moving_average_reference(data, window_size, threshold):
+    """Per-window loop the vectorized detector replaces / 被向量化替代的逐窗口实现"""
+    arr = np.asarray(data, dtype=float)
+    indices = []
+    for i in range(window_size, len(arr)):
+        window = arr[i - window_size:i]
+        std = np.std(window)
+        if std > 0 and abs(arr[i] - np.mean(window)) > threshold * std:
+            indices.append(i)
+    return indices
+
+
+class TestBatchDetectors:
+    """Test vectorized batch detectors / 测试向量化批量检测"""
+
+    def test_rolling_mean_std_matches_windows(self):
+        """Test cumulative-sum rolling stats / 测试累积和滚动统计"""
+        values = np.random.default_rng(0).normal(1000, 50, 200)
+        means, stds = rolling_mean_std(values, 7)
+        windows = np.lib.stride_tricks.sliding_window_view(values, 7)
+        np.testing.assert_allclose(means, windows.mean(axis=1))
+        np.testing.assert_allclose(stds, windows.std(axis=1), atol=1e-9)
+
+    def test_constant_windows_have_zero_std(self):
+        """Test constant windows are exact zeros / 测试常量窗口标准差为零"""
+        _, stds = rolling_mean_std([1e9 + 0.1] * 6 + [3.0] + [1e9 + 0.1] * 6, 3)
+        assert stds[0] == 0 and stds[-1] == 0 and stds[5] > 0
+
+    @pytest.mark.parametrize("window_size,threshold", [(3, 1.5), (5, 2.0), (12, 2.5)])
+    def test_moving_average_matches_loop(self, window_size, threshold):
+        """Test vectorized moving average equals the loop / 测试向量化移动平均与循环一致"""
+        rng = np.random.default_rng(window_size)
+        data = rng.normal(50, 5, 500)
+        data[rng.integers(0, 500, 20)] += 40
+        data[100:120] = 42.0
+        data = data.tolist()
+        assert detect_anomalies_moving_average(data, window_size, threshold) == \
+            _moving_average_reference(data, window_size, threshold)
+
+    def test_masks_are_batched_by_row(self):
+        """Test masks on a 2D array equal per-series results / 测试二维批量与逐序列一致"""
+        rng = np.random.default_rng(1)
+        series = rng.normal(20, 2, (4, 60))
+        series[1, 30] = 80
+        series[3] = 5.0
+        zscore = zscore_anomaly_mask(series)
+        iqr = iqr_anomaly_mask(series)
+        moving = moving_average_anomaly_mask(series)
+        for row in range(4):
+            data = series[row].tolist()
+            assert np.nonzero(zscore[row])[0].tolist() == detect_anomalies(data)
+            assert np.nonzero(iqr[row])[0].tolist() == detect_anomalies_iqr(data)
+            assert np.nonzero(moving[row])[0].tolist() == _moving_average_reference(data, 5, 2.0)
+        assert zscore[1, 30] and not zscore[3].any()
+
+
+def _price_series(seed=5, count=40, length=30):
+    """Random price series with spikes / 带尖峰的随机价格序列"""
+    rng = np.random.default_rng(seed)
+    series = rng.normal(100, 3, (count, length))
+    series[rng.integers(0, count, 8), rng.integers(5, length, 8)] *= 3
+    return series
+
+
+def _expected(series):
+    """Per-series union of the single-series detectors / 逐序列检测结果的并集"""
+    expected = set()
+    for row, values in enumerate(series):
+        data = values[~np.isnan(values)].tolist()
+        found = set(detect_anomalies(data)) | set(detect_anomalies_iqr(data)) | \
+            set(detect_anomalies_moving_average(data))
+        expected |= {(row, position) for position in found}
+    return expected
+
+
+class TestBatchAnomalyTable:
+    """Test batch multi-series detection / 测试批量多序列检测"""
+
+    def test_matrix_matches_single_series(self):
+        """Test 2D input equals per-series detection in every chunking / 测试二维输入与逐序列一致"""
+        series = _price_series()
+        for max_cells in (30, 300, 10 ** 6):
+            table = detect_anomalies_batch(series, max_cells=max_cells)
+            assert set(zip(table["series"], table["position"])) == _expected(series)
+        assert table["method_count"].between(1, 3).all()
+
+    def test_missing_values_are_skipped(self):
+        """Test NaN gaps are compacted per series / 测试缺失值被跳过"""
+        series = _price_series(seed=6, count=10)
+        series[2, 3:7] = np.nan
+        series[4, :] = np.nan
+        table = detect_anomalies_batch(series, series_ids=[f"sku{i}" for i in range(10)])
+        assert 4 not in set(table["position"][table["series"] == "sku4"])
+        row2 = table[table["series"] == "sku2"]
+        assert ((row2["t"] < 3) | (row2["t"] >= 7)).all()
+        expected = {(f"sku{row}", position) for row, position in _expected(series)}
+        assert set(zip(table["series"], table["position"])) == expected
+
+    def test_long_format_frame(self):
+        """Test long-format (sku, t, value) input / 测试长格式输入"""
+        series = _price_series(seed=7, count=12, length=25)
+        rows = [{"sku": f"p{row}", "t": pd.Timestamp("2024-01-01") + pd.Timedelta(days=col), "value": value}
+                for row in range(12) for col, value in enumerate(series[row])]
+        frame = pd.DataFrame(rows).sample(frac=1, random_state=0)
+        frame.loc[frame.index[:5], "value"] = None
+        table = detect_anomalies_batch(frame, max_cells=60)
+        matrix = np.full((12, 25), np.nan)
+        for row in frame.dropna().itertuples():
+            matrix[int(row.sku[1:]), (row.t - pd.Timestamp("2024-01-01")).days] = row.value
+        expected = {(f"p{row}", position) for row, position in _expected(matrix)}
+        assert set(zip(table["series"], table["position"])) == expected
+        first = table.iloc[0]
+        assert frame[(frame["sku"] == first["series"]) & (frame["t"] == first["t"])]["value"].iloc[0] == first["value"]
+
+    def test_methods_and_empty_input(self):
+        """Test method subsets, validation and empty results / 测试方法子集、校验与空结果"""
+        table = detect_anomalies_batch(_price_series(), methods=["zscore"])
+        assert list(table.columns) == ["series", "position", "t", "value", "score", "method_count", "zscore"]
+        assert table["zscore"].all()
+        assert detect_anomalies_batch(np.ones((3, 10))).empty
+        with pytest.raises(ValueError):
+            detect_anomalies_batch(np.ones((3, 10)), methods=["lof"])
+
+    def test_alerts_from_table(self):
+        """Test alerts per series and dashboard hook / 测试按序列生成警报与仪表板接入"""
+        series = np.full((3, 20), 10.0) + np.tile([0.0, 0.2], 10)
+        series[1, 15] = 50.0
+        table = detect_anomalies_batch(series, series_ids=["a", "b", "c"])
+        alerts = anomaly_alerts(table)
+        assert [alert["series"] for alert in alerts] == ["b"]
+        assert alerts[0]["t"] == 15 and alerts[0]["value"] == 50.0
+        dashboard = MonitoringDashboard()
+        assert dashboard.record_anomaly_table(table) == 1
+        assert dashboard.alerts[-1]["type"] == "price_anomaly"
+        # Still anomalous on the next run: deduplicated by the alert engine
+        assert dashboard.record_anomaly_table(table) == 0
+        assert [alert["type"] for alert in dashboard.alert_engine.get_active_alerts()] == ["price_anomaly:b"]
+
+    def test_price_anomalies_from_lake(self, tmp_path):
+        """Test price histories read from the data lake / 测试从数据湖读取价格历史"""
+        amazon = tmp_path / "amazon"
+        amazon.mkdir()
+        for day in range(1, 13):
+            price = 80.0 if day == 10 else 20.0 + (day % 2)
+            (amazon / f"amazon_products_202405{day:02d}_100000.json").write_text(json.dumps({
+                "items": [{"product_key": "asin:A1", "price": f"${price:.2f}"},
+                          {"product_key": "asin:B2", "price": "$5.00"}],
+                "scraped_at": f"2024-05-{day:02d}T10:00:00+00:00",
+            }), encoding="utf-8")
+        analyzer = AdvancedAnalyzer(output_dir=str(tmp_path / "out"))
+        table = analyzer.detect_price_anomalies(DataLake(str(tmp_path)))
+        assert set(table["series"]) == {"amazon:asin:A1"}
+        assert table.loc[table["value"] == 80.0, "t"].iloc[0] == pd.Timestamp("2024-05-10 10:00:00")
+
+
+class TestStreamingDetectors:
+    """Test streaming detectors / 测试流式检测器"""
+
+    def test_zscore_matches_batch_statistics(self):
+        """Test Welford mean/std and spike detection / 测试 Welford 统计与尖峰检测"""
+        values = np.random.default_rng(2).normal(10, 1, 300)
+        detector = StreamingZScoreDetector(threshold=4)
+        flags = [detector.update(value) for value in values]
+        assert detector.mean == pytest.approx(values.mean())
+        assert detector.std == pytest.approx(values.std())
+        assert not any(flags[:3])
+        assert detector.update(30.0)
+
+    def test_ewma_adapts_to_level_shift(self):
+        """Test EWMA flags a shift and then adapts / 测试 EWMA 检测跳变后自适应"""
+        detector = EWMADetector(alpha=0.2, threshold=3)
+        for i in range(50):
+            detector.update(1.0 + (i % 2) * 0.1)
+        assert detector.update(5.0)
+        for _ in range(60):
+            detector.update(5.0 + 0.1 * (_ % 2))
+        assert not detector.update(5.05)
+        with pytest.raises(ValueError):
+            EWMADetector(alpha=0)
+
+    def test_p2_quantile_accuracy(self):
+        """Test P-square estimates are close to exact quantiles / 测试 P² 分位数估计精度"""
+        values = np.random.default_rng(3).exponential(5, 5000)
+        estimators = {q: P2Quantile(q) for q in (0.25, 0.5, 0.75)}
+        for value in values:
+            for estimator in estimators.values():
+                estimator.update(value)
+        for q, estimator in estimators.items():
+            assert estimator.value == pytest.approx(np.quantile(values, q), rel=0.05)
+        assert P2Quantile(0.5).value is None
+
+    def test_streaming_iqr(self):
+        """Test streaming IQR bounds / 测试流式 IQR 边界"""
+        detector = StreamingIQRDetector()
+        for value in np.random.default_rng(4).uniform(0, 10, 200):
+            detector.update(value)
+        lower, upper = detector.bounds()
+        assert lower < 0 and 10 < upper < 30
+        assert detector.update(40.0)
+        assert not detector.update(5.0)
+
+    def test_factory(self):
+        """Test detector factory / 测试检测器工厂"""
+        assert isinstance(create_streaming_detector("zscore", threshold=3), StreamingZScoreDetector)
+        with pytest.raises(ValueError):
+            create_streaming_detector("unknown")
@@ -0,0 +1,137 @@
+"""
+Tests for data lake query layer
+数据湖查询层测试
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from core.advanced_analysis import AdvancedAnalyzer
+from core.processing.data_lake import DataLake
+from core.smart_analysis import SmartAnalysisEngine
+
+
+@pytest.fixture
+def lake(tmp_path):
+    """Two amazon snapshots and one ebay NDJSON day partition / 两个快照与一个 NDJSON 分区"""
+    amazon = tmp_path / "amazon"
+    ebay = tmp_path / "ebay"
+    amazon.mkdir()
+    ebay.mkdir()
+    (amazon / "amazon_products_20240501_100000.json").write_text(json.dumps({
+        "platform": "amazon",
+        "items": [
+            {"brand": "Acme", "title": "Lamp", "price": "$10.00", "rating": "4.5", "review_count": "10"},
+            {"brand": "Bolt", "title": "Desk", "price": "$30.00", "rating": "3.5", "review_count": "5"},
+        ],
+        "scraped_at": "2024-05-01T10:00:00+00:00",
+    }), encoding="utf-8")
+    (amazon / "amazon_products_20240601_100000.json").write_text(json.dumps({
+        "platform": "amazon",
+        "items": [{"brand": "Acme", "title": "Chair", "price": "$20.00"}],
+        "scraped_at": "2024-06-01T10:00:00+00:00",
+    }), encoding="utf-8")
+    rows = [
+        {"brand": "", "title": "Cup", "price": "5", "scraped_at": "2024-05-02T08:00:00"},
+        {"brand": "Acme", "title": "Pen", "price": "n/a", "scraped_at": "2024-05-02T09:00:00"},
+    ]
+    (ebay / "day=2024-05-02.ndjson").write_text("\n".join(json.dumps(row) for row in rows), encoding="utf-8")
+    (ebay / "notes.txt").write_text("ignored", encoding="utf-8")
+    return DataLake(str(tmp_path), chunk_size=1)
+
+
+class TestDataLake:
+    """Test DataLake class / 测试 DataLake 类"""
+
+    def test_partition_pruning(self, lake):
+        """Test files outside the time range are not opened / 测试时间范围外的文件被剪枝"""
+        assert lake.platforms() == ["amazon", "ebay"]
+        paths = [partition.path for partition in lake.partitions(since="2024-05-20")]
+        assert len(paths) == 1 and paths[0].endswith("20240601_100000.json")
+        assert [p.platform for p in lake.partitions(platforms=["ebay"])] == ["ebay"]
+
+    def test_scan_columns_and_filters(self, lake):
+        """Test column pushdown and row predicates / 测试列下推与行过滤"""
+        chunks = list(lake.scan(columns=["title", "price_numeric"], filters=[("price_numeric", ">", 15)]))
+        assert all(list(chunk.columns) == ["title", "price_numeric"] for chunk in chunks)
+        assert sorted(title for chunk in chunks for title in chunk["title"]) == ["Chair", "Desk"]
+
+        titles = [t for chunk in lake.scan(columns=["title"], filters=[("platform", "==", "ebay")])
+                  for t in chunk["title"]]
+        assert titles == ["Cup", "Pen"]
+
+    def test_exact_time_filter(self, lake):
+        """Test rows are filtered on their own scrape time / 测试按行采集时间过滤"""
+        titles = [t for chunk in lake.scan(columns=["title"], since="2024-05-02T08:30:00", until="2024-05-31")
+                  for t in chunk["title"]]
+        assert titles == ["Pen"]
+
+    def test_aggregate_combines_chunks(self, lake):
+        """Test per-chunk partials combine to exact aggregates / 测试分块聚合结果正确"""
+        by_brand = lake.aggregate("brand").set_index("brand")
+        assert by_brand.loc["Acme", "products"] == 3
+        assert by_brand.loc["Acme", "price_count"] == 2
+        assert by_brand.loc["Acme", "price_mean"] == pytest.approx(15.0)
+        assert by_brand.loc["Acme", "price_std"] == pytest.approx(np.std([10.0, 20.0], ddof=1), abs=0.01)
+        assert by_brand.loc["Unknown", "products"] == 1
+        assert by_brand["market_share_percent"].sum() == pytest.approx(100.0)
+
+        overall = lake.aggregate().iloc[0]
+        assert overall["products"] == 5
+        assert overall["price_min"] == 5.0 and overall["price_max"] == 30.0
+
+    def test_daily_trends(self, lake):
+        """Test aggregates per scrape day / 测试按天聚合"""
+        trends = lake.daily_trends()
+        assert trends["day"].tolist() == ["2024-05-01", "2024-05-02", "2024-06-01"]
+        assert trends["products"].tolist() == [2, 2, 1]
+
+    def test_column_and_read(self, lake):
+        """Test single-column reads and materialization / 测试单列读取与物化"""
+        assert sorted(lake.column("price", platforms=["amazon"])) == [10.0, 20.0, 30.0]
+        frame = lake.read(columns=["brand", "price_numeric"], platforms=["amazon"])
+        assert len(frame) == 3
+
+    def test_summarize_single_scan(self, lake, monkeypatch):
+        """Test several aggregates from one pass over the partitions / 测试一次扫描得到多个聚合"""
+        opened = []
+        read_partition = DataLake._read_partition
+        monkeypatch.setattr(DataLake, "_read_partition",
+                            lambda self, partition, *args, **kwargs: opened.append(partition.path)
+                            or read_partition(self, partition, *args, **kwargs))
+        summary = lake.summarize({"brands": "brand", "daily": "day"}, values=["price"])
+        assert len(opened) == len(set(opened)) == 3
+        assert summary["overall"].equals(lake.aggregate())
+        assert summary["brands"].equals(lake.aggregate("brand"))
+        assert summary["daily"].equals(lake.daily_trends())
+        assert sorted(summary["price"]) == sorted(lake.column("price"))
+
+    def test_empty_lake(self, tmp_path):
+        """Test an empty lake returns empty results / 测试空数据湖"""
+        lake = DataLake(str(tmp_path / "missing"))
+        assert lake.platforms() == []
+        assert lake.aggregate("brand").empty
+        assert lake.column("price").size == 0
+
+
+class TestHistoryAnalysis:
+    """Test analyzers over the lake / 测试基于数据湖的分析"""
+
+    def test_advanced_analyzer_history(self, lake, tmp_path):
+        """Test AdvancedAnalyzer.analyze_history / 测试历史分析"""
+        result = AdvancedAnalyzer(output_dir=str(tmp_path / "out")).analyze_history(lake)
+        assert result["total_products"] == 5
+        assert result["competitor_matrix"].iloc[0]["brand"] == "Acme"
+        assert result["price_distribution"]["count"] == 4
+        assert len(result["daily_trends"]) == 3
+
+    def test_smart_analysis_history(self, lake):
+        """Test SmartAnalysisEngine.analyze_history / 测试智能分析历史数据"""
+        analysis = SmartAnalysisEngine().analyze_history(lake, platforms=["amazon"])
+        stats = analysis["basic_stats"]
+        assert stats["total_products"] == 3
+        assert stats["price_range"]["median"] == 20.0
+        assert stats["review_stats"]["total"] == 15
+        assert [brand["brand"] for brand in analysis["competition_analysis"]["main_brands"]] == ["Acme", "Bolt"]
@@ -6,7 +6,8 @@ Tests for Data Validation Module
 import pytest
 from core.data_validation import (
     ValidationRule, DataValidator, DataDeduplicator, DataQualityChecker,
-    create_amazon_validator, create_amazon_deduplicator
+    StreamingQualityChecker, create_amazon_validator, create_amazon_deduplicator,
+    create_scrape_quality_checker
 )
 
 
@@ -287,6 +288,89 @@ class TestDataQualityChecker:
         assert "invalid_data" in report
 
 
+class TestStreamingQualityChecker:
+    """Test StreamingQualityChecker class / 测试 StreamingQualityChecker 类"""
+    
+    def _make_checker(self, **kwargs):
+        validator = DataValidator()
+        validator.add_rule(ValidationRule("id", "type", {"type": "string"}, required=True))
+        validator.add_rule(ValidationRule("price", "type", {"type": "number"}, required=False))
+        return StreamingQualityChecker(validator, DataDeduplicator(hash_fields=["id"]), **kwargs)
+    
+    def test_incremental_counters(self):
+        """Test counters match batch check / 测试增量计数与批量检查一致"""
+        checker = self._make_checker()
+        data_list = [
+            {"id": "1", "price": 10},
+            {"id": "2"},
+            {"id": "1", "price": 12},
+            {"price": "bad"}
+        ]
+        
+        accepted = checker.add_batch(data_list[:2]) + checker.add_batch(data_list[2:])
+        metrics = checker.get_metrics()
+        
+        assert [d["id"] for d in accepted] == ["1", "2"]
+        assert metrics["input_count"] == 4
+        assert metrics["valid_count"] == 3
+        assert metrics["invalid_count"] == 1
+        assert metrics["unique_count"] == 2
+        assert metrics["duplicate_count"] == 1
+        assert metrics["field_completeness"] == {"id": 0.75, "price": 0.75}
+        assert metrics["rule_failure_rates"] == {"id:type": 0.25, "price:type": 0.25}
+    
+    def test_publishes_to_dashboard(self):
+        """Test live metrics are published / 测试实时指标发布到仪表板"""
+        from core.monitoring import MonitoringDashboard
+        dashboard = MonitoringDashboard()
+        checker = self._make_checker(source="amazon", dashboard=dashboard, publish_every=2)
+        
+        checker.add({"id": "1"})
+        assert "amazon" not in dashboard.quality_stats
+        
+        checker.add({"id": "2"})
+        assert dashboard.quality_stats["amazon"]["input_count"] == 2
+        
+        for _ in range(20):
+            checker.add({"price": 1})
+        checker.finish()
+        
+        assert dashboard.quality_stats["amazon"]["input_count"] == 22
+        assert any(alert["type"] == "high_invalid_rate" for alert in dashboard.alerts)
+        assert "quality_stats" in dashboard.get_dashboard_data()
+    
+    def test_reset(self):
+        """Test reset clears counters / 测试重置清除计数器"""
+        checker = self._make_checker()
+        checker.add({"id": "1"})
+        
+        checker.reset()
+        
+        assert checker.get_metrics()["input_count"] == 0
+    
+    def test_scrape_quality_checker(self):
+        """Test the crawl checker validates per platform and publishes periodically / 测试采集检查器按平台校验并周期发布"""
+        from core.monitoring import MonitoringDashboard
+        dashboard = MonitoringDashboard()
+        products = [
+            {"product_key": "ebay:1", "title": "Lamp", "price": "$10"},
+            {"product_key": "ebay:1", "title": "Lamp", "price": "$10"},
+            {"product_key": "ebay:2", "title": ""},
+        ]
+        checker = create_scrape_quality_checker("ebay", dashboard=dashboard, publish_every=2)
+        
+        checker.add_batch(products)
+        assert dashboard.quality_stats["ebay"]["input_count"] == 2
+        metrics = checker.finish()
+        
+        assert (metrics["valid_count"], metrics["duplicate_count"], metrics["unique_count"]) == (2, 1, 1)
+        assert dashboard.quality_stats["ebay"]["input_count"] == 3
+        amazon = create_scrape_quality_checker("amazon", dashboard=dashboard)
+        amazon.add({"asin": "bad", "title": "x"})
+        assert amazon.invalid_count == 1
+        assert amazon.publish_every == 100
+
+
 class TestPredefinedValidators:
     """Test predefined validators / 测试预定义验证器"""
     
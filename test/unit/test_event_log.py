@@ -0,0 +1,110 @@
+"""
+结构化事件日志测试
+Event Log Test Module
+"""
+import os
+import json
+import pytest
+
+from scrapers.event_log import EventLogger, EventLogReader
+from core.auto_crawler_iter.metrics_collector import MetricsCollector
+
+
+class TestEventLogReader:
+    """增量读取测试 / Incremental reader tests"""
+
+    def test_reads_only_new_events(self, tmp_path):
+        """测试只读取新事件 / Test only new events are returned"""
+        path = str(tmp_path / "events.ndjson")
+        writer = EventLogger(path)
+        reader = EventLogReader(path)
+
+        writer.emit("fetch", "ebay", secs=1.0)
+        assert [e["type"] for e in reader.read_new()] == ["fetch"]
+        assert reader.read_new() == []
+
+        writer.emit("save", "ebay", items=3)
+        events = reader.read_new()
+        assert len(events) == 1 and events[0]["items"] == 3
+        writer.close()
+
+    def test_partial_line_is_deferred(self, tmp_path):
+        """测试半行延后读取 / Test partial line is read later"""
+        path = tmp_path / "events.ndjson"
+        path.write_text('{"type":"captcha"}\n{"type":"sa', encoding="utf-8")
+        reader = EventLogReader(str(path))
+
+        assert len(reader.read_new()) == 1
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('ve","items":1}\n')
+        assert reader.read_new() == [{"type": "save", "items": 1}]
+
+    def test_survives_rotation(self, tmp_path):
+        """测试轮转后不丢事件 / Test no events lost across rotation"""
+        path = str(tmp_path / "events.ndjson")
+        writer = EventLogger(path, max_bytes=200, backup_count=3)
+        reader = EventLogReader(path)
+
+        seen = []
+        for i in range(10):
+            writer.emit("save", "ebay", items=i)
+            seen.extend(event["items"] for event in reader.read_new())
+        writer.close()
+
+        assert os.path.exists(f"{path}.1")
+        assert seen == list(range(10))
+
+    def test_writers_share_rotation(self, tmp_path):
+        """测试多个写入器（进程）共享轮转 / Test several writers (processes) rotate once each time"""
+        path = str(tmp_path / "events.ndjson")
+        writers = [EventLogger(path, max_bytes=200, backup_count=20) for _ in range(2)]
+        reader = EventLogReader(path)
+
+        seen = []
+        for i in range(20):
+            writers[i % 2].emit("save", "ebay", items=i)
+            seen.extend(event["items"] for event in reader.read_new())
+        for writer in writers:
+            writer.close()
+
+        assert seen == list(range(20))
+        assert os.path.getsize(path) < 200 + 100
+
+
+class TestMetricsCollector:
+    """事件驱动的迭代指标测试 / Event-driven iteration metrics tests"""
+
+    def test_aggregates_and_resumes(self, tmp_path):
+        """测试累计并在新实例中续读 / Test aggregates persist across instances"""
+        path = str(tmp_path / "events.ndjson")
+        writer = EventLogger(path)
+        writer.emit("fetch", "amazon", secs=1.0)
+        writer.emit("fetch", "amazon", secs=3.0)
+        writer.emit("captcha", "amazon")
+        writer.emit("error", "amazon", kind="request", message="boom")
+        writer.emit("save", "amazon", items=0)
+        writer.emit("save", "amazon", items=10)
+
+        metrics = MetricsCollector(event_log=path).collect()
+        assert metrics["avg_list_time"] == 2.0
+        assert metrics["captcha_hits"] == 1
+        assert metrics["errors_total"] == 1
+        assert metrics["items_total"] == 10
+        assert metrics["pages_zero"] == 1
+        assert metrics["files_scanned"] == 2
+        assert metrics["recent_errors"] == ["[amazon] request: boom"]
+
+        writer.emit("save", "amazon", items=5)
+        writer.close()
+        resumed = MetricsCollector(event_log=path)
+        assert resumed.reader.offset > 0
+        metrics = resumed.collect()
+        assert metrics["items_total"] == 15
+        assert metrics["errors_total"] == 1
+
+        with open(resumed.state_file, encoding="utf-8") as f:
+            assert json.load(f)["reader"]["offset"] == os.path.getsize(path)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
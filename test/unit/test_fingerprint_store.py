@@ -0,0 +1,127 @@
+"""
+列表页指纹存储测试
+Fingerprint Store Test Module
+"""
+import copy
+import pytest
+from unittest.mock import patch
+
+from core.crawl.fingerprint_store import FingerprintStore, card_fingerprint
+from scrapers.amazon_scraper import AmazonScraper
+from scrapers.multi_platform_scraper import FordealScraper
+
+
+LIST_PAGE = [
+    {"asin": "B000000001", "title": "Laptop A", "price": "$999", "rating": "4.5", "review_count": "100"},
+    {"asin": "B000000002", "title": "Laptop B", "price": "$799", "rating": "4.1", "review_count": "50"},
+]
+
+
+class TestCardFingerprint:
+    """指纹计算测试 / Fingerprint calculation tests"""
+
+    def test_ignores_whitespace_and_other_fields(self):
+        """测试忽略空白和非卡片字段 / Test whitespace and non-card fields are ignored"""
+        a = {"title": " Laptop  A ", "price": "$999", "scraped_at": "t1"}
+        b = {"title": "Laptop A", "price": "$999", "scraped_at": "t2"}
+        assert card_fingerprint(a) == card_fingerprint(b)
+
+    def test_changes_with_price(self):
+        """测试价格变化导致指纹变化 / Test price change changes fingerprint"""
+        a = {"title": "Laptop A", "price": "$999"}
+        b = {"title": "Laptop A", "price": "$949"}
+        assert card_fingerprint(a) != card_fingerprint(b)
+
+
+class TestFingerprintStore:
+    """指纹存储测试 / Fingerprint store tests"""
+
+    def test_split_and_persist(self, tmp_path):
+        """测试划分与持久化 / Test split and persistence"""
+        path = str(tmp_path / "fp.json")
+        store = FingerprintStore(path)
+        products = copy.deepcopy(LIST_PAGE)
+
+        changed, unchanged = store.split(products, lambda p: p["asin"])
+        assert len(changed) == 2 and unchanged == []
+
+        for product, key, fingerprint in changed:
+            store.update(key, fingerprint, {"brand": "Acme"})
+        store.save()
+
+        reloaded = FingerprintStore(path)
+        products = copy.deepcopy(LIST_PAGE)
+        products[1]["price"] = "$749"
+        changed, unchanged = reloaded.split(products, lambda p: p["asin"])
+
+        assert [key for _, key, _ in changed] == ["B000000002"]
+        assert unchanged[0]["brand"] == "Acme"
+        assert unchanged[0]["price"] == "$999"
+
+
+class TestIncrementalRun:
+    """增量采集流程测试 / Incremental run tests"""
+
+    def test_detail_fetched_only_for_changed(self, tmp_path):
+        """测试只为变化的商品采集详情 / Test detail only fetched for changed products"""
+        scraper = AmazonScraper(data_dir=str(tmp_path))
+
+        def run_once(list_page):
+            with patch.object(scraper, "scrape_list_page", return_value=copy.deepcopy(list_page)), \
+                 patch.object(scraper, "scrape_product_detail",
+                              side_effect=lambda asin: {"brand": f"brand-{asin}"}) as detail, \
+                 patch.object(scraper, "_wait"), \
+                 patch.object(scraper, "save_data"):
+                products = scraper.run("https://www.amazon.com/s?k=laptop", deep_detail=True, incremental=True)
+            return products, [call.args[0] for call in detail.call_args_list]
+
+        _, fetched = run_once(LIST_PAGE)
+        assert fetched == ["B000000001", "B000000002"]
+
+        products, fetched = run_once(LIST_PAGE)
+        assert fetched == []
+        assert products[0]["brand"] == "brand-B000000001"
+
+        changed_page = copy.deepcopy(LIST_PAGE)
+        changed_page[0]["review_count"] = "101"
+        _, fetched = run_once(changed_page)
+        assert fetched == ["B000000001"]
+
+    def test_unsupported_platform_skips_detail(self, tmp_path):
+        """测试无详情解析的平台忽略增量并告警 / Test platforms without a detail parser warn and skip"""
+        scraper = FordealScraper()
+        scraper.data_dir = str(tmp_path)
+        list_page = [{"id": "1", "title": "Lamp", "url": "/p/1"}]
+
+        assert not scraper.supports_detail()
+        with patch.object(scraper, "scrape_list_page", return_value=list_page), \
+             patch.object(scraper, "_wait") as wait, \
+             patch.object(scraper, "save_data", return_value=""), \
+             patch("scrapers.base_scraper.log_warning") as warning:
+            scraper.run("https://www.fordeal.com/search?q=lamp", deep_detail=True, incremental=True)
+
+        wait.assert_not_called()
+        assert "not supported" in warning.call_args_list[0].args[0]
+        assert not (tmp_path / ".list_fingerprints.json").exists()
+
+
+class TestRunQuality:
+    """采集质量统计测试 / Crawl quality tests"""
+
+    def test_counters_run_across_pages(self, tmp_path):
+        """测试质量计数在多页间累计 / Test quality counters accumulate across pages"""
+        from core.monitoring import get_monitoring_dashboard
+        scraper = AmazonScraper(data_dir=str(tmp_path))
+
+        for page in (LIST_PAGE, LIST_PAGE[:1]):
+            with patch.object(scraper, "scrape_list_page", return_value=copy.deepcopy(page)), \
+                 patch.object(scraper, "save_data", return_value=""):
+                scraper.run("https://www.amazon.com/s?k=laptop")
+
+        checker = scraper.quality_checker
+        assert (checker.input_count, checker.duplicate_count) == (3, 1)
+        assert get_monitoring_dashboard().quality_stats["amazon"]["input_count"] == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,124 @@
+"""
+Tests for keyword engine
+关键词引擎测试
+"""
+
+import pytest
+
+from core.processing.keywords import KeywordEngine, TokenCache, ngrams, tokenize
+
+
+TITLES = [
+    "Wireless Gaming Mouse",
+    "Wireless Gaming Keyboard",
+    "Wireless Gaming Mouse",
+    "USB Cable for the Mouse",
+]
+
+
+class TestTokenize:
+    """Test tokenizer helpers / 测试分词函数"""
+
+    def test_basic_tokenize(self):
+        """Test basic splitting strips punctuation and short words / 测试基础分词"""
+        assert tokenize("Wireless, Gaming-Mouse for PC!", use_jieba=False) == ("wireless", "gamingmouse", "for")
+
+    def test_ngrams(self):
+        """Test n-gram generation / 测试 n 元词组"""
+        assert ngrams(["a", "b", "c"], 2) == ["a b", "b c"]
+        assert ngrams(["a"], 2) == []
+
+
+class TestKeywordEngine:
+    """Test KeywordEngine class / 测试 KeywordEngine 类"""
+
+    def test_counts_and_documents(self):
+        """Test term and document counts with repeated titles / 测试重复标题的词频与文档频率"""
+        corpus = KeywordEngine(use_jieba=False).build(TITLES)
+
+        assert corpus.documents == 4
+        assert corpus.term_counts["wireless"] == 3
+        assert corpus.term_counts["mouse"] == 3
+        assert "the" not in corpus.term_counts
+        assert corpus.doc_counts["usb"] == 1
+        assert corpus.top_terms(1) == {"wireless": 3}
+
+    def test_ngrams_and_tfidf(self):
+        """Test bigram counts and TF-IDF ranking / 测试二元词组与 TF-IDF"""
+        corpus = KeywordEngine(use_jieba=False).build(TITLES)
+
+        assert corpus.top_ngrams(2, 1) == {"wireless gaming": 3}
+        # "cable for the mouse" drops stopwords before forming bigrams
+        assert corpus.ngram_counts(2)["cable mouse"] == 1
+
+        scores = corpus.tfidf(top_n=10)
+        assert scores["usb"] < scores["wireless"]
+        assert scores["keyboard"] == scores["usb"]
+
+    def test_token_cache_persisted(self, tmp_path):
+        """Test unchanged titles are not re-tokenized across runs / 测试跨运行复用分词缓存"""
+        path = str(tmp_path / "tokens.json")
+        engine = KeywordEngine(cache_path=path, use_jieba=False)
+        engine.build(TITLES)
+        assert engine.cache.misses == 3
+        assert engine.save_cache()
+
+        reloaded = KeywordEngine(cache_path=path, use_jieba=False)
+        corpus = reloaded.build(TITLES + ["New Mouse Pad"])
+        assert reloaded.cache.hits == 3
+        assert reloaded.cache.misses == 1
+        assert corpus.term_counts["mouse"] == 4
+
+    def test_cache_evicts_least_recently_used(self, tmp_path):
+        """Test trimming keeps recently hit entries / 测试裁剪保留最近命中的条目"""
+        path = tmp_path / "tokens.json"
+        cache = TokenCache(str(path), max_entries=2)
+        cache.put("a", ("x",))
+        cache.put("b", ("y",))
+        assert cache.get("a") == ("x",)
+        cache.put("c", ("z",))
+        assert cache.save()
+
+        reloaded = TokenCache(str(path))
+        assert reloaded.load()
+        assert list(reloaded.entries) == ["a", "c"]
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_cache_keyed_by_mode(self):
+        """Test tokens from another tokenizer mode are not reused / 测试不同分词模式不共用缓存"""
+        assert TokenCache.key("Mouse", "basic") != TokenCache.key("Mouse", "jieba")
+
+    def test_stopwords_apply_to_cached_tokens(self):
+        """Test added stopwords filter cached tokens / 测试新增停用词作用于缓存分词"""
+        engine = KeywordEngine(use_jieba=False)
+        engine.build(TITLES)
+        engine.add_stopwords(["Gaming"])
+        assert "gaming" not in engine.build(TITLES).term_counts
+
+    def test_parallel_matches_serial(self):
+        """Test chunked pool tokenization matches in-process counts / 测试并行分词结果一致"""
+        titles = [f"wireless mouse model{i % 40}" for i in range(200)]
+        parallel = KeywordEngine(use_jieba=False, workers=2, parallel_min_titles=10, chunk_size=10).build(titles)
+        serial = KeywordEngine(use_jieba=False, workers=1).build(titles)
+
+        assert parallel.term_counts == serial.term_counts
+        assert parallel.doc_counts == serial.doc_counts
+
+
+def test_analyzer_keyword_options(tmp_path):
+    """Test AdvancedAnalyzer n-gram and TF-IDF options / 测试分析器的词组与 TF-IDF 选项"""
+    from core.advanced_analysis import AdvancedAnalyzer
+
+    analyzer = AdvancedAnalyzer(output_dir=str(tmp_path))
+    analyzer._keyword_engine = KeywordEngine(use_jieba=False)
+    products = [{"title": title} for title in TITLES]
+
+    keywords = analyzer.analyze_keywords(products, top_n=20, save_wordcloud=False, ngram_range=(1, 2))
+    assert keywords["wireless gaming"] == 3
+    assert keywords["mouse"] == 3
+
+    scores = analyzer.analyze_keywords(products, save_wordcloud=False, weighting="tfidf")
+    assert isinstance(scores["usb"], float)
+
+    with pytest.raises(ValueError):
+        analyzer.analyze_keywords(products, weighting="bm25")
@@ -0,0 +1,129 @@
+"""
+Tests for Latency Histogram Module
+延迟直方图模块测试
+"""
+
+import random
+import threading
+import pytest
+
+from core.latency_histogram import LatencyHistogram, SlidingWindowHistogram, percentile_label
+from core.monitoring import MetricsCollector
+
+
+class TestLatencyHistogram:
+    """Test LatencyHistogram class / 测试 LatencyHistogram 类"""
+
+    def test_percentile_label(self):
+        """Test percentile names / 测试百分位名称"""
+        assert percentile_label(50) == "p50"
+        assert percentile_label(99.9) == "p999"
+
+    def test_percentiles_within_relative_error(self):
+        """Test percentiles match exact values within error / 测试百分位误差"""
+        rng = random.Random(7)
+        values = [rng.lognormvariate(-1, 1) for _ in range(20000)]
+        hist = LatencyHistogram(relative_error=0.01)
+        for value in values:
+            hist.record(value)
+
+        ordered = sorted(values)
+        for p in (50, 90, 99, 99.9):
+            exact = ordered[int(round(p / 100 * len(ordered))) - 1]
+            assert hist.percentile(p) == pytest.approx(exact, rel=0.03)
+
+    def test_percentiles_matches_percentile(self):
+        """Test batch percentiles equal single lookups / 测试批量与单次一致"""
+        hist = LatencyHistogram()
+        for i in range(1, 1001):
+            hist.record(i / 1000)
+
+        result = hist.percentiles([50, 99])
+        assert result["p50"] == hist.percentile(50)
+        assert result["p99"] == hist.percentile(99)
+        assert hist.percentile(100) == 1.0
+
+    def test_merge(self):
+        """Test merging histograms / 测试合并直方图"""
+        a, b = LatencyHistogram(), LatencyHistogram()
+        a.record(0.1, count=3)
+        b.record(2.0)
+
+        a.merge(b)
+
+        assert a.count == 4
+        assert a.max == 2.0
+        assert a.mean() == pytest.approx(0.575)
+        with pytest.raises(ValueError):
+            a.merge(LatencyHistogram(relative_error=0.05))
+
+    def test_empty(self):
+        """Test empty histogram / 测试空直方图"""
+        assert LatencyHistogram().percentiles([50])["p50"] == 0.0
+
+
+class TestSlidingWindowHistogram:
+    """Test SlidingWindowHistogram class / 测试 SlidingWindowHistogram 类"""
+
+    def test_window_drops_old_slots(self):
+        """Test values leave the window / 测试过期数据移出窗口"""
+        hist = SlidingWindowHistogram(slot_seconds=10, num_slots=6)
+        hist.record(5.0, now=1000)
+        hist.record(0.1, now=1055)
+
+        assert hist.window(60, now=1055).count == 2
+        assert hist.window(30, now=1055).count == 1
+        assert hist.window(30, now=1055).percentile(100) == 0.1
+        assert hist.window(None).count == 2
+
+    def test_ring_reuses_slots(self):
+        """Test a wrapped slot is replaced / 测试环形槽复用"""
+        hist = SlidingWindowHistogram(slot_seconds=1, num_slots=2)
+        hist.record(1.0, now=0)
+        hist.record(2.0, now=2)
+
+        assert hist.window(2, now=2).count == 1
+
+
+class TestCollectorLatency:
+    """Test MetricsCollector latency percentiles / 测试收集器延迟百分位"""
+
+    def test_percentiles_per_platform_and_endpoint(self):
+        """Test filtering by platform and endpoint type / 测试按平台和端点过滤"""
+        collector = MetricsCollector()
+        for _ in range(99):
+            collector.record_request("amazon", True, 0.2, endpoint_type="list")
+        collector.record_request("amazon", True, 5.0, endpoint_type="detail")
+        collector.record_request("ebay", True, 1.0)
+
+        amazon = collector.get_latency_percentiles("amazon")
+        assert amazon["count"] == 100
+        assert amazon["p50"] == pytest.approx(0.2, rel=0.02)
+        assert amazon["p999"] == pytest.approx(5.0, rel=0.02)
+        assert collector.get_latency_percentiles("amazon", "detail")["count"] == 1
+        assert collector.get_latency_percentiles()["count"] == 101
+        assert set(collector.get_latency_breakdown()) == {"amazon/list", "amazon/detail", "ebay/page"}
+
+        collector.reset()
+        assert collector.get_latency_percentiles()["count"] == 0
+
+    def test_concurrent_recording(self):
+        """Test recording from many threads / 测试多线程记录"""
+        collector = MetricsCollector()
+
+        def worker(platform):
+            for _ in range(500):
+                collector.record_request(platform, True, 0.5)
+
+        threads = [threading.Thread(target=worker, args=(p,)) for p in ("amazon", "ebay") * 4]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert collector.get_latency_percentiles()["count"] == 4000
+        assert collector.total_requests == 4000
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
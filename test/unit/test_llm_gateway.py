@@ -0,0 +1,187 @@
+"""
+Tests for LLM gateway
+大模型网关测试
+"""
+
+import asyncio
+import json
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pytest
+
+import core.llm_gateway as llm_gateway
+from core.llm_gateway import LLMGateway, ResponseCache, StubChatModel, cache_key
+from core.processing.recommender import FALLBACK_RECOMMENDATION, ai_recommendation
+from core.smart_analysis import SmartAnalysisEngine
+
+
+def _messages(text="Summarize the market"):
+    return [{"role": "system", "content": "You are an analyst."}, {"role": "user", "content": text}]
+
+
+class TestResponseCache:
+    """Test ResponseCache class / 测试 ResponseCache 类"""
+
+    def test_key_normalizes_whitespace(self):
+        """Test formatting-only prompt changes share a key / 测试仅格式不同的提示词共享缓存键"""
+        key = cache_key("m", _messages("Summarize  the\n market "), max_tokens=10)
+        assert key == cache_key("m", _messages("Summarize the market"), max_tokens=10)
+        assert key != cache_key("other", _messages("Summarize the market"), max_tokens=10)
+        assert key != cache_key("m", _messages("Summarize the market"), max_tokens=20)
+
+    def test_ttl_and_lru_eviction(self):
+        """Test expiry and least-recently-used eviction / 测试过期与 LRU 淘汰"""
+        cache = ResponseCache(path=None, ttl_seconds=10, max_entries=2)
+        cache.put("a", "A", "m", now=0)
+        cache.put("b", "B", "m", now=0)
+        assert cache.get("a", now=5)["text"] == "A"
+        cache.put("c", "C", "m", now=5)
+        assert cache.get("b", now=5) is None
+        assert cache.get("a", now=11) is None
+        assert cache.get("c", now=11)["text"] == "C"
+        assert (cache.hits, cache.misses) == (2, 2)
+
+    def test_save_load_round_trip(self, tmp_path):
+        """Test persistence / 测试持久化"""
+        path = str(tmp_path / "cache" / "llm.json")
+        cache = ResponseCache(path=path)
+        cache.put("a", "A", "m")
+        assert cache.save()
+        restored = ResponseCache(path=path)
+        assert restored.load()
+        assert restored.get("a")["text"] == "A"
+        assert not ResponseCache(path=path, ttl_seconds=-1).get("a")
+
+    def test_concurrent_saves_merge(self, tmp_path):
+        """Test threads and processes sharing the file keep every entry / 测试共享文件的并发保存不丢条目"""
+        path = str(tmp_path / "llm.json")
+        first, second = ResponseCache(path=path), ResponseCache(path=path)
+
+        def fill(cache, prefix):
+            for i in range(50):
+                cache.put(f"{prefix}{i}", "T", "m")
+                assert cache.save()
+
+        threads = [threading.Thread(target=fill, args=(cache, prefix))
+                   for cache, prefix in ((first, "a"), (first, "b"), (second, "c"))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        restored = ResponseCache(path=path)
+        assert restored.load()
+        assert len(restored) == 150
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_maybe_save_is_debounced(self, tmp_path):
+        """Test saves within the interval are deferred until flush / 测试间隔内的保存延后到 flush"""
+        path = tmp_path / "llm.json"
+        cache = ResponseCache(path=str(path), save_interval=3600)
+        cache.put("a", "A", "m")
+        assert cache.maybe_save()
+        cache.put("b", "B", "m")
+        assert not cache.maybe_save()
+        assert "b" not in json.loads(path.read_text(encoding="utf-8"))["entries"]
+        assert cache.flush()
+        assert "b" in json.loads(path.read_text(encoding="utf-8"))["entries"]
+
+
+class TestLLMGateway:
+    """Test LLMGateway class / 测试 LLMGateway 类"""
+
+    def test_repeated_prompt_is_cached(self, tmp_path):
+        """Test second identical request is served from cache / 测试重复请求命中缓存"""
+        stub = StubChatModel()
+        gateway = LLMGateway(stub, ResponseCache(path=str(tmp_path / "llm.json")))
+        first = gateway.complete(_messages(), model="m", max_tokens=50)
+        second = gateway.complete(_messages(), model="m", max_tokens=50)
+        assert (first["cached"], second["cached"]) == (False, True)
+        assert first["text"] == second["text"] == "[m] Summarize the market"
+        assert stub.calls == 1
+        assert gateway.complete(_messages(), model="m", use_cache=False)["cached"] is False
+        assert stub.calls == 2
+        assert (tmp_path / "llm.json").exists()
+        gateway.shutdown()
+
+    def test_concurrent_requests_are_coalesced(self):
+        """Test identical in-flight requests share one backend call / 测试进行中的相同请求被合并"""
+        stub = StubChatModel(delay=0.2)
+        gateway = LLMGateway(stub)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(gateway.complete(_messages(), model="m")))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert stub.calls == 1
+        assert len({result["text"] for result in results}) == 1
+        assert gateway.get_stats()["backend_calls"] == 1
+        gateway.shutdown()
+
+    def test_timeout_keeps_request_running(self):
+        """Test timed-out request still fills the cache / 测试超时后请求仍写入缓存"""
+        stub = StubChatModel(delay=0.3)
+        gateway = LLMGateway(stub)
+        with pytest.raises(FutureTimeoutError):
+            gateway.complete(_messages(), model="m", timeout=0.01)
+        assert gateway.complete(_messages(), model="m", timeout=5)["text"]
+        assert stub.calls == 1
+        gateway.shutdown()
+
+    def test_async_and_errors(self):
+        """Test awaitable completions and backend errors / 测试异步调用与后端异常"""
+        def fail(model, messages):
+            raise ValueError("boom")
+
+        gateway = LLMGateway(StubChatModel())
+        result = asyncio.run(gateway.acomplete(_messages("hi"), model="m"))
+        assert result["text"] == "[m] hi"
+        failing = LLMGateway(StubChatModel(responder=fail))
+        with pytest.raises(ValueError):
+            failing.complete(_messages(), model="m")
+        assert failing.in_flight == {}
+        with pytest.raises(RuntimeError):
+            LLMGateway(None).submit(_messages(), model="m")
+        gateway.shutdown()
+        failing.shutdown()
+
+
+class TestGatewayConsumers:
+    """Test callers routed through the gateway / 测试通过网关调用的模块"""
+
+    def test_smart_analysis_insights_cached(self):
+        """Test AI insights reuse cached responses / 测试 AI 洞察复用缓存"""
+        stub = StubChatModel(responder=lambda model, messages: "1. 市场机会评估: 良好")
+        engine = SmartAnalysisEngine(llm=LLMGateway(stub))
+        products = [{"title": "Lamp", "brand": "Acme", "price": "$10", "rating": "4.5"}]
+        first = engine.analyze_market_data(products)["ai_insights"]
+        second = engine.analyze_market_data(products)["ai_insights"]
+        assert first["ai_generated_insights"] == "1. 市场机会评估: 良好"
+        assert (first["cached"], second["cached"]) == (False, True)
+        assert stub.calls == 1
+
+    def test_recommendation_uses_shared_gateway(self, monkeypatch):
+        """Test recommendations with and without a backend / 测试有无后端时的推荐"""
+        monkeypatch.setattr(llm_gateway, "_global_gateway", LLMGateway(None))
+        assert ai_recommendation({"sales": 10}) == FALLBACK_RECOMMENDATION
+        monkeypatch.setattr(llm_gateway, "_global_gateway",
+                            LLMGateway(StubChatModel(responder=lambda model, messages: "提价 5%")))
+        assert ai_recommendation({"sales": 10}) == "提价 5%"
+        slow = LLMGateway(StubChatModel(responder=lambda model, messages: "late", delay=0.5))
+        monkeypatch.setattr(llm_gateway, "_global_gateway", slow)
+        assert ai_recommendation({"sales": 11}, timeout=0.05) == FALLBACK_RECOMMENDATION
+        slow.shutdown()
+
+    def test_evolution_suggestions_skip_live_connection_check(self, tmp_path, monkeypatch):
+        """Test suggestions need only an available gateway, no test completion / 测试生成建议不发起连接测试请求"""
+        CrawlerEvolutionEngine = pytest.importorskip("core.crawler_evolution").CrawlerEvolutionEngine
+        monkeypatch.chdir(tmp_path)
+        stub = StubChatModel(responder=lambda model, messages: "降低请求频率")
+        engine = CrawlerEvolutionEngine(llm=LLMGateway(stub))
+        result = engine.generate_evolution_suggestions({"recent_logs": "timeout", "error_count": 3})
+        assert result["status"] == "success" and result["suggestions"] == "降低请求频率"
+        assert stub.calls == 1
+        assert CrawlerEvolutionEngine(llm=LLMGateway(None)).generate_evolution_suggestions({})["status"] == "error"
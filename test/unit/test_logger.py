@@ -0,0 +1,113 @@
+"""
+日志模块测试
+Logger Test Module
+"""
+import logging
+import threading
+import pytest
+
+from scrapers import logger as scraper_logger
+from scrapers.logger import setup_logging, log_info, log_sampled, LazyQueueHandler
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    """临时日志文件，测试后恢复默认配置 / Temp log file, default setup restored afterwards"""
+    path = tmp_path / "scraper.log"
+    setup_logging(str(path), console=False, max_bytes=400, backup_count=2, batch_size=8)
+    yield path
+    setup_logging()
+
+
+def _drain():
+    # 停止监听线程会写出所有已入队的记录 / Stopping the listener writes all queued records
+    scraper_logger._listener.stop()
+    scraper_logger._listener.start()
+
+
+class TestAsyncLogging:
+    """异步日志测试 / Async logging tests"""
+
+    def test_records_written_by_listener(self, log_file):
+        """测试记录由后台线程写入 / Test records are written by the listener"""
+        log_info("找到 %d 个商品 / Found %d items", 3, 3)
+        _drain()
+
+        text = "".join(p.read_text(encoding="utf-8") for p in log_file.parent.glob("scraper.log*"))
+        assert "Found 3 items" in text
+
+    def test_formatting_is_lazy(self, log_file):
+        """测试标量参数不在调用线程格式化 / Test scalar args are not formatted in the caller"""
+        formatted_in = []
+
+        class Probe(str):
+            def __str__(self):
+                formatted_in.append(threading.current_thread().name)
+                return "probe"
+
+        # pytest 的捕获处理器会在调用线程格式化，测试期间暂时移除 / Detach pytest's capture handlers
+        root = logging.getLogger()
+        others = [h for h in root.handlers if not isinstance(h, LazyQueueHandler)]
+        for handler in others:
+            root.removeHandler(handler)
+        try:
+            log_info("value=%s", Probe())
+            _drain()
+        finally:
+            for handler in others:
+                root.addHandler(handler)
+
+        assert formatted_in and threading.main_thread().name not in formatted_in
+
+    def test_mutable_args_are_snapshotted(self, log_file):
+        """测试可变参数在记录时合并 / Test mutable args are merged at call time"""
+        product = {"title": "before"}
+        log_info("product=%s", product)
+        product["title"] = "after"
+        _drain()
+
+        text = log_file.read_text(encoding="utf-8")
+        assert "before" in text and "after" not in text
+
+    def test_rotation(self, log_file):
+        """测试按大小轮转 / Test size-based rotation"""
+        for i in range(40):
+            log_info("line %d with some padding to grow the file", i)
+        _drain()
+
+        assert (log_file.parent / "scraper.log.1").exists()
+
+    def test_reopens_after_external_rotation(self, log_file):
+        """测试其他进程轮转后重新打开文件 / Test file is reopened after another process rotates it"""
+        log_info("first line")
+        _drain()
+        log_file.rename(log_file.parent / "scraper.log.1")
+
+        log_info("second line")
+        _drain()
+
+        assert "second line" in log_file.read_text(encoding="utf-8")
+        assert "second line" not in (log_file.parent / "scraper.log.1").read_text(encoding="utf-8")
+
+    def test_single_queue_handler(self, log_file):
+        """测试重复配置不重复挂载 / Test re-setup does not stack handlers"""
+        setup_logging(str(log_file), console=False)
+        handlers = [h for h in logging.getLogger().handlers if isinstance(h, LazyQueueHandler)]
+        assert len(handlers) == 1
+
+
+class TestSampledLogging:
+    """采样日志测试 / Sampled logging tests"""
+
+    def test_every_nth_call(self, caplog):
+        """测试每 N 次记录一次 / Test one record per N calls"""
+        with caplog.at_level(logging.DEBUG, logger="scrapers"):
+            for i in range(10):
+                log_sampled("sampled item %d", i, every=4)
+
+        messages = [r.getMessage() for r in caplog.records if r.getMessage().startswith("sampled item")]
+        assert messages == ["sampled item 0", "sampled item 4", "sampled item 8"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,148 @@
+"""
+Tests for Metrics Exporter Module
+指标导出模块测试
+"""
+
+import gc
+import urllib.request
+import weakref
+import pytest
+
+from core import metrics_exporter
+from core.enhanced_scraper import EnhancedScraper
+from core.metrics_exporter import (MetricsRegistry, start_metrics_server, get_metrics_registry,
+                                   maybe_start_metrics_server, CONTENT_TYPE)
+from core.monitoring import MonitoringDashboard
+from core.task_queue import TaskQueue, Task
+from core.latency_histogram import LatencyHistogram
+
+
+@pytest.fixture
+def registry():
+    """Registry wired to a fresh dashboard / 接入新仪表板的注册表"""
+    dashboard = MonitoringDashboard()
+    dashboard.record_scraping_operation("amazon", True, 0.3, 10, endpoint_type="list")
+    dashboard.record_scraping_operation("amazon", True, 2.0, 1, endpoint_type="list")
+    dashboard.record_scraping_operation("amazon", False, 4.0, error_type="captcha")
+
+    registry = MetricsRegistry()
+    registry.register_dashboard(dashboard)
+    return registry
+
+
+class TestRendering:
+    """Test OpenMetrics rendering / 测试 OpenMetrics 渲染"""
+
+    def test_request_counters_and_histogram(self, registry):
+        """Test scraper families / 测试抓取指标"""
+        text = registry.render()
+
+        assert text.endswith("# EOF\n")
+        assert "# TYPE scraper_requests counter" in text
+        assert 'scraper_requests_total{platform="amazon",status="success"} 2' in text
+        assert 'scraper_requests_total{platform="amazon",status="failure"} 1' in text
+        assert "scraper_captcha_hits_total 1" in text
+        assert 'scraper_request_duration_seconds_bucket{platform="amazon",endpoint="list",le="0.5"} 1' in text
+        assert 'scraper_request_duration_seconds_bucket{platform="amazon",endpoint="list",le="+Inf"} 2' in text
+        assert 'scraper_request_duration_seconds_count{platform="amazon",endpoint="page"} 1' in text
+
+    def test_task_queue_and_cache(self):
+        """Test queue depth and cache ratio / 测试队列和缓存"""
+        queue = TaskQueue(max_workers=1)
+        queue.add_task(Task("t1", "scrape_url", {}))
+        queue.add_task(Task("t2", "scrape_url", {}))
+
+        registry = MetricsRegistry()
+        registry.register_task_queue(queue, "scrape")
+        registry.register_cache("pages", lambda: {"hits": 3, "misses": 1})
+        text = registry.render()
+
+        assert 'task_queue_depth{queue="scrape"} 2' in text
+        assert 'task_queue_tasks{queue="scrape",status="pending"} 2' in text
+        assert 'cache_hit_ratio{cache="pages"} 0.75' in text
+
+    def test_failing_collector_is_skipped(self):
+        """Test one broken collector does not break the scrape / 测试收集器异常被跳过"""
+        registry = MetricsRegistry()
+        registry.register("broken", lambda: 1 / 0)
+        registry.register_cache("pages", lambda: {"hits": 0, "misses": 0})
+
+        assert 'cache_hits_total{cache="pages"} 0' in registry.render()
+
+    def test_label_escaping(self):
+        """Test label values are escaped / 测试标签值转义"""
+        registry = MetricsRegistry()
+        registry.register_cache('a"b', lambda: {"hits": 1, "misses": 0})
+
+        assert 'cache="a\\"b"' in registry.render()
+
+    def test_cache_owner_is_not_kept_alive(self, tmp_path):
+        """Test bound-method sources are held weakly / 测试绑定方法以弱引用持有"""
+        registry = MetricsRegistry()
+        scraper = EnhancedScraper(cache_dir=str(tmp_path / "cache"), data_dir=str(tmp_path / "data"))
+        registry.register_cache("scraper", scraper.get_cache_stats)
+        scraper.cache_hits = 2
+        assert 'cache_hits_total{cache="scraper"} 2' in registry.render()
+
+        scraper_ref = weakref.ref(scraper)
+        del scraper
+        gc.collect()
+
+        assert scraper_ref() is None
+        assert 'cache="scraper"' not in registry.render()
+        assert "cache:scraper" not in registry.collectors
+
+
+class TestCumulativeCounts:
+    """Test histogram bucket conversion / 测试直方图桶转换"""
+
+    def test_cumulative_counts(self):
+        """Test counts at or below bounds / 测试累计计数"""
+        hist = LatencyHistogram()
+        for value in (0.01, 0.2, 0.2, 3.0):
+            hist.record(value)
+
+        assert hist.cumulative_counts([0.1, 1.0, 5.0]) == [1, 3, 4]
+
+
+class TestHttpServer:
+    """Test HTTP endpoint / 测试 HTTP 端点"""
+
+    def test_serves_metrics(self, registry):
+        """Test /metrics over HTTP / 测试通过 HTTP 获取指标"""
+        server = start_metrics_server(port=0, registry=registry)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as response:
+                body = response.read().decode("utf-8")
+                assert response.headers["Content-Type"] == CONTENT_TYPE
+            assert "scraper_requests_total" in body
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_in_process_server_exports_queue_and_cache(self, monkeypatch, tmp_path):
+        """Test the scraping process serves its own queue and cache metrics / 测试抓取进程导出自身队列与缓存指标"""
+        monkeypatch.setenv(metrics_exporter.METRICS_PORT_ENV, "0")
+        monkeypatch.setattr(metrics_exporter, "_global_server", None)
+        queue = TaskQueue(max_workers=1, name="crawl")
+        queue.start()
+        scraper = EnhancedScraper(cache_dir=str(tmp_path / "cache"), data_dir=str(tmp_path / "data"))
+        server = metrics_exporter._global_server
+        try:
+            assert server is not None and maybe_start_metrics_server() is server
+            scraper.cache_hits = 3
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as response:
+                body = response.read().decode("utf-8")
+            assert 'task_queue_depth{queue="crawl"} 0' in body
+            assert f'cache_hits_total{{cache="enhanced_scraper:{tmp_path / "cache"}"}} 3' in body
+        finally:
+            queue.stop()
+            server.shutdown()
+            server.server_close()
+        assert 'queue="crawl"' not in get_metrics_registry().render()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -174,6 +174,23 @@ class TestMetricsCollector:
         assert collector.failed_requests == 0
         assert len(collector.request_history) == 0
         assert len(collector.platform_metrics) == 0
+    
+    def test_streaming_response_time_anomalies(self):
+        """Test per-platform streaming anomaly detection / 测试按平台的流式异常检测"""
+        collector = MetricsCollector()
+        
+        for i in range(30):
+            collector.record_request("amazon", True, 1.0 + (i % 3) * 0.1, 10)
+        collector.record_request("amazon", True, 25.0, 10)
+        collector.record_request("ebay", True, 25.0, 10)
+        
+        anomalies = collector.get_metric_anomalies()
+        assert [a["metric"] for a in anomalies] == ["response_time:amazon"]
+        assert anomalies[0]["value"] == 25.0
+        
+        collector.reset()
+        assert collector.get_metric_anomalies() == []
+        assert collector.anomaly_detectors == {}
 
 
 class TestMonitoringDashboard:
@@ -230,6 +247,10 @@ class TestMonitoringDashboard:
             else:
                 dashboard.record_scraping_operation("amazon", False, 1.0, error_type="timeout")
         
+        # Recording no longer evaluates rules; the engine does on its timer
+        assert len(dashboard.alerts) == 0
+        dashboard.check_alerts()
+        
         # Should have triggered alert
         assert len(dashboard.alerts) > 0
     
@@ -247,6 +268,10 @@ class TestMonitoringDashboard:
             else:
                 dashboard.record_scraping_operation("amazon", False, 1.0, error_type="captcha")
         
+        # Recording no longer evaluates rules; the engine does on its timer
+        assert len(dashboard.alerts) == 0
+        dashboard.check_alerts()
+        
         # Should have triggered alert
         assert len(dashboard.alerts) > 0
     
@@ -261,6 +286,10 @@ class TestMonitoringDashboard:
         for i in range(15):
             dashboard.record_scraping_operation("amazon", True, 10.0, 10)
         
+        # Recording no longer evaluates rules; the engine does on its timer
+        assert len(dashboard.alerts) == 0
+        dashboard.check_alerts()
+        
         # Should have triggered alert
         assert len(dashboard.alerts) > 0
     
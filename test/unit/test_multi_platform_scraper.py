@@ -194,7 +194,7 @@ class TestConvenienceFunction:
             mock_get_scraper.return_value = mock_scraper
             
             result = scrape_platform("ebay", "https://test.com", max_items=10)
-            mock_scraper.run.assert_called_once_with("https://test.com", 10, False)
+            mock_scraper.run.assert_called_once_with("https://test.com", 10, False, incremental=False)
             assert result == []
 
 
@@ -0,0 +1,120 @@
+"""
+Tests for numeric normalization module
+数值标准化模块测试
+"""
+
+import math
+import pytest
+import pandas as pd
+
+from core.processing.normalization import (
+    parse_price, parse_rating, parse_count, normalize_series, normalize_frame,
+    normalize_record, numeric_column, numeric_values
+)
+
+
+class TestScalarParsers:
+    """Test scalar parsers / 测试标量解析"""
+
+    @pytest.mark.parametrize("raw, expected", [
+        ("$1,299.00", 1299.0),
+        ("1.234,56 €", 1234.56),
+        ("12,99 €", 12.99),
+        ("CHF 1'234.50", 1234.5),
+        ("1 234,50 €", 1234.5),
+        ("¥999", 999.0),
+        (19.5, 19.5),
+        ("invalid", 0.0),
+        ("", 0.0),
+        (None, 0.0),
+    ])
+    def test_parse_price(self, raw, expected):
+        """Test price parsing across locales / 测试多区域价格解析"""
+        assert parse_price(raw) == pytest.approx(expected)
+
+    def test_parse_price_forced_decimal(self):
+        """Test explicit decimal separator / 测试指定小数分隔符"""
+        assert parse_price("1.234", decimal=",") == 1234.0
+        assert parse_price("1.234") == pytest.approx(1.234)
+
+    @pytest.mark.parametrize("raw, expected", [
+        ("4.5 out of 5 stars", 4.5),
+        ("4,5 von 5 Sternen", 4.5),
+        ("7 stars", 0.0),
+        (4, 4.0),
+        (None, 0.0),
+    ])
+    def test_parse_rating(self, raw, expected):
+        """Test rating parsing / 测试评分解析"""
+        assert parse_rating(raw) == pytest.approx(expected)
+
+    @pytest.mark.parametrize("raw, expected", [
+        ("1,234 ratings", 1234),
+        ("1.234 Bewertungen", 1234),
+        ("2.3K", 2300),
+        ("1.5万", 15000),
+        ("(45)", 45),
+        ("none", 0),
+    ])
+    def test_parse_count(self, raw, expected):
+        """Test count parsing / 测试计数解析"""
+        assert parse_count(raw) == expected
+
+
+class TestFrameNormalization:
+    """Test column normalization / 测试列标准化"""
+
+    def test_normalize_series_strings(self):
+        """Test string column parsing with NaN for failures / 测试字符串列解析"""
+        result = normalize_series(pd.Series(["$1.00", "$1.00", None, "n/a", "$2.50"]), "price")
+
+        assert result.iloc[0] == 1.0
+        assert result.iloc[4] == 2.5
+        assert result.isna().tolist() == [False, False, True, True, False]
+
+    def test_normalize_series_numeric_passthrough(self):
+        """Test numeric column is passed through / 测试数值列直接透传"""
+        result = normalize_series(pd.Series([4.0, 6.0]), "rating")
+
+        assert result.iloc[0] == 4.0
+        assert math.isnan(result.iloc[1])
+
+    def test_normalize_frame_coalesces_sources(self):
+        """Test first parseable source wins row by row / 测试按行取第一个可解析来源"""
+        df = pd.DataFrame([
+            {"price": "$5", "current_price": "$7"},
+            {"price": "", "current_price": "$7"},
+            {"price": None, "current_price": None},
+        ])
+
+        result = normalize_frame(df)
+
+        assert result["price_numeric"].tolist()[:2] == [5.0, 7.0]
+        assert math.isnan(result["price_numeric"].iloc[2])
+        assert "price_numeric" not in df.columns
+
+    def test_stored_columns_are_reused(self):
+        """Test ingest-time values skip re-parsing / 测试复用入库时的数值"""
+        records = [{"price": "$1", "price_numeric": 9.0}, {"price": "$2"}]
+
+        assert numeric_column(records, "price").tolist() == [9.0, 2.0]
+
+    def test_normalize_record(self):
+        """Test in-place record normalization / 测试单条记录原地标准化"""
+        record = normalize_record({"price": "$10", "rating": "bad", "review_count": "1,000"})
+
+        assert record["price_numeric"] == 10.0
+        assert record["rating_numeric"] is None
+        assert record["review_count_numeric"] == 1000
+
+    def test_numeric_values_filters(self):
+        """Test filtering of unparseable and non-positive values / 测试过滤无效值"""
+        products = [{"price": "$0"}, {"price": "x"}, {"price": "$3"}]
+
+        assert numeric_values(products, "price").tolist() == [3.0]
+        assert numeric_values(products, "price", positive_only=False).tolist() == [0.0, 3.0]
+        assert numeric_values([], "price").size == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,138 @@
+"""
+Tests for sparse price cube
+稀疏价格立方体测试
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.advanced_analysis import AdvancedAnalyzer
+from core.processing.data_lake import DataLake
+from core.processing.price_cube import HAS_SCIPY, PriceCube, shared_product_keys
+
+LAMP = "gtin:00012345678905"
+
+
+@pytest.fixture
+def records():
+    """One lamp listed on three platforms plus a single-platform desk / 三个平台上的同款台灯与单平台书桌"""
+    return [
+        {"product_key": "amazon:A1", "gtin": "0012345678905", "platform": "amazon",
+         "price": "$10.00", "scraped_at": "2024-05-01T10:00:00"},
+        {"product_key": "ebay:111", "upc": "012345678905", "platform": "ebay",
+         "price": "$9.00", "scraped_at": "2024-05-01T11:00:00"},
+        {"product_key": "ebay:111", "upc": "012345678905", "platform": "ebay",
+         "price": "$12.00", "scraped_at": "2024-05-03T11:00:00"},
+        {"product_key": "walmart:W9", "ean": "0012345678905", "platform": "walmart",
+         "price": "$11.00", "scraped_at": "2024-05-02T09:00:00"},
+        {"product_key": "amazon:D2", "platform": "amazon", "price": "$50.00", "scraped_at": "2024-05-02T11:00:00"},
+        {"product_key": "amazon:D2", "platform": "amazon", "price": "$45.00", "scraped_at": "2024-05-02T12:00:00"},
+        {"product_key": "amazon:X", "platform": "amazon", "price": "n/a", "scraped_at": "2024-05-02T12:00:00"},
+    ]
+
+
+class TestPriceCube:
+    """Test PriceCube class / 测试 PriceCube 类"""
+
+    def test_shared_keys_match_across_platforms(self, records):
+        """Test UPC/EAN/GTIN normalize to one key / 测试 UPC/EAN/GTIN 归一为同一键"""
+        keys = shared_product_keys(pd.DataFrame(records))
+        assert keys.tolist()[:4] == [LAMP] * 4
+        assert keys.tolist()[4] == "amazon:D2"
+
+    def test_cells_are_deduplicated(self, records):
+        """Test one cell per coordinate with the lowest price / 测试每个坐标只保留最低价"""
+        cube = PriceCube.from_records(records)
+        assert len(cube) == 5
+        assert cube.shape == (2, 3, 3)
+        assert cube.day_range == ("2024-05-01", "2024-05-03")
+        assert cube.history("amazon:D2").loc["2024-05-02", "amazon"] == 45.0
+
+    def test_cheapest_platform_as_of_day(self, records):
+        """Test cheapest platform uses the latest price per platform / 测试最便宜平台取各平台最新价"""
+        cube = PriceCube.from_records(records)
+        latest = cube.cheapest_platform().set_index("product")
+        assert latest.loc[LAMP, "platform"] == "amazon"
+        assert latest.loc[LAMP, "platforms"] == 3
+        assert latest.loc[LAMP, "runner_up_price"] == 11.0
+        assert np.isnan(latest.loc["amazon:D2", "runner_up_price"])
+        earlier = cube.cheapest_platform(day="2024-05-02", min_platforms=2)
+        assert earlier[["product", "platform", "price"]].values.tolist() == [[LAMP, "ebay", 9.0]]
+        stale = cube.cheapest_platform(day="2024-05-03", max_age_days=1).set_index("product")
+        assert stale.loc[LAMP, "platform"] == "walmart"
+
+    def test_spread_and_undercuts(self, records):
+        """Test price spread and undercut detection / 测试价差与低价竞争检测"""
+        cube = PriceCube.from_records(records)
+        spread = cube.price_spread()
+        assert spread[["product", "min_price", "max_price", "platforms"]].values.tolist() == [[LAMP, 10.0, 12.0, 3]]
+        assert spread["spread_percent"].iloc[0] == pytest.approx(20.0)
+
+        undercuts = cube.undercuts("ebay", threshold=0.1)
+        assert undercuts[["product", "competitor_platform", "competitor_price"]].values.tolist() == \
+            [[LAMP, "amazon", 10.0]]
+        assert cube.undercuts("ebay", threshold=0.2).empty
+        assert cube.undercuts("amazon").empty
+        assert cube.undercuts("unknown").empty
+
+    def test_slice(self, records):
+        """Test label and day slicing / 测试按标签和日期切片"""
+        cube = PriceCube.from_records(records)
+        sliced = cube.slice(platforms=["ebay", "walmart"], since="2024-05-02")
+        assert len(sliced) == 2
+        assert set(sliced.platform_labels[sliced.platforms]) == {"ebay", "walmart"}
+        assert len(cube.slice(products=LAMP)) == 4
+
+    @pytest.mark.skipif(not HAS_SCIPY, reason="scipy not installed")
+    def test_to_sparse(self, records):
+        """Test CSR export of a snapshot / 测试导出 CSR 稀疏矩阵"""
+        matrix = PriceCube.from_records(records).to_sparse()
+        assert matrix.shape == (2, 3) and matrix.nnz == 4
+        assert matrix.toarray()[0].tolist() == [10.0, 12.0, 11.0]
+
+    def test_matches_pandas_reference(self):
+        """Test vectorized results against a groupby reference / 测试与 pandas 分组结果一致"""
+        rng = np.random.default_rng(0)
+        n = 5000
+        cube = PriceCube(rng.integers(0, 300, n), rng.integers(0, 4, n), rng.integers(0, 30, n),
+                         rng.uniform(1, 100, n).round(2), [f"p{i}" for i in range(300)], list("abcd"))
+        cells = pd.DataFrame({"product": cube.product_labels[cube.products],
+                              "platform": cube.platform_labels[cube.platforms],
+                              "day": cube.days, "price": cube.prices})
+        latest = cells.sort_values("day").groupby(["product", "platform"]).tail(1)
+        expected = latest.groupby("product")["price"].agg(["min", "max", "count"])
+        spread = cube.price_spread(min_platforms=1).set_index("product").sort_index()
+        np.testing.assert_allclose(spread["min_price"], expected.sort_index()["min"])
+        np.testing.assert_allclose(spread["max_price"], expected.sort_index()["max"])
+        cheapest = cube.cheapest_platform().set_index("product").sort_index()
+        np.testing.assert_allclose(cheapest["price"], expected.sort_index()["min"])
+
+
+class TestCrossPlatformAnalysis:
+    """Test AdvancedAnalyzer cross-platform comparison / 测试高级分析器跨平台比价"""
+
+    def test_from_products(self, records, tmp_path):
+        """Test comparison on product records / 测试基于商品列表的比价"""
+        analyzer = AdvancedAnalyzer(output_dir=str(tmp_path))
+        result = analyzer.analyze_cross_platform_prices(records, platform="ebay")
+        assert result["summary"]["cross_platform_products"] == 1
+        assert result["platform_wins"] == {"amazon": 1}
+        assert len(result["undercuts"]) == 1
+        assert analyzer.analyze_cross_platform_prices([]) == {}
+
+    def test_from_lake(self, tmp_path):
+        """Test comparison over data lake partitions / 测试基于数据湖的比价"""
+        for platform, price in (("amazon", "$10.00"), ("ebay", "$8.00")):
+            folder = tmp_path / platform
+            folder.mkdir()
+            (folder / f"{platform}_products_20240501_100000.json").write_text(json.dumps({
+                "items": [{"product_key": f"{platform}:1", "gtin": "4006381333931", "price": price}],
+                "scraped_at": "2024-05-01T10:00:00+00:00",
+            }), encoding="utf-8")
+        analyzer = AdvancedAnalyzer(output_dir=str(tmp_path / "out"))
+        result = analyzer.analyze_cross_platform_prices(lake=DataLake(str(tmp_path)), platform="amazon")
+        assert result["cheapest_platform"]["platform"].tolist() == ["ebay"]
+        assert result["undercuts"]["undercut_percent"].iloc[0] == pytest.approx(20.0)
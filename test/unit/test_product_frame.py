@@ -0,0 +1,71 @@
+"""
+Tests for columnar product store
+列式商品存储测试
+"""
+
+import numpy as np
+import pandas as pd
+
+from core.processing.product_frame import ProductFrame
+
+
+PRODUCTS = [
+    {"brand": "Apple", "platform": "amazon", "title": "MacBook Pro", "price": "$1,299.00", "rating": "4.7"},
+    {"brand": "Apple", "platform": "amazon", "title": "MacBook Air", "price": "$999.00", "rating": "n/a"},
+    {"brand": "", "platform": "ebay", "title": "", "price": "free"},
+    {"brand": None, "platform": "ebay", "title": "Generic Laptop", "price": 0},
+]
+
+
+class TestProductFrame:
+    """Test ProductFrame class / 测试 ProductFrame 类"""
+
+    def test_typed_columns(self):
+        """Test numeric parsing and categorical columns / 测试数值解析与分类列"""
+        frame = ProductFrame.from_records(PRODUCTS)
+
+        assert len(frame) == 4
+        assert isinstance(frame.df["brand"].dtype, pd.CategoricalDtype)
+        assert isinstance(frame.df["platform"].dtype, pd.CategoricalDtype)
+        np.testing.assert_allclose(frame.numeric("price"), [1299.0, 999.0])
+        np.testing.assert_allclose(frame.numeric("price", positive_only=False), [1299.0, 999.0, 0.0])
+        assert frame.filled_numeric()["rating_numeric"].tolist() == [4.7, 0.0, 0.0, 0.0]
+
+    def test_group_key_maps_missing(self):
+        """Test null and empty values map to Unknown / 测试空值映射为 Unknown"""
+        frame = ProductFrame.from_records(PRODUCTS)
+
+        assert frame.group_key("brand").tolist() == ["Apple", "Apple", "Unknown", "Unknown"]
+        assert frame.value_counts("brand").to_dict() == {"Apple": 2, "Unknown": 2}
+        assert frame.group_key("seller").tolist() == ["Unknown"] * 4
+
+    def test_texts_skip_empty(self):
+        """Test texts skips empty values / 测试文本跳过空值"""
+        frame = ProductFrame.from_records(PRODUCTS)
+        assert frame.texts("title") == ["MacBook Pro", "MacBook Air", "Generic Laptop"]
+        assert frame.texts("missing") == []
+
+    def test_memoized(self):
+        """Test derived values are computed once / 测试派生值只计算一次"""
+        frame = ProductFrame.from_records(PRODUCTS)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return 42
+
+        assert frame.memo("answer", compute) == 42
+        assert frame.memo("answer", compute) == 42
+        assert len(calls) == 1
+        assert frame.numeric("price") is frame.numeric("price")
+
+    def test_coerce(self):
+        """Test coerce reuses frames and accepts DataFrames / 测试 coerce 复用已有对象"""
+        frame = ProductFrame.from_records(PRODUCTS)
+        assert ProductFrame.coerce(frame) is frame
+
+        df = pd.DataFrame(PRODUCTS)
+        coerced = ProductFrame.coerce(df)
+        assert "price_numeric" in coerced.df.columns
+        assert "price_numeric" not in df.columns
+        assert ProductFrame.coerce([]).empty
@@ -0,0 +1,165 @@
+"""
+Tests for product identity module
+商品标识模块测试
+"""
+
+import pytest
+
+from core.processing.product_identity import (
+    canonicalize_url, extract_product_id, product_key, annotate_products, ProductIdentityIndex,
+    extract_identifiers, normalize_identifier
+)
+from core.data_deduplication import DataDeduplicator
+
+
+class TestCanonicalizeUrl:
+    """Test URL canonicalization / 测试URL规范化"""
+
+    def test_strips_tracking_params_and_fragment(self):
+        """Test tracking params, fragment and trailing slash are removed / 测试去除跟踪参数"""
+        url = "HTTPS://WWW.Example.com/item/42/?utm_source=x&color=red&gclid=abc&size=M#reviews"
+
+        assert canonicalize_url(url) == "https://www.example.com/item/42?color=red&size=M"
+
+    def test_resolves_relative_links(self):
+        """Test relative hrefs resolve against the list page / 测试相对链接解析"""
+        assert canonicalize_url("/itm/123456789012?_trksid=p1", "ebay") == "https://www.ebay.com/itm/123456789012"
+        assert canonicalize_url("item/5", base_url="https://shop.example.com/list/") == \
+            "https://shop.example.com/list/item/5"
+        assert canonicalize_url("//cdn.example.com/p/1") == "https://cdn.example.com/p/1"
+
+    def test_amazon_ref_segment(self):
+        """Test Amazon /ref= path segments are dropped / 测试去除 Amazon ref 路径段"""
+        url = "/Apple-MacBook/dp/B08N5WRWNW/ref=sr_1_1?keywords=laptop&qid=1&sr=8-1"
+
+        assert canonicalize_url(url, "amazon") == "https://www.amazon.com/Apple-MacBook/dp/B08N5WRWNW"
+
+    def test_keeps_identifying_params(self):
+        """Test per-platform params are kept / 测试保留平台标识参数"""
+        url = "https://www.flipkart.com/phone/p/itmabc?pid=MOBG123&lid=LST1&marketplace=FLIPKART"
+
+        assert canonicalize_url(url, "flipkart") == "https://www.flipkart.com/phone/p/itmabc?pid=MOBG123"
+
+    @pytest.mark.parametrize("url", ["", "javascript:void(0)", "mailto:a@b.c"])
+    def test_invalid_links(self, url):
+        """Test non-http links yield empty string / 测试非 http 链接"""
+        assert canonicalize_url(url) == ""
+
+
+class TestProductKey:
+    """Test product identity / 测试商品标识"""
+
+    @pytest.mark.parametrize("platform, url, expected", [
+        ("ebay", "https://www.ebay.com/itm/Some-Title/123456789012", "123456789012"),
+        ("aliexpress", "https://www.aliexpress.com/item/1005001234.html", "1005001234"),
+        ("shopee", "https://shopee.ph/Some-Item-i.123.456", "123.456"),
+        ("etsy", "https://www.etsy.com/listing/98765/handmade", "98765"),
+        ("mercadolibre", "https://articulo.mercadolibre.com.mx/MLM-123456-x", "MLM123456"),
+        ("target", "https://www.target.com/p/thing/-/A-5555", "5555"),
+        ("unknown", "https://example.com/p/1", None),
+    ])
+    def test_extract_product_id(self, platform, url, expected):
+        """Test native ID extraction / 测试原生ID提取"""
+        assert extract_product_id(url, platform) == expected
+
+    def test_same_product_same_key(self):
+        """Test observations of one product share a key / 测试同一商品键一致"""
+        first = {"platform": "ebay", "url": "/itm/123456789012?_trksid=a&hash=1"}
+        second = {"platform": "ebay", "url": "https://www.ebay.com/itm/Title/123456789012?epid=9"}
+
+        assert product_key(first) == product_key(second) == "ebay:123456789012"
+
+    def test_amazon_uses_asin(self):
+        """Test Amazon records key on ASIN / 测试 Amazon 使用 ASIN"""
+        assert product_key({"asin": "B08N5WRWNW", "url": "/x"}, "amazon") == "amazon:B08N5WRWNW"
+
+    def test_url_fallback(self):
+        """Test fallback to canonical URL / 测试回退到规范化URL"""
+        key = product_key({"url": "https://example.com/p/1?utm_medium=x"}, "unknown")
+
+        assert key == "unknown:url:https://example.com/p/1"
+
+    def test_annotate_products(self):
+        """Test records are annotated in place / 测试原地标注记录"""
+        products = [{"url": "/listing/1/a?ref=hp"}, {"title": "no url"}]
+
+        annotate_products(products, "etsy")
+
+        assert products[0]["canonical_url"] == "https://www.etsy.com/listing/1/a"
+        assert products[0]["product_key"] == "etsy:1"
+        assert products[1]["product_key"] is None
+
+
+class TestProductIdentityIndex:
+    """Test integer identity index / 测试整数标识索引"""
+
+    def test_dense_stable_ids(self, tmp_path):
+        """Test IDs are dense and survive reload / 测试ID连续且可持久化"""
+        path = str(tmp_path / "identity.json")
+        index = ProductIdentityIndex(path)
+
+        ids = index.resolve_all([
+            {"platform": "ebay", "url": "/itm/111111111"},
+            {"platform": "ebay", "url": "/itm/222222222"},
+            {"platform": "ebay", "url": "/itm/111111111?_trksid=z"},
+        ])
+        index.save()
+
+        assert ids == [0, 1, 0]
+        reloaded = ProductIdentityIndex(path)
+        assert reloaded.get_id("ebay:222222222") == 1
+        assert reloaded.lookup(0) == "ebay:111111111"
+        assert len(reloaded) == 2
+
+    def test_assign_shares_ids_across_instances(self, tmp_path):
+        """Test instances sharing a file never reuse an ID / 测试共享文件的实例不重复分配ID"""
+        path = str(tmp_path / "identity.json")
+        first, second = ProductIdentityIndex(path), ProductIdentityIndex(path)
+
+        first.assign([{"platform": "ebay", "url": "/itm/111111111"}])
+        records = [{"platform": "ebay", "url": "/itm/222222222"},
+                   {"platform": "ebay", "url": "/itm/111111111"}]
+        ids = second.assign(records)
+
+        assert ids == [1, 0]
+        assert [r["product_uid"] for r in records] == [1, 0]
+        assert ProductIdentityIndex(path).lookup(1) == "ebay:222222222"
+
+
+class TestExtractIdentifiers:
+    """Test shared identifier extraction / 测试共享商品标识提取"""
+
+    def test_normalize_identifier(self):
+        """Test the first GTIN-shaped run wins / 测试取第一个GTIN格式数字"""
+        assert normalize_identifier("012345678905 123456789012") == "012345678905"
+        assert normalize_identifier("978-0-306-40615-7") == "9780306406157"
+        assert normalize_identifier("n/a") is None
+
+    def test_json_ld_and_detail_rows(self):
+        """Test JSON-LD gtin13 and Amazon UPC rows are read / 测试读取JSON-LD与详情行"""
+        from bs4 import BeautifulSoup
+
+        html = (
+            '<script type="application/ld+json">'
+            '{"@type": "Product", "offers": {"gtin13": "4006381333931"}}</script>'
+            '<table><tr><th>UPC</th><td>012345678905</td></tr></table>'
+            '<div id="detailBullets_feature_div"><ul>'
+            '<li>ISBN-13 \u200f : \u200e 978-0306406157</li></ul></div>'
+        )
+        found = extract_identifiers(BeautifulSoup(html, "html.parser"))
+
+        assert found == {"ean": "4006381333931", "upc": "012345678905", "isbn": "9780306406157"}
+
+
+class TestUrlDeduplication:
+    """Test URL dedup uses canonical URLs / 测试URL去重使用规范化URL"""
+
+    def test_tracking_variants_are_duplicates(self, tmp_path):
+        """Test tracking-param variants hash the same / 测试跟踪参数变体哈希一致"""
+        dedup = DataDeduplicator(storage_path=str(tmp_path))
+
+        assert dedup.get_url_hash("https://a.com/p/1?utm_source=x") == dedup.get_url_hash("https://a.com/p/1")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,109 @@
+"""
+Tests for Sampling Profiler Module
+采样分析器模块测试
+"""
+
+import json
+import os
+import signal
+import threading
+import time
+import pytest
+
+from core import sampling_profiler
+from core.sampling_profiler import SamplingProfiler, load_profiler_config, maybe_start_profiler
+
+
+def _busy_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+class TestSamplingProfiler:
+    """Test SamplingProfiler class / 测试 SamplingProfiler 类"""
+
+    def test_samples_only_selected_threads(self, tmp_path):
+        """Test worker stacks are sampled and aggregated / 测试只采样选定线程"""
+        stop = threading.Event()
+        worker = threading.Thread(target=_busy_loop, args=(stop,), name="Worker-1", daemon=True)
+        other = threading.Thread(target=stop.wait, name="Other", daemon=True)
+        worker.start()
+        other.start()
+
+        profiler = SamplingProfiler(interval=0.001, thread_prefixes=["Worker-"])
+        for _ in range(30):
+            profiler.sample_once()
+            time.sleep(0.002)
+        stop.set()
+        worker.join()
+
+        stacks = profiler.collapsed_stacks()
+        assert profiler.sample_count == sum(stacks.values()) == 30
+        assert all("_busy_loop" in stack for stack in stacks)
+
+        top = profiler.top_functions(5)
+        busy = next(row for row in top if row["function"].startswith("_busy_loop"))
+        assert busy["total_pct"] == pytest.approx(100.0)
+
+        path = profiler.write_collapsed(str(tmp_path / "out.folded"))
+        line = open(path, encoding="utf-8").readline()
+        assert line.rsplit(" ", 1)[1].strip().isdigit()
+
+    def test_start_stop_toggle(self):
+        """Test background sampling lifecycle / 测试后台采样生命周期"""
+        profiler = SamplingProfiler(interval=0.001, thread_prefixes=["MainThread"])
+
+        assert profiler.toggle() is True
+        time.sleep(0.05)
+        assert profiler.toggle() is False
+        assert profiler.sample_count > 0
+
+        profiler.reset()
+        assert profiler.top_functions() == []
+
+    def test_config_and_env(self, tmp_path, monkeypatch):
+        """Test config merge and env override / 测试配置合并和环境变量"""
+        path = tmp_path / "profiler.json"
+        path.write_text(json.dumps({"interval_seconds": 0.05}), encoding="utf-8")
+
+        monkeypatch.delenv("SCRAPER_PROFILE", raising=False)
+        config = load_profiler_config(str(path))
+        assert config["interval_seconds"] == 0.05 and config["enabled"] is False
+
+        monkeypatch.setenv("SCRAPER_PROFILE", "1")
+        assert load_profiler_config(str(path))["enabled"] is True
+
+    @pytest.mark.skipif(not hasattr(signal, "SIGUSR2"), reason="SIGUSR2 not available")
+    def test_signal_toggle_is_opt_in(self, tmp_path, monkeypatch):
+        """Test the signal toggle is installed only when configured / 测试信号开关需显式开启"""
+        profiler = SamplingProfiler(interval=0.001, thread_prefixes=["MainThread"],
+                                    output_dir=str(tmp_path))
+        config = dict(sampling_profiler.DEFAULT_CONFIG)
+        monkeypatch.setattr(sampling_profiler, "_global_profiler", profiler)
+        monkeypatch.setattr(sampling_profiler, "_config", config)
+        monkeypatch.setattr(sampling_profiler, "_toggle_thread", None)
+        previous = signal.getsignal(signal.SIGUSR2)
+        try:
+            maybe_start_profiler()
+            assert signal.getsignal(signal.SIGUSR2) is previous
+
+            config["signal_toggle"] = True
+            maybe_start_profiler()
+            os.kill(os.getpid(), signal.SIGUSR2)
+            deadline = time.time() + 2
+            while not profiler.running and time.time() < deadline:
+                time.sleep(0.01)
+            assert profiler.running
+            time.sleep(0.02)
+            os.kill(os.getpid(), signal.SIGUSR2)
+            deadline = time.time() + 2
+            while not list(tmp_path.glob("*.folded")) and time.time() < deadline:
+                time.sleep(0.01)
+            assert list(tmp_path.glob("profile_*.folded"))
+        finally:
+            signal.signal(signal.SIGUSR2, previous)
+            profiler.stop()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
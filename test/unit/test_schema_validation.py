@@ -0,0 +1,167 @@
+"""
+Tests for Schema Validation Module
+Schema 验证模块测试
+"""
+
+import io
+import json
+import pytest
+from core.schema_validation import (
+    compile_schema, clear_schema_cache, schema_hash, load_schema_validator,
+    get_platform_validator, iter_validate_ndjson, validate_ndjson
+)
+
+
+PRODUCT_SCHEMA = {
+    "title": "TestProduct",
+    "type": "object",
+    "required": ["id", "name"],
+    "properties": {
+        "id": {"type": "string", "pattern": "^[0-9]+$"},
+        "name": {"type": "string", "minLength": 2, "maxLength": 20},
+        "price": {"type": "number", "minimum": 0},
+        "stock": {"type": "integer"},
+        "status": {"type": "string", "enum": ["active", "inactive"]},
+        "tags": {"type": "array", "maxItems": 2},
+        "seller": {
+            "type": "object",
+            "required": ["seller_id"],
+            "properties": {"seller_id": {"type": "string"}}
+        }
+    }
+}
+
+
+class TestCompileSchema:
+    """Test schema compilation / 测试 Schema 编译"""
+
+    def setup_method(self):
+        clear_schema_cache()
+
+    def test_valid_record(self):
+        """Test valid record passes / 测试有效记录通过"""
+        validator = compile_schema(PRODUCT_SCHEMA)
+        record = {"id": "123", "name": "Widget", "price": 9.5, "stock": 3,
+                  "status": "active", "tags": ["a"], "seller": {"seller_id": "s1"}}
+
+        is_valid, errors = validator.validate(record)
+
+        assert is_valid is True
+        assert errors == []
+
+    def test_missing_required_reports_once(self):
+        """Test missing required field yields a single error / 测试缺失必需字段只报告一次"""
+        validator = compile_schema(PRODUCT_SCHEMA)
+
+        is_valid, errors = validator.validate({"id": "1"})
+
+        assert is_valid is False
+        assert len(errors) == 1
+        assert "name" in errors[0]
+
+    @pytest.mark.parametrize("override", [
+        {"id": "abc"},
+        {"name": "x"},
+        {"price": -1},
+        {"price": "9.5"},
+        {"stock": 1.5},
+        {"stock": True},
+        {"status": "deleted"},
+        {"tags": ["a", "b", "c"]},
+        {"seller": {"name": "no id"}},
+    ])
+    def test_invalid_values(self, override):
+        """Test each keyword rejects bad values / 测试各关键字拒绝无效值"""
+        validator = compile_schema(PRODUCT_SCHEMA)
+        record = {"id": "123", "name": "Widget"}
+        record.update(override)
+
+        is_valid, _ = validator.validate(record)
+
+        assert is_valid is False
+
+    def test_unanchored_pattern(self):
+        """Test JSON Schema patterns use search semantics / 测试正则为非锚定匹配"""
+        validator = compile_schema({"properties": {"sku": {"type": "string", "pattern": "X[0-9]"}}})
+
+        assert validator.validate({"sku": "abcX1"})[0] is True
+        assert validator.validate({"sku": "abc"})[0] is False
+
+    def test_cache_returns_independent_validators(self):
+        """Test cached plans are shared but validators are not / 测试缓存共享规则但不共享验证器"""
+        first = compile_schema(PRODUCT_SCHEMA)
+        second = compile_schema(json.loads(json.dumps(PRODUCT_SCHEMA)))
+
+        assert first is not second
+        assert first.rules[0] is second.rules[0]
+
+        first.rules.clear()
+        assert len(compile_schema(PRODUCT_SCHEMA).rules) == len(second.rules)
+
+    def test_schema_hash_ignores_key_order(self):
+        """Test schema hash is key-order independent / 测试哈希与键顺序无关"""
+        assert schema_hash({"a": 1, "b": 2}) == schema_hash({"b": 2, "a": 1})
+
+
+class TestSchemaFiles:
+    """Test loading schemas from repository / 测试从仓库加载 Schema"""
+
+    def test_records_schema(self):
+        """Test data/schema/records_schema.json / 测试记录 Schema"""
+        validator = load_schema_validator("records_schema")
+
+        assert validator.validate({"id": "1", "createdAt": "2024-01-01T00:00:00Z"})[0] is True
+        assert validator.validate({"id": "1", "createdAt": "yesterday"})[0] is False
+        assert validator.validate({"id": "1", "createdAt": "2024-01-01T00:00:00Z",
+                                   "status": "unknown"})[0] is False
+
+    def test_amazon_platform_schema(self):
+        """Test platform lookup by name / 测试按平台名查找 Schema"""
+        validator = get_platform_validator("Amazon")
+
+        assert validator.validate({"asin": "B08N5WRWNW", "title": "Product"})[0] is True
+        assert validator.validate({"asin": "B08N5", "title": "Product"})[0] is False
+
+    def test_missing_schema(self):
+        """Test missing schema raises / 测试缺失 Schema 抛出异常"""
+        with pytest.raises(FileNotFoundError):
+            load_schema_validator("does_not_exist")
+
+
+class TestNdjsonValidation:
+    """Test streaming NDJSON validation / 测试流式 NDJSON 验证"""
+
+    def test_iter_validate(self):
+        """Test per-line results / 测试逐行结果"""
+        validator = compile_schema(PRODUCT_SCHEMA)
+        stream = io.StringIO(
+            '{"id": "1", "name": "ok"}\n'
+            '\n'
+            'not json\n'
+            '[1, 2]\n'
+            '{"id": "x", "name": "ok"}\n'
+        )
+
+        results = list(iter_validate_ndjson(stream, validator))
+
+        assert [r["line"] for r in results] == [1, 3, 4, 5]
+        assert [r["valid"] for r in results] == [True, False, False, False]
+
+    def test_validate_file_summary(self, tmp_path):
+        """Test summary with bounded invalid samples / 测试汇总报告和有界无效样本"""
+        path = tmp_path / "items.ndjson"
+        with open(path, "w", encoding="utf-8") as f:
+            for i in range(10):
+                f.write(json.dumps({"id": str(i), "name": "ok" if i % 2 else "x"}) + "\n")
+
+        report = validate_ndjson(path, compile_schema(PRODUCT_SCHEMA), max_invalid_samples=2)
+
+        assert report["total_count"] == 10
+        assert report["valid_count"] == 5
+        assert report["invalid_count"] == 5
+        assert len(report["invalid_samples"]) == 2
+        assert sum(report["error_counts"].values()) == 5
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
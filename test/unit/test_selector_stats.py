@@ -0,0 +1,113 @@
+"""
+选择器命中统计测试模块
+Selector Hit Statistics Test Module
+"""
+from datetime import date, timedelta
+
+from bs4 import BeautifulSoup
+
+from scrapers.multi_platform_scraper import FordealScraper
+from scrapers.selector_stats import SelectorStats, LIST_SLOT, field_slot
+
+
+class TestSelectorStats:
+    """测试 SelectorStats 类 / Test SelectorStats class"""
+
+    def test_rows_with_avg_items(self):
+        """测试按日统计与每次命中平均商品数 / Test per-day rows with items per hit"""
+        stats = SelectorStats(path=None)
+        today = date(2024, 5, 2)
+        stats.record_hit("ebay", LIST_SLOT, "li.s-item", items=40, day=today)
+        stats.record_hit("ebay", LIST_SLOT, "li.s-item", items=20, day=today)
+        stats.record_hit("ebay", field_slot("title"), "h3", day=today - timedelta(days=1))
+
+        rows = stats.rows("ebay", days=7, today=today)
+        assert len(rows) == 2
+        list_row = [row for row in rows if row["slot"] == LIST_SLOT][0]
+        assert list_row["hits"] == 2
+        assert list_row["avg_items"] == 30
+        assert stats.rows("ebay", days=1, today=today) == [list_row]
+
+    def test_ordered_by_hit_rate(self):
+        """测试按命中率重排选择器 / Test selectors reordered by hit rate"""
+        stats = SelectorStats(path=None, min_hits=5)
+        selectors = ["div.title", "h3", "h4"]
+        for _ in range(3):
+            stats.record_hit("fordeal", "field:title", "h3")
+
+        # Not enough data yet: keep original order
+        assert stats.ordered("fordeal", "field:title", selectors) == selectors
+
+        for _ in range(3):
+            stats.record_hit("fordeal", "field:title", "h4")
+        stats.record_hit("fordeal", "field:title", "h3")
+        assert stats.ordered("fordeal", "field:title", selectors) == ["h3", "h4", "div.title"]
+        assert stats.ordered("other", "field:title", selectors) == selectors
+
+    def test_reorder_disabled(self):
+        """测试关闭重排 / Test reordering can be disabled"""
+        stats = SelectorStats(path=None, reorder=False, min_hits=1)
+        stats.record_hit("fordeal", LIST_SLOT, "b")
+        assert stats.ordered("fordeal", LIST_SLOT, ["a", "b"]) == ["a", "b"]
+
+    def test_save_load_and_prune(self, tmp_path):
+        """测试紧凑保存、加载与过期清理 / Test compact save, load and pruning"""
+        path = str(tmp_path / "selector_stats.json")
+        today = date(2024, 5, 2)
+        stats = SelectorStats(path=path, retention_days=7)
+        stats.record_hit("ebay", LIST_SLOT, "li.s-item", items=10, day=today)
+        stats.record_hit("ebay", LIST_SLOT, "div.s-item", items=5, day=today - timedelta(days=30))
+        assert stats.save(today=today)
+
+        loaded = SelectorStats(path=path)
+        assert loaded.load()
+        rows = loaded.rows(days=60, today=today)
+        assert [row["selector"] for row in rows] == ["li.s-item"]
+        assert loaded.group_hits[(loaded.ids["ebay"], loaded.ids[LIST_SLOT])] == 1
+
+    def test_concurrent_savers_merge(self, tmp_path):
+        """测试多个进程保存时命中累加而非覆盖 / Test savers sharing a file add up instead of overwriting"""
+        path = str(tmp_path / "selector_stats.json")
+        today = date(2024, 5, 2)
+        first, second = SelectorStats(path=path), SelectorStats(path=path)
+        first.record_hit("ebay", LIST_SLOT, "li.s-item", items=4, day=today)
+        second.record_hit("ebay", LIST_SLOT, "li.s-item", items=6, day=today)
+        second.record_hit("ebay", LIST_SLOT, "div.s-item", day=today)
+
+        assert first.save(today=today)
+        assert second.save(today=today)
+        assert first.save(today=today)
+
+        stored = SelectorStats(path=path)
+        assert stored.load()
+        rows = {row["selector"]: row for row in stored.rows(today=today)}
+        assert rows["li.s-item"]["hits"] == 2
+        assert rows["li.s-item"]["items"] == 10
+        assert rows["div.s-item"]["hits"] == 1
+        assert second.rows(today=today) == stored.rows(today=today)
+
+
+class TestScraperTelemetry:
+    """测试爬虫记录选择器命中 / Test scrapers record selector hits"""
+
+    HTML = """
+    <div class="item-card"><h3>Lamp</h3><span class="price">$5</span><a href="/p/1">x</a></div>
+    <div class="item-card"><h3>Desk</h3><span class="price">$9</span><a href="/p/2">x</a></div>
+    """
+
+    def test_list_and_field_hits(self, monkeypatch):
+        """测试列表与字段选择器命中被记录 / Test list and field hits are recorded"""
+        scraper = FordealScraper()
+        stats = SelectorStats(path=None)
+        scraper.selector_stats = stats
+        monkeypatch.setattr(scraper, "_fetch_page", lambda url: BeautifulSoup(self.HTML, "html.parser"))
+
+        products = scraper.scrape_list_page("https://example.com", max_items=10)
+
+        assert [p["title"] for p in products] == ["Lamp", "Desk"]
+        by_slot = {(row["slot"], row["selector"]): row for row in stats.rows("fordeal")}
+        # div[class*='product'] does not match, div.item-card is the third fallback
+        assert by_slot[(LIST_SLOT, "div.item-card")]["items"] == 2
+        assert by_slot[("field:title", "h3")]["hits"] == 2
+        assert by_slot[("field:price", "span.price")]["hits"] == 2
+        assert ("field:image", "img") not in by_slot
@@ -0,0 +1,99 @@
+"""
+Tests for Ring Buffer Time Series Module
+环形缓冲时间序列模块测试
+"""
+
+import pytest
+
+from core.time_series_buffer import EventRingBuffer, RollupSeries, EVENT_DTYPE
+from core.monitoring import MetricsCollector
+
+
+class TestEventRingBuffer:
+    """Test EventRingBuffer class / 测试 EventRingBuffer 类"""
+
+    def test_compact_events(self):
+        """Test event width stays small / 测试事件宽度"""
+        assert EVENT_DTYPE.itemsize <= 32
+
+    def test_wraps_and_keeps_order(self):
+        """Test oldest events are overwritten / 测试覆盖最旧事件"""
+        buffer = EventRingBuffer(capacity=4)
+        for i in range(6):
+            buffer.append(100.0 + i, "amazon", i % 2 == 0, 0.5, items=i)
+
+        assert len(buffer) == 4
+        assert buffer.tail(10)["items"].tolist() == [2, 3, 4, 5]
+        assert buffer.tail(2)["items"].tolist() == [4, 5]
+
+    def test_since_across_wrap(self):
+        """Test window query spanning the wrap point / 测试跨越环形边界的窗口查询"""
+        buffer = EventRingBuffer(capacity=5)
+        for i in range(8):
+            buffer.append(float(i), "ebay", True, 0.1, items=i)
+
+        assert buffer.since(4.5)["items"].tolist() == [5, 6, 7]
+        assert buffer.since(1.0)["items"].tolist() == [3, 4, 5, 6, 7]
+        assert len(buffer.since(100.0)) == 0
+
+    def test_to_records(self):
+        """Test conversion to display records / 测试转换为展示记录"""
+        buffer = EventRingBuffer(capacity=3)
+        buffer.append(0.0, "amazon", False, 2.0, error_type="captcha")
+
+        record = buffer.to_records(buffer.tail(1))[0]
+
+        assert record["timestamp"].startswith("1970-01-01T00:00:00")
+        assert record["platform"] == "amazon"
+        assert record["success"] is False
+        assert record["error_type"] == "captcha"
+
+
+class TestRollupSeries:
+    """Test RollupSeries class / 测试 RollupSeries 类"""
+
+    def test_buckets_and_gaps(self):
+        """Test aggregation with empty buckets / 测试聚合与空桶"""
+        rollup = RollupSeries(resolution_seconds=60, num_buckets=10)
+        rollup.add(60.0, True, 1.0, items=5)
+        rollup.add(90.0, False, 3.0)
+        rollup.add(200.0, True, 2.0, items=1)
+
+        series = rollup.query(240, now=200.0)
+
+        assert series["timestamps"].tolist() == [0, 60, 120, 180]
+        assert series["requests"].tolist() == [0, 2, 0, 1]
+        assert series["failed"].tolist() == [0, 1, 0, 0]
+        assert series["items"].tolist() == [0, 5, 0, 1]
+        assert series["latency_max"].tolist() == [0, 3.0, 0, 2.0]
+
+    def test_stale_buckets_ignored(self):
+        """Test wrapped buckets from an old epoch are not reported / 测试忽略过期桶"""
+        rollup = RollupSeries(resolution_seconds=1, num_buckets=4)
+        rollup.add(1.0, True, 1.0)
+
+        assert rollup.query(4, now=5.0)["requests"].sum() == 0
+        assert rollup.query(4, now=4.0)["requests"].sum() == 1
+
+
+class TestCollectorTimeSeries:
+    """Test MetricsCollector time series / 测试收集器时间序列"""
+
+    def test_time_series_from_rollups(self):
+        """Test chart data comes from rollups / 测试图表数据来自汇总"""
+        collector = MetricsCollector()
+        collector.record_request("amazon", True, 1.0, 10)
+        collector.record_request("amazon", False, 3.0, error_type="timeout")
+
+        minute = collector.get_time_series_data(60)
+        second = collector.get_time_series_data(1)
+
+        assert minute["resolution_seconds"] == 60 and len(minute["requests"]) == 60
+        assert sum(minute["requests"]) == 2
+        assert sum(second["failed"]) == 1
+        assert max(minute["avg_response_time"]) == pytest.approx(2.0)
+        assert collector.get_recent_requests(1)[0]["error_type"] == "timeout"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
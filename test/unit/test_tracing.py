@@ -0,0 +1,143 @@
+"""
+Tests for Tracing Module
+链路追踪模块测试
+"""
+
+import json
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+
+from core.tracing import span, trace_run, flame_summary_path
+from core.data_validation import DataValidator, DataDeduplicator
+from scrapers.amazon_scraper import AmazonScraper
+
+
+class TestSpans:
+    """Test span nesting and export / 测试 span 嵌套与导出"""
+
+    def test_noop_outside_run(self):
+        """Test spans outside a run record nothing / 测试未追踪时不记录"""
+        with span("fetch") as current:
+            current.set_attribute("x", 1)
+
+    def test_parent_child_and_otlp_export(self, tmp_path):
+        """Test parent links and OTLP/JSON layout / 测试父子关系和 OTLP 格式"""
+        export = str(tmp_path / "traces.jsonl")
+        with trace_run("run", export_path=export, url="u") as trace:
+            with span("fetch", url="u") as fetch:
+                fetch.set_attribute("http.status_code", 200)
+                with span("parse"):
+                    pass
+
+        names = {s.name: s for s in trace.spans}
+        assert names["parse"].parent is names["fetch"]
+        assert names["fetch"].parent is names["run"]
+
+        with open(export, encoding="utf-8") as f:
+            payload = json.loads(f.readline())
+        spans = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        by_name = {s["name"]: s for s in spans}
+        assert by_name["parse"]["parentSpanId"] == by_name["fetch"]["spanId"]
+        assert "parentSpanId" not in by_name["run"]
+        assert len(by_name["run"]["traceId"]) == 32
+        assert {"key": "http.status_code", "value": {"intValue": "200"}} in by_name["fetch"]["attributes"]
+
+    def test_error_status(self):
+        """Test exceptions mark the span as failed / 测试异常标记失败"""
+        with pytest.raises(ValueError):
+            with trace_run("run", export_path=None) as trace:
+                with span("save"):
+                    raise ValueError("disk full")
+
+        assert {s.name: s.status for s in trace.spans} == {"save": "error", "run": "error"}
+
+    def test_flame_summary_uses_self_time(self, tmp_path):
+        """Test collapsed stacks report self time / 测试折叠栈使用自身耗时"""
+        with trace_run("run", export_path=None) as trace:
+            with span("fetch"):
+                time.sleep(0.02)
+            with span("validate"):
+                DataValidator().validate_batch([{}])
+            with span("outer"):
+                DataDeduplicator().deduplicate([{"a": 1}, {"a": 1}])
+
+        stacks = trace.collapsed_stacks()
+        assert stacks["run;fetch"] >= 20000
+        assert "run;outer;dedup" in stacks
+        assert trace.stage_totals()["fetch"] >= 0.02
+        assert "network=" in trace.summary_line()
+
+        path = trace.write_flame_summary(str(tmp_path / "out.flame.txt"))
+        first = open(path, encoding="utf-8").readline().split()
+        assert first[0] == "run;fetch" and int(first[1]) >= 20000
+
+    def test_export_rotates(self, tmp_path):
+        """Test the export file rotates past the size limit / 测试导出文件超限轮转"""
+        export = tmp_path / "traces.jsonl"
+        with patch("core.tracing.TRACE_MAX_BYTES", 1):
+            for _ in range(3):
+                with trace_run("run", export_path=str(export)):
+                    pass
+
+        assert export.exists()
+        assert (tmp_path / "traces.jsonl.1").exists()
+        assert (tmp_path / "traces.jsonl.2").exists()
+
+    def test_unsampled_run_is_not_traced(self):
+        """Test unsampled runs yield no trace / 测试未采样的运行不追踪"""
+        with patch("core.tracing.Trace.export") as export:
+            with trace_run("run", sampled=False) as trace:
+                with span("fetch") as current:
+                    current.set_attribute("x", 1)
+
+        assert trace is None
+        export.assert_not_called()
+
+
+class TestScraperTracing:
+    """Test scraper run is traced / 测试抓取运行被追踪"""
+
+    def test_run_writes_flame_summary(self, tmp_path):
+        """Test sampled runs write a flame summary outside the data dir / 测试采样运行在数据目录外写火焰图摘要"""
+        data_dir, flame_dir = tmp_path / "data", tmp_path / "flames"
+        scraper = AmazonScraper(data_dir=str(data_dir))
+        html = b"""<div data-component-type="s-search-result" data-asin="B000000001">
+                   <h2><a href="/dp/B000000001"><span>Laptop</span></a></h2></div>"""
+        response = MagicMock(status_code=200, content=html)
+
+        with patch.object(scraper.session, "get", return_value=response), \
+             patch("core.tracing.TRACE_SAMPLE_RATE", 1.0), \
+             patch("core.tracing.FLAME_DIR", str(flame_dir)), \
+             patch("core.tracing.Trace.export") as export:
+            scraper.run("https://www.amazon.com/s?k=laptop")
+
+        export.assert_called_once()
+        assert not list(data_dir.glob("*.flame.txt"))
+        flames = list(flame_dir.glob("*.flame.txt"))
+        assert len(flames) == 1
+        stacks = flames[0].read_text(encoding="utf-8")
+        assert "amazon.run;fetch" in stacks
+        assert "amazon.run;parse" in stacks
+        assert "amazon.run;save" in stacks
+
+    def test_runs_untraced_by_default(self, tmp_path):
+        """Test runs are not traced unless sampled / 测试默认不追踪"""
+        scraper = AmazonScraper(data_dir=str(tmp_path))
+        response = MagicMock(status_code=200, content=b"<html></html>")
+
+        with patch.object(scraper.session, "get", return_value=response), \
+             patch("core.tracing.TRACE_SAMPLE_RATE", 0.0), \
+             patch("core.tracing.Trace.export") as export:
+            scraper.run("https://www.amazon.com/s?k=laptop")
+
+        export.assert_not_called()
+
+    def test_flame_summary_path(self, tmp_path):
+        """Test summary path derivation / 测试摘要路径"""
+        with patch("core.tracing.FLAME_DIR", str(tmp_path)):
+            assert flame_summary_path("data/amazon/x.json") == str(tmp_path / "x.flame.txt")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,157 @@
+"""
+Tests for materialized daily trend aggregates
+每日趋势预聚合测试
+"""
+
+import json
+
+import pytest
+
+from core.advanced_analysis import AdvancedAnalyzer
+from core.processing.data_lake import DataLake
+from core.processing.trend_aggregates import TrendAggregates
+from core.smart_analysis import SmartAnalysisEngine
+
+
+def _batch(reviews_a="10", reviews_b="5"):
+    return [
+        {"product_key": "a", "brand": "Acme", "category": "Lamps", "price": "$10.00",
+         "rating": "4.6", "review_count": reviews_a},
+        {"product_key": "b", "brand": "Acme", "category": "Lamps", "price": "$30.00",
+         "rating": "3.0", "review_count": reviews_b},
+        {"product_key": "c", "brand": "", "category": "Desks", "price": "n/a", "rating": "1.2"},
+    ]
+
+
+@pytest.fixture
+def aggregates():
+    """Two days of amazon batches / 两天的 amazon 批次"""
+    aggregates = TrendAggregates(path=None)
+    aggregates.ingest(_batch(), platform="amazon", day="2024-05-01", batch_id="b1")
+    aggregates.ingest(_batch("25", "5"), platform="amazon", day="2024-05-02", batch_id="b2")
+    return aggregates
+
+
+class TestTrendAggregates:
+    """Test TrendAggregates class / 测试 TrendAggregates 类"""
+
+    def test_ingest_is_idempotent_per_batch(self, aggregates):
+        """Test replaying a batch id is skipped / 测试重复批次被跳过"""
+        before = aggregates.summary()
+        assert aggregates.ingest(_batch("99"), platform="amazon", day="2024-05-02", batch_id="b2") == 0
+        assert aggregates.summary() == before
+        assert before["products"] == 6
+
+    def test_review_deltas_and_new_products(self, aggregates):
+        """Test review growth and first-seen products per day / 测试评论增长与新商品"""
+        daily = aggregates.query("day").set_index("day")
+        assert daily.loc["2024-05-01", "new_products"] == 3
+        assert daily.loc["2024-05-02", "new_products"] == 0
+        assert daily.loc["2024-05-01", "review_delta"] == 0
+        assert daily.loc["2024-05-02", "review_delta"] == 15
+
+    def test_rating_histogram(self, aggregates):
+        """Test ratings land in 1-5 star buckets / 测试评分直方图"""
+        summary = aggregates.summary(since="2024-05-01", until="2024-05-01")
+        assert [summary[f"rating_{star}"] for star in range(1, 6)] == [1, 0, 1, 0, 1]
+        assert summary["rating_mean"] == pytest.approx((4.6 + 3.0 + 1.2) / 3)
+
+    def test_query_groups_and_statistics(self, aggregates):
+        """Test grouping, filters and derived statistics / 测试分组、过滤与派生统计"""
+        brands = aggregates.query("brand").set_index("brand")
+        assert brands.loc["Unknown", "products"] == 2
+        lamps = aggregates.summary(category="Lamps", until="2024-05-01")
+        assert lamps["price_mean"] == pytest.approx(20.0)
+        assert lamps["price_std"] == pytest.approx(14.1421356)
+        assert (lamps["price_min"], lamps["price_max"]) == (10.0, 30.0)
+        assert aggregates.summary(platform="ebay") == {}
+
+    def test_save_load_round_trip(self, aggregates, tmp_path):
+        """Test persistence keeps rows, review baselines and batch ids / 测试持久化往返"""
+        path = str(tmp_path / "aggregates.json")
+        assert aggregates.save(path)
+        restored = TrendAggregates(path=path)
+        assert restored.load()
+        assert restored.summary() == aggregates.summary()
+        assert restored.ingest(_batch(), platform="amazon", batch_id="b1") == 0
+        restored.ingest(_batch("30", "5"), platform="amazon", day="2024-05-03", batch_id="b3")
+        assert restored.summary(since="2024-05-03")["review_delta"] == 5
+
+    def test_save_merges_concurrent_writers(self, tmp_path):
+        """Test two writers on one file keep each other's batches / 测试多个写入者合并而非覆盖"""
+        path = str(tmp_path / "aggregates.json")
+        first, second = TrendAggregates(path=path), TrendAggregates(path=path)
+        first.ingest(_batch(), platform="amazon", day="2024-05-01", batch_id="b1")
+        second.ingest(_batch(), platform="ebay", day="2024-05-01", batch_id="b2")
+        second.ingest(_batch(), platform="amazon", day="2024-05-01", batch_id="b1")
+        assert first.save() and second.save()
+        reader = TrendAggregates(path=path)
+        assert reader.summary()["products"] == 6
+        assert set(reader.query("platform")["platform"]) == {"amazon", "ebay"}
+
+    def test_reads_reload_changed_file(self, tmp_path):
+        """Test readers pick up batches saved by another process / 测试读取时重新加载文件"""
+        path = str(tmp_path / "aggregates.json")
+        reader, writer = TrendAggregates(path=path), TrendAggregates(path=path)
+        assert reader.summary() == {}
+        writer.ingest(_batch(), platform="amazon", day="2024-05-01", batch_id="b1")
+        writer.save()
+        assert reader.summary()["products"] == 3
+        assert reader.summary(platform=["amazon", "ebay"])["products"] == 3
+
+    def test_ingest_lake_backfills_once(self, tmp_path):
+        """Test data lake backfill skips ingested partitions / 测试数据湖回填仅一次"""
+        amazon = tmp_path / "amazon"
+        amazon.mkdir()
+        (amazon / "amazon_products_20240501_100000.json").write_text(json.dumps({
+            "platform": "amazon",
+            "items": [{"brand": "Acme", "title": "Lamp", "price": "$10.00"},
+                      {"brand": "Bolt", "title": "Desk", "price": "$30.00"}],
+            "scraped_at": "2024-05-01T10:00:00+00:00",
+        }), encoding="utf-8")
+        lake = DataLake(str(tmp_path), chunk_size=1)
+        aggregates = TrendAggregates(path=None)
+        assert aggregates.ingest_lake(lake) == 2
+        assert aggregates.ingest_lake(lake) == 0
+        daily = aggregates.query("day")
+        assert list(daily["day"]) == ["2024-05-01"]
+        assert daily["price_sum"].iloc[0] == 40.0
+
+
+class TestAggregateAnalyses:
+    """Test analyzers reading aggregates / 测试基于预聚合的分析"""
+
+    def test_advanced_analyzer(self, aggregates, tmp_path):
+        """Test AdvancedAnalyzer trend summary / 测试高级分析器趋势汇总"""
+        analyzer = AdvancedAnalyzer(output_dir=str(tmp_path))
+        trends = analyzer.analyze_trend_aggregates(aggregates)
+        assert trends["price_trends"]["range"] == [10.0, 30.0]
+        assert trends["rating_trends"]["distribution"]["5_stars"] == 2
+        assert trends["review_trends"]["review_growth"] == 15
+        assert len(trends["daily"]) == 2
+        assert analyzer.analyze_trend_aggregates(aggregates, platform="ebay") == {}
+
+    def test_market_trends_without_products(self, aggregates, tmp_path):
+        """Test analyze_market_trends reads aggregates when no products are given / 测试无商品时读取预聚合"""
+        analyzer = AdvancedAnalyzer(output_dir=str(tmp_path))
+        trends = analyzer.analyze_market_trends(aggregates=aggregates, platform="amazon")
+        assert trends["review_trends"]["review_growth"] == 15
+
+    def test_market_data_uses_aggregates_for_scraped_platforms(self, aggregates):
+        """Test trending and lifecycle read aggregates for known platforms / 测试已采集平台读取预聚合"""
+        engine = SmartAnalysisEngine(aggregates=aggregates)
+        products = [{"platform": "amazon", "brand": "Other", "title": "Desk lamp", "rating": "4.9"}]
+        analysis = engine.analyze_market_data(products)
+        assert analysis["trending_products"]["top_brands"] == [("Acme", 4)]
+        assert ("lamp", 1) in analysis["trending_products"]["popular_keywords"]
+        assert analysis["lifecycle_analysis"]["review_growth"] == 15
+        unknown = engine.analyze_market_data([dict(products[0], platform="ebay")])
+        assert unknown["trending_products"]["top_brands"] == [("Other", 1)]
+
+    def test_smart_analysis(self, aggregates):
+        """Test SmartAnalysisEngine trending and lifecycle / 测试智能分析热销与生命周期"""
+        result = SmartAnalysisEngine().analyze_trends_from_aggregates(aggregates)
+        assert result["trending_products"]["top_brands"] == [("Acme", 4)]
+        assert result["trending_products"]["top_categories"][0] == ("Lamps", 4)
+        assert result["lifecycle_analysis"]["review_sentiment"] == "negative"
+        assert result["daily_review_growth"] == {"2024-05-01": 0, "2024-05-02": 15}
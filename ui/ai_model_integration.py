@@ -388,6 +388,29 @@ def render_test_model(manager: AIModelManager):
         st.warning("暂无已启用的AI模型，请先添加并启用模型")
         return
     
+    # 并发测速所有模型，路由按实测延迟选择
+    if st.button("⚡ 并发测速全部模型", use_container_width=True):
+        with st.spinner("正在并发测速所有已启用的模型..."):
+            results = manager.benchmark_models()
+        if results:
+            st.dataframe([
+                {
+                    '模型': manager.get_model(model_id).get('model_name', 'N/A'),
+                    '健康': '✅' if stats['healthy'] else '❌',
+                    '成功率': f"{stats['success_rate']:.0%}",
+                    'p50延迟(秒)': round(stats.get('latency_p50', 0), 3),
+                    'p95延迟(秒)': round(stats.get('latency_p95', 0), 3),
+                    'tokens/s': round(stats['tokens_per_second'], 1) if stats['tokens_per_second'] else None,
+                }
+                for model_id, stats in results.items()
+            ], use_container_width=True)
+        else:
+            st.warning("没有可测速的模型（仅支持 OpenAI / Azure OpenAI / Anthropic）")
+    
+    fastest = manager.get_fastest_model()
+    if fastest:
+        st.caption(f"当前最快的健康模型: {fastest.get('provider_name', 'N/A')} - {fastest.get('model_name', 'N/A')}")
+    
     # 选择要测试的模型
     model_options = {
         f"{m.get('provider_name', 'N/A')} - {m.get('model_name', 'N/A')}": m['id']
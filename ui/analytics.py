@@ -12,6 +12,86 @@ import json
 from core.processing.anomaly_detector import detect_anomalies
 from core.collectors.market_collector import fetch_all_trends, get_all_sources
 from core.smart_analysis import SmartAnalysisEngine, analyze_product_data
+from core.processing.data_lake import get_data_lake
+from core.processing.trend_aggregates import get_trend_aggregates
+
+
+def render_history_analysis():
+    """Renders aggregates over all historical scrape outputs (out-of-core)."""
+    lake = get_data_lake()
+    platforms = lake.platforms()
+    if not platforms:
+        st.warning("data/ 目录下暂无采集数据，请先运行爬虫")
+        return
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        selected = st.multiselect("平台", platforms, default=platforms, key="history_platforms")
+    with col2:
+        date_range = st.date_input("采集日期范围", value=(), key="history_dates")
+    since = date_range[0] if len(date_range) > 0 else None
+    until = date_range[1] if len(date_range) > 1 else since
+    
+    if not st.button("📈 分析历史数据", type="primary"):
+        return
+    
+    with st.spinner("正在分块聚合历史数据..."):
+        engine = SmartAnalysisEngine()
+        analysis = engine.analyze_history(lake, platforms=selected, since=since, until=until)
+        # 回填尚未并入每日预聚合的历史文件 / Backfill history files not yet in the daily aggregates
+        aggregates = get_trend_aggregates()
+        if aggregates.ingest_lake(lake, selected):
+            aggregates.save()
+        trend_view = engine.analyze_trends_from_aggregates(aggregates, platform=selected, since=since, until=until)
+    
+    stats = analysis.get('basic_stats', {})
+    if 'error' in stats:
+        st.warning("所选范围内没有数据")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("产品总数", f"{stats['total_products']:,}")
+    with col2:
+        st.metric("平均价格", f"${stats['price_range']['average']:.2f}")
+    with col3:
+        st.metric("平均评分", f"{stats['rating_stats']['average']:.2f}⭐")
+    with col4:
+        st.metric("总评论数", f"{stats['review_stats']['total']:,}")
+    
+    trends = pd.DataFrame(analysis.get('daily_trends', []))
+    if not trends.empty:
+        st.markdown("### 📈 每日趋势")
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=trends['day'], y=trends['price_mean'], name="平均价格", mode='lines+markers'))
+        fig.add_trace(go.Bar(x=trends['day'], y=trends['products'], name="产品数", yaxis='y2', opacity=0.4))
+        fig.update_layout(yaxis=dict(title="平均价格"),
+                          yaxis2=dict(title="产品数", overlaying='y', side='right'),
+                          height=400)
+        st.plotly_chart(fig, use_container_width=True)
+    
+    brands = analysis.get('competition_analysis', {}).get('main_brands', [])
+    if brands:
+        st.markdown("### 🏆 主要品牌")
+        st.dataframe(pd.DataFrame(brands), use_container_width=True)
+    
+    if 'error' not in trend_view:
+        st.markdown("### 🔄 生命周期与评论增长")
+        lifecycle = trend_view['lifecycle_analysis']
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("生命周期阶段", lifecycle['estimated_lifecycle_stage'])
+        with col2:
+            st.metric("新增产品", f"{lifecycle['new_products']:,}")
+        with col3:
+            st.metric("评论增长", f"{lifecycle['review_growth']:,}")
+        growth = trend_view['daily_review_growth']
+        if growth:
+            st.bar_chart(pd.Series(growth, name="评论增长"))
+        categories = trend_view['trending_products']['top_categories']
+        if categories:
+            st.dataframe(pd.DataFrame(categories, columns=["类别", "产品数"]), use_container_width=True)
+
 
 def render_analytics():
     """Renders the analytics page with OpenAI-enhanced analysis and real data."""
@@ -119,7 +199,7 @@ def render_analytics():
             # 用中文显示类别
             category = st.selectbox("选择类别", ["电子产品", "家居厨房", "时尚服饰", "运动户外", "图书文具", "食品饮料", "美妆护肤", "母婴用品"])
         with col3:
-            data_source = st.selectbox("数据源", ["最近采集数据", "上传JSON文件", "上传的文档"])
+            data_source = st.selectbox("数据源", ["最近采集数据", "历史采集数据（全部）", "上传JSON文件", "上传的文档"])
         
         # 加载或上传数据
         product_data = None
@@ -134,7 +214,7 @@ def render_analytics():
                     st.success(f"已加载 {len(product_data)} 个产品数据")
                 except Exception as e:
                     st.error(f"加载数据失败: {e}")
-        else:
+        elif data_source != "历史采集数据（全部）":
             # 尝试加载最近的Amazon数据
             data_dir = "data/amazon"
             if os.path.exists(data_dir):
@@ -152,7 +232,9 @@ def render_analytics():
                     except Exception as e:
                         st.warning(f"加载最近数据失败: {e}")
         
-        if st.button("🚀 开始智能分析", type="primary"):
+        if data_source == "历史采集数据（全部）":
+            render_history_analysis()
+        elif st.button("🚀 开始智能分析", type="primary"):
             if not product_data:
                 st.error("请先加载或上传产品数据")
             else:
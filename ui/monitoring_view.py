@@ -8,9 +8,12 @@ Real-time monitoring interface using Streamlit
 
 import streamlit as st
 import pandas as pd
+import plotly.express as px
 import time
 from datetime import datetime
 from core.monitoring import get_monitoring_dashboard
+from core.sampling_profiler import get_profiler
+from scrapers.selector_stats import get_selector_stats
 from core.i18n import t
 
 
@@ -51,6 +54,8 @@ def render_monitoring_page():
         platform_stats = data["platform_stats"]
         recent_requests = data["recent_requests"]
         recent_errors = data["recent_errors"]
+        time_series = data.get("time_series", {})
+        quality_stats = data.get("quality_stats", {})
         alerts = data["alerts"]
     except Exception as e:
         st.error(f"获取数据失败 / Failed to get data: {e}")
@@ -124,6 +129,23 @@ def render_monitoring_page():
             value=f"{current_stats['requests_per_minute']:.1f}"
         )
     
+    # === Trends / 趋势 ===
+    if time_series and sum(time_series.get("requests", [])) > 0:
+        st.divider()
+        st.subheader("📉 趋势 / Trends")
+        
+        trend_df = pd.DataFrame({
+            "请求 / Requests": time_series["requests"],
+            "失败 / Failed": time_series["failed"],
+            "平均响应时间 / Avg Response Time (s)": time_series["avg_response_time"]
+        }, index=pd.to_datetime(time_series["timestamps"], unit="s"))
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.line_chart(trend_df[["请求 / Requests", "失败 / Failed"]])
+        with col2:
+            st.line_chart(trend_df[["平均响应时间 / Avg Response Time (s)"]])
+    
     # === Platform Statistics / 平台统计 ===
     if platform_stats:
         st.divider()
@@ -143,6 +165,30 @@ def render_monitoring_page():
         
         st.dataframe(platform_df, use_container_width=True, hide_index=True)
     
+    # === Data Quality / 数据质量 ===
+    if quality_stats:
+        st.divider()
+        st.subheader("🧪 数据质量 / Data Quality")
+        
+        quality_df = pd.DataFrame([
+            {
+                "来源 / Source": source,
+                "输入 / Input": metrics["input_count"],
+                "无效率 / Invalid Rate": f"{metrics['invalid_rate'] * 100:.1f}%",
+                "重复率 / Duplicate Rate": f"{metrics['duplicate_rate'] * 100:.1f}%",
+                "质量分数 / Quality Score": f"{metrics['quality_score'] * 100:.1f}%"
+            }
+            for source, metrics in quality_stats.items()
+        ])
+        
+        st.dataframe(quality_df, use_container_width=True, hide_index=True)
+        
+        for source, metrics in quality_stats.items():
+            completeness = metrics.get("field_completeness", {})
+            if completeness:
+                with st.expander(f"字段完整度 / Field Completeness - {source}"):
+                    st.bar_chart(pd.Series(completeness, name="completeness"))
+    
     # === Alerts / 警报 ===
     if alerts:
         st.divider()
@@ -198,6 +244,79 @@ def render_monitoring_page():
         
         st.dataframe(errors_df, use_container_width=True, hide_index=True)
     
+    # === Selector Heatmap / 选择器命中热力图 ===
+    st.divider()
+    st.subheader("🗺️ 选择器命中 / Selector Hits")
+    
+    selector_stats = get_selector_stats()
+    selector_platforms = selector_stats.platforms()
+    if selector_platforms:
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            heatmap_platform = st.selectbox("平台 / Platform", selector_platforms, key="selector_platform")
+        with col2:
+            heatmap_days = st.slider("天数 / Days", 1, 30, 14, key="selector_days")
+        
+        selector_df = pd.DataFrame(selector_stats.rows(heatmap_platform, heatmap_days))
+        if not selector_df.empty:
+            selector_df["selector_label"] = selector_df["slot"] + " · " + selector_df["selector"]
+            heatmap = selector_df.pivot_table(index="selector_label", columns="day", values="hits",
+                                              aggfunc="sum", fill_value=0)
+            fig = px.imshow(heatmap, aspect="auto", color_continuous_scale="YlOrRd",
+                            labels={"x": "日期 / Day", "y": "选择器 / Selector", "color": "命中 / Hits"})
+            st.plotly_chart(fig, use_container_width=True)
+            
+            list_df = selector_df[selector_df["slot"] == "list"]
+            if not list_df.empty:
+                summary = list_df.groupby("selector")[["hits", "items"]].sum()
+                summary["avg_items"] = summary["items"] / summary["hits"]
+                st.dataframe(
+                    summary.reset_index().rename(columns={
+                        "selector": "列表选择器 / List Selector",
+                        "hits": "命中 / Hits",
+                        "items": "商品 / Items",
+                        "avg_items": "每次命中商品数 / Items per Hit"
+                    }),
+                    use_container_width=True, hide_index=True
+                )
+    else:
+        st.info("暂无选择器命中数据 / No selector hits recorded yet")
+    
+    # === Hot Functions / 热点函数 ===
+    st.divider()
+    st.subheader("🔥 热点函数 / Hot Functions")
+    
+    profiler = get_profiler()
+    col1, col2, col3 = st.columns([1, 1, 2])
+    
+    with col1:
+        if st.button("⏹️ 停止采样 / Stop Profiling" if profiler.running else "▶️ 开始采样 / Start Profiling"):
+            profiler.toggle()
+            st.rerun()
+    
+    with col2:
+        if st.button("💾 导出折叠栈 / Export Stacks"):
+            path = profiler.dump()
+            if path:
+                st.success(f"已保存 / Saved: {path}")
+    
+    with col3:
+        st.caption(f"采样数 / Samples: {profiler.sample_count} · "
+                   f"状态 / Status: {'运行中 / running' if profiler.running else '已停止 / stopped'}")
+    
+    hot_functions = profiler.top_functions(15)
+    if hot_functions:
+        hot_df = pd.DataFrame([
+            {
+                "函数 / Function": row["function"],
+                "自身 / Self %": f"{row['self_pct']:.1f}%",
+                "累计 / Total %": f"{row['total_pct']:.1f}%",
+                "自身采样 / Self Samples": row["self"]
+            }
+            for row in hot_functions
+        ])
+        st.dataframe(hot_df, use_container_width=True, hide_index=True)
+    
     # === System Info / 系统信息 ===
     st.divider()
     st.subheader("ℹ️ 系统信息 / System Info")
@@ -222,6 +341,7 @@ def render_monitoring_page():
         - 错误率 > 10% 触发警告 / Error rate > 10% triggers warning
         - 验证码率 > 5% 触发警告 / Captcha rate > 5% triggers warning
         - 平均响应时间 > 10秒 触发提示 / Avg response time > 10s triggers info
+        - 无效数据比例 > 20% 触发警告 / Invalid record rate > 20% triggers warning
     """)
 
 